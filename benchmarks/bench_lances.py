@@ -0,0 +1,90 @@
+"""
+Mede o custo de CPU por lance em três caminhos de gravação:
+
+- orm:    adicionar_lance (add + commit com sessão padrão)
+- rapido: adicionar_lance_rapido (INSERT condicional do Core, expire_on_commit=False)
+- lote:   adicionar_lances_em_lote (executemany do mesmo INSERT)
+
+Os lances vão todos para o mesmo leilão, então cada um encontra mais lances já
+gravados. O caminho orm relê leilao.lances depois de cada commit (a sessão
+padrão expira o leilão), o que custa O(lances existentes): o custo é medido em
+--faixas faixas consecutivas de lances e a economia compara só a primeira, com
+o leilão quase vazio, para ser uma comparação do caminho de gravação.
+
+Uso: python -m benchmarks.bench_lances [--lances N] [--tamanho-lote N] [--faixas N]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from benchmarks.comum import criar_sessao, popular
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+
+
+def _lances(quantidade: int, inicio: int = 0):
+    agora = datetime.now()
+    return [Lance(1000.0 + i, i % 2 + 1, 1, agora) for i in range(inicio, inicio + quantidade)]
+
+
+def executar(lances: int = 2000, tamanho_lote: int = 500, faixas: int = 4) -> dict:
+    if faixas <= 0 or lances % faixas:
+        raise ValueError("O número de lances deve ser múltiplo (positivo) do número de faixas")
+    caminhos = {
+        "orm": ({}, lambda g, ls: [g.adicionar_lance(1, l) for l in ls]),
+        "rapido": ({"expire_on_commit": False}, lambda g, ls: [g.adicionar_lance_rapido(1, l) for l in ls]),
+        "lote": ({"expire_on_commit": False}, lambda g, ls: [
+            g.adicionar_lances_em_lote(1, ls[i:i + tamanho_lote]) for i in range(0, len(ls), tamanho_lote)
+        ]),
+    }
+    por_faixa = lances // faixas
+    resultados = {}
+    for nome, (opcoes, gravar) in caminhos.items():
+        db = criar_sessao(**opcoes)
+        popular(db, leiloes=1)
+        gerenciador = GerenciadorLeiloes(db)
+        gerenciador.encontrar_leilao_por_id(1)
+        dados = _lances(lances)
+
+        medidas, cpu_total, tempo_total = [], 0.0, 0.0
+        for existentes in range(0, lances, por_faixa):
+            inicio_cpu, inicio = time.process_time(), time.perf_counter()
+            gravar(gerenciador, dados[existentes:existentes + por_faixa])
+            cpu, total = time.process_time() - inicio_cpu, time.perf_counter() - inicio
+            cpu_total, tempo_total = cpu_total + cpu, tempo_total + total
+            medidas.append({"lances_existentes": existentes, "cpu_us_por_lance": round(cpu / por_faixa * 1e6, 1)})
+        resultados[nome] = {
+            "lances": lances,
+            "cpu_us_por_lance": round(cpu_total / lances * 1e6, 1),
+            "lances_por_segundo": round(lances / tempo_total),
+            "faixas": medidas,
+        }
+        db.close()
+
+    # Primeira faixa: leilão quase vazio, sem o custo de reler os lances existentes
+    base = resultados["orm"]["faixas"][0]["cpu_us_por_lance"]
+    for r in resultados.values():
+        r["economia_cpu"] = f"{(1 - r['faixas'][0]['cpu_us_por_lance'] / base) * 100:.0f}%"
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lances", type=int, default=2000)
+    parser.add_argument("--tamanho-lote", type=int, default=500)
+    parser.add_argument("--faixas", type=int, default=4)
+    args = parser.parse_args()
+
+    resultados = executar(args.lances, args.tamanho_lote, args.faixas)
+    existentes = [f["lances_existentes"] for f in next(iter(resultados.values()))["faixas"]]
+    print("CPU µs/lance por número de lances já existentes no leilão")
+    print(f"{'caminho':<10}" + "".join(f"{n:>10,}" for n in existentes) + f"{'lances/s':>12}{'economia':>10}")
+    for nome, r in resultados.items():
+        print(f"{nome:<10}" + "".join(f"{f['cpu_us_por_lance']:>10,}" for f in r["faixas"])
+              + f"{r['lances_por_segundo']:>12,}{r['economia_cpu']:>10}")
+    print("\neconomia: em relação ao orm na primeira faixa (leilão quase vazio); o orm relê")
+    print("leilao.lances a cada lance, então o custo dele cresce com os lances existentes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compara a listagem com objetos do ORM (listar_leiloes) com os modelos de
+leitura leves (listar_leiloes_resumo): linhas por segundo e bytes por linha.
+
+Uso: python -m benchmarks.bench_leituras [--leiloes N] [--lances N]
+"""
+import argparse
+
+from benchmarks.comum import criar_sessao, cronometrar, medir_memoria, popular
+from models.gerenciador_leiloes import GerenciadorLeiloes
+
+
+def executar(leiloes: int = 20000, lances_por_leilao: int = 3, repeticoes: int = 5) -> dict:
+    db = criar_sessao()
+    popular(db, leiloes, lances_por_leilao)
+    gerenciador = GerenciadorLeiloes(db)
+
+    def via_orm():
+        return gerenciador.listar_leiloes()
+
+    # Para exibir o preço atual o caminho do ORM ainda carrega os lances de cada leilão
+    def via_orm_com_preco():
+        return [(l, l.maior_lance) for l in gerenciador.listar_leiloes()]
+
+    def via_resumo():
+        return gerenciador.listar_leiloes_resumo()
+
+    resultados = {}
+    for nome, funcao in [("orm", via_orm), ("orm_com_preco", via_orm_com_preco), ("resumo", via_resumo)]:
+        def isolado():
+            db.expunge_all()  # evita que o identity map reaproveite objetos entre execuções
+            return funcao()
+        tempo = cronometrar(isolado, repeticoes)
+        db.expunge_all()
+        linhas, bytes_alocados = medir_memoria(funcao)
+        resultados[nome] = {
+            "linhas": len(linhas),
+            "linhas_por_segundo": round(len(linhas) / tempo),
+            "bytes_por_linha": round(bytes_alocados / len(linhas)),
+        }
+        del linhas
+    db.close()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leiloes", type=int, default=20000)
+    parser.add_argument("--lances", type=int, default=3, help="lances por leilão")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    resultados = executar(args.leiloes, args.lances, args.repeticoes)
+    print(f"{'caminho':<15}{'linhas/s':>14}{'bytes/linha':>14}")
+    for nome, r in resultados.items():
+        print(f"{nome:<15}{r['linhas_por_segundo']:>14,}{r['bytes_por_linha']:>14,}")
+
+
+if __name__ == "__main__":
+    main()
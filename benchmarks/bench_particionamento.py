@@ -0,0 +1,126 @@
+"""
+Vazão de gravação de lances com os leilões particionados em N arquivos SQLite
+(models.database.RoteadorShards), para N = --shards.
+
+- direto:   --clientes threads chamando adicionar_lance_rapido, cada uma com
+            uma sessão por shard; os escritores de arquivos diferentes não
+            disputam o mesmo lock
+- executor: os mesmos lances pelo ExecutorShards, um escritor por arquivo
+            (--processos: um processo por arquivo)
+
+Cada leilão recebe lances crescentes de dois participantes alternados, então
+todos são aceitos e a vazão compara só o custo de gravação.
+
+Uso: python -m benchmarks.bench_particionamento [--shards 1 2 4 8] [--modo direto|executor] [--processos]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Sequence
+
+from models.database import RoteadorShards
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.gerenciador_shards import GerenciadorShards
+from models.lance import Lance
+from models.leilao import Leilao
+from models.participante import Participante
+from services.shards import ExecutorShards
+
+MODOS = ("direto", "executor")
+
+
+def _preparar(pasta: str, shards: int, leiloes: int) -> RoteadorShards:
+    roteador = RoteadorShards(os.path.join(pasta, f"catalogo{shards}.db"),
+                              [os.path.join(pasta, f"shards{shards}_{i}.db") for i in range(shards)])
+    roteador.criar_tabelas()
+    sistema = GerenciadorShards(roteador)
+    for i in (1, 2):
+        sistema.adicionar_participante(Participante(f"{i}{i}{i}.{i}{i}{i}.{i}{i}{i}-{i}{i}", f"Participante {i}",
+                                                    f"p{i}@bench.com", datetime(1990, 1, 1)))
+    agora = datetime.now()
+    for i in range(leiloes):
+        leilao = sistema.adicionar_leilao(Leilao(f"Leilão {i}", 100.0, agora, agora + timedelta(days=1)))
+        sistema.abrir_leilao(leilao.id, agora)
+    sistema.fechar()
+    return roteador
+
+
+def _lances(leiloes: int, lances_por_leilao: int) -> List[Lance]:
+    agora = datetime.now()
+    return [Lance(100.0 + n, n % 2 + 1, leilao_id, agora)
+            for n in range(lances_por_leilao) for leilao_id in range(1, leiloes + 1)]
+
+
+def _direto(roteador: RoteadorShards, lances: List[Lance], clientes: int) -> float:
+    # Cada cliente fica com os leilões de mesmo resto: a ordem dentro de um leilão é mantida
+    por_cliente = [[lance for lance in lances if lance.leilao_id % clientes == indice] for indice in range(clientes)]
+
+    def cliente(indice: int):
+        gerenciadores = [GerenciadorLeiloes(roteador.sessao(shard)) for shard in range(roteador.shards)]
+        for lance in por_cliente[indice]:
+            gerenciadores[roteador.shard_do_leilao(lance.leilao_id)].adicionar_lance_rapido(lance.leilao_id, lance)
+        for gerenciador in gerenciadores:
+            gerenciador.db.close()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(clientes) as executor:
+        list(executor.map(cliente, range(clientes)))
+    return len(lances) / (time.perf_counter() - inicio)
+
+
+def _executor(roteador: RoteadorShards, lances: List[Lance], processos: bool) -> float:
+    executor = ExecutorShards(roteador.criar_gerenciador(), shards=roteador.shards,
+                              particao=roteador.shard_do_leilao, processos=processos).iniciar()
+    # Aquecimento: espera o gerenciador de cada shard (e os processos) estar pronto
+    for leilao_id in range(1, roteador.shards + 1):
+        executor.executar(leilao_id, GerenciadorLeiloes.listar_leiloes).result()
+
+    inicio = time.perf_counter()
+    futuros = [executor.enviar(lance.leilao_id, lance) for lance in lances]
+    for futuro in futuros:
+        futuro.result()
+    vazao = len(lances) / (time.perf_counter() - inicio)
+    executor.encerrar()
+    return vazao
+
+
+def executar(shards: Sequence[int] = (1, 2, 4, 8), modo: str = "direto", leiloes: int = 64,
+             lances_por_leilao: int = 100, clientes: int = 16, processos: bool = False) -> dict:
+    if modo not in MODOS:
+        raise ValueError(f"Modo deve ser um de {MODOS}")
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        for quantidade in shards:
+            roteador = _preparar(pasta, quantidade, leiloes)
+            lances = _lances(leiloes, lances_por_leilao)
+            vazao = (_direto(roteador, lances, clientes) if modo == "direto"
+                     else _executor(roteador, lances, processos))
+            roteador.fechar()
+            resultados[quantidade] = round(vazao)
+    base = resultados[shards[0]] / shards[0]
+    return {quantidade: {"lances_por_segundo": vazao, "escala": round(vazao / base, 2)}
+            for quantidade, vazao in resultados.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--modo", choices=MODOS, default="direto")
+    parser.add_argument("--leiloes", type=int, default=64)
+    parser.add_argument("--lances-por-leilao", type=int, default=100)
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--processos", action="store_true")
+    args = parser.parse_args()
+
+    resultados = executar(args.shards, args.modo, args.leiloes, args.lances_por_leilao, args.clientes,
+                          args.processos)
+    print(f"{'shards':<8}{'lances/s':>12}{'escala':>10}")
+    for quantidade, r in resultados.items():
+        print(f"{quantidade:<8}{r['lances_por_segundo']:>12,}{r['escala']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compara a vazão de gravação de lances com escritores concorrentes e com o
+ExecutorShards (services.shards).
+
+- direto:   --clientes threads, cada uma com a própria sessão, chamando
+            adicionar_lance_rapido em um único arquivo em WAL (os escritores se
+            ordenam pelo lock do SQLite)
+- shards N: os mesmos lances enviados ao ExecutorShards com N shards, um
+            arquivo por shard (--processos: um processo por shard)
+
+Cada leilão recebe lances crescentes de dois participantes alternados, então
+todos são aceitos e a vazão compara só o custo de gravação.
+
+Uso: python -m benchmarks.bench_shards [--leiloes 64] [--lances-por-leilao 200] [--shards 1 2 4] [--processos]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Sequence
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.comum import popular
+from models.base import Base
+from models.database import criar_engine_wal
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from services.shards import ExecutorShards, GerenciadorPorArquivo
+
+
+def _preparar(caminhos: List[str], leiloes: int):
+    for caminho in caminhos:
+        engine = criar_engine_wal(caminho)
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as db:
+            popular(db, leiloes=leiloes)
+        engine.dispose()
+
+
+def _lances(leiloes: int, lances_por_leilao: int) -> List[Lance]:
+    agora = datetime.now()
+    return [Lance(100.0 + n, n % 2 + 1, leilao_id, agora)
+            for n in range(lances_por_leilao) for leilao_id in range(1, leiloes + 1)]
+
+
+def _direto(pasta: str, leiloes: int, lances_por_leilao: int, clientes: int) -> float:
+    caminho = os.path.join(pasta, "direto.db")
+    _preparar([caminho], leiloes)
+    criar = GerenciadorPorArquivo([caminho])
+    lances = _lances(leiloes, lances_por_leilao)
+    # Cada cliente fica com os leilões de mesmo resto: a ordem dentro de um leilão é mantida
+    por_cliente = [[lance for lance in lances if lance.leilao_id % clientes == indice] for indice in range(clientes)]
+
+    def cliente(indice: int):
+        gerenciador = criar(indice)
+        for lance in por_cliente[indice]:
+            gerenciador.adicionar_lance_rapido(lance.leilao_id, lance)
+        gerenciador.db.close()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(clientes) as executor:
+        list(executor.map(cliente, range(clientes)))
+    return len(lances) / (time.perf_counter() - inicio)
+
+
+def _shards(pasta: str, leiloes: int, lances_por_leilao: int, shards: int, processos: bool) -> float:
+    caminhos = [os.path.join(pasta, f"shards{shards}_{i}.db") for i in range(shards)]
+    _preparar(caminhos, leiloes)
+    executor = ExecutorShards(GerenciadorPorArquivo(caminhos), shards=shards, processos=processos).iniciar()
+    # Aquecimento: espera o gerenciador de cada shard (e os processos) estar pronto
+    for indice in range(shards):
+        executor.executar(indice, GerenciadorLeiloes.listar_leiloes).result()
+    lances = _lances(leiloes, lances_por_leilao)
+
+    inicio = time.perf_counter()
+    futuros = [executor.enviar(lance.leilao_id, lance) for lance in lances]
+    for futuro in futuros:
+        futuro.result()
+    vazao = len(lances) / (time.perf_counter() - inicio)
+    executor.encerrar()
+    return vazao
+
+
+def executar(leiloes: int = 64, lances_por_leilao: int = 200, clientes: int = 16,
+             shards: Sequence[int] = (1, 2, 4), processos: bool = False) -> dict:
+    with tempfile.TemporaryDirectory() as pasta:
+        resultados = {"direto": round(_direto(pasta, leiloes, lances_por_leilao, clientes))}
+        for quantidade in shards:
+            resultados[f"shards {quantidade}"] = round(
+                _shards(pasta, leiloes, lances_por_leilao, quantidade, processos))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leiloes", type=int, default=64)
+    parser.add_argument("--lances-por-leilao", type=int, default=200)
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--processos", action="store_true")
+    args = parser.parse_args()
+
+    resultados = executar(args.leiloes, args.lances_por_leilao, args.clientes, args.shards, args.processos)
+    print(f"{'caminho':<12}{'lances/s':>12}")
+    for nome, vazao in resultados.items():
+        print(f"{nome:<12}{vazao:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Gerador de carga concorrente para um leilão disputado (teste de carga/soak).
+
+Simula uma população de participantes dando lances no mesmo leilão por meio do
+GerenciadorLeiloes, usando threads, processos ou tarefas asyncio. Cada
+participante tem sua própria sessão/conexão com um arquivo SQLite. Ao final o
+relatório traz percentis de latência, motivos de recusa (regras de negócio e
+"lock timeout" do SQLite), vazão por segundo e a verificação das invariantes
+da sequência de lances gravada.
+
+O projeto não tem camada HTTP; a carga é aplicada direto no gerenciador.
+
+Com --soft-close JANELA PRORROGACAO o leilão termina JANELA segundos após a
+preparação e usa o soft-close, simulando uma disputa de último minuto: cada
+lance na janela final adia o término. A verificação reaplica a regra aos
+lances gravados e confere que nenhuma prorrogação foi perdida ou duplicada.
+
+Com --caminho fila os lances passam pelo EscritorLances (uma thread de
+gravação com fila limitada e prazo por pedido, --capacidade e --prazo): nos
+picos o excedente é recusado com "Sistema ocupado" e a latência fica limitada
+ao prazo, em vez de crescer com a espera pelo lock do SQLite.
+
+Uso: python -m benchmarks.carga --participantes 200 --duracao 30 --modo threads [--caminho rapido|fila]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.base import Base
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao
+from models.participante import Participante
+from services.leiloes_quentes import EscritorLances
+
+MODOS = ("threads", "processos", "asyncio")
+CAMINHOS = ("orm", "rapido", "fila")
+ACEITO = "aceito"
+# Pausa máxima de um participante após "Sistema ocupado", como faria um cliente
+# real; sem ela os recusados disputariam o GIL com a thread de gravação
+PAUSA_OCUPADO_S = 0.05
+
+# (instante em segundos desde o início, latência em segundos, resultado)
+Registro = Tuple[float, float, str]
+
+
+def criar_engine(caminho_banco: str, timeout_lock: float = 5.0, wal: bool = False):
+    engine = create_engine(
+        f"sqlite:///{caminho_banco}",
+        connect_args={"timeout": timeout_lock, "check_same_thread": False},
+    )
+    if wal:
+        @event.listens_for(engine, "connect")
+        def _ativar_wal(conexao_dbapi, _registro):
+            conexao_dbapi.execute("PRAGMA journal_mode=WAL")
+    return engine
+
+
+def preparar_banco(caminho_banco: str, participantes: int, lance_minimo: float = 100.0,
+                   soft_close: Optional[Tuple[int, int]] = None) -> int:
+    """
+    Cria o banco com os participantes e um leilão ABERTO; retorna o id do leilão
+
+    soft_close: (janela, prorrogação) em segundos; o leilão termina ao fim da janela
+    """
+    if os.path.exists(caminho_banco):
+        os.remove(caminho_banco)
+    engine = criar_engine(caminho_banco)
+    Base.metadata.create_all(engine)
+    agora = datetime.now()
+    janela, prorrogacao = soft_close or (None, None)
+    data_fim = agora + timedelta(seconds=janela) if soft_close else agora + timedelta(days=1)
+    with engine.begin() as conexao:
+        conexao.execute(insert(Participante.__table__), [
+            {"cpf": f"{i:011d}", "nome": f"Participante {i}", "email": f"p{i}@carga.com",
+             "data_nascimento": datetime(1990, 1, 1)}
+            for i in range(1, participantes + 1)
+        ])
+        leilao_id = conexao.execute(insert(Leilao.__table__).returning(Leilao.__table__.c.id), {
+            "nome": "Leilão disputado", "lance_minimo": lance_minimo, "estado": EstadoLeilao.ABERTO,
+            "data_inicio": agora - timedelta(hours=1), "data_fim": data_fim,
+            "janela_prorrogacao_s": janela, "prorrogacao_s": prorrogacao,
+        }).scalar()
+    engine.dispose()
+    return leilao_id
+
+
+def classificar_erro(erro: Exception) -> str:
+    """Motivo da recusa: a mensagem da regra de negócio ou o tipo de falha do banco"""
+    if isinstance(erro, ValueError):
+        return str(erro)
+    if isinstance(erro, OperationalError) and "locked" in str(erro):
+        return "lock timeout"
+    return type(erro).__name__
+
+
+class Lancador:
+    """Um participante simulado, com sessão própria, que dá lances no leilão"""
+
+    def __init__(self, engine, leilao_id: int, participante_id: int, caminho: str,
+                 inicio: float, semente: int, escritor: Optional[EscritorLances] = None):
+        self.db: Session = sessionmaker(bind=engine, autoflush=False,
+                                        expire_on_commit=(caminho == "orm"))()
+        self.gerenciador = GerenciadorLeiloes(self.db)
+        self.leilao_id = leilao_id
+        self.participante_id = participante_id
+        if escritor is not None:
+            self.adicionar = escritor.adicionar_lance
+        else:
+            self.adicionar = (self.gerenciador.adicionar_lance if caminho == "orm"
+                              else self.gerenciador.adicionar_lance_rapido)
+        self.inicio = inicio
+        self.rng = random.Random(semente)
+
+    def tentar(self) -> Registro:
+        """Lê o lance atual, cobre com um incremento aleatório e registra o resultado"""
+        comeco = None
+        try:
+            atual = self.gerenciador.obter_maior_lance(self.leilao_id)
+            valor = round(max(atual, 100.0) + self.rng.uniform(1, 10), 2)
+            lance = Lance(valor, self.participante_id, self.leilao_id, datetime.now())
+            comeco = time.perf_counter()
+            self.adicionar(self.leilao_id, lance)
+            resultado = ACEITO
+        except Exception as erro:
+            self.db.rollback()
+            resultado = classificar_erro(erro)
+        fim = time.perf_counter()
+        return (fim - self.inicio, fim - comeco if comeco else 0.0, resultado)
+
+    def pausa_apos(self, registro: Registro, pausa: float) -> float:
+        if registro[2].startswith("Sistema ocupado"):
+            pausa = max(pausa, PAUSA_OCUPADO_S)
+        return self.rng.uniform(0, pausa) if pausa else 0.0
+
+    def executar_ate(self, fim: float, pausa: float = 0.0) -> List[Registro]:
+        registros = []
+        while time.perf_counter() < fim:
+            registros.append(self.tentar())
+            espera = self.pausa_apos(registros[-1], pausa)
+            if espera:
+                time.sleep(espera)
+        self.db.close()
+        return registros
+
+
+def _rodar_processo(caminho_banco, leilao_id, participante_id, caminho, duracao, pausa,
+                    timeout_lock, wal, semente) -> List[Registro]:
+    # Em outro processo perf_counter não é comparável: o início é medido localmente
+    engine = criar_engine(caminho_banco, timeout_lock, wal)
+    inicio = time.perf_counter()
+    lancador = Lancador(engine, leilao_id, participante_id, caminho, inicio, semente)
+    registros = lancador.executar_ate(inicio + duracao, pausa)
+    engine.dispose()
+    return registros
+
+
+def executar_carga(caminho_banco: str, participantes: int = 200, duracao: float = 10.0,
+                   modo: str = "threads", caminho: str = "orm", pausa: float = 0.0,
+                   timeout_lock: float = 5.0, wal: bool = False, threads_asyncio: int = 8,
+                   semente: int = 42, soft_close: Optional[Tuple[int, int]] = None,
+                   capacidade: int = 1000, prazo_s: float = 0.25) -> Dict[str, Any]:
+    """
+    Prepara o banco, aplica a carga e retorna o relatório
+
+    Args:
+        participantes: Número de participantes simultâneos
+        duracao: Duração da carga em segundos
+        modo: 'threads', 'processos' ou 'asyncio'
+        caminho: 'orm' (adicionar_lance), 'rapido' (adicionar_lance_rapido) ou 'fila' (EscritorLances)
+        pausa: Pausa aleatória máxima entre lances de um participante (segundos)
+        timeout_lock: Espera máxima pelo lock de escrita do SQLite
+        wal: Ativa o journal_mode=WAL
+        threads_asyncio: Threads que executam as chamadas no modo asyncio
+        soft_close: (janela, prorrogação) em segundos para a disputa de último minuto
+        capacidade: Tamanho máximo da fila do escritor (caminho 'fila')
+        prazo_s: Prazo de cada pedido na fila do escritor (caminho 'fila')
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo inválido: {modo}")
+    if caminho not in CAMINHOS:
+        raise ValueError(f"Caminho inválido: {caminho}")
+    if caminho == "fila" and modo == "processos":
+        raise ValueError("O caminho fila exige o modo threads ou asyncio")
+
+    leilao_id = preparar_banco(caminho_banco, participantes, soft_close=soft_close)
+    engine = criar_engine(caminho_banco)
+    with sessionmaker(bind=engine)() as db:
+        data_fim_inicial = db.get(Leilao, leilao_id).data_fim
+    engine.dispose()
+    inicio = time.perf_counter()
+    if modo == "processos":
+        argumentos = [(caminho_banco, leilao_id, p, caminho, duracao, pausa, timeout_lock, wal, semente + p)
+                      for p in range(1, participantes + 1)]
+        with multiprocessing.Pool(participantes) as pool:
+            registros = [r for lista in pool.starmap(_rodar_processo, argumentos) for r in lista]
+    else:
+        engine = criar_engine(caminho_banco, timeout_lock, wal)
+        escritor = None
+        if caminho == "fila":
+            sessao = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+            escritor = EscritorLances(lambda: GerenciadorLeiloes(sessao()), capacidade=capacidade,
+                                      prazo_s=prazo_s).iniciar()
+        lancadores = [Lancador(engine, leilao_id, p, caminho, inicio, semente + p, escritor)
+                      for p in range(1, participantes + 1)]
+        if modo == "threads":
+            registros = _executar_threads(lancadores, inicio + duracao, pausa)
+        else:
+            registros = asyncio.run(_executar_asyncio(lancadores, inicio + duracao, pausa, threads_asyncio))
+        if escritor is not None:
+            escritor.encerrar()
+        engine.dispose()
+    duracao_real = time.perf_counter() - inicio
+
+    engine = criar_engine(caminho_banco)
+    with sessionmaker(bind=engine)() as db:
+        violacoes = verificar_invariantes(db, leilao_id, data_fim_inicial)
+    engine.dispose()
+
+    relatorio = gerar_relatorio(registros, duracao_real)
+    if soft_close:
+        engine = criar_engine(caminho_banco)
+        with sessionmaker(bind=engine)() as db:
+            relatorio["prorrogacao_total_s"] = (db.get(Leilao, leilao_id).data_fim - data_fim_inicial).total_seconds()
+        engine.dispose()
+    relatorio.update({"modo": modo, "caminho": caminho, "participantes": participantes,
+                      "violacoes": violacoes[:20], "total_violacoes": len(violacoes)})
+    return relatorio
+
+
+def _executar_threads(lancadores: List[Lancador], fim: float, pausa: float) -> List[Registro]:
+    resultados: List[List[Registro]] = [[] for _ in lancadores]
+
+    def rodar(indice: int):
+        resultados[indice] = lancadores[indice].executar_ate(fim, pausa)
+
+    threads = [threading.Thread(target=rodar, args=(i,)) for i in range(len(lancadores))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [r for lista in resultados for r in lista]
+
+
+async def _executar_asyncio(lancadores: List[Lancador], fim: float, pausa: float,
+                            threads: int) -> List[Registro]:
+    # Muitas tarefas compartilhando poucas threads, como clientes assíncronos
+    # multiplexados sobre um pool limitado de conexões
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        async def tarefa(lancador: Lancador) -> List[Registro]:
+            registros = []
+            while time.perf_counter() < fim:
+                registros.append(await loop.run_in_executor(executor, lancador.tentar))
+                espera = lancador.pausa_apos(registros[-1], pausa)
+                if espera:
+                    await asyncio.sleep(espera)
+            lancador.db.close()
+            return registros
+
+        listas = await asyncio.gather(*(tarefa(l) for l in lancadores))
+    return [r for lista in listas for r in lista]
+
+
+def percentil(valores_ordenados: List[float], p: float) -> float:
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+
+def gerar_relatorio(registros: List[Registro], duracao: float) -> Dict[str, Any]:
+    """Percentis de latência, motivos de recusa e vazão por segundo"""
+    latencias = sorted(r[1] * 1000 for r in registros)
+    latencias_aceitos = sorted(r[1] * 1000 for r in registros if r[2] == ACEITO)
+    motivos = Counter(r[2] for r in registros if r[2] != ACEITO)
+    aceitos_por_segundo = Counter(int(r[0]) for r in registros if r[2] == ACEITO)
+    segundos = range(int(duracao) + 1)
+
+    def resumo(valores):
+        return {f"p{p}": round(percentil(valores, p), 3) for p in (50, 90, 99)} | {
+            "max": round(valores[-1], 3) if valores else 0.0}
+
+    aceitos = len(latencias_aceitos)
+    return {
+        "duracao_s": round(duracao, 2),
+        "tentativas": len(registros),
+        "aceitos": aceitos,
+        "recusados": len(registros) - aceitos,
+        "aceitos_por_segundo": round(aceitos / duracao, 1) if duracao > 0 else 0.0,
+        "latencia_ms": resumo(latencias),
+        "latencia_aceitos_ms": resumo(latencias_aceitos),
+        "motivos_recusa": dict(motivos.most_common()),
+        "vazao_por_segundo": [aceitos_por_segundo.get(s, 0) for s in segundos],
+    }
+
+
+def verificar_invariantes(db: Session, leilao_id: int, data_fim_inicial: Optional[datetime] = None) -> List[str]:
+    """
+    Confere a sequência de lances gravada (na ordem de gravação): valores
+    estritamente crescentes e nenhum participante com dois lances seguidos.
+    Com data_fim_inicial e soft-close, confere também a data_fim final contra
+    as prorrogações esperadas para os lances gravados.
+    Retorna a lista de violações encontradas.
+    """
+    lances = db.execute(
+        select(Lance.id, Lance.valor, Lance.participante_id)
+        .where(Lance.leilao_id == leilao_id)
+        .order_by(Lance.id)
+    ).all()
+    violacoes = []
+    for anterior, atual in zip(lances, lances[1:]):
+        if atual.valor <= anterior.valor:
+            violacoes.append(f"Lance {atual.id} (R${atual.valor:.2f}) não supera o lance "
+                             f"{anterior.id} (R${anterior.valor:.2f})")
+        if atual.participante_id == anterior.participante_id:
+            violacoes.append(f"Lances {anterior.id} e {atual.id} consecutivos do participante "
+                             f"{atual.participante_id}")
+
+    leilao = db.get(Leilao, leilao_id)
+    if data_fim_inicial is not None and leilao.prorrogacao_s:
+        # Os lances são gravados um por vez (o SQLite tem um único escritor), então
+        # reaplicar a regra na ordem de gravação deve levar exatamente à data_fim gravada
+        janela = timedelta(seconds=leilao.janela_prorrogacao_s)
+        prorrogacao = timedelta(seconds=leilao.prorrogacao_s)
+        esperado, prorrogacoes = data_fim_inicial, 0
+        for (data_hora,) in db.execute(select(Lance.data_hora).where(Lance.leilao_id == leilao_id)
+                                       .order_by(Lance.id)):
+            if esperado - janela <= data_hora <= esperado:
+                esperado += prorrogacao
+                prorrogacoes += 1
+        if leilao.data_fim != esperado:
+            violacoes.append(f"data_fim {leilao.data_fim.isoformat()} difere da esperada "
+                             f"{esperado.isoformat()} ({prorrogacoes} prorrogações)")
+    return violacoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--participantes", type=int, default=200)
+    parser.add_argument("--duracao", type=float, default=10.0, help="segundos de carga")
+    parser.add_argument("--modo", choices=MODOS, default="threads")
+    parser.add_argument("--caminho", choices=CAMINHOS, default="orm")
+    parser.add_argument("--pausa", type=float, default=0.0, help="pausa máxima entre lances (s)")
+    parser.add_argument("--timeout-lock", type=float, default=5.0)
+    parser.add_argument("--wal", action="store_true")
+    parser.add_argument("--threads-asyncio", type=int, default=8)
+    parser.add_argument("--soft-close", type=int, nargs=2, metavar=("JANELA", "PRORROGACAO"),
+                        help="leilão com soft-close terminando ao fim da janela (segundos)")
+    parser.add_argument("--capacidade", type=int, default=1000, help="fila do escritor (caminho fila)")
+    parser.add_argument("--prazo", type=float, default=0.25, help="prazo por pedido em segundos (caminho fila)")
+    parser.add_argument("--banco", help="arquivo SQLite (padrão: temporário)")
+    parser.add_argument("--saida", help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    banco = args.banco or os.path.join(tempfile.mkdtemp(), "carga.db")
+    relatorio = executar_carga(banco, args.participantes, args.duracao, args.modo, args.caminho,
+                               args.pausa, args.timeout_lock, args.wal, args.threads_asyncio,
+                               soft_close=tuple(args.soft_close) if args.soft_close else None,
+                               capacidade=args.capacidade, prazo_s=args.prazo)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(json.dumps({k: v for k, v in relatorio.items() if k != "vazao_por_segundo"},
+                     indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Tuple
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.base import Base
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao
+from models.participante import Participante
+
+# Utilitários compartilhados pelos scripts de benchmark.
+
+
+def criar_sessao(url: str = "sqlite://", **opcoes_sessao) -> Session:
+    """Cria o banco (em memória por padrão) com todas as tabelas e retorna uma sessão"""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, **opcoes_sessao)()
+
+
+def popular(db: Session, leiloes: int, lances_por_leilao: int = 0,
+            participantes: int = 2, estado: EstadoLeilao = EstadoLeilao.ABERTO) -> None:
+    """
+    Insere dados sintéticos simples com inserts em lote do Core.
+
+    Os lances alternam entre participantes e têm valores crescentes,
+    respeitando as regras de adicionar_lance.
+    """
+    agora = datetime.now()
+    db.execute(insert(Participante), [
+        {"cpf": f"{i:011d}", "nome": f"Participante {i}", "email": f"p{i}@bench.com",
+         "data_nascimento": datetime(1990, 1, 1)}
+        for i in range(1, participantes + 1)
+    ])
+    db.execute(insert(Leilao), [
+        {"nome": f"Leilão {i}", "lance_minimo": 100.0, "estado": estado,
+         "data_inicio": agora - timedelta(days=1), "data_fim": agora + timedelta(days=i % 30 + 1)}
+        for i in range(1, leiloes + 1)
+    ])
+    if lances_por_leilao:
+        db.execute(insert(Lance), [
+            {"valor": 100.0 + j, "participante_id": j % participantes + 1,
+             "leilao_id": i, "data_hora": agora}
+            for i in range(1, leiloes + 1)
+            for j in range(lances_por_leilao)
+        ])
+    db.commit()
+
+
+def cronometrar(funcao: Callable[[], Any], repeticoes: int = 5) -> float:
+    """Retorna o melhor tempo (em segundos) entre as repetições"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def medir_memoria(funcao: Callable[[], Any]) -> Tuple[Any, int]:
+    """Executa a função e retorna (resultado, bytes ainda alocados pelo resultado)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        atual, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, atual
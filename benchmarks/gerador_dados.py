@@ -0,0 +1,205 @@
+"""
+Gerador determinístico de dados sintéticos para benchmarks.
+
+Cria participantes com CPFs válidos e e-mails únicos, leilões com popularidade
+assimétrica (distribuição de Zipf) e um fluxo de lances que respeita as regras
+de adicionar_lance (valores estritamente crescentes e sem dois lances
+consecutivos do mesmo participante). Tudo é gravado direto em um arquivo SQLite
+com inserts em lote.
+
+Uso: python -m benchmarks.gerador_dados --preset 1m --saida leilao.db [--semente 42]
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import create_engine, insert
+
+from models.base import Base
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao
+from models.participante import Participante, calcular_digitos_cpf
+
+# Tamanhos pré-definidos, para que todas as medições usem os mesmos dados
+PRESETS = {
+    "10k": {"participantes": 1_000, "leiloes": 200, "lances": 10_000},
+    "1m": {"participantes": 50_000, "leiloes": 10_000, "lances": 1_000_000},
+    "10m": {"participantes": 500_000, "leiloes": 100_000, "lances": 10_000_000},
+}
+
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor",
+         "Isabela", "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael")
+SOBRENOMES = ("Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa",
+              "Rodrigues", "Almeida", "Nascimento", "Carvalho", "Rocha")
+ITENS = ("Notebook", "Smartphone", "TV 4K", "Bicicleta", "Relógio", "Câmera",
+         "Console", "Geladeira", "Sofá", "Guitarra", "Drone", "Monitor")
+
+TAMANHO_BLOCO = 50_000
+_SQL_LANCE = "INSERT INTO lances (valor, participante_id, leilao_id, data_hora) VALUES (?, ?, ?, ?)"
+
+
+def gerar_cpf(indice: int, rng: random.Random) -> str:
+    """CPF válido e único para cada índice (cada índice tem sua própria faixa de 8 números)"""
+    base = f"{100_000_000 + indice * 8 + rng.randrange(7):09d}"
+    if base == base[0] * 9:  # sequências repetidas não são CPFs válidos
+        base = f"{int(base) + 1:09d}"
+    return f"{base[:3]}.{base[3:6]}.{base[6:]}-{calcular_digitos_cpf(base)}"
+
+
+def distribuir_zipf(total: int, quantidade: int, expoente: float, rng: random.Random) -> List[int]:
+    """
+    Divide total lances entre quantidade leilões com pesos 1/k^expoente.
+
+    As contagens são determinísticas (proporcionais ao peso, com o resto indo aos
+    mais populares) e as posições de popularidade são embaralhadas entre os leilões.
+    """
+    pesos = [1 / (k ** expoente) for k in range(1, quantidade + 1)]
+    soma = sum(pesos)
+    contagens = [int(total * p / soma) for p in pesos]
+    for k in range(total - sum(contagens)):
+        contagens[k % quantidade] += 1
+    rng.shuffle(contagens)
+    return contagens
+
+
+def gerar(caminho: str = "leilao.db", participantes: int = 1_000, leiloes: int = 200,
+          lances: int = 10_000, semente: int = 42, expoente_zipf: float = 1.1,
+          agora: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Gera o banco de dados sintético e retorna um resumo da geração
+
+    Args:
+        caminho: Arquivo SQLite de saída (sobrescrito se existir)
+        participantes, leiloes, lances: Quantidades a gerar
+        semente: Semente do gerador aleatório (mesma semente = mesmos dados)
+        expoente_zipf: Assimetria da popularidade dos leilões
+        agora: Data de referência (padrão: agora)
+    """
+    if participantes < 2 and lances:
+        raise ValueError("São necessários ao menos 2 participantes para gerar lances")
+    rng = random.Random(semente)
+    agora = agora or datetime.now().replace(microsecond=0)
+    inicio = time.perf_counter()
+
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(engine)
+    indices_lances = list(Lance.__table__.indexes)
+
+    with engine.begin() as conexao:
+        # Carga em massa: sem journal/fsync e índices de lances criados só no final
+        conexao.exec_driver_sql("PRAGMA synchronous = OFF")
+        for indice in indices_lances:
+            indice.drop(conexao)
+
+        for bloco in _blocos(_participantes(participantes, rng)):
+            conexao.execute(insert(Participante.__table__), bloco)
+
+        dados_leiloes = list(_leiloes(leiloes, agora, rng))
+        for bloco in _blocos(dados_leiloes):
+            conexao.execute(insert(Leilao.__table__), bloco)
+
+        converter_data = Lance.__table__.c.data_hora.type.bind_processor(conexao.dialect)
+        contagens = distribuir_zipf(lances, leiloes, expoente_zipf, rng) if leiloes else []
+        fluxo = _lances(dados_leiloes, contagens, participantes, agora, rng, converter_data)
+        for bloco in _blocos(fluxo):
+            conexao.exec_driver_sql(_SQL_LANCE, bloco)
+
+        for indice in indices_lances:
+            indice.create(conexao)
+    engine.dispose()
+
+    return {
+        'caminho': caminho,
+        'participantes': participantes,
+        'leiloes': leiloes,
+        'lances': lances,
+        'maior_leilao': max(contagens, default=0),
+        'semente': semente,
+        'duracao_s': round(time.perf_counter() - inicio, 2),
+    }
+
+
+def _blocos(linhas: Iterator, tamanho: int = TAMANHO_BLOCO) -> Iterator[list]:
+    bloco = []
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) == tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+def _participantes(quantidade: int, rng: random.Random) -> Iterator[dict]:
+    for i in range(quantidade):
+        yield {
+            "cpf": gerar_cpf(i, rng),
+            "nome": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}",
+            "email": f"participante{i + 1}@exemplo.com",
+            "data_nascimento": datetime(1950 + rng.randrange(55), rng.randrange(1, 13), rng.randrange(1, 29)),
+        }
+
+
+def _leiloes(quantidade: int, agora: datetime, rng: random.Random) -> Iterator[dict]:
+    # Todos já abertos; o término varia entre 2 dias atrás e 7 dias à frente,
+    # então parte dos leilões já pode ser finalizada
+    for i in range(quantidade):
+        data_inicio = agora - timedelta(days=rng.randrange(3, 30), seconds=rng.randrange(86_400))
+        data_fim = agora + timedelta(seconds=rng.randrange(-2 * 86_400, 7 * 86_400))
+        yield {
+            "nome": f"{rng.choice(ITENS)} #{i + 1}",
+            "lance_minimo": float(rng.randrange(50, 5_000)),
+            "data_inicio": data_inicio,
+            "data_fim": data_fim,
+            "estado": EstadoLeilao.ABERTO,
+        }
+
+
+def _lances(leiloes: List[dict], contagens: List[int], participantes: int, agora: datetime,
+            rng: random.Random, converter_data) -> Iterator[tuple]:
+    """Gera os lances de cada leilão respeitando as regras de adicionar_lance"""
+    for leilao_id, (leilao, quantidade) in enumerate(zip(leiloes, contagens), start=1):
+        if not quantidade:
+            continue
+        valor = leilao["lance_minimo"]
+        momento = leilao["data_inicio"]
+        fim = min(leilao["data_fim"], agora)
+        passo = max((fim - momento).total_seconds() / (quantidade + 1), 0.001)
+        anterior = None
+        for _ in range(quantidade):
+            participante = rng.randrange(1, participantes + 1)
+            if participante == anterior:
+                participante = participante % participantes + 1
+            valor = round(valor + max(1.0, valor * rng.uniform(0.001, 0.02)), 2)
+            momento += timedelta(seconds=passo)
+            anterior = participante
+            yield (valor, participante, leilao_id, converter_data(momento) if converter_data else momento)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="10k")
+    parser.add_argument("--saida", default="leilao.db")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--expoente-zipf", type=float, default=1.1)
+    parser.add_argument("--participantes", type=int, help="sobrescreve o preset")
+    parser.add_argument("--leiloes", type=int, help="sobrescreve o preset")
+    parser.add_argument("--lances", type=int, help="sobrescreve o preset")
+    args = parser.parse_args()
+
+    tamanhos = dict(PRESETS[args.preset])
+    for campo in tamanhos:
+        if getattr(args, campo) is not None:
+            tamanhos[campo] = getattr(args, campo)
+
+    resumo = gerar(args.saida, semente=args.semente, expoente_zipf=args.expoente_zipf, **tamanhos)
+    print(f"Dados gerados: {resumo}")
+
+
+if __name__ == "__main__":
+    main()
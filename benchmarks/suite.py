@@ -0,0 +1,324 @@
+"""
+Suíte de benchmarks dos caminhos críticos do GerenciadorLeiloes.
+
+Comandos:
+  executar  Roda os casos e grava os resultados em JSON
+  comparar  Compara um resultado com a baseline e falha (código 1) se alguma
+            métrica piorar além do limite ou se algum caso da baseline não
+            tiver sido medido (com --filtro, só os casos que ele seleciona)
+
+A baseline versionada (benchmarks/baseline.json) foi gravada com o comando
+abaixo, sem filtro e com as 20 repetições padrão; os números dependem da
+máquina, então regrave-a no ambiente onde a comparação roda.
+
+Uso:
+  python -m benchmarks.suite executar --saida resultados.json [--filtro adicionar_lance]
+  python -m benchmarks.suite executar --saida benchmarks/baseline.json   # grava a baseline
+  python -m benchmarks.suite comparar benchmarks/baseline.json resultados.json --limite 0.20
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+
+from benchmarks.comum import criar_sessao, popular
+from benchmarks.gerador_dados import gerar_cpf
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao
+from models.participante import Participante
+from services.email_service import EmailService
+
+# Métricas comparadas pelo comando "comparar" (menor é melhor)
+METRICAS = ("mediana_ms", "p95_ms")
+LANCES_LEILAO_CHEIO = 10_000
+
+# Cada caso recebe o número de repetições e retorna (operação(i), limpeza)
+Preparo = Callable[[int], Tuple[Callable[[int], Any], Callable[[], None]]]
+CASOS: Dict[str, Preparo] = {}
+
+
+def caso(nome: str):
+    """Registra uma função de preparo como caso da suíte"""
+    def registrar(preparar: Preparo) -> Preparo:
+        CASOS[nome] = preparar
+        return preparar
+    return registrar
+
+
+def _gerenciador(leiloes: int = 1, lances_por_leilao: int = 0, participantes: int = 2) -> GerenciadorLeiloes:
+    db = criar_sessao()
+    popular(db, leiloes, lances_por_leilao, participantes)
+    return GerenciadorLeiloes(db)
+
+
+def _caso_adicionar_lance(lances_existentes: int) -> Preparo:
+    def preparar(repeticoes: int):
+        gerenciador = _gerenciador(lances_por_leilao=lances_existentes)
+        base = 100.0 + lances_existentes
+        agora = datetime.now()
+        # popular alterna os participantes 1 e 2; o próximo lance continua a alternância
+        primeiro = lances_existentes % 2
+
+        def operacao(i: int):
+            participante = (primeiro + i) % 2 + 1
+            gerenciador.adicionar_lance(1, Lance(base + i, participante, 1, agora))
+        return operacao, gerenciador.db.close
+    return preparar
+
+
+caso("adicionar_lance/leilao_vazio")(_caso_adicionar_lance(0))
+caso("adicionar_lance/leilao_10k_lances")(_caso_adicionar_lance(LANCES_LEILAO_CHEIO))
+
+
+def _caso_lance_rapido(soft_close: bool) -> Preparo:
+    def preparar(repeticoes: int):
+        gerenciador = _gerenciador(lances_por_leilao=LANCES_LEILAO_CHEIO)
+        gerenciador.db.expire_on_commit = False
+        agora = datetime.now()
+        if soft_close:
+            # Termina em 1 minuto com janela de 5 minutos e o lance i chega i segundos
+            # depois de agora: todo lance cai na janela e prorroga o leilão em 1 segundo
+            gerenciador.db.execute(update(Leilao).where(Leilao.id == 1).values(
+                data_fim=agora + timedelta(minutes=1), janela_prorrogacao_s=300, prorrogacao_s=1))
+            gerenciador.db.commit()
+        base = 100.0 + LANCES_LEILAO_CHEIO
+        primeiro = LANCES_LEILAO_CHEIO % 2
+
+        def operacao(i: int):
+            participante = (primeiro + i) % 2 + 1
+            gerenciador.adicionar_lance_rapido(1, Lance(base + i, participante, 1, agora + timedelta(seconds=i)))
+        return operacao, gerenciador.db.close
+    return preparar
+
+
+caso("adicionar_lance_rapido/leilao_10k_lances")(_caso_lance_rapido(soft_close=False))
+caso("adicionar_lance_rapido/soft_close_ultimo_minuto")(_caso_lance_rapido(soft_close=True))
+
+
+def _caso_listar(**filtros) -> Preparo:
+    def preparar(repeticoes: int):
+        gerenciador = _gerenciador(leiloes=5_000, lances_por_leilao=2)
+        # Um terço dos leilões fica INATIVO para o filtro por estado ser seletivo
+        gerenciador.db.execute(
+            update(Leilao).where(Leilao.id % 3 == 0).values(estado=EstadoLeilao.INATIVO)
+        )
+        gerenciador.db.commit()
+        agora = datetime.now()
+        parametros = {
+            "estado": EstadoLeilao.ABERTO if filtros.get("estado") else None,
+            "data_inicio": agora - timedelta(days=2) if filtros.get("periodo") else None,
+            "data_fim": agora + timedelta(days=10) if filtros.get("periodo") else None,
+        }
+
+        def operacao(i: int):
+            gerenciador.db.expunge_all()
+            return gerenciador.listar_leiloes(**parametros)
+        return operacao, gerenciador.db.close
+    return preparar
+
+
+caso("listar_leiloes/sem_filtro")(_caso_listar())
+caso("listar_leiloes/estado")(_caso_listar(estado=True))
+caso("listar_leiloes/periodo")(_caso_listar(periodo=True))
+caso("listar_leiloes/estado_e_periodo")(_caso_listar(estado=True, periodo=True))
+
+
+@caso("finalizar_leilao/10k_lances")
+def _finalizar_leilao(repeticoes: int):
+    # Um leilão cheio por repetição, já que cada um só pode ser finalizado uma vez
+    gerenciador = _gerenciador(leiloes=repeticoes, lances_por_leilao=LANCES_LEILAO_CHEIO)
+    depois_do_fim = datetime.now() + timedelta(days=60)
+
+    def operacao(i: int):
+        gerenciador.finalizar_leilao(i + 1, depois_do_fim)
+    return operacao, gerenciador.db.close
+
+
+@caso("apuracao/alocar_1m_lances")
+def _alocar_unidades(repeticoes: int):
+    # Só o motor de alocação de um lote de múltiplas unidades, sem banco
+    import numpy as np
+    from models.apuracao import alocar_unidades
+    rng = np.random.default_rng(0)
+    valores = np.round(rng.uniform(100.0, 2000.0, 1_000_000), 2)
+    quantidades = rng.integers(1, 6, len(valores))
+    ids = np.arange(len(valores))
+
+    def operacao(i: int):
+        return alocar_unidades(valores, quantidades, ids, unidades=100_000)
+    return operacao, lambda: None
+
+
+@caso("remover_participante/100k_lances")
+def _remover_participante(repeticoes: int):
+    gerenciador = _gerenciador(leiloes=10, lances_por_leilao=LANCES_LEILAO_CHEIO)
+    # Participantes extras, sem lances, que podem ser removidos
+    rng = random.Random(0)
+    cpfs = [gerar_cpf(10_000 + i, rng) for i in range(repeticoes)]
+    gerenciador.db.execute(insert(Participante), [
+        {"cpf": cpf, "nome": "Removível", "email": f"removivel{i}@bench.com",
+         "data_nascimento": datetime(1990, 1, 1)}
+        for i, cpf in enumerate(cpfs)
+    ])
+    gerenciador.db.commit()
+    removiveis = [Participante(cpf, "Removível", f"removivel{i}@bench.com", datetime(1990, 1, 1))
+                  for i, cpf in enumerate(cpfs)]
+
+    def operacao(i: int):
+        gerenciador.remover_participante(removiveis[i])
+    return operacao, gerenciador.db.close
+
+
+@caso("email/enviar_renderizacao")
+def _enviar_email(repeticoes: int):
+    servico = EmailService(modo="test")
+    dados = {"nome_vencedor": "Ana", "nome_item": "Notebook", "valor_lance": "4500.00", "ano": 2025}
+
+    def operacao(i: int):
+        servico.enviar("vencedor@exemplo.com", "Parabéns pelo leilão", "email_template.html", dados)
+    return operacao, lambda: None
+
+
+def medir(preparar: Preparo, repeticoes: int, aquecimento: int = 2) -> Dict[str, Any]:
+    """Executa um caso e retorna as estatísticas dos tempos por operação"""
+    operacao, limpar = preparar(repeticoes + aquecimento)
+    tempos = []
+    try:
+        for i in range(repeticoes + aquecimento):
+            inicio = time.perf_counter()
+            operacao(i)
+            duracao = time.perf_counter() - inicio
+            if i >= aquecimento:
+                tempos.append(duracao * 1000)
+    finally:
+        limpar()
+
+    tempos.sort()
+    mediana = statistics.median(tempos)
+    return {
+        "repeticoes": repeticoes,
+        "mediana_ms": round(mediana, 4),
+        "p95_ms": round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 4),
+        "min_ms": round(tempos[0], 4),
+        "ops_por_segundo": round(1000 / mediana, 1) if mediana > 0 else None,
+    }
+
+
+def executar(filtro: Optional[str] = None, repeticoes: int = 20) -> Dict[str, Any]:
+    """Roda os casos (opcionalmente só os que contêm filtro no nome)"""
+    os.environ.setdefault("EMAIL_MODE", "test")  # finalizar_leilao não deve imprimir e-mails
+    resultados = {}
+    for nome, preparar in CASOS.items():
+        if filtro and filtro not in nome:
+            continue
+        resultados[nome] = medir(preparar, repeticoes)
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "repeticoes": repeticoes,
+            "filtro": filtro,
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(baseline: Dict[str, Any], atual: Dict[str, Any], limite: float = 0.20) -> List[Dict[str, Any]]:
+    """
+    Compara dois resultados e retorna uma linha por caso/métrica.
+
+    Uma métrica regride quando (atual - baseline) / baseline > limite. Um caso
+    da baseline que não aparece no resultado atual (benchmark quebrado ou
+    renomeado) vira uma linha com ausente=True, contada como regressão; casos
+    novos, só no resultado atual, são ignorados. Se o resultado atual foi
+    gravado com --filtro (meta.filtro), os casos da baseline que o filtro
+    exclui não são comparados.
+    """
+    filtro = atual.get("meta", {}).get("filtro")
+    linhas = []
+    for nome, base in baseline["resultados"].items():
+        if filtro and filtro not in nome:
+            continue
+        medido = atual["resultados"].get(nome)
+        if medido is None:
+            linhas.append({"caso": nome, "metrica": None, "baseline": None, "atual": None,
+                           "variacao": None, "regressao": True, "ausente": True})
+            continue
+        for metrica in METRICAS:
+            if not base.get(metrica):
+                continue
+            variacao = (medido[metrica] - base[metrica]) / base[metrica]
+            linhas.append({
+                "caso": nome,
+                "metrica": metrica,
+                "baseline": base[metrica],
+                "atual": medido[metrica],
+                "variacao": round(variacao, 4),
+                "regressao": variacao > limite,
+            })
+    return linhas
+
+
+def _ler_json(caminho: str) -> Dict[str, Any]:
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    cmd_executar = comandos.add_parser("executar", help="roda a suíte e grava o JSON")
+    cmd_executar.add_argument("--saida", default="resultados_benchmark.json")
+    cmd_executar.add_argument("--filtro", help="roda apenas casos cujo nome contém este texto")
+    cmd_executar.add_argument("--repeticoes", type=int, default=20)
+
+    cmd_comparar = comandos.add_parser("comparar", help="compara com a baseline")
+    cmd_comparar.add_argument("baseline")
+    cmd_comparar.add_argument("atual")
+    cmd_comparar.add_argument("--limite", type=float, default=0.20,
+                              help="piora relativa tolerada (0.20 = 20%%)")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "executar":
+        resultado = executar(args.filtro, args.repeticoes)
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        for nome, r in resultado["resultados"].items():
+            print(f"{nome:<40}{r['mediana_ms']:>12.3f} ms{r['p95_ms']:>12.3f} ms (p95)")
+        print(f"\nResultados gravados em {args.saida}")
+        return 0
+
+    linhas = comparar(_ler_json(args.baseline), _ler_json(args.atual), args.limite)
+    for linha in linhas:
+        if linha.get("ausente"):
+            print(f"{linha['caso']:<40}AUSENTE no resultado atual")
+            continue
+        marca = "REGRESSÃO" if linha["regressao"] else "ok"
+        print(f"{linha['caso']:<40}{linha['metrica']:<12}{linha['baseline']:>12.3f}"
+              f"{linha['atual']:>12.3f}{linha['variacao']:>+10.1%}  {marca}")
+    regressoes = [l for l in linhas if l["regressao"]]
+    if regressoes:
+        ausentes = sum(1 for l in regressoes if l.get("ausente"))
+        if ausentes:
+            print(f"\n{ausentes} caso(s) da baseline sem resultado")
+        if len(regressoes) > ausentes:
+            print(f"\n{len(regressoes) - ausentes} métrica(s) pioraram mais que {args.limite:.0%}")
+        return 1
+    print("\nNenhuma regressão acima do limite")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
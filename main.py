@@ -1,24 +1,29 @@
 import os
+import sys
 from datetime import datetime, timedelta
 from models.leilao import Leilao, EstadoLeilao
 from models.participante import Participante
 from models.lance import Lance
 from models.gerenciador_leiloes import GerenciadorLeiloes
 from models.database import create_db_tables, get_db
-import time
+from services.limitador import limitador_do_ambiente
+from services.perfilamento import perfilador_ativo
+from services.relogio import Relogio, RelogioVirtual, RELOGIO_SISTEMA
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def main():
+# relogio: hora real por padrão; com um RelogioVirtual (--simular) as esperas
+# apenas avançam o relógio e a demonstração termina na hora
+def main(relogio: Relogio = RELOGIO_SISTEMA):
     if os.path.exists("leilao.db"):
         os.remove("leilao.db")
         
     create_db_tables()
     db = next(get_db())
     
-    # Configuração inicial
-    gerenciador = GerenciadorLeiloes(db)
+    # Configuração inicial (limite de taxa só com LEILAO_LIMITE_PARTICIPANTE/LEILAO_LIMITE_LEILAO)
+    gerenciador = GerenciadorLeiloes(db, relogio=relogio, limitador=limitador_do_ambiente())
     
     # Cadastro de participantes (use e-mails reais para teste)
     participante1_data = Participante(
@@ -40,8 +45,8 @@ def main():
     leilao_data = Leilao(
         nome="Notebook Acer Nitro",
         lance_minimo=4500.00,
-        data_inicio=datetime.now() + timedelta(seconds=5),
-        data_fim=datetime.now() + timedelta(seconds=20)  # 5s + 15s
+        data_inicio=relogio.agora() + timedelta(seconds=5),
+        data_fim=relogio.agora() + timedelta(seconds=20)  # 5s + 15s
     )
     leilao = gerenciador.adicionar_leilao(leilao_data)
     
@@ -51,18 +56,18 @@ def main():
 
     # Aguarda abertura
     print("\nAguardando abertura...")
-    while datetime.now() < leilao.data_inicio:
-        time.sleep(0.1)
-    gerenciador.abrir_leilao(leilao.id, datetime.now())
-    print(f"\n=== Leilão ABERTO! ({datetime.now().strftime('%H:%M:%S')}) ===")
+    while relogio.agora() < leilao.data_inicio:
+        relogio.dormir(0.1)
+    gerenciador.abrir_leilao(leilao.id, relogio.agora())
+    print(f"\n=== Leilão ABERTO! ({relogio.agora().strftime('%H:%M:%S')}) ===")
 
     # Registra lances
     print("\n=== Lances ===")
     try:
-        gerenciador.adicionar_lance(leilao.id, Lance(5500, participante1.id, leilao.id, datetime.now()))
+        gerenciador.adicionar_lance(leilao.id, Lance(5500, participante1.id, leilao.id, relogio.agora()))
         print(f"Lance de {participante1.nome} no valor de 5500 adicionado com sucesso!")
-        time.sleep(5)
-        gerenciador.adicionar_lance(leilao.id, Lance(6000, participante2.id, leilao.id, datetime.now()))
+        relogio.dormir(5)
+        gerenciador.adicionar_lance(leilao.id, Lance(6000, participante2.id, leilao.id, relogio.agora()))
         print(f"Lance de {participante2.nome} no valor de 6000 adicionado com sucesso!")
     except ValueError as e:
         print(f"Erro ao adicionar lance: {e}")
@@ -70,7 +75,7 @@ def main():
     # Aguarda término com verificação contínua
     print("\nAguardando término...")
     while True:
-        agora = datetime.now()
+        agora = relogio.agora()
         leilao = gerenciador.encontrar_leilao_por_id(leilao.id)
         if agora >= leilao.data_fim:
             try:
@@ -78,7 +83,9 @@ def main():
                 break
             except ValueError as e:
                 print(f"Tentando finalizar... ({e})")
-                time.sleep(0.5)
+                relogio.dormir(0.5)
+        else:
+            relogio.dormir(0.1)
     
     # Resultado
     print("\n=== RESULTADO ===")
@@ -92,4 +99,15 @@ def main():
             print("\nEmail enviado para o vencedor!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # --profile equivale a LEILAO_PROFILE=1: perfila main() e cada operação do gerenciador
+    if "--profile" in sys.argv[1:]:
+        os.environ["LEILAO_PROFILE"] = "1"
+    relogio = RelogioVirtual(datetime.now()) if "--simular" in sys.argv[1:] else RELOGIO_SISTEMA
+    perfilador = perfilador_ativo()
+    if perfilador is None:
+        main(relogio)
+    else:
+        with perfilador.perfilar("main"):
+            main(relogio)
+        perfilador.salvar()
+        print(f"\nPerfis gravados em {perfilador.diretorio}/")
\ No newline at end of file
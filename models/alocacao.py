@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
+from models.base import Base
+
+
+class Alocacao(Base):
+    """Unidades de um lote de múltiplas unidades atribuídas a um lance na finalização"""
+    __tablename__ = "alocacoes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    leilao_id = Column(Integer, ForeignKey("leiloes.id"), nullable=False)
+    lance_id = Column(Integer, ForeignKey("lances.id"), nullable=False)
+    participante_id = Column(Integer, ForeignKey("participantes.id"), nullable=False)
+    quantidade = Column(Integer, nullable=False)
+    preco_unitario = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_alocacoes_leilao", "leilao_id"),
+    )
+
+    def __init__(self, leilao_id: int, lance_id: int, participante_id: int, quantidade: int,
+                 preco_unitario: float):
+        self.leilao_id = leilao_id
+        self.lance_id = lance_id
+        self.participante_id = participante_id
+        self.quantidade = quantidade
+        self.preco_unitario = preco_unitario
+
+    def __repr__(self):
+        return (f"<Alocacao(leilao_id={self.leilao_id}, lance_id={self.lance_id}, "
+                f"quantidade={self.quantidade}, preco_unitario={self.preco_unitario})>")
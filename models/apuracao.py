@@ -0,0 +1,86 @@
+"""
+Apuração vetorizada (NumPy) de resultados de muitos leilões de uma vez.
+
+Os lances chegam como arrays paralelos (leilão, valor, id do lance) e são
+agrupados por leilão com uma única ordenação, sem laço Python por leilão.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+
+class DoisMaiores(NamedTuple):
+    grupos: np.ndarray    # grupos (leilões) com pelo menos um lance, em ordem crescente
+    primeiro: np.ndarray  # índice do maior lance de cada grupo nos arrays de entrada
+    segundo: np.ndarray   # índice do segundo maior lance ou -1 quando o grupo tem um só lance
+
+
+def dois_maiores_por_grupo(grupos: np.ndarray, valores: np.ndarray, desempate: np.ndarray) -> DoisMaiores:
+    """
+    Seleciona os dois maiores valores de cada grupo.
+
+    Em empate de valor vence o menor desempate (o lance mais antigo, pelo id),
+    como em GerenciadorLeiloes.identificar_vencedor.
+    """
+    if len(grupos) == 0:
+        vazio = np.empty(0, dtype=np.int64)
+        return DoisMaiores(np.empty(0, dtype=grupos.dtype), vazio, vazio)
+    # lexsort ordena pela última chave primeiro: grupo, valor decrescente, desempate
+    ordem = np.lexsort((desempate, -valores, grupos))
+    ordenados = grupos[ordem]
+    inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+    tamanhos = np.diff(np.r_[inicios, len(ordenados)])
+    segundo = np.full(len(inicios), -1, dtype=np.int64)
+    com_segundo = tamanhos > 1
+    segundo[com_segundo] = ordem[inicios[com_segundo] + 1]
+    return DoisMaiores(ordenados[inicios], ordem[inicios], segundo)
+
+
+def precos_selados(valor_vencedor: np.ndarray, segundo_valor: np.ndarray, lance_minimo: np.ndarray,
+                   segundo_preco: np.ndarray) -> np.ndarray:
+    """
+    Preço pago em cada leilão selado: o lance vencedor no primeiro preço; no
+    segundo preço (Vickrey), o segundo maior lance, ou o lance mínimo quando não
+    há segundo lance (segundo_valor NaN).
+    """
+    return np.where(segundo_preco, np.fmax(segundo_valor, lance_minimo), valor_vencedor)
+
+
+class Alocacoes(NamedTuple):
+    lances: np.ndarray          # índice de cada lance atendido nos arrays de entrada, do maior preço ao menor
+    unidades: np.ndarray        # unidades atribuídas a cada lance atendido
+    preco_unitario: np.ndarray  # preço por unidade pago por cada lance atendido
+
+
+def alocar_unidades(valores: np.ndarray, quantidades: np.ndarray, desempate: np.ndarray, unidades: int,
+                    preco_uniforme: bool = True) -> Alocacoes:
+    """
+    Distribui as unidades de um lote entre os lances de maior preço unitário.
+
+    Cada lance pede ao menos uma unidade, então só os `unidades` maiores preços
+    (e os empatados com o último deles) podem ser atendidos: eles são separados
+    com np.partition em O(n) e apenas esses são ordenados. Em empate de preço é
+    atendido primeiro o menor desempate (lance mais antigo). O último lance
+    atendido pode receber só parte do pedido.
+
+    No preço uniforme todos pagam o menor preço aceito; no discriminatório, cada
+    um paga o próprio lance.
+    """
+    if len(valores) == 0 or unidades <= 0:
+        vazio = np.empty(0, dtype=np.int64)
+        return Alocacoes(vazio, vazio, np.empty(0, dtype=np.float64))
+    candidatos = np.arange(len(valores))
+    if len(valores) > unidades:
+        corte = -np.partition(-valores, unidades - 1)[unidades - 1]
+        candidatos = np.flatnonzero(valores >= corte)
+    ordem = candidatos[np.lexsort((desempate[candidatos], -valores[candidatos]))]
+
+    pedidas = quantidades[ordem]
+    antes = np.cumsum(pedidas) - pedidas
+    atendidas = np.clip(unidades - antes, 0, pedidas)
+    atendidos = atendidas > 0
+    lances = ordem[atendidos]
+    precos = valores[lances]
+    if preco_uniforme:
+        precos = np.full(len(lances), precos[-1])
+    return Alocacoes(lances, atendidas[atendidos], precos)
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from models.base import Base
+
+# Tempo mínimo que uma chave fica gravada antes de ser removida pela limpeza
+TTL_IDEMPOTENCIA = timedelta(hours=24)
+# Tamanho máximo da chave enviada pelo cliente (um UUID em texto tem 36)
+TAMANHO_MAXIMO_CHAVE = 64
+
+
+class ChaveIdempotencia(Base):
+    """Lance aceito indexado pela chave de idempotência enviada pelo participante"""
+    __tablename__ = "chaves_idempotencia"
+
+    # A chave vale por participante: clientes diferentes não colidem
+    participante_id = Column(Integer, ForeignKey("participantes.id"), primary_key=True)
+    chave = Column(String(TAMANHO_MAXIMO_CHAVE), primary_key=True)
+    lance_id = Column(Integer, ForeignKey("lances.id"), nullable=False)
+    criada_em = Column(DateTime, nullable=False, index=True)
+
+    def __init__(self, participante_id: int, chave: str, lance_id: int, criada_em: datetime):
+        self.participante_id = participante_id
+        self.chave = chave
+        self.lance_id = lance_id
+        self.criada_em = criada_em
+
+    def __repr__(self):
+        return (f"<ChaveIdempotencia(participante_id={self.participante_id}, chave='{self.chave}', "
+                f"lance_id={self.lance_id})>")
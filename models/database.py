@@ -1,6 +1,17 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, event, func, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 from models.base import Base
+from models.monitor_sql import normalizar_sql
+
+logger = logging.getLogger(__name__)
 
 # Define o caminho para o arquivo do banco de dados SQLite
 DATABASE_URL = "sqlite:///./leilao.db"
@@ -16,6 +27,26 @@ engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 # bind=engine: associa a sessão ao nosso motor de banco de dados
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sessão para o caminho rápido de lances (GerenciadorLeiloes.adicionar_lance_rapido)
+# expire_on_commit=False: o commit não expira os objetos carregados, evitando
+# que o próximo acesso a cada um deles faça um novo SELECT
+SessionRapida = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Engine de um arquivo SQLite em journal_mode=WAL: leitores não bloqueiam o
+# escritor nem são bloqueados por ele. Usada pelos escritores por shard
+# (services.shards); timeout é a espera máxima pelo lock de escrita. Com
+# catalogo, cada conexão anexa esse arquivo (RoteadorShards).
+def criar_engine_wal(caminho: str, timeout: float = 30.0, catalogo: Optional[str] = None) -> Engine:
+    engine_wal = create_engine(f"sqlite:///{caminho}", connect_args={"timeout": timeout, "check_same_thread": False})
+
+    @event.listens_for(engine_wal, "connect")
+    def _ativar_wal(conexao_dbapi, _registro):
+        conexao_dbapi.execute("PRAGMA journal_mode=WAL")
+        if catalogo is not None:
+            conexao_dbapi.execute("ATTACH DATABASE ? AS catalogo", (catalogo,))
+
+    return engine_wal
+
 # Função utilitária para obter uma sessão de banco de dados
 # Usaremos isso para gerenciar o ciclo de vida da sessão (abrir e fechar)
 def get_db():
@@ -25,12 +56,276 @@ def get_db():
     finally:
         db.close()
 
-# Função para criar as tabelas no banco de dados
-def create_db_tables():
-    # Importar todos os modelos para que o SQLAlchemy os reconheça
+# Importa todos os modelos para que o SQLAlchemy os reconheça
+def _importar_modelos():
     from models.participante import Participante
     from models.leilao import Leilao
     from models.lance import Lance
+    from models.lance_automatico import LanceAutomatico
+    from models.alocacao import Alocacao
+    from models.chave_idempotencia import ChaveIdempotencia
+
+# Função para criar as tabelas no banco de dados
+def create_db_tables():
+    _importar_modelos()
     print("Criando tabelas no banco de dados...")
     Base.metadata.create_all(bind=engine)
-    print("Tabelas criadas com sucesso!")
\ No newline at end of file
+    print("Tabelas criadas com sucesso!")
+
+
+# --- Particionamento horizontal: leilões em vários arquivos SQLite ---
+
+# Diretório leilao_id -> shard, no catálogo. Os ids dos leilões são reservados
+# aqui, então continuam únicos entre todos os shards; sqlite_autoincrement
+# impede que o id de um leilão removido seja reaproveitado.
+DIRETORIO_LEILOES = Table(
+    "diretorio_leiloes", MetaData(),
+    Column("leilao_id", Integer, primary_key=True),
+    Column("shard", Integer, nullable=False, index=True),
+    sqlite_autoincrement=True,
+)
+
+
+class RoteadorShards:
+    """
+    Leilões distribuídos por leilao_id entre vários arquivos SQLite.
+
+    Cada leilão fica inteiro em um shard, com seus lances, lances automáticos,
+    alocações e chaves de idempotência, e cada arquivo tem o próprio lock de
+    escrita. Os participantes ficam no catálogo, que toda conexão de shard
+    anexa: o SQLite procura nos bancos anexados as tabelas que o arquivo não
+    tem, então as consultas do GerenciadorLeiloes que juntam lances e
+    participantes funcionam sem mudança.
+
+    Os ids de leilão são reservados no catálogo e valem em todos os shards;
+    os demais ids (lances, lances automáticos, alocações) vêm do arquivo de
+    cada shard e só são únicos dentro dele, por isso um lance é identificado
+    entre shards pelo par (shard, id).
+
+    O catálogo guarda também o diretório leilao_id -> shard. Um leilão novo
+    vai para leilao_id % shards, e GerenciadorShards.mover_leilao o leva para
+    outro arquivo depois; acrescentar um arquivo à lista só muda o destino dos
+    leilões novos.
+    """
+
+    def __init__(self, catalogo: str, shards: Sequence[str], timeout: float = 30.0):
+        """
+        Args:
+            catalogo: Arquivo com os participantes e o diretório de leilões
+            shards: Arquivos dos leilões, na ordem dos índices de shard
+            timeout: Espera máxima pelo lock de escrita de cada arquivo
+        """
+        if not shards:
+            raise ValueError("Informe ao menos um arquivo de shard")
+        self.catalogo = catalogo
+        self.caminhos = list(shards)
+        self.timeout = timeout
+        self.engine_catalogo = criar_engine_wal(catalogo, timeout)
+        self.engines = [criar_engine_wal(caminho, timeout, catalogo) for caminho in self.caminhos]
+        self._sessoes_catalogo = sessionmaker(bind=self.engine_catalogo, autoflush=False, expire_on_commit=False)
+        self._sessoes = [sessionmaker(bind=e, autoflush=False, expire_on_commit=False) for e in self.engines]
+        # Cópia em memória do diretório: cada leilão é procurado no catálogo uma vez
+        self._diretorio: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shards(self) -> int:
+        return len(self.engines)
+
+    # Participantes (e o diretório) no catálogo; as demais tabelas em cada shard
+    def criar_tabelas(self):
+        _importar_modelos()
+        participantes = Base.metadata.tables["participantes"]
+        Base.metadata.create_all(self.engine_catalogo, tables=[participantes])
+        DIRETORIO_LEILOES.metadata.create_all(self.engine_catalogo)
+        tabelas = [tabela for tabela in Base.metadata.sorted_tables if tabela is not participantes]
+        for engine_shard in self.engines:
+            Base.metadata.create_all(engine_shard, tables=tabelas)
+
+    def sessao_catalogo(self) -> Session:
+        return self._sessoes_catalogo()
+
+    def sessao(self, shard: int) -> Session:
+        return self._sessoes[shard]()
+
+    def reservar_leilao_id(self, shard: Optional[int] = None) -> Tuple[int, int]:
+        """Reserva um id de leilão no diretório; retorna (leilao_id, shard)"""
+        if shard is not None and not 0 <= shard < self.shards:
+            raise ValueError(f"Shard deve estar entre 0 e {self.shards - 1}")
+        with self.engine_catalogo.begin() as conexao:
+            leilao_id = conexao.execute(
+                insert(DIRETORIO_LEILOES).values(shard=-1 if shard is None else shard)).inserted_primary_key[0]
+            if shard is None:
+                shard = leilao_id % self.shards
+                conexao.execute(update(DIRETORIO_LEILOES)
+                                .where(DIRETORIO_LEILOES.c.leilao_id == leilao_id).values(shard=shard))
+        with self._lock:
+            self._diretorio[leilao_id] = shard
+        return leilao_id, shard
+
+    def shard_do_leilao(self, leilao_id: int) -> int:
+        """Índice do shard do leilão; serve de partição para o ExecutorShards"""
+        shard = self._diretorio.get(leilao_id)
+        if shard is None:
+            with self.engine_catalogo.connect() as conexao:
+                shard = conexao.execute(select(DIRETORIO_LEILOES.c.shard)
+                                        .where(DIRETORIO_LEILOES.c.leilao_id == leilao_id)).scalar()
+            if shard is None:
+                raise ValueError("Leilão não encontrado")
+            with self._lock:
+                self._diretorio[leilao_id] = shard
+        return shard
+
+    def mudar_shard(self, leilao_id: int, shard: int):
+        with self.engine_catalogo.begin() as conexao:
+            conexao.execute(update(DIRETORIO_LEILOES)
+                            .where(DIRETORIO_LEILOES.c.leilao_id == leilao_id).values(shard=shard))
+        with self._lock:
+            self._diretorio[leilao_id] = shard
+
+    def leiloes_por_shard(self) -> List[int]:
+        with self.engine_catalogo.connect() as conexao:
+            contagens = dict(conexao.execute(select(DIRETORIO_LEILOES.c.shard, func.count())
+                                             .group_by(DIRETORIO_LEILOES.c.shard)).all())
+        return [contagens.get(shard, 0) for shard in range(self.shards)]
+
+    def criar_gerenciador(self):
+        """criar_gerenciador serializável para o ExecutorShards, um shard por arquivo"""
+        from services.shards import GerenciadorPorArquivo
+        return GerenciadorPorArquivo(self.caminhos, self.timeout, self.catalogo)
+
+    def fechar(self):
+        for engine_shard in [self.engine_catalogo] + self.engines:
+            engine_shard.dispose()
+
+
+# --- Log de consultas lentas e histogramas de tempo por instrução (opcional) ---
+
+# Limites superiores (ms) das faixas do histograma; a última faixa é "acima de 1000ms"
+FAIXAS_HISTOGRAMA_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+
+class EstatisticasConsultas:
+    """Tempo acumulado e histograma por instrução SQL normalizada de uma engine"""
+
+    def __init__(self, limite_ms: float, explicar: bool = True):
+        self.limite_ms = limite_ms
+        self.explicar = explicar
+        self._por_forma: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, sql: str, duracao_ms: float):
+        forma = normalizar_sql(sql)
+        faixa = bisect.bisect_left(FAIXAS_HISTOGRAMA_MS, duracao_ms)
+        with self._lock:
+            atual = self._por_forma.get(forma)
+            if atual is None:
+                atual = self._por_forma[forma] = {
+                    'chamadas': 0, 'tempo_total_ms': 0.0, 'tempo_max_ms': 0.0,
+                    'histograma': [0] * (len(FAIXAS_HISTOGRAMA_MS) + 1),
+                }
+            atual['chamadas'] += 1
+            atual['tempo_total_ms'] += duracao_ms
+            atual['tempo_max_ms'] = max(atual['tempo_max_ms'], duracao_ms)
+            atual['histograma'][faixa] += 1
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        """As n instruções com maior tempo total"""
+        with self._lock:
+            itens = sorted(self._por_forma.items(), key=lambda item: item[1]['tempo_total_ms'], reverse=True)[:n]
+            rotulos = [f"<={limite}ms" for limite in FAIXAS_HISTOGRAMA_MS] + [f">{FAIXAS_HISTOGRAMA_MS[-1]}ms"]
+            return [{
+                'sql': forma,
+                'chamadas': dados['chamadas'],
+                'tempo_total_ms': round(dados['tempo_total_ms'], 3),
+                'tempo_medio_ms': round(dados['tempo_total_ms'] / dados['chamadas'], 3),
+                'tempo_max_ms': round(dados['tempo_max_ms'], 3),
+                'histograma': dict(zip(rotulos, dados['histograma'])),
+            } for forma, dados in itens]
+
+    def limpar(self):
+        with self._lock:
+            self._por_forma.clear()
+
+
+_estatisticas_por_engine: Dict[Engine, EstatisticasConsultas] = {}
+_listeners_por_engine: Dict[Engine, tuple] = {}
+
+
+def _plano_de_execucao(cursor, sql: str, parametros) -> str:
+    # EXPLAIN QUERY PLAN em um cursor novo da mesma conexão DBAPI (mesma transação)
+    try:
+        linhas = cursor.connection.execute(f"EXPLAIN QUERY PLAN {sql}", parametros or ()).fetchall()
+    except sqlite3.Error as e:
+        return f"indisponível ({e})"
+    return "; ".join(linha[-1] for linha in linhas)
+
+
+def habilitar_log_consultas_lentas(engine: Engine = engine, limite_ms: float = 100.0,
+                                   explicar: bool = True) -> EstatisticasConsultas:
+    """
+    Passa a medir todas as instruções da engine.
+
+    Cada instrução soma seu tempo à estatística da sua forma normalizada;
+    instruções acima de limite_ms são registradas no log (WARNING) com os
+    parâmetros e, se explicar=True, com o EXPLAIN QUERY PLAN.
+    """
+    if engine in _estatisticas_por_engine:
+        estatisticas = _estatisticas_por_engine[engine]
+        estatisticas.limite_ms = limite_ms
+        estatisticas.explicar = explicar
+        return estatisticas
+
+    estatisticas = EstatisticasConsultas(limite_ms, explicar)
+
+    def antes(conexao, cursor, sql, parametros, contexto, executemany):
+        conexao.info.setdefault("consultas_lentas_inicio", []).append(time.perf_counter())
+
+    def depois(conexao, cursor, sql, parametros, contexto, executemany):
+        inicios = conexao.info.get("consultas_lentas_inicio")
+        if not inicios:
+            return
+        duracao_ms = (time.perf_counter() - inicios.pop()) * 1000
+        estatisticas.registrar(sql, duracao_ms)
+        if duracao_ms >= estatisticas.limite_ms:
+            plano = ""
+            if estatisticas.explicar and not executemany:
+                plano = f"\n  Plano: {_plano_de_execucao(cursor, sql, parametros)}"
+            logger.warning("Consulta lenta (%.1fms): %s\n  Parâmetros: %s%s",
+                           duracao_ms, sql, parametros, plano)
+
+    # Instrução que falhou: não há after_cursor_execute, então o início sai aqui
+    # para não se acumular em conexao.info, que acompanha a conexão no pool
+    def falha(contexto_erro):
+        conexao = contexto_erro.connection
+        inicios = conexao.info.get("consultas_lentas_inicio") if conexao is not None else None
+        if inicios:
+            inicios.pop()
+
+    event.listen(engine, "before_cursor_execute", antes)
+    event.listen(engine, "after_cursor_execute", depois)
+    event.listen(engine, "handle_error", falha)
+    _estatisticas_por_engine[engine] = estatisticas
+    _listeners_por_engine[engine] = (antes, depois, falha)
+    return estatisticas
+
+
+def desabilitar_log_consultas_lentas(engine: Engine = engine):
+    """Remove os listeners e descarta as estatísticas da engine"""
+    listeners = _listeners_por_engine.pop(engine, None)
+    _estatisticas_por_engine.pop(engine, None)
+    if listeners:
+        event.remove(engine, "before_cursor_execute", listeners[0])
+        event.remove(engine, "after_cursor_execute", listeners[1])
+        event.remove(engine, "handle_error", listeners[2])
+
+
+def top_consultas(n: int = 10, engine: Engine = engine) -> List[Dict[str, Any]]:
+    """As n instruções com maior tempo total na engine (vazio se o log não estiver habilitado)"""
+    estatisticas = _estatisticas_por_engine.get(engine)
+    return estatisticas.top(n) if estatisticas else []
+
+
+# Habilita o log na engine padrão quando LEILAO_SQL_LENTO_MS estiver definido
+if os.getenv("LEILAO_SQL_LENTO_MS"):
+    habilitar_log_consultas_lentas(engine, float(os.getenv("LEILAO_SQL_LENTO_MS")))
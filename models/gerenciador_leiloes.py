@@ -1,15 +1,236 @@
-from datetime import datetime
-from typing import List
-from sqlalchemy.orm import Session
-from models.leilao import Leilao, EstadoLeilao
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from itertools import chain, islice
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import DateTime, Float, Integer, and_, bindparam, delete, exists, func, insert, inspect, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from models.leilao import (Leilao, EstadoLeilao, TipoLeilao, CURVAS_PRECO, TIPOS_SELADOS, TIPOS_MULTIPLOS,
+                           calcular_preco_holandes)
 from models.participante import Participante
 from models.lance import Lance
+from models.alocacao import Alocacao
+from models.chave_idempotencia import ChaveIdempotencia, TAMANHO_MAXIMO_CHAVE, TTL_IDEMPOTENCIA
+from models.lance_automatico import LanceAutomatico, Maximo, resolver_lances_automaticos
+from models.leituras import AlocacaoResumo, LeilaoResumo, LanceResumo, ParticipanteResumo
 from services.email_service import EmailService
+from services.cache_leitura import CacheLeitura
+from services.leiloes_quentes import EstadoQuente, LeiloesQuentes
+from services.shards import EstadoShard
+from services.limitador import LimitadorLances
+from services.metricas import (LANCES_ACEITOS, LANCES_RECUSADOS, LATENCIA_LANCE, LEILOES_POR_ESTADO,
+                               ATRASO_ABERTURA, ATRASO_FINALIZACAO, LANCES_REPETIDOS, RECUSAS_EM_MEMORIA)
+from services.perfilamento import perfilador_ativo
+from services.relogio import Relogio, RELOGIO_SISTEMA
+
+# Último lance de um leilão. Como cada lance precisa superar o anterior, o último
+# lance é também o de maior valor e vem direto do índice (leilao_id, valor).
+def _consulta_ultimo_lance(leilao_id):
+    return (
+        select(Lance.valor, Lance.participante_id)
+        .where(Lance.leilao_id == leilao_id)
+        .order_by(Lance.valor.desc())
+        .limit(1)
+    )
+
+# INSERT condicional usado pelo caminho rápido de lances: as mesmas regras de
+# adicionar_lance são verificadas pelo próprio banco, no mesmo comando que grava
+# o lance, então a validação e a escrita são atômicas mesmo com vários escritores.
+# Leilões ingleses exigem superar o último lance sem repetir o participante;
+# leilões selados e lotes de múltiplas unidades aceitam lances fora de ordem, um
+# por participante. A quantidade pedida vai de 1 às unidades do lote.
+# O comando é montado uma única vez e reaproveita o cache de compilação do SQLAlchemy.
+_P_VALOR = bindparam("valor", type_=Float)
+_P_PARTICIPANTE = bindparam("participante_id", type_=Integer)
+_P_LEILAO = bindparam("leilao_id", type_=Integer)
+_P_QUANTIDADE = bindparam("quantidade", type_=Integer)
+_ULTIMO_LANCE = _consulta_ultimo_lance(_P_LEILAO)
+_SELECT_LANCE_VALIDO = (
+    select(_P_VALOR, _P_PARTICIPANTE, Leilao.id, bindparam("data_hora", type_=DateTime), _P_QUANTIDADE)
+    .where(
+        Leilao.id == _P_LEILAO,
+        Leilao.estado == EstadoLeilao.ABERTO,
+        Leilao.lance_minimo <= _P_VALOR,
+        _P_QUANTIDADE >= 1,
+        _P_QUANTIDADE <= Leilao.quantidade,
+        or_(
+            and_(
+                Leilao.tipo == TipoLeilao.INGLES,
+                ~exists().where(Lance.leilao_id == _P_LEILAO, Lance.valor >= _P_VALOR),
+                func.coalesce(
+                    _ULTIMO_LANCE.with_only_columns(Lance.participante_id).scalar_subquery(), -1
+                ) != _P_PARTICIPANTE,
+            ),
+            and_(
+                # Comparações simples (e não in_) para o comando servir ao executemany
+                or_(*(Leilao.tipo == tipo for tipo in TIPOS_SELADOS + TIPOS_MULTIPLOS)),
+                ~exists().where(Lance.participante_id == _P_PARTICIPANTE, Lance.leilao_id == _P_LEILAO),
+            ),
+        ),
+    )
+)
+_COLUNAS_LANCE = ["valor", "participante_id", "leilao_id", "data_hora", "quantidade"]
+_INSERT_LANCE = insert(Lance.__table__).from_select(_COLUNAS_LANCE, _SELECT_LANCE_VALIDO)
+_INSERT_LANCE_RETORNANDO_ID = _INSERT_LANCE.returning(Lance.__table__.c.id)
+# INSERT simples de vários lances já validados, com os ids na ordem dos parâmetros
+_INSERT_LANCES_RETORNANDO_IDS = insert(Lance.__table__).returning(Lance.__table__.c.id, sort_by_parameter_order=True)
+
+
+# Soma segundos a uma data gravada pelo SQLAlchemy no SQLite ('AAAA-MM-DD HH:MM:SS.ffffff').
+# strftime descarta a fração, mas somar segundos inteiros não a altera: ela é
+# copiada do valor original, mantendo o formato (e a ordenação como texto).
+def _somar_segundos(data, segundos):
+    return func.strftime("%Y-%m-%d %H:%M:%S", data, func.printf("%+d seconds", segundos)).concat(
+        func.substr(data, 20))
+
+
+# bool é subclasse de int, mas True não é um preço nem uma quantidade
+def _eh_numero(valor) -> bool:
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def _eh_inteiro(valor) -> bool:
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+# Soft-close: um único UPDATE pela chave primária, executado na mesma transação
+# do lance aceito (em todos os caminhos), sem ler lances nem carregar o leilão.
+# A janela é avaliada contra data_fim já gravada, então a prorrogação de um lance
+# concorrente que fez commit antes é respeitada.
+_LEILOES = Leilao.__table__
+_P_MOMENTO = bindparam("data_hora", type_=DateTime)
+_PRORROGAR_LEILAO = (
+    update(_LEILOES)
+    .where(
+        _LEILOES.c.id == _P_LEILAO,
+        _LEILOES.c.janela_prorrogacao_s.isnot(None),
+        _P_MOMENTO <= _LEILOES.c.data_fim,
+        _P_MOMENTO >= _somar_segundos(_LEILOES.c.data_fim, -_LEILOES.c.janela_prorrogacao_s),
+    )
+    .values(data_fim=_somar_segundos(_LEILOES.c.data_fim, _LEILOES.c.prorrogacao_s))
+)
+
+# Lances automáticos: os dois maiores máximos do leilão vêm do índice
+# (leilao_id, valor_maximo); em empate vence o máximo registrado primeiro.
+_AUTOMATICOS = LanceAutomatico.__table__
+_TOPO_AUTOMATICOS = (
+    select(_AUTOMATICOS.c.valor_maximo, _AUTOMATICOS.c.data_hora, _AUTOMATICOS.c.participante_id)
+    .where(_AUTOMATICOS.c.leilao_id == _P_LEILAO)
+    .order_by(_AUTOMATICOS.c.valor_maximo.desc(), _AUTOMATICOS.c.data_hora)
+    .limit(2)
+)
+_REGISTRO_AUTOMATICO = sqlite_insert(_AUTOMATICOS)
+_REGISTRAR_AUTOMATICO = _REGISTRO_AUTOMATICO.on_conflict_do_update(
+    index_elements=["leilao_id", "participante_id"],
+    set_={"valor_maximo": _REGISTRO_AUTOMATICO.excluded.valor_maximo,
+          "data_hora": _REGISTRO_AUTOMATICO.excluded.data_hora},
+)
+
+# Arremate do leilão holandês: o UPDATE só altera o leilão enquanto ele está
+# ABERTO e dentro do prazo, então entre compradores simultâneos apenas um
+# obtém rowcount 1; os demais recebem 0 sem gravar nada.
+_ARREMATAR_HOLANDES = (
+    update(_LEILOES)
+    .where(
+        _LEILOES.c.id == _P_LEILAO,
+        _LEILOES.c.tipo == TipoLeilao.HOLANDES,
+        _LEILOES.c.estado == EstadoLeilao.ABERTO,
+        _LEILOES.c.data_inicio <= _P_MOMENTO,
+        _LEILOES.c.data_fim >= _P_MOMENTO,
+    )
+    .values(estado=EstadoLeilao.FINALIZADO, preco_final=_P_VALOR)
+)
+
+# Novo data_fim de um leilão, definido pelo dono do shard (services.shards), que já
+# aplicou o soft-close em memória
+_DEFINIR_DATA_FIM = (
+    update(_LEILOES)
+    .where(_LEILOES.c.id == bindparam("b_leilao_id"))
+    .values(data_fim=bindparam("b_data_fim", type_=DateTime))
+)
+
+# Motivo (rótulo de métrica) de cada mensagem de recusa de lance. As mensagens
+# contêm valores, então não podem ser usadas diretamente como rótulo.
+_MOTIVOS_RECUSA = (
+    ("Leilão não encontrado", "leilao_nao_encontrado"),
+    ("Leilão deve estar ABERTO", "leilao_nao_aberto"),
+    ("Lance deve ser >=", "abaixo_do_minimo"),
+    ("Lance deve ser maior que o último", "menor_que_ultimo"),
+    ("Participante não pode dar dois", "lance_consecutivo"),
+    ("Lote recusado", "lote_concorrente"),
+    ("Lances automáticos recusados", "lote_concorrente"),
+    ("Lance máximo deve ser maior", "menor_que_ultimo"),
+    ("Participante já enviou", "lance_selado_repetido"),
+    ("Lances automáticos só", "tipo_de_leilao"),
+    ("Leilão holandês só aceita", "tipo_de_leilao"),
+    ("Leilão já foi arrematado", "leilao_arrematado"),
+    ("Leilão holandês encerrado", "leilao_nao_aberto"),
+    ("Arremate pelo preço atual só", "tipo_de_leilao"),
+    ("Quantidade do lance", "quantidade_invalida"),
+    ("Limite de lances", "limite_de_taxa"),
+)
+
+
+def _rejeitar(erro: ValueError):
+    mensagem = str(erro)
+    motivo = next((m for prefixo, m in _MOTIVOS_RECUSA if mensagem.startswith(prefixo)), "outro")
+    LANCES_RECUSADOS.rotulado(motivo).inc()
+
+
+# Mede um método de gravação de lances: latência de toda tentativa, lances
+# aceitos (o retorno do método, quando é a quantidade gravada) e recusas por motivo.
+def _medir_lance(caminho: str):
+    aceitos = LANCES_ACEITOS.rotulado(caminho)
+    latencia = LATENCIA_LANCE.rotulado(caminho)
+
+    def decorador(metodo):
+        @wraps(metodo)
+        def medido(self, *args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                resultado = metodo(self, *args, **kwargs)
+            except ValueError as e:
+                _rejeitar(e)
+                raise
+            finally:
+                latencia.observar(time.perf_counter() - inicio)
+            aceitos.inc(resultado if type(resultado) is int else 1)
+            return resultado
+        return medido
+    return decorador
+
 
 # Classe responsável por gerenciar todas as operações relacionadas a leilões e participantes.
 class GerenciadorLeiloes:
-    def __init__(self, db: Session):
+    # cache: CacheLeitura opcional na frente das buscas por id/CPF. Pode ser
+    # exclusivo deste gerenciador ou compartilhado (services.cache_leitura.cache_compartilhado).
+    # relogio: fonte da hora atual (services.relogio); um RelogioVirtual permite simular o tempo.
+    # quentes: LeiloesQuentes opcional (services.leiloes_quentes), em geral compartilhado
+    # entre gerenciadores, que ativa o caminho em memória dos leilões quentes.
+    # idempotencia: CacheLeitura opcional (limitado e com TTL) na frente da tabela de
+    # chaves de idempotência, para que reenvios não acessem o banco.
+    # limitador: LimitadorLances opcional (services.limitador), em geral compartilhado,
+    # que recusa em memória os lances acima da taxa por participante ou por leilão.
+    def __init__(self, db: Session, cache: Optional[CacheLeitura] = None,
+                 relogio: Optional[Relogio] = None, quentes: Optional[LeiloesQuentes] = None,
+                 idempotencia: Optional[CacheLeitura] = None, limitador: Optional[LimitadorLances] = None):
         self.db = db
+        self.cache = cache
+        self.relogio = relogio or RELOGIO_SISTEMA
+        self.quentes = quentes
+        self.idempotencia = idempotencia
+        self.limitador = limitador
+
+        # Modo de perfilamento (LEILAO_PROFILE): verificado só aqui, então
+        # desligado não acrescenta nada às operações
+        perfilador = perfilador_ativo()
+        if perfilador is not None:
+            perfilador.envolver(self)
 
     # Adiciona um novo leilão.
     def adicionar_leilao(self, leilao: Leilao):
@@ -18,6 +239,101 @@ class GerenciadorLeiloes:
         self.db.refresh(leilao)
         return leilao
 
+    # Cadastra um catálogo de leilões em lote. Cada item é um dict com nome,
+    # lance_minimo, data_inicio, data_fim e, opcionalmente, os demais argumentos
+    # de Leilao (tipo, quantidade, soft-close e o cronograma do holandês). Cada
+    # item passa pelas mesmas regras de Leilao.__init__, a gravação usa
+    # INSERT ... RETURNING em blocos e não há refresh por linha. Retorna os ids gravados na ordem de entrada, as linhas
+    # recusadas como (índice, motivo) e a vazão.
+    def adicionar_leiloes_em_lote(self, leiloes: Iterable[Dict[str, Any]],
+                                  tamanho_lote: int = 1000) -> Dict[str, Any]:
+        if tamanho_lote <= 0:
+            raise ValueError("Tamanho do lote deve ser positivo")
+        inicio = time.perf_counter()
+        resultado = {'ids': [], 'rejeitados': [], 'inseridos': 0}
+        inserir = insert(Leilao.__table__).returning(Leilao.__table__.c.id, sort_by_parameter_order=True)
+
+        itens = enumerate(leiloes)
+        while True:
+            bloco = list(islice(itens, tamanho_lote))
+            if not bloco:
+                break
+            validos = []
+            for indice, dados in bloco:
+                motivo = self._validar_dados_leilao(dados)
+                if motivo:
+                    resultado['rejeitados'].append((indice, motivo))
+                else:
+                    tipo = dados.get("tipo", TipoLeilao.INGLES)
+                    holandes = tipo == TipoLeilao.HOLANDES
+                    # Todas as linhas levam as mesmas colunas (executemany); como
+                    # em Leilao, o cronograma de preço só é gravado no holandês
+                    validos.append({
+                        "nome": dados["nome"],
+                        "lance_minimo": dados["lance_minimo"],
+                        "data_inicio": dados["data_inicio"],
+                        "data_fim": dados["data_fim"],
+                        "estado": EstadoLeilao.INATIVO,
+                        "tipo": tipo,
+                        "quantidade": dados.get("quantidade", 1),
+                        "janela_prorrogacao_s": dados.get("janela_prorrogacao_s"),
+                        "prorrogacao_s": dados.get("prorrogacao_s"),
+                        "preco_inicial": dados.get("preco_inicial") if holandes else None,
+                        "curva_preco": dados.get("curva_preco", "linear") if holandes else None,
+                        "intervalo_preco_s": dados.get("intervalo_preco_s") if holandes else None,
+                    })
+            if validos:
+                resultado['ids'].extend(self.db.execute(inserir, validos).scalars())
+                self.db.commit()
+
+        resultado['inseridos'] = len(resultado['ids'])
+        duracao = time.perf_counter() - inicio
+        resultado['duracao_s'] = round(duracao, 3)
+        resultado['leiloes_por_segundo'] = round(resultado['inseridos'] / duracao) if duracao > 0 else 0
+        return resultado
+
+    # Retorna o motivo da recusa de um item do catálogo ou None se for válido.
+    @staticmethod
+    def _validar_dados_leilao(dados: Dict[str, Any]) -> Optional[str]:
+        faltando = [c for c in ("nome", "lance_minimo", "data_inicio", "data_fim") if dados.get(c) is None]
+        if faltando:
+            return f"Campos obrigatórios ausentes: {', '.join(faltando)}"
+        if not isinstance(dados["data_inicio"], datetime) or not isinstance(dados["data_fim"], datetime):
+            return "Datas devem ser datetime"
+        if dados["data_fim"] <= dados["data_inicio"]:
+            return "Data de término deve ser posterior à data de início"
+        if not _eh_numero(dados["lance_minimo"]) or dados["lance_minimo"] < 0:
+            return "Lance mínimo deve ser um número não negativo"
+        tipo = dados.get("tipo", TipoLeilao.INGLES)
+        if not isinstance(tipo, TipoLeilao):
+            return "Tipo de leilão inválido"
+        quantidade = dados.get("quantidade", 1)
+        if not _eh_inteiro(quantidade):
+            return "Quantidade do lote deve ser um número inteiro"
+        if quantidade < 1:
+            return "Quantidade do lote deve ser positiva"
+        if quantidade > 1 and not tipo.multiplo:
+            return "Apenas leilões de múltiplas unidades podem ter quantidade maior que 1"
+        janela, prorrogacao = dados.get("janela_prorrogacao_s"), dados.get("prorrogacao_s")
+        if (janela is None) != (prorrogacao is None):
+            return "Janela e prorrogação do soft-close devem ser informadas juntas"
+        if janela is not None:
+            if not _eh_inteiro(janela) or not _eh_inteiro(prorrogacao) or janela <= 0 or prorrogacao <= 0:
+                return "Janela e prorrogação do soft-close devem ser positivas"
+            if tipo != TipoLeilao.INGLES:
+                return "Soft-close só se aplica a leilões ingleses"
+        if tipo == TipoLeilao.HOLANDES:
+            preco_inicial = dados.get("preco_inicial")
+            if not _eh_numero(preco_inicial) or preco_inicial <= dados["lance_minimo"]:
+                return "Preço inicial do leilão holandês deve ser maior que o lance mínimo"
+            curva = dados.get("curva_preco", "linear")
+            if curva not in CURVAS_PRECO:
+                return f"Curva de preço inválida: {curva}"
+            intervalo = dados.get("intervalo_preco_s")
+            if intervalo is not None and (not _eh_inteiro(intervalo) or intervalo <= 0):
+                return "Intervalo de queda do preço deve ser positivo"
+        return None
+
     def adicionar_participante(self, participante: Participante):
         self.db.add(participante)
         self.db.commit()
@@ -25,72 +341,857 @@ class GerenciadorLeiloes:
         return participante
 
     def encontrar_leilao_por_id(self, leilao_id: int) -> Leilao:
-        return self.db.query(Leilao).filter(Leilao.id == leilao_id).first()
+        chave = ("leilao", leilao_id)
+        leilao = self._obter_do_cache(chave)
+        if leilao is None:
+            leilao = self.db.query(Leilao).filter(Leilao.id == leilao_id).first()
+            self._armazenar_no_cache(chave, leilao)
+        return leilao
 
     def encontrar_participante_por_cpf(self, cpf: str) -> Participante:
-        return self.db.query(Participante).filter(Participante.cpf == cpf).first()
+        chave = ("participante", cpf)
+        participante = self._obter_do_cache(chave)
+        if participante is None:
+            participante = self.db.query(Participante).filter(Participante.cpf == cpf).first()
+            self._armazenar_no_cache(chave, participante)
+        return participante
+
+    # O cache guarda só os valores das colunas (tuplas imutáveis), nunca objetos
+    # de uma sessão: o commit (expire_on_commit) expiraria os objetos
+    # compartilhados e cada acerto voltaria a consultar o banco. Em um acerto o
+    # objeto vem, sem SQL, do identity map (com as colunas expiradas repostas
+    # pelos valores guardados) ou é montado com esses valores e associado à
+    # sessão com merge(load=False).
+    def _obter_do_cache(self, chave):
+        if self.cache is None:
+            return None
+        copia = self.cache.obter(chave)
+        if copia is None:
+            return None
+        classe, valores = copia
+        objeto = self.db.identity_map.get(identity_key(classe, valores["id"]))
+        if objeto is not None:
+            estado = inspect(objeto)
+            if estado.modified:
+                # Alterações pendentes nesta sessão: trata como falha
+                return None
+            # Expirado pelo commit: recarrega as colunas a partir do cache
+            for atributo in estado.expired_attributes & valores.keys():
+                set_committed_value(objeto, atributo, valores[atributo])
+            return objeto
+        objeto = classe.__mapper__.class_manager.new_instance()
+        for atributo, valor in valores.items():
+            set_committed_value(objeto, atributo, valor)
+        make_transient_to_detached(objeto)
+        return self.db.merge(objeto, load=False)
+
+    def _armazenar_no_cache(self, chave, objeto):
+        if self.cache is not None and objeto is not None:
+            colunas = inspect(type(objeto)).column_attrs
+            valores = MappingProxyType({c.key: getattr(objeto, c.key) for c in colunas})
+            self.cache.definir(chave, (type(objeto), valores))
+
+    # Remove do cache a entrada de um leilão após qualquer escrita do gerenciador.
+    # apenas_lances: a escrita só gravou lances, então o estado em memória de um
+    # leilão quente continua válido (é atualizado por _publicar_lance).
+    def _invalidar_leilao(self, leilao_id: int, apenas_lances: bool = False):
+        if self.cache is not None:
+            self.cache.invalidar(("leilao", leilao_id))
+        if self.quentes is not None and not apenas_lances:
+            self.quentes.invalidar(leilao_id)
+
+    # Maior valor de lance calculado no banco (MAX sobre o índice (leilao_id, valor)).
+    # Equivalente a Leilao.maior_lance, mas sem carregar a coleção de lances.
+    def obter_maior_lance(self, leilao_id: int) -> float:
+        valor = self.db.query(func.max(Lance.valor)).filter(Lance.leilao_id == leilao_id).scalar()
+        return valor if valor is not None else 0
+
+    # Menor valor de lance calculado no banco (MIN sobre o mesmo índice).
+    def obter_menor_lance(self, leilao_id: int) -> float:
+        valor = self.db.query(func.min(Lance.valor)).filter(Lance.leilao_id == leilao_id).scalar()
+        return valor if valor is not None else 0
+
+    # Busca os lances de maior valor já com o Participante carregado, em uma única consulta.
+    # Em caso de empate vence o lance mais antigo, como em Leilao.identificar_vencedor.
+    def _consultar_maiores_lances(self, leilao_id: int, limite: int = 1) -> List[Lance]:
+        return (
+            self.db.query(Lance)
+            .join(Lance.participante)
+            .options(contains_eager(Lance.participante))
+            .filter(Lance.leilao_id == leilao_id)
+            .order_by(Lance.valor.desc(), Lance.id)
+            .limit(limite)
+            .all()
+        )
 
-    def abrir_leilao(self, leilao_id: int, data_abertura: datetime):
+    def _consultar_lance_vencedor(self, leilao_id: int) -> Optional[Lance]:
+        maiores = self._consultar_maiores_lances(leilao_id)
+        return maiores[0] if maiores else None
+
+    # Versão consultada no banco de Leilao.identificar_vencedor.
+    def identificar_vencedor(self, leilao_id: int) -> Optional[Lance]:
+        leilao = self.encontrar_leilao_por_id(leilao_id)
+        if not leilao:
+            raise ValueError("Leilão não encontrado")
+        if leilao.estado != EstadoLeilao.FINALIZADO:
+            raise ValueError("Leilão não finalizado")
+        return self._consultar_lance_vencedor(leilao_id)
+
+    # Sem data_abertura, usa a hora do relógio do gerenciador.
+    def abrir_leilao(self, leilao_id: int, data_abertura: Optional[datetime] = None):
+        data_abertura = data_abertura or self.relogio.agora()
         leilao = self.encontrar_leilao_por_id(leilao_id)
         if not leilao:
             raise ValueError("Leilão não encontrado")
         leilao.abrir(data_abertura)
+        ATRASO_ABERTURA.observar((data_abertura - leilao.data_inicio).total_seconds())
         self.db.commit()
+        self._invalidar_leilao(leilao_id)
 
-    def finalizar_leilao(self, leilao_id: int, data_finalizacao: datetime):
+    # Sem data_finalizacao, usa a hora do relógio do gerenciador.
+    def finalizar_leilao(self, leilao_id: int, data_finalizacao: Optional[datetime] = None):
+        data_finalizacao = data_finalizacao or self.relogio.agora()
         leilao = self.encontrar_leilao_por_id(leilao_id)
         if not leilao:
             raise ValueError("Leilão não encontrado")
+        if leilao.tipo.multiplo:
+            return self._finalizar_lote_multiplo(leilao, data_finalizacao)
         
-        leilao.finalizar(data_finalizacao)
+        # O lance vencedor (com o participante) e o segundo maior lance, que define
+        # o preço no leilão de segundo preço, vêm de uma única consulta indexada,
+        # então o custo não depende da quantidade de lances do leilão.
+        maiores = self._consultar_maiores_lances(leilao_id, limite=2)
+        lance_vencedor = maiores[0] if maiores else None
+        leilao.finalizar(data_finalizacao, possui_lances=lance_vencedor is not None)
+        ATRASO_FINALIZACAO.observar((data_finalizacao - leilao.data_fim).total_seconds())
+
+        # Copia os dados do e-mail antes do commit, que expira os objetos carregados.
+        finalizado = leilao.estado == EstadoLeilao.FINALIZADO
+        if finalizado:
+            leilao.preco_final = leilao.calcular_preco(
+                lance_vencedor.valor, maiores[1].valor if len(maiores) > 1 else None)
+            vencedor = lance_vencedor.participante
+            email_vencedor, nome_vencedor = vencedor.email, vencedor.nome
+            nome_item, valor_vencedor = leilao.nome, leilao.preco_final
+
         self.db.commit()
+        self._invalidar_leilao(leilao_id)
 
         # Se o leilão foi finalizado com um vencedor, envia o e-mail.
-        if leilao.estado == EstadoLeilao.FINALIZADO:
+        if finalizado:
+            self._notificar_vencedor(leilao_id, email_vencedor, nome_vencedor, nome_item, valor_vencedor)
+
+    # Finaliza um lote de múltiplas unidades. Os lances candidatos são lidos como
+    # arrays e apurados por alocar_unidades (seleção parcial + ordenação);
+    # as alocações são gravadas com um único executemany na transação que muda o
+    # estado. Cada participante tem um só lance, então recebe um só e-mail, com o
+    # total a pagar.
+    def _finalizar_lote_multiplo(self, leilao: Leilao, data_finalizacao: datetime):
+        # NumPy só é carregado por quem faz apuração em lote
+        import numpy as np
+        from models.apuracao import alocar_unidades
+
+        # Cada lance pede ao menos uma unidade, então só pode ser atendido quem
+        # está entre os `quantidade` maiores preços (ou empatado com o último):
+        # o corte vem do índice (leilao_id, valor) e só esses lances são lidos.
+        # Com menos lances que unidades não há corte e todos são candidatos.
+        corte = (
+            select(Lance.valor).where(Lance.leilao_id == leilao.id)
+            .order_by(Lance.valor.desc()).limit(1).offset(leilao.quantidade - 1)
+            .scalar_subquery()
+        )
+        lances = self.db.execute(
+            select(Lance.id, Lance.valor, Lance.quantidade, Lance.participante_id)
+            .where(Lance.leilao_id == leilao.id, Lance.valor >= func.coalesce(corte, leilao.lance_minimo))
+        ).all()
+        leilao.finalizar(data_finalizacao, possui_lances=bool(lances))
+        ATRASO_FINALIZACAO.observar((data_finalizacao - leilao.data_fim).total_seconds())
+        if not lances:
+            self.db.commit()
+            self._invalidar_leilao(leilao.id)
+            return
+
+        colunas = np.fromiter(chain.from_iterable(lances), dtype=np.float64, count=4 * len(lances)).reshape(-1, 4)
+        ids_lance, valores = colunas[:, 0].astype(np.int64), colunas[:, 1]
+        quantidades, participantes = colunas[:, 2].astype(np.int64), colunas[:, 3].astype(np.int64)
+        alocacoes = alocar_unidades(valores, quantidades, ids_lance, leilao.quantidade,
+                                    preco_uniforme=leilao.tipo == TipoLeilao.MULTIPLO_PRECO_UNIFORME)
+
+        leilao_id, nome_item = leilao.id, leilao.nome
+        linhas = [
+            {"leilao_id": leilao_id, "lance_id": l, "participante_id": p, "quantidade": q, "preco_unitario": v}
+            for l, p, q, v in zip(ids_lance[alocacoes.lances].tolist(), participantes[alocacoes.lances].tolist(),
+                                  alocacoes.unidades.tolist(), alocacoes.preco_unitario.tolist())
+        ]
+        self.db.execute(insert(Alocacao.__table__), linhas)
+        leilao.preco_final = float(alocacoes.preco_unitario.min())
+        # Junção com as alocações recém-gravadas: um IN com todos os vencedores
+        # passaria do limite de parâmetros do SQLite em lotes grandes
+        dados = {p.id: p for p in self.db.execute(
+            select(Participante.id, Participante.nome, Participante.email)
+            .join(Alocacao, Alocacao.participante_id == Participante.id)
+            .where(Alocacao.leilao_id == leilao_id))}
+        self.db.commit()
+        self._invalidar_leilao(leilao_id)
+
+        try:
+            email_service = EmailService(relogio=self.relogio)
+        except Exception as e:
+            print(f"ALERTA: Leilão ID {leilao_id} finalizado, mas o serviço de e-mail falhou: {e}")
+            return
+        for linha in linhas:
+            vencedor = dados[linha["participante_id"]]
+            self._notificar_vencedor(leilao_id, vencedor.email, vencedor.nome, nome_item,
+                                     linha["quantidade"] * linha["preco_unitario"], email_service)
+
+    # Envia o e-mail ao vencedor. Uma falha não desfaz a finalização: o erro é
+    # apenas registrado. email_service permite reaproveitar a conexão em lote.
+    def _notificar_vencedor(self, leilao_id, email_vencedor, nome_vencedor, nome_item, valor,
+                            email_service: Optional[EmailService] = None):
+        try:
+            email_service = email_service or EmailService(relogio=self.relogio)
+            email_service.enviar(
+                email_vencedor,
+                f"Parabéns! Você venceu o leilão '{nome_item}'",
+                "email_template.html",
+                {
+                    "nome_vencedor": nome_vencedor,
+                    "nome_item": nome_item,
+                    "valor_lance": f"{valor:.2f}",
+                    "ano": self.relogio.agora().year
+                }
+            )
+        except Exception as e:
+            # Mesmo que o e-mail falhe, o leilão já foi finalizado.
+            # Apenas registra o erro para análise posterior.
+            print(f"ALERTA: Leilão ID {leilao_id} finalizado, mas o e-mail para o vencedor falhou: {e}")
+
+    # Finaliza de uma vez todos os leilões selados ABERTOS cujo término já passou.
+    # Os lances de todos eles são lidos em uma consulta e apurados com NumPy
+    # (dois maiores por leilão, sem laço Python por leilão); estados e preços são
+    # gravados com um único executemany. Retorna as contagens e a duração.
+    def finalizar_leiloes_selados(self, data_finalizacao: Optional[datetime] = None) -> Dict[str, Any]:
+        # NumPy só é carregado por quem faz apuração em lote
+        import numpy as np
+        from models.apuracao import dois_maiores_por_grupo, precos_selados
+
+        data_finalizacao = data_finalizacao or self.relogio.agora()
+        inicio = time.perf_counter()
+        vencidos = (
+            select(Leilao.id, Leilao.lance_minimo, Leilao.tipo, Leilao.nome, Leilao.data_fim)
+            .where(Leilao.estado == EstadoLeilao.ABERTO, Leilao.tipo.in_(TIPOS_SELADOS),
+                   Leilao.data_fim <= data_finalizacao)
+            .order_by(Leilao.id)
+        )
+        leiloes = self.db.execute(vencidos).all()
+        if not leiloes:
+            return {'finalizados': 0, 'expirados': 0, 'duracao_s': 0.0}
+        ids = np.array([l.id for l in leiloes], dtype=np.int64)
+        minimos = np.array([l.lance_minimo for l in leiloes], dtype=np.float64)
+        segundo_preco = np.array([l.tipo == TipoLeilao.SELADO_SEGUNDO_PRECO for l in leiloes])
+
+        ids_vencidos = vencidos.with_only_columns(Leilao.id).order_by(None).scalar_subquery()
+        lances = self.db.execute(
+            select(Lance.leilao_id, Lance.valor, Lance.id, Lance.participante_id)
+            .where(Lance.leilao_id.in_(ids_vencidos))
+        ).all()
+        # fromiter sobre os valores achatados evita a conversão lenta de cada Row pelo NumPy
+        colunas = np.fromiter(chain.from_iterable(lances), dtype=np.float64, count=4 * len(lances)).reshape(-1, 4)
+        leilao_lance, valores, id_lance = colunas[:, 0].astype(np.int64), colunas[:, 1], colunas[:, 2]
+        participantes = colunas[:, 3].astype(np.int64)
+
+        apuracao = dois_maiores_por_grupo(leilao_lance, valores, id_lance)
+        posicao = np.searchsorted(ids, apuracao.grupos)
+        segundo_valor = np.where(apuracao.segundo >= 0, valores[apuracao.segundo], np.nan)
+        precos = precos_selados(valores[apuracao.primeiro], segundo_valor, minimos[posicao], segundo_preco[posicao])
+        expirados = ids[~np.isin(ids, apuracao.grupos)]
+
+        atualizar = (
+            update(_LEILOES)
+            .where(_LEILOES.c.id == bindparam("b_id"), _LEILOES.c.estado == EstadoLeilao.ABERTO)
+            .values(estado=bindparam("b_estado"), preco_final=bindparam("b_preco"))
+        )
+        self.db.execute(atualizar, [
+            {"b_id": i, "b_estado": EstadoLeilao.FINALIZADO, "b_preco": p}
+            for i, p in zip(apuracao.grupos.tolist(), precos.tolist())
+        ] + [{"b_id": i, "b_estado": EstadoLeilao.EXPIRADO, "b_preco": None} for i in expirados.tolist()])
+        self.db.commit()
+
+        for leilao in leiloes:
+            ATRASO_FINALIZACAO.observar((data_finalizacao - leilao.data_fim).total_seconds())
+            objeto = self.db.identity_map.get(identity_key(Leilao, leilao.id))
+            if objeto is not None:
+                self.db.expire(objeto)
+            self._invalidar_leilao(leilao.id)
+
+        # Um e-mail por vencedor, com os dados dos participantes lidos em uma consulta
+        # e um único EmailService para o lote
+        vencedores = participantes[apuracao.primeiro].tolist()
+        if vencedores:
+            nomes = {leilao.id: leilao.nome for leilao in leiloes}
+            dados = {p.id: p for p in self.db.execute(
+                select(Participante.id, Participante.nome, Participante.email)
+                .where(Participante.id.in_(set(vencedores))))}
             try:
-                vencedor = leilao.identificar_vencedor().participante
-                email_service = EmailService()
-                email_service.enviar(
-                    vencedor.email,
-                    f"Parabéns! Você venceu o leilão '{leilao.nome}'",
-                    "email_template.html",
-                    {
-                        "nome_vencedor": vencedor.nome,
-                        "nome_item": leilao.nome,
-                        "valor_lance": f"{leilao.maior_lance:.2f}",
-                        "ano": datetime.now().year
-                    }
-                )
+                email_service = EmailService(relogio=self.relogio)
             except Exception as e:
-                # Mesmo que o e-mail falhe, o leilão já foi finalizado.
-                # Apenas registra o erro para análise posterior.
-                print(f"ALERTA: Leilão ID {leilao.id} finalizado, mas o e-mail para o vencedor falhou: {e}")
+                print(f"ALERTA: {len(vencedores)} leilões selados finalizados, mas o serviço de e-mail falhou: {e}")
+                email_service = None
+            if email_service is not None:
+                for leilao_id, participante_id, preco in zip(apuracao.grupos.tolist(), vencedores, precos.tolist()):
+                    vencedor = dados[participante_id]
+                    self._notificar_vencedor(leilao_id, vencedor.email, vencedor.nome, nomes[leilao_id],
+                                             preco, email_service)
 
-    def adicionar_lance(self, leilao_id: int, lance: Lance):
+        return {'finalizados': len(apuracao.grupos), 'expirados': len(expirados),
+                'duracao_s': round(time.perf_counter() - inicio, 3)}
+
+    # Com chave_idempotencia, o reenvio de um lance já aceito (mesmo participante
+    # e chave) devolve o lance gravado na primeira vez, sem revalidar nem tocar no
+    # leilão. Recusas não são guardadas: um lance recusado não altera nada, então
+    # reenviá-lo apenas repete a validação.
+    def adicionar_lance(self, leilao_id: int, lance: Lance, chave_idempotencia: Optional[str] = None) -> Lance:
+        return self._com_idempotencia(self._adicionar_lance, leilao_id, lance, chave_idempotencia)
+
+    @_medir_lance("orm")
+    def _adicionar_lance(self, leilao_id: int, lance: Lance, chave_idempotencia: Optional[str] = None) -> Lance:
+        self._pre_validar_quente(leilao_id, lance.valor)
         leilao = self.encontrar_leilao_por_id(leilao_id)
         if not leilao:
             raise ValueError("Leilão não encontrado")
-        
-        if leilao.estado != EstadoLeilao.ABERTO:
+
+        if leilao.tipo == TipoLeilao.HOLANDES:
+            raise ValueError("Leilão holandês só aceita arremate pelo preço atual")
+        self._validar_quantidade(leilao.quantidade, lance.quantidade)
+        if leilao.tipo.oculto:
+            self._validar_lance_selado(
+                leilao.estado, leilao.lance_minimo,
+                self._participantes_com_lance(leilao_id, [lance.participante_id]),
+                lance.valor, lance.participante_id
+            )
+        else:
+            ultimo = leilao.lances[-1] if leilao.lances else None
+            self._validar_lance(
+                leilao.estado, leilao.lance_minimo,
+                (ultimo.valor, ultimo.participante_id) if ultimo else None,
+                lance.valor, lance.participante_id
+            )
+
+        self.db.add(lance)
+        # Flush explícito (as sessões do projeto usam autoflush=False): gera o id
+        # para a chave e deixa o lance visível ao INSERT condicional dos automáticos
+        self.db.flush()
+        # Soft-close pelo mesmo UPDATE do caminho rápido: a soma é feita pelo banco,
+        # então lances concorrentes não perdem prorrogações, e entra no commit do lance
+        prorrogado = self.db.execute(
+            _PRORROGAR_LEILAO, {"leilao_id": leilao_id, "data_hora": lance.data_hora}).rowcount > 0
+        if chave_idempotencia is not None:
+            self._gravar_chave_idempotencia(lance.participante_id, chave_idempotencia, lance.id)
+        automaticos = self._responder_lances_automaticos(
+            leilao_id, (lance.valor, lance.participante_id), lance.valor, lance.data_hora)
+        # Lido antes do commit, que expira o lance
+        ultimo = automaticos[-1] if automaticos else lance
+        preco = (ultimo.valor, ultimo.participante_id)
+        self.db.commit()
+        self._anexar_lances_gravados(automaticos)
+        self._expirar_lances_carregados(leilao_id, prorrogado or bool(automaticos))
+        self._publicar_lance(leilao_id, *preco)
+        return lance
+
+    # Regras de aceitação de um lance, compartilhadas pelos caminhos ORM e Core.
+    # ultimo é a tupla (valor, participante_id) do último lance ou None.
+    @staticmethod
+    def _validar_lance(estado, lance_minimo, ultimo, valor, participante_id):
+        if estado != EstadoLeilao.ABERTO:
             raise ValueError("Leilão deve estar ABERTO para receber lances")
 
-        if lance.valor < leilao.lance_minimo:
-            raise ValueError(f"Lance deve ser >= R${leilao.lance_minimo:.2f}")
+        if valor < lance_minimo:
+            raise ValueError(f"Lance deve ser >= R${lance_minimo:.2f}")
 
-        if leilao.lances and lance.valor <= leilao.lances[-1].valor:
+        if ultimo and valor <= ultimo[0]:
             raise ValueError("Lance deve ser maior que o último lance")
 
-        if leilao.lances and lance.participante_id == leilao.lances[-1].participante_id:
+        if ultimo and participante_id == ultimo[1]:
             raise ValueError("Participante não pode dar dois lances consecutivos")
 
-        self.db.add(lance)
+    # Regras do leilão selado: os lances não precisam superar o anterior, mas
+    # cada participante envia um só. com_lance é o conjunto de participantes
+    # que já enviaram lance ao leilão.
+    @staticmethod
+    def _validar_lance_selado(estado, lance_minimo, com_lance, valor, participante_id):
+        if estado != EstadoLeilao.ABERTO:
+            raise ValueError("Leilão deve estar ABERTO para receber lances")
+
+        if valor < lance_minimo:
+            raise ValueError(f"Lance deve ser >= R${lance_minimo:.2f}")
+
+        if participante_id in com_lance:
+            raise ValueError("Participante já enviou um lance para este leilão selado")
+
+    # Cada lance pede de 1 até todas as unidades do lote (sempre 1 fora dos lotes
+    # de múltiplas unidades).
+    @staticmethod
+    def _validar_quantidade(unidades_lote, quantidade):
+        if not 1 <= quantidade <= unidades_lote:
+            raise ValueError(f"Quantidade do lance deve estar entre 1 e {unidades_lote}")
+
+    # Participantes, entre os informados, que já têm lance no leilão
+    # (índice (participante_id, leilao_id)).
+    def _participantes_com_lance(self, leilao_id: int, participantes: List[int]) -> set:
+        return set(self.db.execute(
+            select(Lance.participante_id).where(Lance.leilao_id == leilao_id, Lance.participante_id.in_(participantes))
+        ).scalars())
+
+    # --- Caminho rápido de lances (Core, sem o unit of work do ORM) ---
+    # Indicado para sessões criadas com expire_on_commit=False (ver
+    # models.database.SessionRapida), para que o commit não expire os objetos carregados.
+
+    # Grava um lance com um único INSERT condicional e retorna o próprio lance,
+    # já persistente no identity map da sessão (sem novo SELECT).
+    # chave_idempotencia: como em adicionar_lance.
+    def adicionar_lance_rapido(self, leilao_id: int, lance: Lance, chave_idempotencia: Optional[str] = None) -> Lance:
+        return self._com_idempotencia(self._adicionar_lance_rapido, leilao_id, lance, chave_idempotencia)
+
+    @_medir_lance("rapido")
+    def _adicionar_lance_rapido(self, leilao_id: int, lance: Lance, chave_idempotencia: Optional[str] = None) -> Lance:
+        self._pre_validar_quente(leilao_id, lance.valor)
+        lance.leilao_id = leilao_id
+        parametros = self._parametros_lance(lance)
+        novo_id = self.db.execute(_INSERT_LANCE_RETORNANDO_ID, parametros).scalar()
+        if novo_id is None:
+            # Nada foi gravado: encerra a transação sem rollback, que expiraria
+            # todos os objetos da sessão
+            self.db.commit()
+            self._diagnosticar_lance_recusado(leilao_id, [lance])
+
+        if chave_idempotencia is not None:
+            self._gravar_chave_idempotencia(lance.participante_id, chave_idempotencia, novo_id)
+        prorrogado = self.db.execute(_PRORROGAR_LEILAO, parametros).rowcount > 0
+        automaticos = self._responder_lances_automaticos(
+            leilao_id, (lance.valor, lance.participante_id), lance.valor, lance.data_hora)
+        self.db.commit()
+        lance.id = novo_id
+        self._anexar_lances_gravados([lance] + automaticos)
+        self._expirar_lances_carregados(leilao_id, prorrogado or bool(automaticos))
+        ultimo = automaticos[-1] if automaticos else lance
+        self._publicar_lance(leilao_id, ultimo.valor, ultimo.participante_id)
+        return lance
+
+    # Limite de taxa, antes de qualquer acesso ao banco. Nos lances com chave de
+    # idempotência vem logo depois da consulta da chave: o reenvio de um lance
+    # já aceito devolve o lance gravado sem consumir a cota. Os lances em lote
+    # não passam por aqui: são carga administrativa, não de um participante.
+    def _limitar(self, leilao_id: int, participante_id: int):
+        if self.limitador is not None:
+            try:
+                self.limitador.verificar(leilao_id, participante_id)
+            except ValueError as e:
+                _rejeitar(e)
+                raise
+
+    # --- Idempotência de lances ---
+
+    # Devolve o lance já gravado com a chave ou executa gravar. A chave é gravada
+    # na mesma transação do lance (chave primária (participante_id, chave)), então
+    # entre reenvios simultâneos só um grava; os demais são recusados e devolvem
+    # o lance do vencedor. O limite de taxa só é cobrado de lances novos.
+    def _com_idempotencia(self, gravar, leilao_id: int, lance: Lance, chave: Optional[str]) -> Lance:
+        if chave is None:
+            self._limitar(leilao_id, lance.participante_id)
+            return gravar(leilao_id, lance)
+        if not 0 < len(chave) <= TAMANHO_MAXIMO_CHAVE:
+            raise ValueError(f"Chave de idempotência deve ter de 1 a {TAMANHO_MAXIMO_CHAVE} caracteres")
+        gravado = self._lance_da_chave(lance.participante_id, chave)
+        if gravado is not None:
+            return gravado
+        self._limitar(leilao_id, lance.participante_id)
+        # Lidos antes da gravação: no caminho ORM o commit expira o lance
+        dados = (lance.valor, lance.participante_id, leilao_id, lance.data_hora, lance.quantidade)
+        try:
+            gravado = gravar(leilao_id, lance, chave)
+        except (IntegrityError, ValueError) as e:
+            # Um reenvio simultâneo pode ter gravado o lance depois da consulta:
+            # este é então recusado pelo INSERT condicional ou pela chave primária
+            if isinstance(e, IntegrityError):
+                self.db.rollback()
+            gravado = self._lance_da_chave(lance.participante_id, chave)
+            if gravado is None:
+                raise
+            return gravado
+        if self.idempotencia is not None:
+            # A identidade (id) está disponível mesmo com o lance expirado
+            self.idempotencia.definir(("idempotencia", lance.participante_id, chave),
+                                      (inspect(gravado).identity[0],) + dados)
+        return gravado
+
+    # Lance gravado com a chave: do cache em memória ou de uma consulta pela
+    # chave primária da tabela de chaves (junto com o lance, pela chave primária
+    # dele). O leilão não é lido. Retorna None se a chave ainda não foi usada.
+    def _lance_da_chave(self, participante_id: int, chave: str) -> Optional[Lance]:
+        chave_cache = ("idempotencia", participante_id, chave)
+        dados = self.idempotencia.obter(chave_cache) if self.idempotencia is not None else None
+        origem = "memoria"
+        if dados is None:
+            dados = self.db.execute(
+                select(Lance.id, Lance.valor, Lance.participante_id, Lance.leilao_id, Lance.data_hora,
+                       Lance.quantidade)
+                .join(ChaveIdempotencia, ChaveIdempotencia.lance_id == Lance.id)
+                .where(ChaveIdempotencia.participante_id == participante_id, ChaveIdempotencia.chave == chave)
+            ).first()
+            if dados is None:
+                return None
+            dados = tuple(dados)
+            origem = "banco"
+            if self.idempotencia is not None:
+                self.idempotencia.definir(chave_cache, dados)
+        LANCES_REPETIDOS.rotulado(origem).inc()
+
+        lance_id, valor, participante_id, leilao_id, data_hora, quantidade = dados
+        lance = self.db.identity_map.get(identity_key(Lance, lance_id))
+        if lance is None:
+            lance = Lance(valor, participante_id, leilao_id, data_hora, quantidade)
+            lance.id = lance_id
+            self._anexar_lances_gravados([lance])
+        return lance
+
+    # Grava a chave na transação do lance; o cache em memória só recebe o
+    # resultado depois do commit, em _com_idempotencia.
+    def _gravar_chave_idempotencia(self, participante_id: int, chave: str, lance_id: int):
+        self.db.execute(insert(ChaveIdempotencia.__table__), {
+            "participante_id": participante_id, "chave": chave, "lance_id": lance_id,
+            "criada_em": self.relogio.agora(),
+        })
+
+    # Remove as chaves de idempotência gravadas há mais de ttl (índice de criada_em).
+    # Depois disso, um reenvio com a mesma chave é tratado como um lance novo.
+    def limpar_chaves_idempotencia(self, ttl: timedelta = TTL_IDEMPOTENCIA) -> int:
+        limite = self.relogio.agora() - ttl
+        removidas = self.db.execute(
+            delete(ChaveIdempotencia.__table__).where(ChaveIdempotencia.criada_em < limite)).rowcount
+        self.db.commit()
+        return removidas
+
+    # Grava vários lances de um leilão com um único executemany do INSERT condicional.
+    # O lote é validado antes em memória; se algum lance for recusado pelo banco
+    # (por exemplo, por um lance concorrente), nada é gravado.
+    @_medir_lance("lote")
+    def adicionar_lances_em_lote(self, leilao_id: int, lances: List[Lance]) -> int:
+        if not lances:
+            return 0
+        for lance in lances:
+            lance.leilao_id = leilao_id
+        if self.quentes is not None:
+            self.quentes.registrar(leilao_id, len(lances))
+        self._diagnosticar_lance_recusado(leilao_id, lances, apenas_validar=True)
+
+        parametros = [self._parametros_lance(l) for l in lances]
+        resultado = self.db.execute(_INSERT_LANCE, parametros)
+        if resultado.rowcount != len(lances):
+            self.db.rollback()
+            raise ValueError("Lote recusado: o leilão recebeu outros lances durante a gravação")
+
+        # Soft-close lance a lance, na ordem do lote: cada prorrogação vale para o lance seguinte
+        prorrogado = self.db.execute(_PRORROGAR_LEILAO, parametros).rowcount > 0
+        ultimo = lances[-1]
+        automaticos = self._responder_lances_automaticos(
+            leilao_id, (ultimo.valor, ultimo.participante_id), ultimo.valor, ultimo.data_hora)
         self.db.commit()
+        self._anexar_lances_gravados(automaticos)
+        self._expirar_lances_carregados(leilao_id, prorrogado or bool(automaticos))
+        ultimo = automaticos[-1] if automaticos else ultimo
+        self._publicar_lance(leilao_id, ultimo.valor, ultimo.participante_id)
+        return len(lances)
+
+    # Preço atual de um leilão holandês, calculado na leitura a partir do cronograma.
+    def obter_preco_atual(self, leilao_id: int, momento: Optional[datetime] = None) -> float:
+        leilao = self.encontrar_leilao_por_id(leilao_id)
+        if not leilao:
+            raise ValueError("Leilão não encontrado")
+        return leilao.preco_atual(momento or self.relogio.agora())
+
+    # Arremata um leilão holandês pelo preço do momento: o primeiro comprador
+    # vence e encerra o leilão. O preço vem do cronograma (imutável) e o arremate
+    # é um UPDATE condicional, gravado com o lance na mesma transação.
+    def arrematar_leilao_holandes(self, leilao_id: int, participante_id: int,
+                                  momento: Optional[datetime] = None) -> Lance:
+        self._limitar(leilao_id, participante_id)
+        return self._arrematar_leilao_holandes(leilao_id, participante_id, momento)
+
+    @_medir_lance("holandes")
+    def _arrematar_leilao_holandes(self, leilao_id: int, participante_id: int,
+                                   momento: Optional[datetime] = None) -> Lance:
+        momento = momento or self.relogio.agora()
+        dados = self.db.execute(
+            select(Leilao.tipo, Leilao.estado, Leilao.nome, Leilao.lance_minimo, Leilao.data_inicio,
+                   Leilao.data_fim, Leilao.preco_inicial, Leilao.curva_preco, Leilao.intervalo_preco_s)
+            .where(Leilao.id == leilao_id)
+        ).first()
+        if dados is None:
+            raise ValueError("Leilão não encontrado")
+        if dados.tipo != TipoLeilao.HOLANDES:
+            raise ValueError("Arremate pelo preço atual só existe em leilões holandeses")
+        preco = calcular_preco_holandes(dados.preco_inicial, dados.lance_minimo, dados.data_inicio,
+                                        dados.data_fim, momento, dados.curva_preco, dados.intervalo_preco_s)
+
+        parametros = {"leilao_id": leilao_id, "valor": preco, "data_hora": momento}
+        if self.db.execute(_ARREMATAR_HOLANDES, parametros).rowcount == 0:
+            self.db.rollback()
+            no_prazo = dados.data_inicio <= momento <= dados.data_fim
+            if dados.estado == EstadoLeilao.FINALIZADO or (dados.estado == EstadoLeilao.ABERTO and no_prazo):
+                # Aberto e no prazo quando lido: outro comprador arrematou no meio tempo
+                raise ValueError("Leilão já foi arrematado")
+            if dados.estado == EstadoLeilao.ABERTO and momento > dados.data_fim:
+                raise ValueError("Leilão holandês encerrado sem comprador")
+            raise ValueError("Leilão deve estar ABERTO para receber lances")
+
+        lance = Lance(preco, participante_id, leilao_id, momento)
+        lance.id = self.db.execute(insert(Lance.__table__).returning(Lance.__table__.c.id),
+                                   self._parametros_lance(lance)).scalar()
+        vencedor = self.db.execute(
+            select(Participante.nome, Participante.email).where(Participante.id == participante_id)).first()
+        self.db.commit()
+        self._anexar_lances_gravados([lance])
+        leilao = self.db.identity_map.get(identity_key(Leilao, leilao_id))
+        if leilao is not None:
+            self.db.expire(leilao, ["estado", "preco_final", "lances"])
+        self._invalidar_leilao(leilao_id)
+
+        if vencedor is not None:
+            self._notificar_vencedor(leilao_id, vencedor.email, vencedor.nome, dados.nome, preco)
+        return lance
+
+    # Registra (ou altera) o valor máximo oculto até o qual o sistema dá lances
+    # pelo participante e resolve a disputa com os demais máximos do leilão na
+    # mesma transação. Retorna os lances visíveis gravados (nenhum, um ou dois).
+    def registrar_lance_automatico(self, leilao_id: int, participante_id: int, valor_maximo: float,
+                                   data_hora: Optional[datetime] = None) -> List[Lance]:
+        self._limitar(leilao_id, participante_id)
+        data_hora = data_hora or self.relogio.agora()
+        dados = self.db.execute(
+            select(Leilao.estado, Leilao.lance_minimo, Leilao.tipo).where(Leilao.id == leilao_id)
+        ).first()
+        if dados is None:
+            raise ValueError("Leilão não encontrado")
+        if dados.tipo != TipoLeilao.INGLES:
+            raise ValueError("Lances automáticos só são aceitos em leilões ingleses")
+        if dados.estado != EstadoLeilao.ABERTO:
+            raise ValueError("Leilão deve estar ABERTO para receber lances")
+        if valor_maximo < dados.lance_minimo:
+            raise ValueError(f"Lance deve ser >= R${dados.lance_minimo:.2f}")
+
+        # A gravação do máximo obtém o lock de escrita do SQLite: o último lance
+        # lido a seguir não muda até o commit
+        self.db.execute(_REGISTRAR_AUTOMATICO, {
+            "participante_id": participante_id, "leilao_id": leilao_id,
+            "valor_maximo": valor_maximo, "data_hora": data_hora,
+        })
+        ultimo = self.db.execute(_consulta_ultimo_lance(leilao_id)).first()
+        if ultimo is not None and valor_maximo <= ultimo.valor:
+            self.db.rollback()
+            raise ValueError(f"Lance máximo deve ser maior que o último lance (R${ultimo.valor:.2f})")
+
+        automaticos = self._responder_lances_automaticos(
+            leilao_id, tuple(ultimo) if ultimo else None, dados.lance_minimo, data_hora)
+        self.db.commit()
+        self._anexar_lances_gravados(automaticos)
+        self._expirar_lances_carregados(leilao_id, bool(automaticos))
+        if automaticos:
+            self._publicar_lance(leilao_id, automaticos[-1].valor, automaticos[-1].participante_id)
+        return automaticos
+
+    # Resolve os lances automáticos depois de um lance aceito (ultimo) ou de um
+    # novo máximo, dentro da transação do chamador: uma consulta indexada pelos
+    # dois maiores máximos e um INSERT condicional por lance visível resultante.
+    # Sem máximos registrados no leilão, custa apenas a consulta.
+    def _responder_lances_automaticos(self, leilao_id: int, ultimo, lance_minimo: float,
+                                      data_hora: datetime) -> List[Lance]:
+        maximos = [Maximo._make(linha) for linha in self.db.execute(_TOPO_AUTOMATICOS, {"leilao_id": leilao_id})]
+        if not maximos:
+            return []
+        gravados = []
+        for valor, participante_id in resolver_lances_automaticos(ultimo, lance_minimo, maximos):
+            lance = Lance(valor, participante_id, leilao_id, data_hora)
+            parametros = self._parametros_lance(lance)
+            lance.id = self.db.execute(_INSERT_LANCE_RETORNANDO_ID, parametros).scalar()
+            if lance.id is None:
+                self.db.rollback()
+                raise ValueError("Lances automáticos recusados: o leilão recebeu outros lances durante a gravação")
+            self.db.execute(_PRORROGAR_LEILAO, parametros)
+            gravados.append(lance)
+        LANCES_ACEITOS.rotulado("automatico").inc(len(gravados))
+        return gravados
+
+    # --- Escritor único por shard (services.shards) ---
+
+    # Estado de que a thread dona do shard precisa para validar lances em
+    # memória. A transação de leitura é encerrada em seguida, para não segurar
+    # o banco enquanto o estado é usado.
+    def carregar_estado_shard(self, leilao_id: int) -> Optional[EstadoShard]:
+        dados = self.db.execute(
+            select(Leilao.tipo, Leilao.estado, Leilao.lance_minimo, Leilao.quantidade, Leilao.data_fim,
+                   Leilao.janela_prorrogacao_s, Leilao.prorrogacao_s,
+                   exists().where(_AUTOMATICOS.c.leilao_id == leilao_id))
+            .where(Leilao.id == leilao_id)
+        ).first()
+        ultimo, com_lance = None, set()
+        if dados is not None and dados.tipo.oculto:
+            com_lance = set(self.db.execute(
+                select(Lance.participante_id).where(Lance.leilao_id == leilao_id)).scalars())
+        elif dados is not None:
+            linha = self.db.execute(_consulta_ultimo_lance(leilao_id)).first()
+            ultimo = tuple(linha) if linha else None
+        self.db.commit()
+        return EstadoShard(*dados, ultimo, com_lance) if dados is not None else None
+
+    # Regras de aceitação dos outros caminhos, com as mesmas mensagens, sobre o
+    # estado mantido em memória pelo dono do shard.
+    @classmethod
+    def validar_lance_shard(cls, estado: EstadoShard, lance: Lance):
+        try:
+            if estado.tipo == TipoLeilao.HOLANDES:
+                raise ValueError("Leilão holandês só aceita arremate pelo preço atual")
+            cls._validar_quantidade(estado.quantidade, lance.quantidade)
+            if estado.tipo.oculto:
+                cls._validar_lance_selado(estado.estado, estado.lance_minimo, estado.com_lance,
+                                          lance.valor, lance.participante_id)
+            else:
+                cls._validar_lance(estado.estado, estado.lance_minimo, estado.ultimo,
+                                   lance.valor, lance.participante_id)
+        except ValueError as e:
+            _rejeitar(e)
+            raise
+
+    # Grava em uma transação os lances já validados pelo dono do shard, na ordem
+    # em que foram aceitos, e os novos data_fim do soft-close. Como ele é o único
+    # escritor dos seus leilões, o INSERT dispensa as condições do caminho rápido;
+    # os ids vêm do RETURNING, e não do maior id da tabela, que outro escritor no
+    # mesmo arquivo poderia alterar. Os lances recebem o id mas não entram no
+    # identity map (são devolvidos a outras threads ou processos).
+    @_medir_lance("shard")
+    def gravar_lances_shard(self, lances: List[Lance], datas_fim: Dict[int, datetime]) -> int:
+        ids = self.db.execute(_INSERT_LANCES_RETORNANDO_IDS,
+                              [self._parametros_lance(lance) for lance in lances]).scalars().all()
+        if datas_fim:
+            self.db.execute(_DEFINIR_DATA_FIM, [{"b_leilao_id": leilao_id, "b_data_fim": data_fim}
+                                                for leilao_id, data_fim in datas_fim.items()])
+        self.db.commit()
+        for novo_id, lance in zip(ids, lances):
+            lance.id = novo_id
+        ultimos = {lance.leilao_id: lance for lance in lances}
+        for leilao_id, ultimo in ultimos.items():
+            self._expirar_lances_carregados(leilao_id, leilao_id in datas_fim)
+            self._publicar_lance(leilao_id, ultimo.valor, ultimo.participante_id)
+        return len(lances)
+
+    # --- Leilões quentes (services.leiloes_quentes) ---
+
+    # Conta a tentativa de lance e, se o leilão está quente, recusa em memória o
+    # lance que já perdeu. Só são usados fatos que não voltam atrás (o último
+    # valor de um leilão inglês só cresce e um leilão encerrado não reabre),
+    # então um estado desatualizado nunca recusa um lance válido: o que passa
+    # daqui continua sendo decidido pelo banco.
+    def _pre_validar_quente(self, leilao_id: int, valor: float):
+        if self.quentes is None or not self.quentes.registrar(leilao_id):
+            return
+        estado = self.quentes.estado(leilao_id) or self._carregar_estado_quente(leilao_id)
+        if estado is None or estado.tipo != TipoLeilao.INGLES:
+            return
+        motivo = None
+        if estado.estado in (EstadoLeilao.FINALIZADO, EstadoLeilao.EXPIRADO):
+            motivo = "Leilão deve estar ABERTO para receber lances"
+        elif estado.estado == EstadoLeilao.ABERTO:
+            if valor < estado.lance_minimo:
+                motivo = f"Lance deve ser >= R${estado.lance_minimo:.2f}"
+            elif estado.ultimo_valor is not None and valor <= estado.ultimo_valor:
+                motivo = "Lance deve ser maior que o último lance"
+        if motivo:
+            RECUSAS_EM_MEMORIA.inc()
+            raise ValueError(motivo)
+
+    # Lê em uma consulta o estado de um leilão recém-promovido (ou invalidado).
+    def _carregar_estado_quente(self, leilao_id: int) -> Optional[EstadoQuente]:
+        maior_lance = select(func.max(Lance.valor)).where(Lance.leilao_id == leilao_id).scalar_subquery()
+        linha = self.db.execute(
+            select(Leilao.tipo, Leilao.estado, Leilao.lance_minimo, maior_lance).where(Leilao.id == leilao_id)
+        ).first()
+        if linha is None:
+            return None
+        estado = EstadoQuente._make(linha)
+        self.quentes.guardar_estado(leilao_id, estado)
+        return estado
+
+    # Atualiza o estado em memória e difunde o preço após um lance gravado.
+    def _publicar_lance(self, leilao_id: int, valor: float, participante_id: int):
+        if self.quentes is not None:
+            self.quentes.lance_aceito(leilao_id, valor, participante_id)
+
+    # Coloca no identity map, sem SQL, lances gravados pelo Core e já commitados.
+    def _anexar_lances_gravados(self, lances: List[Lance]):
+        for lance in lances:
+            make_transient_to_detached(lance)
+            self.db.add(lance)
+
+    @staticmethod
+    def _parametros_lance(lance: Lance) -> dict:
+        return {
+            "valor": lance.valor,
+            "participante_id": lance.participante_id,
+            "leilao_id": lance.leilao_id,
+            "data_hora": lance.data_hora,
+            "quantidade": lance.quantidade,
+        }
+
+    # Reproduz em memória a validação do INSERT condicional para gerar a mesma
+    # mensagem de erro de adicionar_lance. Com apenas_validar=False, sempre
+    # levanta ValueError (o lance já foi recusado pelo banco).
+    def _diagnosticar_lance_recusado(self, leilao_id: int, lances: List[Lance], apenas_validar: bool = False):
+        dados = self.db.execute(
+            select(Leilao.estado, Leilao.lance_minimo, Leilao.tipo, Leilao.quantidade).where(Leilao.id == leilao_id)
+        ).first()
+        if dados is None:
+            raise ValueError("Leilão não encontrado")
+
+        if dados.tipo == TipoLeilao.HOLANDES:
+            raise ValueError("Leilão holandês só aceita arremate pelo preço atual")
+        for lance in lances:
+            self._validar_quantidade(dados.quantidade, lance.quantidade)
+        if dados.tipo.oculto:
+            com_lance = self._participantes_com_lance(leilao_id, [l.participante_id for l in lances])
+            for lance in lances:
+                self._validar_lance_selado(dados.estado, dados.lance_minimo, com_lance,
+                                           lance.valor, lance.participante_id)
+                com_lance.add(lance.participante_id)
+            if not apenas_validar:
+                raise ValueError("Participante já enviou um lance para este leilão selado")
+            return
+
+        ultimo = self.db.execute(_consulta_ultimo_lance(leilao_id)).first()
+        for lance in lances:
+            self._validar_lance(dados.estado, dados.lance_minimo, ultimo, lance.valor, lance.participante_id)
+            ultimo = (lance.valor, lance.participante_id)
+
+        if not apenas_validar:
+            # Passou na validação em memória: outro escritor mudou o leilão no meio tempo
+            raise ValueError("Lance deve ser maior que o último lance")
+
+    # Mantém o identity map consistente: a coleção Leilao.lances já carregada
+    # não contém os lances gravados pelo Core, então é expirada (sem SQL agora),
+    # assim como data_fim quando o soft-close prorrogou o leilão.
+    def _expirar_lances_carregados(self, leilao_id: int, prorrogado: bool = False):
+        leilao = self.db.identity_map.get(identity_key(Leilao, leilao_id))
+        if leilao is not None:
+            self.db.expire(leilao, ["lances", "data_fim"] if prorrogado else ["lances"])
+        self._invalidar_leilao(leilao_id, apenas_lances=True)
 
     def listar_leiloes(self, 
                       estado: EstadoLeilao = None, 
                       data_inicio: datetime = None, 
                       data_fim: datetime = None) -> List[Leilao]:
-        query = self.db.query(Leilao)
+        query = self._filtrar_leiloes(self.db.query(Leilao), estado, data_inicio, data_fim)
+        return query.all()
+
+    # Aplica os filtros de listar_leiloes tanto a uma Query do ORM quanto a um select().
+    def _filtrar_leiloes(self, query, estado, data_inicio, data_fim):
         if data_inicio and data_fim and data_inicio > data_fim:
             raise ValueError("Data de início não pode ser maior que data de término")
         if estado:
@@ -99,7 +1200,67 @@ class GerenciadorLeiloes:
             query = query.filter(Leilao.data_inicio >= data_inicio)
         if data_fim:
             query = query.filter(Leilao.data_fim <= data_fim)
-        return query.all()
+        return query
+
+    # Atualiza o medidor de leilões por estado com uma contagem agrupada no banco.
+    # Feito para ser registrado como coletor: REGISTRO.registrar_coletor(gerenciador.coletar_leiloes_por_estado)
+    def coletar_leiloes_por_estado(self):
+        contagens = dict(self.db.execute(select(Leilao.estado, func.count()).group_by(Leilao.estado)).all())
+        for estado in EstadoLeilao:
+            LEILOES_POR_ESTADO.rotulado(estado.name).definir(contagens.get(estado, 0))
+
+    # --- Consultas de leitura leves (sem hidratar objetos do ORM) ---
+
+    # Mesmos filtros de listar_leiloes, retornando LeilaoResumo com o maior lance atual.
+    def listar_leiloes_resumo(self,
+                              estado: EstadoLeilao = None,
+                              data_inicio: datetime = None,
+                              data_fim: datetime = None) -> List[LeilaoResumo]:
+        maior_lance = (
+            select(func.max(Lance.valor))
+            .where(Lance.leilao_id == Leilao.id)
+            .correlate(Leilao)
+            .scalar_subquery()
+        )
+        consulta = select(
+            Leilao.id, Leilao.nome, Leilao.estado, Leilao.lance_minimo,
+            Leilao.data_inicio, Leilao.data_fim, func.coalesce(maior_lance, 0)
+        )
+        consulta = self._filtrar_leiloes(consulta, estado, data_inicio, data_fim)
+        return [LeilaoResumo._make(linha) for linha in self.db.execute(consulta)]
+
+    # Histórico de lances de um leilão, do menor para o maior valor.
+    # Os lances de leilões selados e de lotes de múltiplas unidades ficam ocultos até o encerramento.
+    def listar_lances_resumo(self, leilao_id: int) -> List[LanceResumo]:
+        dados = self.db.execute(select(Leilao.tipo, Leilao.estado).where(Leilao.id == leilao_id)).first()
+        if dados and dados.tipo.oculto and dados.estado in (EstadoLeilao.INATIVO, EstadoLeilao.ABERTO):
+            raise ValueError("Lances de leilão selado ficam ocultos até a finalização")
+        consulta = (
+            select(Lance.id, Lance.valor, Lance.participante_id, Participante.nome, Lance.data_hora)
+            .join(Participante, Participante.id == Lance.participante_id)
+            .where(Lance.leilao_id == leilao_id)
+            .order_by(Lance.valor, Lance.id)
+        )
+        return [LanceResumo._make(linha) for linha in self.db.execute(consulta)]
+
+    # Unidades atribuídas na finalização de um lote de múltiplas unidades, do
+    # maior preço ao menor (ordem em que foram gravadas).
+    def listar_alocacoes(self, leilao_id: int) -> List[AlocacaoResumo]:
+        consulta = (
+            select(Alocacao.lance_id, Alocacao.participante_id, Participante.nome,
+                   Alocacao.quantidade, Alocacao.preco_unitario)
+            .join(Participante, Participante.id == Alocacao.participante_id)
+            .where(Alocacao.leilao_id == leilao_id)
+            .order_by(Alocacao.id)
+        )
+        return [AlocacaoResumo._make(linha) for linha in self.db.execute(consulta)]
+
+    def encontrar_participante_resumo(self, cpf: str) -> Optional[ParticipanteResumo]:
+        consulta = select(
+            Participante.id, Participante.cpf, Participante.nome, Participante.email
+        ).where(Participante.cpf == cpf)
+        linha = self.db.execute(consulta).first()
+        return ParticipanteResumo._make(linha) if linha else None
 
     def editar_leilao(self, leilao_id: int, 
                      novo_nome: str = None, 
@@ -117,6 +1278,7 @@ class GerenciadorLeiloes:
             leilao.lance_minimo = novo_lance_minimo
         
         self.db.commit()
+        self._invalidar_leilao(leilao_id)
         self.db.refresh(leilao)
         return leilao
 
@@ -133,6 +1295,7 @@ class GerenciadorLeiloes:
         
         self.db.delete(leilao)
         self.db.commit()
+        self._invalidar_leilao(leilao_id)
 
     def remover_participante(self, participante: Participante):
         participante_db = self.encontrar_participante_por_cpf(participante.cpf)
@@ -145,4 +1308,6 @@ class GerenciadorLeiloes:
             raise ValueError("Participante não pode ser removido (possui lances)")
 
         self.db.delete(participante_db)
-        self.db.commit()
\ No newline at end of file
+        self.db.commit()
+        if self.cache is not None:
+            self.cache.invalidar(("participante", participante.cpf))
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+GerenciadorLeiloes sobre vários arquivos SQLite (models.database.RoteadorShards).
+
+Um GerenciadorLeiloes por shard faz todo o trabalho de um leilão no arquivo
+dele; este gerenciador só escolhe o shard pelo diretório, reserva os ids dos
+leilões novos no catálogo, espalha as listagens por todos os shards em
+paralelo (intercalando os resultados) e move leilões entre arquivos.
+
+Só os ids de leilão são globais. Ids de lance repetem entre shards: nas
+listagens de lances o lance vem como LanceShard, identificado por (shard, id).
+
+Uso:
+    roteador = RoteadorShards("catalogo.db", ["leiloes0.db", "leiloes1.db"])
+    roteador.criar_tabelas()
+    sistema = GerenciadorShards(roteador)
+    leilao = sistema.adicionar_leilao(Leilao(...))
+    sistema.gerenciador(leilao.id).registrar_lance_automatico(leilao.id, participante.id, 500.0)
+
+Para gravar com um escritor por shard, use o ExecutorShards com
+criar_gerenciador=roteador.criar_gerenciador() e particao=roteador.shard_do_leilao.
+"""
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm.util import identity_key
+
+from models.alocacao import Alocacao
+from models.chave_idempotencia import ChaveIdempotencia
+from models.database import RoteadorShards
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.lance_automatico import LanceAutomatico
+from models.leilao import Leilao, EstadoLeilao
+from models.leituras import LanceShard, LeilaoResumo
+from models.participante import Participante
+
+_LEILOES = Leilao.__table__
+_LANCES = Lance.__table__
+_AUTOMATICOS = LanceAutomatico.__table__
+_ALOCACOES = Alocacao.__table__
+_CHAVES = ChaveIdempotencia.__table__
+
+# Leilões que ainda recebem escritas: são eles que o rebalanceamento distribui
+_ESTADOS_ATIVOS = (EstadoLeilao.INATIVO, EstadoLeilao.ABERTO)
+
+
+class GerenciadorShards:
+    """Operações do GerenciadorLeiloes roteadas pelo leilao_id entre os shards"""
+
+    def __init__(self, roteador: RoteadorShards, **opcoes):
+        """
+        Args:
+            roteador: Arquivos do catálogo e dos shards
+            **opcoes: Repassadas a cada GerenciadorLeiloes (cache, relogio, limitador...)
+        """
+        self.roteador = roteador
+        self.catalogo = GerenciadorLeiloes(roteador.sessao_catalogo(), **opcoes)
+        self.gerenciadores = [GerenciadorLeiloes(roteador.sessao(shard), **opcoes)
+                              for shard in range(roteador.shards)]
+        self._leitores = ThreadPoolExecutor(roteador.shards, thread_name_prefix="shard-leitura")
+
+    def gerenciador(self, leilao_id: int) -> GerenciadorLeiloes:
+        """GerenciadorLeiloes do shard onde o leilão está"""
+        return self.gerenciadores[self.roteador.shard_do_leilao(leilao_id)]
+
+    # --- Participantes (catálogo) ---
+
+    def adicionar_participante(self, participante: Participante) -> Participante:
+        return self.catalogo.adicionar_participante(participante)
+
+    def encontrar_participante_por_cpf(self, cpf: str) -> Participante:
+        return self.catalogo.encontrar_participante_por_cpf(cpf)
+
+    # --- Leilões e lances (shard do leilão) ---
+
+    # O id vem do diretório do catálogo, e não do arquivo do shard, para ser
+    # único entre todos eles. shard=None usa o padrão (leilao_id % shards).
+    def adicionar_leilao(self, leilao: Leilao, shard: Optional[int] = None) -> Leilao:
+        leilao.id, shard = self.roteador.reservar_leilao_id(shard)
+        return self.gerenciadores[shard].adicionar_leilao(leilao)
+
+    def encontrar_leilao_por_id(self, leilao_id: int) -> Optional[Leilao]:
+        try:
+            gerenciador = self.gerenciador(leilao_id)
+        except ValueError:
+            return None
+        return gerenciador.encontrar_leilao_por_id(leilao_id)
+
+    def abrir_leilao(self, leilao_id: int, data_abertura: Optional[datetime] = None):
+        return self.gerenciador(leilao_id).abrir_leilao(leilao_id, data_abertura)
+
+    def finalizar_leilao(self, leilao_id: int, data_finalizacao: Optional[datetime] = None):
+        return self.gerenciador(leilao_id).finalizar_leilao(leilao_id, data_finalizacao)
+
+    def adicionar_lance(self, leilao_id: int, lance: Lance, chave_idempotencia: Optional[str] = None) -> Lance:
+        return self.gerenciador(leilao_id).adicionar_lance(leilao_id, lance, chave_idempotencia)
+
+    def adicionar_lance_rapido(self, leilao_id: int, lance: Lance, chave_idempotencia: Optional[str] = None) -> Lance:
+        return self.gerenciador(leilao_id).adicionar_lance_rapido(leilao_id, lance, chave_idempotencia)
+
+    # --- Listagens (todos os shards) ---
+
+    # Cada shard é consultado em uma thread com a própria sessão e os
+    # resultados, já ordenados em cada shard, são intercalados. Os leilões
+    # saem por id, como em um único banco: o id deles vem do catálogo.
+    def listar_leiloes(self, estado: EstadoLeilao = None, data_inicio: datetime = None,
+                       data_fim: datetime = None) -> List[Leilao]:
+        return self._juntar(lambda g: g.listar_leiloes(estado, data_inicio, data_fim), attrgetter("id"))
+
+    def listar_leiloes_resumo(self, estado: EstadoLeilao = None, data_inicio: datetime = None,
+                              data_fim: datetime = None) -> List[LeilaoResumo]:
+        return self._juntar(lambda g: g.listar_leiloes_resumo(estado, data_inicio, data_fim), attrgetter("id"))
+
+    # Lances do participante em todos os leilões, do mais antigo ao mais novo.
+    # O id do lance sozinho não ordena nem identifica nada entre shards (cada
+    # arquivo numera os seus): a ordem é (data_hora, shard, id).
+    def listar_lances_participante(self, participante_id: int) -> List[LanceShard]:
+        def consultar(shard: int) -> List[LanceShard]:
+            consulta = (
+                select(_LANCES.c.id, _LANCES.c.leilao_id, _LANCES.c.valor, _LANCES.c.data_hora)
+                .where(_LANCES.c.participante_id == participante_id)
+                .order_by(_LANCES.c.data_hora, _LANCES.c.id)
+            )
+            return [LanceShard(shard, *linha) for linha in self.gerenciadores[shard].db.execute(consulta)]
+
+        parciais = list(self._leitores.map(consultar, range(self.roteador.shards)))
+        return list(heapq.merge(*parciais, key=attrgetter("data_hora", "shard", "id")))
+
+    def _espalhar(self, consulta: Callable[[GerenciadorLeiloes], Any]) -> List[Any]:
+        return list(self._leitores.map(consulta, self.gerenciadores))
+
+    def _juntar(self, consulta: Callable[[GerenciadorLeiloes], List[Any]],
+                chave: Callable[[Any], Any]) -> List[Any]:
+        parciais = self._espalhar(lambda g: sorted(consulta(g), key=chave))
+        return list(heapq.merge(*parciais, key=chave))
+
+    # --- Rebalanceamento ---
+
+    # Copia o leilão com tudo o que depende dele para o shard de destino, aponta
+    # o diretório para lá e só então o remove da origem: uma falha no meio deixa
+    # no máximo uma cópia órfã, nunca um leilão sem dados. Os lances recebem ids
+    # novos no destino (ids de lance só são únicos dentro de um shard) e as
+    # alocações e chaves de idempotência acompanham a troca. Nenhuma escrita no
+    # leilão pode acontecer durante a cópia: com o ExecutorShards, rode a
+    # mudança pelo executar() do leilão.
+    def mover_leilao(self, leilao_id: int, destino: int) -> Dict[str, int]:
+        origem = self.roteador.shard_do_leilao(leilao_id)
+        if not 0 <= destino < self.roteador.shards:
+            raise ValueError(f"Shard deve estar entre 0 e {self.roteador.shards - 1}")
+        if destino == origem:
+            return {'lances': 0, 'lances_automaticos': 0, 'alocacoes': 0, 'chaves_idempotencia': 0}
+        de, para = self.gerenciadores[origem], self.gerenciadores[destino]
+
+        ids_lances = select(_LANCES.c.id).where(_LANCES.c.leilao_id == leilao_id)
+        linha_leilao = de.db.execute(select(_LEILOES).where(_LEILOES.c.id == leilao_id)).mappings().one()
+        lances = de.db.execute(select(_LANCES).where(_LANCES.c.leilao_id == leilao_id)
+                               .order_by(_LANCES.c.id)).mappings().all()
+        automaticos = de.db.execute(select(_AUTOMATICOS).where(_AUTOMATICOS.c.leilao_id == leilao_id)).mappings().all()
+        alocacoes = de.db.execute(select(_ALOCACOES).where(_ALOCACOES.c.leilao_id == leilao_id)).mappings().all()
+        chaves = de.db.execute(select(_CHAVES).where(_CHAVES.c.lance_id.in_(ids_lances))).mappings().all()
+        de.db.commit()
+
+        try:
+            # O INSERT do leilão abre a transação de escrita do destino: o maior id
+            # de lance lido em seguida não muda até o commit
+            para.db.execute(insert(_LEILOES), [dict(linha_leilao)])
+            ultimo_id = para.db.execute(select(func.max(_LANCES.c.id))).scalar() or 0
+            novos_ids = {lance["id"]: novo_id for novo_id, lance in enumerate(lances, ultimo_id + 1)}
+            for tabela, linhas in ((_LANCES, [{**lance, "id": novos_ids[lance["id"]]} for lance in lances]),
+                                   (_AUTOMATICOS, [_sem_id(linha) for linha in automaticos]),
+                                   (_ALOCACOES, [{**_sem_id(linha), "lance_id": novos_ids[linha["lance_id"]]}
+                                                 for linha in alocacoes]),
+                                   (_CHAVES, [{**linha, "lance_id": novos_ids[linha["lance_id"]]}
+                                              for linha in chaves])):
+                if linhas:
+                    para.db.execute(insert(tabela), linhas)
+            para.db.commit()
+        except Exception:
+            para.db.rollback()
+            raise
+        self.roteador.mudar_shard(leilao_id, destino)
+
+        de.db.execute(delete(_CHAVES).where(_CHAVES.c.lance_id.in_(ids_lances)))
+        for tabela in (_ALOCACOES, _AUTOMATICOS, _LANCES):
+            de.db.execute(delete(tabela).where(tabela.c.leilao_id == leilao_id))
+        de.db.execute(delete(_LEILOES).where(_LEILOES.c.id == leilao_id))
+        de.db.commit()
+        # O objeto carregado pela sessão da origem deixaria de refletir o banco
+        leilao = de.db.identity_map.get(identity_key(Leilao, leilao_id))
+        if leilao is not None:
+            de.db.expunge(leilao)
+        de._invalidar_leilao(leilao_id)
+        return {'lances': len(lances), 'lances_automaticos': len(automaticos),
+                'alocacoes': len(alocacoes), 'chaves_idempotencia': len(chaves)}
+
+    # Move leilões ativos (INATIVO ou ABERTO) do shard com mais deles para o
+    # com menos até a diferença ser de no máximo um. Útil depois de acrescentar
+    # um arquivo ao roteador. Retorna os movimentos como (leilao_id, origem, destino).
+    def rebalancear(self) -> List[Tuple[int, int, int]]:
+        ativos = self._espalhar(lambda g: g.db.execute(
+            select(Leilao.id).where(Leilao.estado.in_(_ESTADOS_ATIVOS)).order_by(Leilao.id)).scalars().all())
+        movimentos = []
+        while True:
+            maior = max(range(len(ativos)), key=lambda shard: len(ativos[shard]))
+            menor = min(range(len(ativos)), key=lambda shard: len(ativos[shard]))
+            if len(ativos[maior]) - len(ativos[menor]) <= 1:
+                return movimentos
+            leilao_id = ativos[maior].pop()
+            self.mover_leilao(leilao_id, menor)
+            ativos[menor].append(leilao_id)
+            movimentos.append((leilao_id, maior, menor))
+
+    def fechar(self):
+        self._leitores.shutdown()
+        for gerenciador in [self.catalogo] + self.gerenciadores:
+            gerenciador.db.close()
+
+
+def _sem_id(linha) -> dict:
+    # Linhas sem referências ao próprio id recebem um novo do destino
+    return {coluna: valor for coluna, valor in linha.items() if coluna != "id"}
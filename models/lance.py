@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from models.database import Base
 
@@ -12,16 +12,28 @@ class Lance(Base):
     participante_id = Column(Integer, ForeignKey("participantes.id"), nullable=False)
     leilao_id = Column(Integer, ForeignKey("leiloes.id"), nullable=False)
     data_hora = Column(DateTime, nullable=False)
+    # Unidades pedidas; valor é o preço por unidade (maior que 1 só em lotes de múltiplas unidades)
+    quantidade = Column(Integer, default=1, server_default="1", nullable=False)
+
+    # Índice composto usado pelas consultas de MAX/MIN e do lance vencedor,
+    # evitando carregar todos os lances do leilão em memória. O segundo atende aos
+    # lances de um participante (lance único no leilão selado, remoção do participante)
+    __table_args__ = (
+        Index("ix_lances_leilao_valor", "leilao_id", "valor"),
+        Index("ix_lances_participante_leilao", "participante_id", "leilao_id"),
+    )
 
     # Relacionamentos
     participante = relationship("Participante", back_populates="lances")
     leilao = relationship("Leilao", back_populates="lances")
 
-    def __init__(self, valor: float, participante_id: int, leilao_id: int, data_hora: datetime):
+    def __init__(self, valor: float, participante_id: int, leilao_id: int, data_hora: datetime,
+                 quantidade: int = 1):
         self.valor = valor
         self.participante_id = participante_id
         self.leilao_id = leilao_id
         self.data_hora = data_hora
+        self.quantidade = quantidade
 
     def __str__(self):
         return f"Lance de R${self.valor:.2f} por {self.participante.nome}"
@@ -0,0 +1,89 @@
+import heapq
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, UniqueConstraint
+from models.base import Base
+
+# Diferença mínima com que um lance automático supera o concorrente
+INCREMENTO_LANCE = 1.0
+
+
+class LanceAutomatico(Base):
+    """Valor máximo oculto até o qual o sistema dá lances por um participante"""
+    __tablename__ = "lances_automaticos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    participante_id = Column(Integer, ForeignKey("participantes.id"), nullable=False)
+    leilao_id = Column(Integer, ForeignKey("leiloes.id"), nullable=False)
+    valor_maximo = Column(Float, nullable=False)
+    data_hora = Column(DateTime, nullable=False)
+
+    # Um máximo por participante em cada leilão; o índice (leilao_id, valor_maximo)
+    # entrega os dois maiores máximos de um leilão sem percorrer os demais
+    __table_args__ = (
+        UniqueConstraint("leilao_id", "participante_id", name="uq_lances_automaticos_leilao_participante"),
+        Index("ix_lances_automaticos_leilao_maximo", "leilao_id", "valor_maximo"),
+    )
+
+    def __init__(self, participante_id: int, leilao_id: int, valor_maximo: float, data_hora: datetime):
+        self.participante_id = participante_id
+        self.leilao_id = leilao_id
+        self.valor_maximo = valor_maximo
+        self.data_hora = data_hora
+
+    def __repr__(self):
+        return (f"<LanceAutomatico(id={self.id}, participante_id={self.participante_id}, "
+                f"leilao_id={self.leilao_id}, valor_maximo={self.valor_maximo})>")
+
+
+# Máximo de um concorrente na resolução; em empate vence o registrado primeiro
+class Maximo(NamedTuple):
+    valor_maximo: float
+    data_hora: datetime
+    participante_id: int
+
+
+def resolver_lances_automaticos(ultimo: Optional[Tuple[float, int]], lance_minimo: float,
+                                maximos: Iterable[Maximo],
+                                incremento: float = INCREMENTO_LANCE) -> List[Tuple[float, int]]:
+    """
+    Resolve a disputa entre lances automáticos em um passo, sem simular rodadas.
+
+    Só os dois maiores máximos importam (selecionados com um heap): o segundo
+    colocado sobe até o próprio máximo e o líder cobre com o incremento, limitado
+    ao seu máximo. Retorna os lances visíveis a gravar, em ordem, como
+    (valor, participante_id): no máximo dois, estritamente crescentes e sem o
+    mesmo participante duas vezes seguidas.
+
+    Args:
+        ultimo: (valor, participante_id) do último lance visível ou None
+        lance_minimo: Lance mínimo do leilão
+        maximos: Máximos registrados no leilão
+    """
+    topo = heapq.nsmallest(2, maximos, key=lambda m: (-m.valor_maximo, m.data_hora))
+    if not topo:
+        return []
+    lider = topo[0]
+    segundo = topo[1] if len(topo) > 1 else None
+    valor, dono = ultimo if ultimo else (None, None)
+    lances = []
+
+    # O segundo colocado dá o seu máximo quando ainda supera o lance atual; em
+    # empate com o líder ele não teria como ser coberto, então só empurra o preço
+    if (segundo is not None and segundo.participante_id != dono
+            and segundo.valor_maximo < lider.valor_maximo
+            and segundo.valor_maximo >= lance_minimo
+            and (valor is None or segundo.valor_maximo > valor)):
+        valor, dono = segundo.valor_maximo, segundo.participante_id
+        lances.append((valor, dono))
+
+    if dono == lider.participante_id:
+        return lances
+    # O líder paga o incremento sobre o maior valor concorrente, até o seu máximo
+    concorrentes = [v for v in (valor, segundo.valor_maximo if segundo else None) if v is not None]
+    preco = max(lance_minimo, round(max(concorrentes) + incremento, 2)) if concorrentes else lance_minimo
+    preco = min(preco, lider.valor_maximo)
+    if preco >= lance_minimo and (valor is None or preco > valor):
+        lances.append((preco, lider.participante_id))
+    return lances
@@ -1,5 +1,7 @@
+import math
 from datetime import datetime
 from enum import Enum, auto
+from typing import Optional
 
 from sqlalchemy import Column, Integer, String, Float, DateTime, Enum as SQLEnum
 from sqlalchemy.orm import relationship
@@ -12,6 +14,56 @@ class EstadoLeilao(Enum):
     FINALIZADO = auto() # Leilão foi encerrado com sucesso (pelo menos um lance foi feito)
     EXPIRADO = auto()   # Leilão foi encerrado sem que nenhum lance tenha sido feito
 
+# Enumeração das modalidades de leilão
+class TipoLeilao(Enum):
+    INGLES = auto()                 # Lances abertos e crescentes; vence o maior lance
+    SELADO_PRIMEIRO_PRECO = auto()  # Lances ocultos; o maior lance vence e paga o próprio valor
+    SELADO_SEGUNDO_PRECO = auto()   # Lances ocultos; o maior lance vence e paga o segundo maior (Vickrey)
+    HOLANDES = auto()               # Preço decrescente; o primeiro a aceitar o preço atual arremata
+    # Lotes com várias unidades: lances ocultos com preço unitário e quantidade; as
+    # unidades vão para os maiores preços, todos pagando o menor preço aceito (uniforme)
+    # ou cada um o próprio lance (discriminatório)
+    MULTIPLO_PRECO_UNIFORME = auto()
+    MULTIPLO_DISCRIMINATORIO = auto()
+
+    @property
+    def selado(self) -> bool:
+        return self in (TipoLeilao.SELADO_PRIMEIRO_PRECO, TipoLeilao.SELADO_SEGUNDO_PRECO)
+
+    @property
+    def multiplo(self) -> bool:
+        return self in (TipoLeilao.MULTIPLO_PRECO_UNIFORME, TipoLeilao.MULTIPLO_DISCRIMINATORIO)
+
+    # Lances invisíveis até a finalização
+    @property
+    def oculto(self) -> bool:
+        return self.selado or self.multiplo
+
+TIPOS_SELADOS = (TipoLeilao.SELADO_PRIMEIRO_PRECO, TipoLeilao.SELADO_SEGUNDO_PRECO)
+TIPOS_MULTIPLOS = (TipoLeilao.MULTIPLO_PRECO_UNIFORME, TipoLeilao.MULTIPLO_DISCRIMINATORIO)
+
+# Curvas de queda do preço no leilão holandês
+CURVAS_PRECO = ("linear", "exponencial")
+
+
+# Preço do leilão holandês no momento informado, calculado só a partir do
+# cronograma (nada é gravado enquanto o preço cai). O preço vai de preco_inicial
+# em data_inicio até lance_minimo em data_fim, em linha reta ou em queda
+# exponencial; com intervalo_s ele cai em degraus a cada intervalo_s segundos.
+def calcular_preco_holandes(preco_inicial: float, lance_minimo: float, data_inicio: datetime,
+                            data_fim: datetime, momento: datetime, curva: str = "linear",
+                            intervalo_s: Optional[int] = None) -> float:
+    decorrido = (momento - data_inicio).total_seconds()
+    duracao = (data_fim - data_inicio).total_seconds()
+    if intervalo_s:
+        decorrido = math.floor(decorrido / intervalo_s) * intervalo_s
+    fracao = min(max(decorrido / duracao, 0.0), 1.0)
+    if curva == "exponencial":
+        preco = preco_inicial * (lance_minimo / preco_inicial) ** fracao
+    else:
+        preco = preco_inicial - (preco_inicial - lance_minimo) * fracao
+    return round(max(preco, lance_minimo), 2)
+
 # Classe que representa um Leilão
 class Leilao(Base):
     __tablename__ = "leiloes"
@@ -19,22 +71,70 @@ class Leilao(Base):
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, nullable=False)
     lance_minimo = Column(Float, nullable=False)
+    # Unidades do lote (maior que 1 só em leilões de múltiplas unidades)
+    quantidade = Column(Integer, default=1, server_default="1", nullable=False)
     data_inicio = Column(DateTime, nullable=False)
     data_fim = Column(DateTime, nullable=False)
     estado = Column(SQLEnum(EstadoLeilao), default=EstadoLeilao.INATIVO, nullable=False)
+    # Soft-close (opcional): um lance nos últimos janela_prorrogacao_s segundos
+    # adia data_fim em prorrogacao_s segundos
+    janela_prorrogacao_s = Column(Integer, nullable=True)
+    prorrogacao_s = Column(Integer, nullable=True)
+    tipo = Column(SQLEnum(TipoLeilao), default=TipoLeilao.INGLES, nullable=False)
+    # Preço pago pelo vencedor, definido na finalização (nos lotes de múltiplas
+    # unidades, o menor preço unitário aceito)
+    preco_final = Column(Float, nullable=True)
+    # Leilão holandês: preço de partida e cronograma da queda até lance_minimo
+    preco_inicial = Column(Float, nullable=True)
+    curva_preco = Column(String(20), nullable=True)
+    intervalo_preco_s = Column(Integer, nullable=True)
 
     # Relacionamento com Lances (um leilão pode ter muitos lances)
     lances = relationship("Lance", back_populates="leilao", cascade="all, delete-orphan")
 
-    def __init__(self, nome: str, lance_minimo: float, data_inicio: datetime, data_fim: datetime):
+    def __init__(self, nome: str, lance_minimo: float, data_inicio: datetime, data_fim: datetime,
+                 janela_prorrogacao_s: Optional[int] = None, prorrogacao_s: Optional[int] = None,
+                 tipo: TipoLeilao = TipoLeilao.INGLES, preco_inicial: Optional[float] = None,
+                 curva_preco: str = "linear", intervalo_preco_s: Optional[int] = None,
+                 quantidade: int = 1):
         # Validação para garantir que a data final não seja anterior à inicial
         if data_fim <= data_inicio:
             raise ValueError("Data de término deve ser posterior à data de início")
+        # O soft-close precisa da janela e da prorrogação, ambas positivas
+        if (janela_prorrogacao_s is None) != (prorrogacao_s is None):
+            raise ValueError("Janela e prorrogação do soft-close devem ser informadas juntas")
+        if janela_prorrogacao_s is not None and (janela_prorrogacao_s <= 0 or prorrogacao_s <= 0):
+            raise ValueError("Janela e prorrogação do soft-close devem ser positivas")
+        # Só lotes de múltiplas unidades vendem mais de uma unidade
+        if quantidade < 1:
+            raise ValueError("Quantidade do lote deve ser positiva")
+        if quantidade > 1 and not tipo.multiplo:
+            raise ValueError("Apenas leilões de múltiplas unidades podem ter quantidade maior que 1")
+        # Só o leilão inglês tem disputa de último minuto: nos selados ninguém vê
+        # os lances e no holandês o primeiro lance encerra o leilão
+        if tipo != TipoLeilao.INGLES and janela_prorrogacao_s is not None:
+            raise ValueError("Soft-close só se aplica a leilões ingleses")
+        # O leilão holandês precisa de um preço de partida acima do mínimo e de um cronograma válido
+        if tipo == TipoLeilao.HOLANDES:
+            if preco_inicial is None or preco_inicial <= lance_minimo:
+                raise ValueError("Preço inicial do leilão holandês deve ser maior que o lance mínimo")
+            if curva_preco not in CURVAS_PRECO:
+                raise ValueError(f"Curva de preço inválida: {curva_preco}")
+            if intervalo_preco_s is not None and intervalo_preco_s <= 0:
+                raise ValueError("Intervalo de queda do preço deve ser positivo")
         self.nome = nome
         self.lance_minimo = lance_minimo
         self.data_inicio = data_inicio
         self.data_fim = data_fim
         self.estado = EstadoLeilao.INATIVO
+        self.janela_prorrogacao_s = janela_prorrogacao_s
+        self.prorrogacao_s = prorrogacao_s
+        self.tipo = tipo
+        self.quantidade = quantidade
+        if tipo == TipoLeilao.HOLANDES:
+            self.preco_inicial = preco_inicial
+            self.curva_preco = curva_preco
+            self.intervalo_preco_s = intervalo_preco_s
 
     # Método para abrir o leilão
     def abrir(self, agora: datetime):
@@ -48,7 +148,9 @@ class Leilao(Base):
         self.estado = EstadoLeilao.ABERTO
 
     # Método para finalizar o leilão
-    def finalizar(self, agora: datetime):
+    # possui_lances permite ao chamador informar o resultado de uma consulta
+    # agregada, evitando carregar a coleção completa de lances
+    def finalizar(self, agora: datetime, possui_lances: Optional[bool] = None):
         # Só pode finalizar se estiver ABERTO
         if self.estado != EstadoLeilao.ABERTO:
             raise ValueError("Leilão só pode ser finalizado se estiver ABERTO.")
@@ -56,13 +158,30 @@ class Leilao(Base):
         if agora < self.data_fim:
             raise ValueError("Leilão não pode ser finalizado antes da data de término.")
         
+        if possui_lances is None:
+            possui_lances = bool(self.lances)
+
         # Se não houver lances, leilão expira
-        if not self.lances: # Verifica se não há lances
+        if not possui_lances: # Verifica se não há lances
             self.estado = EstadoLeilao.EXPIRADO
         else:
             # Se tiver lances, leilão é finalizado
             self.estado = EstadoLeilao.FINALIZADO
 
+    # Preço atual do leilão holandês, calculado na leitura a partir do cronograma
+    def preco_atual(self, momento: datetime) -> float:
+        if self.tipo != TipoLeilao.HOLANDES:
+            raise ValueError("Preço decrescente só existe em leilões holandeses")
+        return calcular_preco_holandes(self.preco_inicial, self.lance_minimo, self.data_inicio, self.data_fim,
+                                       momento, self.curva_preco, self.intervalo_preco_s)
+
+    # Preço pago pelo vencedor: o próprio lance, exceto no leilão selado de segundo
+    # preço, em que paga o segundo maior lance (ou o lance mínimo, se for o único)
+    def calcular_preco(self, valor_vencedor: float, segundo_valor: Optional[float] = None) -> float:
+        if self.tipo == TipoLeilao.SELADO_SEGUNDO_PRECO:
+            return segundo_valor if segundo_valor is not None else self.lance_minimo
+        return valor_vencedor
+
     # Método para identificar o vencedor (maior lance)
     def identificar_vencedor(self):
         # Só pode identificar se o leilão estiver FINALIZADO
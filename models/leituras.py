@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import NamedTuple
+
+from models.leilao import EstadoLeilao
+
+# Modelos de leitura imutáveis para listagens.
+# São tuplas nomeadas (sem __dict__ e sem estado do ORM), preenchidas a partir de
+# consultas select() por colunas, e por isso muito mais leves que Leilao/Lance.
+
+
+# Resumo de um leilão para páginas de listagem
+class LeilaoResumo(NamedTuple):
+    id: int
+    nome: str
+    estado: EstadoLeilao
+    lance_minimo: float
+    data_inicio: datetime
+    data_fim: datetime
+    maior_lance: float  # 0 quando não há lances, como Leilao.maior_lance
+
+
+# Item do histórico de lances de um leilão
+class LanceResumo(NamedTuple):
+    id: int
+    valor: float
+    participante_id: int
+    participante_nome: str
+    data_hora: datetime
+
+
+# Lance em uma listagem que junta vários shards. Ids de lance só são únicos
+# dentro do arquivo do shard: o lance é identificado pelo par (shard, id)
+class LanceShard(NamedTuple):
+    shard: int
+    id: int
+    leilao_id: int
+    valor: float
+    data_hora: datetime
+
+
+# Dados públicos de um participante
+class ParticipanteResumo(NamedTuple):
+    id: int
+    cpf: str
+    nome: str
+    email: str
+
+
+# Unidades de um lote de múltiplas unidades atribuídas a um lance
+class AlocacaoResumo(NamedTuple):
+    lance_id: int
+    participante_id: int
+    participante_nome: str
+    quantidade: int
+    preco_unitario: float
@@ -0,0 +1,190 @@
+"""
+Contagem de instruções SQL por operação e detecção de N+1.
+
+Os eventos before/after_cursor_execute e handle_error do SQLAlchemy são
+registrados uma única vez para todas as engines; cada instrução é atribuída às
+medições ativas no contexto atual (contextvar), então medições aninhadas e
+threads diferentes não se misturam.
+
+Uso em testes:
+
+    with contar_consultas(maximo=3) as medicao:
+        gerenciador.finalizar_leilao(1, agora)
+    assert medicao.linhas_afetadas == 1  # só DML: SELECTs não contam linhas
+
+    @contar_consultas(maximo=2, limite_repeticao=5)
+    def test_algo(): ...
+"""
+import contextvars
+import re
+import time
+import warnings
+from collections import Counter
+from contextlib import ContextDecorator
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_medicoes_ativas: contextvars.ContextVar[tuple] = contextvars.ContextVar("medicoes_sql", default=())
+_listeners_instalados = False
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACOS = re.compile(r"\s+")
+
+
+class ConsultasRepetidasWarning(UserWarning):
+    """A mesma forma de instrução se repetiu muitas vezes em uma operação (provável N+1)"""
+
+
+def normalizar_sql(sql: str) -> str:
+    """Forma da instrução: literais viram ?, listas IN (?, ?, ...) viram (?...) e espaços são unificados"""
+    sql = _LITERAIS.sub("?", sql)
+    sql = _LISTAS.sub("(?...)", sql)
+    return _ESPACOS.sub(" ", sql).strip()
+
+
+class Medicao:
+    """
+    Instruções, linhas afetadas e tempo registrados durante uma operação.
+
+    linhas_afetadas soma o rowcount das instruções DML (INSERT/UPDATE/DELETE);
+    as linhas lidas por SELECT não entram, já que são buscadas depois da execução.
+    """
+
+    def __init__(self, nome: Optional[str] = None, engine: Optional[Engine] = None):
+        self.nome = nome
+        self.engine = engine
+        self.consultas = 0
+        self.linhas_afetadas = 0
+        self.tempo_ms = 0.0
+        self.formas: Counter = Counter()
+        self.instrucoes: List[str] = []
+
+    def registrar(self, sql: str, linhas_afetadas: int, duracao_ms: float):
+        self.consultas += 1
+        self.linhas_afetadas += linhas_afetadas
+        self.tempo_ms += duracao_ms
+        self.formas[normalizar_sql(sql)] += 1
+        self.instrucoes.append(sql)
+
+    def repetidas(self, limite: int) -> Dict[str, int]:
+        """Formas de instrução executadas limite vezes ou mais"""
+        return {forma: n for forma, n in self.formas.items() if n >= limite}
+
+    def __str__(self):
+        return (f"{self.nome or 'operação'}: {self.consultas} consulta(s), "
+                f"{self.linhas_afetadas} linha(s) afetada(s), {self.tempo_ms:.2f}ms")
+
+
+def _antes_de_executar(conexao, cursor, sql, parametros, contexto, executemany):
+    if _medicoes_ativas.get():
+        conexao.info.setdefault("monitor_sql_inicio", []).append(time.perf_counter())
+
+
+def _depois_de_executar(conexao, cursor, sql, parametros, contexto, executemany):
+    medicoes = _medicoes_ativas.get()
+    inicios = conexao.info.get("monitor_sql_inicio")
+    if not medicoes or not inicios:
+        return
+    duracao_ms = (time.perf_counter() - inicios.pop()) * 1000
+    # rowcount é -1 para SELECT no sqlite3: só as linhas afetadas por DML são contadas
+    linhas_afetadas = max(cursor.rowcount, 0)
+    for medicao in medicoes:
+        if medicao.engine is None or medicao.engine is conexao.engine:
+            medicao.registrar(sql, linhas_afetadas, duracao_ms)
+
+
+# Uma instrução que falha não dispara after_cursor_execute: sem isto o início
+# dela ficaria para sempre em conexao.info, que acompanha a conexão no pool
+def _ao_falhar(contexto_erro):
+    conexao = contexto_erro.connection
+    inicios = conexao.info.get("monitor_sql_inicio") if conexao is not None else None
+    if inicios:
+        inicios.pop()
+
+
+def instalar_listeners():
+    """Registra os eventos de cursor em todas as engines (idempotente)"""
+    global _listeners_instalados
+    if not _listeners_instalados:
+        event.listen(Engine, "before_cursor_execute", _antes_de_executar)
+        event.listen(Engine, "after_cursor_execute", _depois_de_executar)
+        event.listen(Engine, "handle_error", _ao_falhar)
+        _listeners_instalados = True
+
+
+class contar_consultas(ContextDecorator):
+    """
+    Mede as instruções SQL executadas no bloco (ou na função decorada)
+
+    Args:
+        engine: Conta apenas instruções desta engine (padrão: todas)
+        maximo: Falha com AssertionError se o bloco executar mais instruções
+        limite_repeticao: Emite ConsultasRepetidasWarning quando a mesma forma
+            de instrução se repete este número de vezes
+        nome: Nome da operação usado nas mensagens
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, maximo: Optional[int] = None,
+                 limite_repeticao: Optional[int] = 10, nome: Optional[str] = None):
+        instalar_listeners()
+        self.engine = engine
+        self.maximo = maximo
+        self.limite_repeticao = limite_repeticao
+        self.nome = nome
+        self.medicao: Optional[Medicao] = None
+        self._tokens: List[contextvars.Token] = []
+
+    def __enter__(self) -> Medicao:
+        self.medicao = Medicao(self.nome, self.engine)
+        self._tokens.append(_medicoes_ativas.set(_medicoes_ativas.get() + (self.medicao,)))
+        return self.medicao
+
+    def __exit__(self, tipo_erro, erro, rastreamento):
+        _medicoes_ativas.reset(self._tokens.pop())
+        medicao = self.medicao
+        if self.limite_repeticao:
+            for forma, vezes in medicao.repetidas(self.limite_repeticao).items():
+                warnings.warn(f"{medicao.nome or 'Operação'} executou {vezes}x a mesma instrução "
+                              f"(possível N+1): {forma}", ConsultasRepetidasWarning, stacklevel=2)
+        if tipo_erro is None and self.maximo is not None and medicao.consultas > self.maximo:
+            instrucoes = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(medicao.instrucoes, 1))
+            raise AssertionError(f"{medicao.nome or 'Operação'} executou {medicao.consultas} "
+                                 f"consulta(s), máximo {self.maximo}:\n{instrucoes}")
+        return False
+
+
+def instrumentar_gerenciador(gerenciador, limite_repeticao: Optional[int] = 10) -> Dict[str, Dict[str, Any]]:
+    """
+    Envolve os métodos públicos do gerenciador para medir cada chamada.
+
+    Retorna o dicionário (atualizado a cada chamada) operação -> {'chamadas',
+    'consultas', 'linhas_afetadas', 'tempo_ms', 'maximo_consultas'}. Operações que
+    chamam outras operações contam as instruções das chamadas internas também.
+    """
+    estatisticas: Dict[str, Dict[str, Any]] = {}
+
+    def envolver(nome, metodo):
+        @wraps(metodo)
+        def medido(*args, **kwargs):
+            with contar_consultas(limite_repeticao=limite_repeticao, nome=nome) as medicao:
+                try:
+                    return metodo(*args, **kwargs)
+                finally:
+                    atual = estatisticas.setdefault(nome, {'chamadas': 0, 'consultas': 0, 'linhas_afetadas': 0,
+                                                           'tempo_ms': 0.0, 'maximo_consultas': 0})
+                    atual['chamadas'] += 1
+                    atual['consultas'] += medicao.consultas
+                    atual['linhas_afetadas'] += medicao.linhas_afetadas
+                    atual['tempo_ms'] += medicao.tempo_ms
+                    atual['maximo_consultas'] = max(atual['maximo_consultas'], medicao.consultas)
+        return medido
+
+    for nome in dir(type(gerenciador)):
+        metodo = getattr(gerenciador, nome)
+        if not nome.startswith("_") and callable(metodo):
+            setattr(gerenciador, nome, envolver(nome, metodo))
+    return estatisticas
@@ -4,6 +4,30 @@ from datetime import datetime
 import re
 from models.base import Base
 
+# Expressões compiladas uma única vez (usadas também pela importação em lote)
+# re.ASCII: \d aceitaria dígitos de outros sistemas de escrita ('١٢٣')
+CPF_REGEX = re.compile(r'^\d{3}\.\d{3}\.\d{3}-\d{2}$', re.ASCII)
+EMAIL_REGEX = re.compile(r'^[^@]+@[^@]+\.[^@]+$')
+
+
+def calcular_digitos_cpf(base: str) -> str:
+    """Calcula os dois dígitos verificadores para os 9 primeiros dígitos do CPF"""
+    # Somas ponderadas desenroladas sobre os códigos ASCII (esta função roda uma vez
+    # por linha importada); 2592 e 3024 descontam o código de '0' (48) vezes a soma dos pesos
+    a, b, c, d, e, f, g, h, i = base.encode()
+    dv1 = (10 * a + 9 * b + 8 * c + 7 * d + 6 * e + 5 * f + 4 * g + 3 * h + 2 * i - 2592) * 10 % 11 % 10
+    dv2 = (11 * a + 10 * b + 9 * c + 8 * d + 7 * e + 6 * f + 5 * g + 4 * h + 3 * i - 3024 + 2 * dv1) * 10 % 11 % 10
+    return f"{dv1}{dv2}"
+
+
+def cpf_digitos_validos(cpf: str) -> bool:
+    """Confere os dígitos verificadores de um CPF já no formato 123.456.789-09"""
+    base = cpf[0:3] + cpf[4:7] + cpf[8:11]
+    if base == base[0] * 9:  # sequências repetidas (111.111.111-11) são inválidas
+        return False
+    return calcular_digitos_cpf(base) == cpf[12:14]
+
+
 class Participante(Base):
     __tablename__ = "participantes"
     
@@ -25,13 +49,13 @@ class Participante(Base):
     
     def _validar_cpf(self, cpf: str) -> str:
         """Validação do CPF no formato 123.456.789-00"""
-        if not re.match(r'^\d{3}\.\d{3}\.\d{3}-\d{2}$', cpf):
+        if not CPF_REGEX.match(cpf):
             raise ValueError("CPF deve estar no formato 123.456.789-00")
         return cpf
     
     def _validar_email(self, email: str) -> str:
         """Validação básica do e-mail"""
-        if not re.match(r'^[^@]+@[^@]+\.[^@]+$', email):
+        if not EMAIL_REGEX.match(email):
             raise ValueError("E-mail inválido")
         return email
     
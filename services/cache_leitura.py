@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class CacheLeitura:
+    """
+    Cache de leitura limitado (LRU) com expiração por tempo (TTL).
+
+    Usado pelo GerenciadorLeiloes na frente de encontrar_leilao_por_id e
+    encontrar_participante_por_cpf. O escopo é definido por quem cria o cache:
+    uma instância por gerenciador (escopo local) ou a mesma instância passada
+    a vários gerenciadores (escopo compartilhado, ver cache_compartilhado()).
+    """
+
+    def __init__(self, capacidade: int = 1024, ttl_segundos: Optional[float] = 30.0,
+                 relogio: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            capacidade: Número máximo de entradas antes de descartar a menos usada
+            ttl_segundos: Tempo de vida de cada entrada (None = sem expiração)
+            relogio: Função que retorna o tempo atual em segundos
+        """
+        if capacidade <= 0:
+            raise ValueError("Capacidade do cache deve ser positiva")
+        self.capacidade = capacidade
+        self.ttl_segundos = ttl_segundos
+        self._relogio = relogio
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contadores para estatísticas
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self.expiracoes = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor em cache ou None (falha ou entrada expirada)"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            valor, expira_em = item
+            if expira_em is not None and self._relogio() >= expira_em:
+                del self._itens[chave]
+                self.expiracoes += 1
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def definir(self, chave: Hashable, valor: Any):
+        """Armazena um valor, descartando a entrada menos usada se necessário"""
+        expira_em = self._relogio() + self.ttl_segundos if self.ttl_segundos is not None else None
+        with self._lock:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+                self.descartes += 1
+
+    def invalidar(self, chave: Hashable):
+        """Remove uma entrada (chamado após escritas do gerenciador)"""
+        with self._lock:
+            if self._itens.pop(chave, None) is not None:
+                self.invalidacoes += 1
+
+    def limpar(self):
+        """Remove todas as entradas, mantendo os contadores"""
+        with self._lock:
+            self._itens.clear()
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do cache"""
+        total = self.acertos + self.falhas
+        taxa_acerto = (self.acertos / total * 100) if total > 0 else 0
+        return {
+            'tamanho': len(self._itens),
+            'capacidade': self.capacidade,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'descartes': self.descartes,
+            'expiracoes': self.expiracoes,
+            'invalidacoes': self.invalidacoes,
+            'taxa_acerto': round(taxa_acerto, 2)
+        }
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def __str__(self) -> str:
+        stats = self.obter_estatisticas()
+        return (
+            f"CacheLeitura(tamanho={stats['tamanho']}/{self.capacidade}, "
+            f"acertos={stats['acertos']}, falhas={stats['falhas']})"
+        )
+
+
+_cache_compartilhado: Optional[CacheLeitura] = None
+
+
+def cache_compartilhado() -> CacheLeitura:
+    """Retorna o cache de escopo compartilhado (criado no primeiro uso)"""
+    global _cache_compartilhado
+    if _cache_compartilhado is None:
+        _cache_compartilhado = CacheLeitura()
+    return _cache_compartilhado
@@ -8,7 +8,14 @@ from typing import Optional, Dict, Any
 import logging
 from datetime import datetime
 import sys
+import time
 from jinja2 import Environment, FileSystemLoader
+try:
+    from services.metricas import LATENCIA_EMAIL
+    from services.relogio import Relogio, RELOGIO_SISTEMA
+except ImportError:  # executado como script: python services/email_service.py
+    from metricas import LATENCIA_EMAIL
+    from relogio import Relogio, RELOGIO_SISTEMA
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -28,13 +35,16 @@ class EmailService:
     - AUTO: Detecta automaticamente o melhor modo
     """
     
-    def __init__(self, modo: Optional[str] = None):
+    def __init__(self, modo: Optional[str] = None, relogio: Optional[Relogio] = None):
         """
         Inicializa o serviço de email
         
         Args:
             modo: 'production', 'development', 'test', 'auto' ou None
+            relogio: Fonte da hora registrada nos envios (padrão: hora do sistema)
         """
+        self.relogio = relogio or RELOGIO_SISTEMA
+
         # Carregar configurações do .env
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
         self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
@@ -125,10 +135,11 @@ class EmailService:
             'sucesso': False,
             'modo': self.modo,
             'destinatario': destinatario,
-            'timestamp': datetime.now(),
+            'timestamp': self.relogio.agora(),
             'assunto': assunto
         }
         
+        inicio = time.perf_counter()
         try:
             mensagem_html = self.jinja_env.get_template(template).render(dados)
             
@@ -152,6 +163,8 @@ class EmailService:
             })
             logger.error(f"❌ Erro inesperado no envio de email: {e}")
         
+        LATENCIA_EMAIL.rotulado(self.modo, "sucesso" if resultado['sucesso'] else "falha").observar(
+            time.perf_counter() - inicio)
         return resultado
     
     def _enviar_teste(self, destinatario: str, assunto: str, mensagem_html: str) -> Dict[str, Any]:
@@ -192,7 +205,7 @@ class EmailService:
         print(f"Para:     {destinatario}")
         print(f"Assunto:  {assunto}")
         print(f"Servidor: {self.smtp_server}:{self.smtp_port}")
-        print(f"Horário:  {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        print(f"Horário:  {self.relogio.agora().strftime('%d/%m/%Y %H:%M:%S')}")
         print(f"{separador}")
         print("CONTEÚDO HTML:")
         print(mensagem_html)
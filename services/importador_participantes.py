@@ -0,0 +1,225 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.participante import Participante, CPF_REGEX, EMAIL_REGEX, cpf_digitos_validos
+
+CAMPOS = ("cpf", "nome", "email", "data_nascimento")
+
+# executemany direto no driver: evita o processamento de parâmetros por linha do
+# SQLAlchemy, que domina o custo em lotes grandes
+_SQL_INSERIR = "INSERT INTO participantes (cpf, nome, email, data_nascimento) VALUES (?, ?, ?, ?)"
+
+
+class ImportadorParticipantes:
+    """
+    Importação em lote de participantes a partir de arquivos CSV ou JSONL.
+
+    O arquivo é lido em streaming e processado em lotes: validação de CPF
+    (formato e dígitos verificadores) e e-mail, detecção de duplicados no
+    próprio arquivo e no banco com consultas IN por lote, e gravação com um
+    executemany por lote. Linhas recusadas vão para um relatório CSV.
+    """
+
+    def __init__(self, db: Session, tamanho_lote: int = 5000, validar_digitos_cpf: bool = True):
+        """
+        Args:
+            db: Sessão do banco de dados
+            tamanho_lote: Linhas por lote de validação/gravação
+            validar_digitos_cpf: Confere os dígitos verificadores além do formato
+        """
+        if tamanho_lote <= 0:
+            raise ValueError("Tamanho do lote deve ser positivo")
+        self.db = db
+        self.tamanho_lote = tamanho_lote
+        self.validar_digitos_cpf = validar_digitos_cpf
+
+    def importar(self, caminho: str, caminho_rejeitados: Optional[str] = None,
+                 formato: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Importa o arquivo e retorna as estatísticas da importação
+
+        Args:
+            caminho: Arquivo de entrada (.csv ou .jsonl)
+            caminho_rejeitados: Relatório CSV das linhas recusadas (opcional)
+            formato: 'csv' ou 'jsonl' (padrão: deduzido da extensão)
+        """
+        formato = formato or self._detectar_formato(caminho)
+        inicio = time.perf_counter()
+        resultado = {'lidos': 0, 'inseridos': 0, 'rejeitados': 0, 'relatorio_rejeitados': caminho_rejeitados}
+        cpfs_vistos, emails_vistos = set(), set()
+
+        relatorio = open(caminho_rejeitados, "w", newline="", encoding="utf-8") if caminho_rejeitados else None
+        try:
+            escritor = csv.writer(relatorio) if relatorio else None
+            if escritor:
+                escritor.writerow(("linha", "motivo") + CAMPOS)
+
+            for lote in self._ler_em_lotes(caminho, formato):
+                resultado['lidos'] += len(lote)
+                validos, rejeitados = self._processar_lote(lote, cpfs_vistos, emails_vistos)
+                if validos:
+                    self._gravar(validos)
+                resultado['inseridos'] += len(validos)
+                resultado['rejeitados'] += len(rejeitados)
+                if escritor:
+                    escritor.writerows(
+                        (numero, motivo) + tuple(dados.get(c, "") for c in CAMPOS)
+                        for numero, motivo, dados in rejeitados
+                    )
+        finally:
+            if relatorio:
+                relatorio.close()
+
+        duracao = time.perf_counter() - inicio
+        resultado['duracao_s'] = round(duracao, 3)
+        resultado['linhas_por_segundo'] = round(resultado['lidos'] / duracao) if duracao > 0 else 0
+        return resultado
+
+    @staticmethod
+    def _detectar_formato(caminho: str) -> str:
+        extensao = os.path.splitext(caminho)[1].lower()
+        if extensao == ".csv":
+            return "csv"
+        if extensao in (".jsonl", ".ndjson"):
+            return "jsonl"
+        raise ValueError(f"Formato de arquivo não suportado: {extensao or caminho}")
+
+    def _ler_em_lotes(self, caminho: str, formato: str) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """Lê o arquivo em streaming, produzindo listas de (número da linha, dados)"""
+        with open(caminho, newline="", encoding="utf-8") as arquivo:
+            if formato == "csv":
+                # A linha 1 é o cabeçalho
+                linhas = enumerate(csv.DictReader(arquivo), start=2)
+            else:
+                linhas = ((n, self._ler_json(texto)) for n, texto in enumerate(arquivo, start=1) if texto.strip())
+
+            lote = []
+            for item in linhas:
+                lote.append(item)
+                if len(lote) == self.tamanho_lote:
+                    yield lote
+                    lote = []
+            if lote:
+                yield lote
+
+    @staticmethod
+    def _ler_json(texto: str) -> Dict[str, Any]:
+        try:
+            dados = json.loads(texto)
+        except ValueError:
+            return {"_erro": "JSON inválido"}
+        return dados if isinstance(dados, dict) else {"_erro": "JSON inválido"}
+
+    def _processar_lote(self, lote, cpfs_vistos: set, emails_vistos: set):
+        """Valida um lote e retorna (linhas para gravar, [(linha, motivo, dados)])"""
+        rejeitados = []
+        candidatos = []
+
+        # 1. Validação de campos
+        for numero, dados in lote:
+            motivo, linha = self._validar_campos(dados)
+            if motivo:
+                rejeitados.append((numero, motivo, dados))
+            else:
+                candidatos.append((numero, dados, linha))
+
+        # 2. Duplicados já gravados no banco: uma consulta por coluna para o lote todo
+        cpfs_no_banco = self._existentes(Participante.cpf, [c[2][0] for c in candidatos])
+        emails_no_banco = self._existentes(Participante.email, [c[2][2] for c in candidatos])
+
+        # 3. Duplicados no próprio arquivo
+        validos = []
+        for numero, dados, linha in candidatos:
+            cpf, email = linha[0], linha[2]
+            if cpf in cpfs_no_banco:
+                motivo = "CPF já cadastrado"
+            elif email in emails_no_banco:
+                motivo = "E-mail já cadastrado"
+            elif cpf in cpfs_vistos:
+                motivo = "CPF duplicado no arquivo"
+            elif email in emails_vistos:
+                motivo = "E-mail duplicado no arquivo"
+            else:
+                cpfs_vistos.add(cpf)
+                emails_vistos.add(email)
+                validos.append(linha)
+                continue
+            rejeitados.append((numero, motivo, dados))
+
+        rejeitados.sort(key=lambda r: r[0])  # relatório na ordem do arquivo
+        return validos, rejeitados
+
+    def _validar_campos(self, dados: Dict[str, Any]):
+        """Retorna (motivo da recusa, None) ou (None, (cpf, nome, email, data_nascimento))"""
+        if "_erro" in dados:
+            return dados["_erro"], None
+
+        # No JSONL os valores podem vir com qualquer tipo (um CPF numérico, por
+        # exemplo, perderia os zeros à esquerda): só texto é aceito
+        for campo in CAMPOS:
+            if not isinstance(dados.get(campo) or "", str):
+                return f"Campo {campo} inválido", None
+
+        cpf = (dados.get("cpf") or "").strip()
+        nome = (dados.get("nome") or "").strip()
+        email = (dados.get("email") or "").strip()
+        nascimento = (dados.get("data_nascimento") or "").strip()
+
+        if not CPF_REGEX.match(cpf):
+            return "CPF deve estar no formato 123.456.789-00", None
+        if self.validar_digitos_cpf and not cpf_digitos_validos(cpf):
+            return "CPF com dígitos verificadores inválidos", None
+        if not nome:
+            return "Nome obrigatório", None
+        if len(nome) > 100:
+            return "Nome com mais de 100 caracteres", None
+        if not EMAIL_REGEX.match(email) or len(email) > 100:
+            return "E-mail inválido", None
+        try:
+            data_nascimento = datetime.fromisoformat(nascimento)
+        except ValueError:
+            return "Data de nascimento inválida", None
+
+        return None, (cpf, nome, email, data_nascimento)
+
+    def _existentes(self, coluna, valores: List[str]) -> set:
+        """Valores já gravados na coluna (lista enviada como um único parâmetro JSON)"""
+        if not valores:
+            return set()
+        lista = func.json_each(json.dumps(valores)).table_valued("value")
+        return set(self.db.execute(select(coluna).where(coluna.in_(select(lista.c.value)))).scalars())
+
+    def _gravar(self, linhas: List[tuple]):
+        """Grava um lote com um único executemany e faz o commit"""
+        conexao = self.db.connection()
+        converter_data = Participante.__table__.c.data_nascimento.type.bind_processor(conexao.dialect)
+        if converter_data:
+            linhas = [(cpf, nome, email, converter_data(nasc)) for cpf, nome, email, nasc in linhas]
+        conexao.exec_driver_sql(_SQL_INSERIR, linhas)
+        self.db.commit()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+    from models.database import SessionLocal, create_db_tables
+
+    parser = argparse.ArgumentParser(description="Importa participantes de um arquivo CSV ou JSONL")
+    parser.add_argument("arquivo")
+    parser.add_argument("--rejeitados", default="participantes_rejeitados.csv")
+    parser.add_argument("--tamanho-lote", type=int, default=5000)
+    args = parser.parse_args()
+
+    create_db_tables()
+    sessao = SessionLocal()
+    try:
+        resultado = ImportadorParticipantes(sessao, args.tamanho_lote).importar(args.arquivo, args.rejeitados)
+    finally:
+        sessao.close()
+    print(f"Importação concluída: {resultado}")
@@ -0,0 +1,435 @@
+"""
+Detecção de leilões quentes e caminho em memória para eles.
+
+O tráfego é concentrado: poucos leilões recebem a maior parte dos lances,
+quase sempre perto de data_fim. LeiloesQuentes mede a taxa de lances de cada
+leilão em uma janela deslizante, promove ao conjunto quente os que passam do
+limiar de promoção e rebaixa os que caem abaixo do limiar de rebaixamento
+(menor, para um leilão na fronteira não entrar e sair a cada lance).
+Para um leilão quente:
+
+- o GerenciadorLeiloes guarda o estado em memória e recusa, sem acessar o
+  banco, os lances que já perderam;
+- as atualizações de preço são agrupadas (DifusorPrecos): os assinantes
+  recebem só o último preço de cada intervalo;
+- o EscritorLances grava os seus lances antes dos de leilões frios. A fila
+  dele é limitada e cada pedido tem prazo: nos picos de encerramento o que não
+  pode ser gravado a tempo é recusado na hora com "Sistema ocupado".
+
+Uso:
+    quentes = LeiloesQuentes(limiar_promocao=20, difusor=DifusorPrecos())
+    gerenciador = GerenciadorLeiloes(db, quentes=quentes)
+    REGISTRO.registrar_coletor(quentes.coletar)
+
+    escritor = EscritorLances(lambda: GerenciadorLeiloes(SessionRapida(), quentes=quentes),
+                              quentes, capacidade=1000, prazo_s=0.5).iniciar()
+    REGISTRO.registrar_coletor(escritor.coletar)
+    lance = escritor.adicionar_lance(leilao_id, Lance(...))
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from models.leilao import EstadoLeilao, TipoLeilao
+from services.metricas import (ESPERA_FILA_LANCES, EVENTOS_PRECO, LANCES_DESCARTADOS, LEILOES_QUENTES,
+                               PROFUNDIDADE_FILA_LANCES, TAXA_LANCES_QUENTES, TRANSICOES_QUENTES)
+
+
+class EstadoQuente(NamedTuple):
+    """Estado de um leilão quente mantido em memória"""
+    tipo: TipoLeilao
+    estado: EstadoLeilao
+    lance_minimo: float
+    ultimo_valor: Optional[float]  # None enquanto não há lances
+
+
+class DifusorPrecos:
+    """
+    Entrega atualizações de preço aos assinantes, agrupadas por intervalo.
+
+    A primeira atualização depois de um intervalo sem entregas sai na hora; as
+    que chegam em rajada ficam pendentes e cada leilão entrega só o último preço
+    quando o intervalo vence (na próxima publicação ou em descarregar(), chamado
+    também pela varredura de LeiloesQuentes).
+    """
+
+    def __init__(self, intervalo_s: float = 0.25, relogio: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            intervalo_s: Intervalo mínimo entre duas entregas
+            relogio: Função que retorna o tempo atual em segundos
+        """
+        if intervalo_s < 0:
+            raise ValueError("Intervalo do difusor não pode ser negativo")
+        self.intervalo_s = intervalo_s
+        self._relogio = relogio
+        self._assinantes: List[Callable[[int, float, int], Any]] = []
+        self._pendentes: Dict[int, Tuple[float, int]] = {}
+        self._proxima_entrega = relogio()
+        self._lock = threading.Lock()
+
+    def assinar(self, assinante: Callable[[int, float, int], Any]):
+        """Registra uma função chamada com (leilao_id, valor, participante_id)"""
+        self._assinantes.append(assinante)
+
+    def publicar(self, leilao_id: int, valor: float, participante_id: int):
+        with self._lock:
+            if leilao_id in self._pendentes:
+                EVENTOS_PRECO.rotulado("agrupado").inc()
+            self._pendentes[leilao_id] = (valor, participante_id)
+            vencido = self._relogio() >= self._proxima_entrega
+        if vencido:
+            self.descarregar()
+
+    def descarregar(self) -> int:
+        """Entrega as atualizações pendentes e retorna quantas foram entregues"""
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, {}
+            self._proxima_entrega = self._relogio() + self.intervalo_s
+        for leilao_id, (valor, participante_id) in pendentes.items():
+            for assinante in self._assinantes:
+                try:
+                    assinante(leilao_id, valor, participante_id)
+                except Exception as e:
+                    # O lance já foi gravado: a falha de um assinante não o desfaz
+                    print(f"ALERTA: falha ao entregar o preço do leilão ID {leilao_id}: {e}")
+        EVENTOS_PRECO.rotulado("entregue").inc(len(pendentes))
+        return len(pendentes)
+
+
+class LeiloesQuentes:
+    """
+    Taxa de lances por leilão em janela deslizante e conjunto de leilões quentes.
+
+    A janela é dividida em fatias com contagem própria e um total corrente, então
+    registrar um lance custa O(1). Leilões sem lances na janela são esquecidos na
+    varredura, feita no máximo uma vez por fatia, que também rebaixa os que esfriaram.
+    Pode ser compartilhado por gerenciadores de várias threads.
+    """
+
+    def __init__(self, limiar_promocao: float = 10.0, limiar_rebaixamento: Optional[float] = None,
+                 janela_s: float = 10.0, fatias: int = 10, capacidade: int = 64,
+                 difusor: Optional[DifusorPrecos] = None, relogio: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            limiar_promocao: Lances por segundo a partir dos quais o leilão fica quente
+            limiar_rebaixamento: Taxa abaixo da qual deixa de ser quente (padrão: metade da promoção)
+            janela_s: Duração da janela deslizante
+            fatias: Número de fatias da janela (resolução da taxa)
+            capacidade: Tamanho máximo do conjunto quente
+            difusor: DifusorPrecos que recebe os preços dos leilões quentes
+            relogio: Função que retorna o tempo atual em segundos
+        """
+        if limiar_rebaixamento is None:
+            limiar_rebaixamento = limiar_promocao / 2
+        if limiar_promocao <= 0 or not 0 <= limiar_rebaixamento <= limiar_promocao:
+            raise ValueError("Limiares devem satisfazer 0 <= rebaixamento <= promoção e promoção > 0")
+        if janela_s <= 0 or fatias <= 0 or capacidade <= 0:
+            raise ValueError("Janela, fatias e capacidade devem ser positivas")
+        self.limiar_promocao = limiar_promocao
+        self.limiar_rebaixamento = limiar_rebaixamento
+        self.janela_s = janela_s
+        self.fatias = fatias
+        self.capacidade = capacidade
+        self.difusor = difusor
+        self._largura = janela_s / fatias
+        self._relogio = relogio
+        # leilao_id -> [última fatia, total na janela, contagem de cada fatia...]
+        self._janelas: Dict[int, list] = {}
+        # leilao_id -> EstadoQuente, ou None até o gerenciador carregar o estado
+        self._quentes: Dict[int, Optional[EstadoQuente]] = {}
+        self._proxima_varredura = self._fatia_atual() + 1
+        self._lock = threading.Lock()
+
+        # Contadores para estatísticas
+        self.promocoes = 0
+        self.rebaixamentos = 0
+
+    def _fatia_atual(self) -> int:
+        return int(self._relogio() // self._largura)
+
+    # Zera as fatias que saíram da janela desde a última atualização
+    def _avancar(self, janela: list, fatia: int):
+        ultima = janela[0]
+        if fatia <= ultima:
+            return
+        if fatia - ultima >= self.fatias:
+            janela[1:] = [0] * (self.fatias + 1)
+        else:
+            for f in range(ultima + 1, fatia + 1):
+                posicao = 2 + f % self.fatias
+                janela[1] -= janela[posicao]
+                janela[posicao] = 0
+        janela[0] = fatia
+
+    def registrar(self, leilao_id: int, lances: int = 1) -> bool:
+        """Conta lances recebidos pelo leilão e retorna se ele está quente"""
+        fatia = self._fatia_atual()
+        with self._lock:
+            janela = self._janelas.get(leilao_id)
+            if janela is None:
+                janela = self._janelas[leilao_id] = [fatia] + [0] * (self.fatias + 1)
+            else:
+                self._avancar(janela, fatia)
+            janela[1] += lances
+            janela[2 + fatia % self.fatias] += lances
+            if (leilao_id not in self._quentes and len(self._quentes) < self.capacidade
+                    and janela[1] / self.janela_s >= self.limiar_promocao):
+                self._quentes[leilao_id] = None
+                self.promocoes += 1
+                TRANSICOES_QUENTES.rotulado("promocao").inc()
+            quente = leilao_id in self._quentes
+            varrer = fatia >= self._proxima_varredura
+        if varrer:
+            self.varrer()
+        return quente
+
+    def varrer(self):
+        """Rebaixa os leilões que esfriaram e esquece os que não tiveram lances na janela"""
+        fatia = self._fatia_atual()
+        with self._lock:
+            for leilao_id, janela in list(self._janelas.items()):
+                self._avancar(janela, fatia)
+                if leilao_id in self._quentes and janela[1] / self.janela_s < self.limiar_rebaixamento:
+                    del self._quentes[leilao_id]
+                    self.rebaixamentos += 1
+                    TRANSICOES_QUENTES.rotulado("rebaixamento").inc()
+                    TAXA_LANCES_QUENTES.remover(str(leilao_id))
+                if janela[1] == 0 and leilao_id not in self._quentes:
+                    del self._janelas[leilao_id]
+            self._proxima_varredura = fatia + 1
+        if self.difusor is not None:
+            self.difusor.descarregar()
+
+    def quente(self, leilao_id: int) -> bool:
+        return leilao_id in self._quentes
+
+    def taxa(self, leilao_id: int) -> float:
+        """Lances por segundo do leilão na janela deslizante"""
+        with self._lock:
+            janela = self._janelas.get(leilao_id)
+            if janela is None:
+                return 0.0
+            self._avancar(janela, self._fatia_atual())
+            return janela[1] / self.janela_s
+
+    def quentes(self) -> Dict[int, float]:
+        """Taxa de cada leilão do conjunto quente"""
+        return {leilao_id: self.taxa(leilao_id) for leilao_id in list(self._quentes)}
+
+    def estado(self, leilao_id: int) -> Optional[EstadoQuente]:
+        return self._quentes.get(leilao_id)
+
+    def guardar_estado(self, leilao_id: int, estado: EstadoQuente):
+        """Guarda o estado lido do banco, se o leilão ainda estiver quente"""
+        with self._lock:
+            if leilao_id in self._quentes:
+                self._quentes[leilao_id] = estado
+
+    def invalidar(self, leilao_id: int):
+        """Descarta o estado em memória (chamado quando o leilão muda de estado)"""
+        with self._lock:
+            if leilao_id in self._quentes:
+                self._quentes[leilao_id] = None
+
+    def lance_aceito(self, leilao_id: int, valor: float, participante_id: int):
+        """Atualiza o último valor de um leilão quente e publica o novo preço"""
+        with self._lock:
+            estado = self._quentes.get(leilao_id)
+            # Lances de leilões ocultos não são divulgados
+            if estado is None or estado.tipo != TipoLeilao.INGLES:
+                return
+            if estado.ultimo_valor is None or valor > estado.ultimo_valor:
+                self._quentes[leilao_id] = estado._replace(ultimo_valor=valor)
+        if self.difusor is not None:
+            self.difusor.publicar(leilao_id, valor, participante_id)
+
+    def coletar(self):
+        """Coletor de métricas: tamanho do conjunto quente e taxa de cada membro"""
+        taxas = self.quentes()
+        LEILOES_QUENTES.definir(len(taxas))
+        for leilao_id, taxa in taxas.items():
+            TAXA_LANCES_QUENTES.rotulado(str(leilao_id)).definir(taxa)
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        return {
+            'acompanhados': len(self._janelas),
+            'quentes': len(self._quentes),
+            'capacidade': self.capacidade,
+            'promocoes': self.promocoes,
+            'rebaixamentos': self.rebaixamentos,
+        }
+
+
+class EscritorLances:
+    """
+    Thread única de gravação de lances com fila de prioridade limitada.
+
+    Os lances de leilões quentes passam à frente dos de leilões frios; na mesma
+    prioridade vale a ordem de chegada. Dentro de um leilão a ordem de chegada
+    sempre vale: enquanto ele tem lances na fila, os novos herdam a prioridade
+    deles, mesmo que o leilão tenha sido promovido ou rebaixado nesse meio
+    tempo. Como só esta thread grava, os lances não disputam entre si o lock de
+    escrita do SQLite.
+
+    A fila é o controle de admissão: com `capacidade` lances na fila, ou quando
+    a espera estimada (lances à frente x tempo médio de gravação) passa do prazo
+    do pedido, o lance é recusado na hora com "Sistema ocupado", e um lance cujo
+    prazo vence enquanto espera é descartado sem acessar o banco. Nos picos a
+    latência fica limitada ao prazo em vez de crescer com a fila.
+
+    criar_gerenciador é chamado dentro da thread; use uma sessão com
+    expire_on_commit=False (models.database.SessionRapida) para que o lance
+    devolvido possa ser lido por outras threads sem novo SELECT.
+    """
+
+    def __init__(self, criar_gerenciador: Callable[[], Any], quentes: Optional[LeiloesQuentes] = None,
+                 capacidade: Optional[int] = 10_000, prazo_s: Optional[float] = None,
+                 relogio: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            criar_gerenciador: Função que cria o GerenciadorLeiloes da thread de gravação
+            quentes: LeiloesQuentes que define a prioridade; sem ele a fila é só por ordem de chegada
+            capacidade: Lances na fila a partir dos quais novos lances são recusados (None: sem limite)
+            prazo_s: Prazo padrão de cada pedido, da chegada até o início da gravação (None: sem prazo)
+            relogio: Função que retorna o tempo atual em segundos
+        """
+        if capacidade is not None and capacidade <= 0:
+            raise ValueError("Capacidade da fila deve ser positiva")
+        if prazo_s is not None and prazo_s <= 0:
+            raise ValueError("Prazo deve ser positivo")
+        self._criar_gerenciador = criar_gerenciador
+        self.quentes = quentes
+        self.capacidade = capacidade
+        self.prazo_s = prazo_s
+        self._relogio = relogio
+        self._fila: List[tuple] = []
+        # Lances na fila por prioridade (0 = quente): os quentes só esperam pelos quentes
+        self._na_fila = [0, 0]
+        # leilao_id -> [prioridade, lances na fila]: enquanto um leilão tem lances
+        # esperando, os novos entram com a mesma prioridade deles, senão uma
+        # promoção faria os lances novos passarem à frente dos antigos do mesmo leilão
+        self._por_leilao: Dict[int, list] = {}
+        # Média móvel do tempo de gravação, para estimar a espera (0 até a primeira gravação)
+        self._gravacao_s = 0.0
+        self._sequencia = itertools.count()
+        self._condicao = threading.Condition()
+        self._encerrando = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Contadores para estatísticas
+        self.descartados = 0
+
+    def iniciar(self) -> "EscritorLances":
+        self._thread = threading.Thread(target=self._executar, name="escritor-lances", daemon=True)
+        self._thread.start()
+        return self
+
+    def enviar(self, leilao_id: int, lance, chave_idempotencia: Optional[str] = None,
+               prazo_s: Optional[float] = None) -> Future:
+        """
+        Enfileira um lance; o Future recebe o lance gravado ou o ValueError da recusa.
+
+        prazo_s substitui o prazo padrão do escritor para este pedido. Um lance
+        não admitido recebe o ValueError "Sistema ocupado" antes de retornar.
+        """
+        futuro = Future()
+        prazo_s = prazo_s if prazo_s is not None else self.prazo_s
+        quente = self.quentes is not None and self.quentes.quente(leilao_id)
+        agora = self._relogio()
+        with self._condicao:
+            if self._encerrando:
+                raise RuntimeError("Escritor de lances encerrado")
+            pendentes = self._por_leilao.get(leilao_id)
+            prioridade = pendentes[0] if pendentes else (0 if quente else 1)
+            motivo = None
+            if self.capacidade is not None and len(self._fila) >= self.capacidade:
+                motivo = "fila_cheia"
+            elif prazo_s is not None:
+                a_frente = self._na_fila[0] if prioridade == 0 else len(self._fila)
+                if a_frente * self._gravacao_s > prazo_s:
+                    motivo = "prazo_estimado"
+            if motivo is None:
+                prazo = agora + prazo_s if prazo_s is not None else None
+                heapq.heappush(self._fila, (prioridade, next(self._sequencia), agora, prazo,
+                                            leilao_id, lance, chave_idempotencia, futuro))
+                self._na_fila[prioridade] += 1
+                self._por_leilao.setdefault(leilao_id, [prioridade, 0])[1] += 1
+                self._condicao.notify()
+        if motivo is not None:
+            self._descartar(futuro, motivo)
+        return futuro
+
+    def adicionar_lance(self, leilao_id: int, lance, chave_idempotencia: Optional[str] = None,
+                        prazo_s: Optional[float] = None):
+        """Envia o lance e espera a gravação, como GerenciadorLeiloes.adicionar_lance"""
+        return self.enviar(leilao_id, lance, chave_idempotencia, prazo_s).result()
+
+    def encerrar(self, timeout: Optional[float] = None):
+        """Grava o que já está na fila e para a thread"""
+        with self._condicao:
+            self._encerrando = True
+            self._condicao.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def __len__(self) -> int:
+        return len(self._fila)
+
+    def coletar(self):
+        """Coletor de métricas: lances na fila"""
+        PROFUNDIDADE_FILA_LANCES.definir(len(self._fila))
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        return {
+            'na_fila': len(self._fila),
+            'capacidade': self.capacidade,
+            'prazo_s': self.prazo_s,
+            'gravacao_media_s': round(self._gravacao_s, 6),
+            'descartados': self.descartados,
+        }
+
+    def _descartar(self, futuro: Future, motivo: str):
+        with self._condicao:
+            self.descartados += 1
+        LANCES_DESCARTADOS.rotulado(motivo).inc()
+        if futuro.set_running_or_notify_cancel():
+            mensagem = "fila cheia" if motivo == "fila_cheia" else "prazo esgotado na fila de lances"
+            futuro.set_exception(ValueError(f"Sistema ocupado: {mensagem}, tente novamente"))
+
+    def _executar(self):
+        gerenciador = self._criar_gerenciador()
+        try:
+            while True:
+                with self._condicao:
+                    while not self._fila and not self._encerrando:
+                        self._condicao.wait()
+                    if not self._fila:
+                        return
+                    prioridade, _, chegada, prazo, leilao_id, lance, chave, futuro = heapq.heappop(self._fila)
+                    self._na_fila[prioridade] -= 1
+                    pendentes = self._por_leilao[leilao_id]
+                    pendentes[1] -= 1
+                    if not pendentes[1]:
+                        del self._por_leilao[leilao_id]
+                inicio = self._relogio()
+                ESPERA_FILA_LANCES.observar(inicio - chegada)
+                # Quem pediu já desistiu (ou vai desistir) do lance: gravar só atrasaria os próximos
+                if prazo is not None and inicio > prazo:
+                    self._descartar(futuro, "prazo_vencido")
+                    continue
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+                try:
+                    futuro.set_result(gerenciador.adicionar_lance_rapido(leilao_id, lance, chave))
+                except Exception as e:
+                    if not isinstance(e, ValueError):
+                        gerenciador.db.rollback()
+                    futuro.set_exception(e)
+                finally:
+                    self._gravacao_s += 0.2 * (self._relogio() - inicio - self._gravacao_s)
+        finally:
+            gerenciador.db.close()
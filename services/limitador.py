@@ -0,0 +1,149 @@
+"""
+Limite de taxa de lances por participante e por leilão (token bucket).
+
+Cada chave tem um balde com até `rajada` fichas, reposto continuamente a
+`taxa` fichas por segundo; cada lance consome uma ficha e, sem fichas, é
+recusado na hora, antes de qualquer acesso ao banco. Assim um cliente que
+dispara lances em sequência não segura o escritor do SQLite para os demais.
+
+O balde de uma chave é só uma tupla (fichas, instante da última atualização).
+Um balde parado por rajada / taxa segundos está cheio de novo, igual a um que
+nunca existiu, então a varredura (no máximo uma por esse período) o descarta:
+a memória acompanha as chaves ativas, não todas as já vistas.
+
+Uso:
+    limitador = LimitadorLances(por_participante=(5, 10), por_leilao=(200, 400))
+    gerenciador = GerenciadorLeiloes(db, limitador=limitador)
+
+Ou pelo ambiente (taxa/rajada), com limitador_do_ambiente():
+    LEILAO_LIMITE_PARTICIPANTE=5/10
+    LEILAO_LIMITE_LEILAO=200/400
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from services.metricas import LANCES_LIMITADOS
+
+
+class BaldesFichas:
+    """
+    Baldes de fichas independentes por chave, com descarte dos ociosos.
+
+    Pode ser compartilhado por gerenciadores de várias threads.
+    """
+
+    def __init__(self, taxa: float, rajada: float, relogio: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            taxa: Fichas repostas por segundo (lances por segundo sustentados)
+            rajada: Capacidade do balde (lances aceitos em sequência após um período parado)
+            relogio: Função que retorna o tempo atual em segundos
+        """
+        if taxa <= 0 or rajada < 1:
+            raise ValueError("Taxa deve ser positiva e a rajada de pelo menos 1 lance")
+        self.taxa = taxa
+        self.rajada = rajada
+        self._relogio = relogio
+        # Tempo para um balde vazio encher: depois disso a chave pode ser esquecida
+        self._ociosidade = rajada / taxa
+        # chave -> (fichas, instante da última atualização)
+        self._baldes: Dict[Hashable, Tuple[float, float]] = {}
+        self._proxima_varredura = relogio() + self._ociosidade
+        self._lock = threading.Lock()
+
+        # Contadores para estatísticas
+        self.recusas = 0
+        self.descartadas = 0
+
+    def consumir(self, chave: Hashable, fichas: float = 1.0) -> float:
+        """Consome fichas do balde da chave; retorna 0 se havia fichas ou os segundos até haver"""
+        agora = self._relogio()
+        with self._lock:
+            saldo, instante = self._baldes.get(chave, (self.rajada, agora))
+            saldo = min(self.rajada, saldo + (agora - instante) * self.taxa)
+            if saldo >= fichas:
+                saldo -= fichas
+                espera = 0.0
+            else:
+                self.recusas += 1
+                espera = (fichas - saldo) / self.taxa
+            self._baldes[chave] = (saldo, agora)
+            if agora >= self._proxima_varredura:
+                self._varrer(agora)
+        return espera
+
+    # Descarta os baldes sem uso há tempo suficiente para estarem cheios
+    def _varrer(self, agora: float):
+        limite = agora - self._ociosidade
+        ociosas = [chave for chave, (_, instante) in self._baldes.items() if instante <= limite]
+        for chave in ociosas:
+            del self._baldes[chave]
+        self.descartadas += len(ociosas)
+        self._proxima_varredura = agora + self._ociosidade
+
+    def __len__(self) -> int:
+        return len(self._baldes)
+
+
+class LimitadorLances:
+    """
+    Limites de lances por participante e por leilão, verificados antes do banco.
+
+    O limite por participante contém um cliente que envia lances demais; o por
+    leilão protege o escritor quando muitos participantes disputam o mesmo
+    leilão. Qualquer um dos dois pode ser desligado com None.
+    """
+
+    def __init__(self, por_participante: Optional[Tuple[float, float]] = (5.0, 10.0),
+                 por_leilao: Optional[Tuple[float, float]] = None,
+                 relogio: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            por_participante: (taxa, rajada) de cada participante, ou None
+            por_leilao: (taxa, rajada) de cada leilão, ou None
+            relogio: Função que retorna o tempo atual em segundos
+        """
+        self.participantes = BaldesFichas(*por_participante, relogio) if por_participante else None
+        self.leiloes = BaldesFichas(*por_leilao, relogio) if por_leilao else None
+
+    def verificar(self, leilao_id: int, participante_id: int):
+        """Consome uma ficha do participante e do leilão ou recusa o lance com ValueError"""
+        # A ficha do participante é gasta mesmo se o leilão recusar: a tentativa conta
+        for limite, baldes, chave in (("participante", self.participantes, participante_id),
+                                      ("leilao", self.leiloes, leilao_id)):
+            if baldes is None:
+                continue
+            espera = baldes.consumir(chave)
+            if espera:
+                LANCES_LIMITADOS.rotulado(limite).inc()
+                raise ValueError(f"Limite de lances por {limite} excedido; tente novamente em {espera:.2f}s")
+
+    def obter_estatisticas(self) -> dict:
+        return {
+            nome: {"chaves": len(baldes), "recusas": baldes.recusas, "descartadas": baldes.descartadas}
+            for nome, baldes in (("participante", self.participantes), ("leilao", self.leiloes))
+            if baldes is not None
+        }
+
+
+# Lê "taxa/rajada" de uma variável de ambiente; None se não estiver definida
+def _ler_limite(variavel: str) -> Optional[Tuple[float, float]]:
+    valor = os.getenv(variavel)
+    if not valor:
+        return None
+    try:
+        taxa, rajada = (float(parte) for parte in valor.split("/"))
+    except ValueError:
+        raise ValueError(f"{variavel} deve ter o formato taxa/rajada, por exemplo 5/10") from None
+    return taxa, rajada
+
+
+def limitador_do_ambiente() -> Optional[LimitadorLances]:
+    """LimitadorLances configurado por LEILAO_LIMITE_PARTICIPANTE e LEILAO_LIMITE_LEILAO; None sem nenhum dos dois"""
+    por_participante = _ler_limite("LEILAO_LIMITE_PARTICIPANTE")
+    por_leilao = _ler_limite("LEILAO_LIMITE_LEILAO")
+    if por_participante is None and por_leilao is None:
+        return None
+    return LimitadorLances(por_participante, por_leilao)
@@ -0,0 +1,367 @@
+"""
+Métricas operacionais (contadores, medidores e histogramas) no formato texto do Prometheus.
+
+O registro de um valor é só uma soma em uma célula da própria thread (sem
+lock), para que as métricas possam ficar ligadas no caminho dos lances.
+Séries com rótulos são obtidas com .rotulado(...) e podem ser guardadas
+pelo chamador.
+
+Uso:
+    LANCES_ACEITOS.rotulado("orm").inc()
+    print(REGISTRO.renderizar_prometheus())
+    servir_metricas(9100)   # GET /metrics
+"""
+import bisect
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Faixas padrão dos histogramas, em segundos
+FAIXAS_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _formatar(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metrica(ABC):
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.rotulos:
+            self._padrao = self.rotulado()
+
+    def rotulado(self, *valores: str):
+        """Série da métrica com os valores de rótulo informados (criada na primeira vez)"""
+        serie = self._series.get(valores)
+        if serie is None:
+            if len(valores) != len(self.rotulos):
+                raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}")
+            with self._lock:
+                serie = self._series.setdefault(valores, self._nova_serie())
+        return serie
+
+    def remover(self, *valores: str):
+        """Descarta uma série (ex.: rótulo de um leilão que saiu do conjunto acompanhado)"""
+        with self._lock:
+            self._series.pop(valores, None)
+
+    @abstractmethod
+    def _nova_serie(self):
+        """Série vazia do tipo da métrica"""
+
+    def _rotulos_texto(self, valores: Tuple[str, ...], extra: str = "") -> str:
+        pares = [f'{r}="{_escapar(str(v))}"' for r, v in zip(self.rotulos, valores)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+    def renderizar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        for valores, serie in sorted(self._series.items()):
+            linhas.extend(self._amostras(valores, serie))
+        return linhas
+
+    def _amostras(self, valores, serie) -> List[str]:
+        return [f"{self.nome}{self._rotulos_texto(valores)} {_formatar(serie.valor)}"]
+
+
+class _DonoDaCelula:
+    """Guardado só no threading.local da thread: é coletado quando ela termina"""
+    __slots__ = ("__weakref__",)
+
+
+class _Celulas:
+    """
+    Uma célula (lista de números) por thread, somadas apenas na leitura.
+
+    Cada thread escreve só na própria célula, então o registro não precisa de
+    lock (um lock custa várias centenas de ns) e nenhum incremento se perde.
+    Quando a thread termina, a célula dela é somada a uma base e descartada,
+    para que a rotatividade de threads não faça a lista (e a leitura) crescer.
+    """
+    __slots__ = ("_local", "_celulas", "_base", "_lock", "_tamanho", "__weakref__")
+
+    def __init__(self, tamanho: int):
+        self._local = threading.local()
+        self._celulas: Dict[int, list] = {}
+        self._base = [0] * tamanho
+        self._lock = threading.Lock()
+        self._tamanho = tamanho
+
+    def celula(self) -> list:
+        try:
+            return self._local.celula
+        except AttributeError:
+            celula = [0] * self._tamanho
+            dono = _DonoDaCelula()
+            with self._lock:
+                self._celulas[id(celula)] = celula
+            recolher = weakref.finalize(dono, _Celulas._recolher, weakref.ref(self), celula)
+            recolher.atexit = False
+            self._local.celula, self._local.dono = celula, dono
+            return celula
+
+    # Chamado quando o dono da célula é coletado (a thread terminou e não
+    # escreve mais nela). A base é trocada, não alterada, para que uma leitura
+    # em andamento some a base antiga com a célula sem contar nada duas vezes.
+    @staticmethod
+    def _recolher(referencia, celula: list):
+        celulas = referencia()
+        if celulas is None:
+            return
+        with celulas._lock:
+            if celulas._celulas.pop(id(celula), None) is not None:
+                celulas._base = [b + v for b, v in zip(celulas._base, celula)]
+
+    def somar(self) -> list:
+        with self._lock:
+            base, celulas = self._base, list(self._celulas.values())
+        return [sum(valores) for valores in zip(base, *celulas)]
+
+
+class _SerieContador:
+    __slots__ = ("_celulas",)
+
+    def __init__(self):
+        self._celulas = _Celulas(1)
+
+    def inc(self, quantidade: float = 1):
+        self._celulas.celula()[0] += quantidade
+
+    @property
+    def valor(self) -> float:
+        return self._celulas.somar()[0]
+
+
+class _SerieMedidor:
+    # Medidores são atualizados fora do caminho crítico (coletores), então um lock basta
+    __slots__ = ("valor", "_lock")
+
+    def __init__(self):
+        self.valor = 0
+        self._lock = threading.Lock()
+
+    def inc(self, quantidade: float = 1):
+        with self._lock:
+            self.valor += quantidade
+
+    def dec(self, quantidade: float = 1):
+        with self._lock:
+            self.valor -= quantidade
+
+    def definir(self, valor: float):
+        self.valor = valor
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (ex.: lances aceitos)"""
+    tipo = "counter"
+
+    def _nova_serie(self):
+        return _SerieContador()
+
+    def inc(self, quantidade: float = 1):
+        if quantidade < 0:
+            raise ValueError("Contador só pode ser incrementado")
+        self._padrao.inc(quantidade)
+
+
+class Medidor(_Metrica):
+    """Valor que sobe e desce (ex.: leilões abertos)"""
+    tipo = "gauge"
+
+    def _nova_serie(self):
+        return _SerieMedidor()
+
+    def inc(self, quantidade: float = 1):
+        self._padrao.inc(quantidade)
+
+    def dec(self, quantidade: float = 1):
+        self._padrao.dec(quantidade)
+
+    def definir(self, valor: float):
+        self._padrao.definir(valor)
+
+
+class _SerieHistograma:
+    # Célula por thread: [contagem por faixa..., soma, total]
+    __slots__ = ("faixas", "_celulas", "_soma", "_total")
+
+    def __init__(self, faixas: Tuple[float, ...]):
+        self.faixas = faixas
+        self._soma = len(faixas) + 1
+        self._total = len(faixas) + 2
+        self._celulas = _Celulas(len(faixas) + 3)
+
+    def observar(self, valor: float):
+        celula = self._celulas.celula()
+        celula[bisect.bisect_left(self.faixas, valor)] += 1
+        celula[self._soma] += valor
+        celula[self._total] += 1
+
+    def ler(self) -> Tuple[List[int], float, int]:
+        """(contagens por faixa, soma, total)"""
+        valores = self._celulas.somar()
+        return valores[:self._soma], valores[self._soma], valores[self._total]
+
+
+class Histograma(_Metrica):
+    """Distribuição de valores em faixas (ex.: latência de um lance em segundos)"""
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = (),
+                 faixas: Sequence[float] = FAIXAS_PADRAO):
+        self.faixas = tuple(sorted(faixas))
+        super().__init__(nome, ajuda, rotulos)
+
+    def _nova_serie(self):
+        return _SerieHistograma(self.faixas)
+
+    def observar(self, valor: float):
+        self._padrao.observar(valor)
+
+    def _amostras(self, valores, serie) -> List[str]:
+        contagens, soma, total = serie.ler()
+        linhas = []
+        acumulado = 0
+        for limite, contagem in zip(self.faixas + (float("inf"),), contagens):
+            acumulado += contagem
+            rotulos = self._rotulos_texto(valores, f'le="{_formatar(limite)}"')
+            linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+        linhas.append(f"{self.nome}_sum{self._rotulos_texto(valores)} {_formatar(soma)}")
+        linhas.append(f"{self.nome}_count{self._rotulos_texto(valores)} {total}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas renderizado junto; coletores atualizam medidores na leitura"""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._coletores: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _registrar(self, classe, nome: str, *args, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = self._metricas[nome] = classe(nome, *args, **kwargs)
+            elif not isinstance(metrica, classe):
+                raise ValueError(f"Métrica {nome} já registrada como {metrica.tipo}")
+            return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        return self._registrar(Contador, nome, ajuda, rotulos)
+
+    def medidor(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Medidor:
+        return self._registrar(Medidor, nome, ajuda, rotulos)
+
+    def histograma(self, nome: str, ajuda: str, rotulos: Sequence[str] = (),
+                   faixas: Sequence[float] = FAIXAS_PADRAO) -> Histograma:
+        return self._registrar(Histograma, nome, ajuda, rotulos, faixas)
+
+    def registrar_coletor(self, coletor: Callable[[], None]):
+        """Função chamada antes de cada renderização (ex.: contar leilões por estado no banco)"""
+        self._coletores.append(coletor)
+
+    def remover_coletor(self, coletor: Callable[[], None]):
+        if coletor in self._coletores:
+            self._coletores.remove(coletor)
+
+    def obter(self, nome: str) -> Optional[_Metrica]:
+        return self._metricas.get(nome)
+
+    def renderizar_prometheus(self) -> str:
+        """Todas as métricas no formato texto de exposição do Prometheus (0.0.4)"""
+        for coletor in list(self._coletores):
+            coletor()
+        linhas = []
+        for nome in sorted(self._metricas):
+            linhas.extend(self._metricas[nome].renderizar())
+        return "\n".join(linhas) + "\n"
+
+
+# Registro padrão da aplicação e as métricas do sistema de leilões
+REGISTRO = RegistroMetricas()
+
+LANCES_ACEITOS = REGISTRO.contador(
+    "leilao_lances_aceitos_total", "Lances gravados", ("caminho",))
+LANCES_RECUSADOS = REGISTRO.contador(
+    "leilao_lances_recusados_total", "Lances recusados por motivo", ("motivo",))
+LATENCIA_LANCE = REGISTRO.histograma(
+    "leilao_lance_latencia_segundos", "Tempo para aceitar ou recusar um lance", ("caminho",))
+LEILOES_POR_ESTADO = REGISTRO.medidor(
+    "leilao_leiloes", "Leilões por estado", ("estado",))
+ATRASO_ABERTURA = REGISTRO.histograma(
+    "leilao_atraso_abertura_segundos", "Tempo entre a data de início e a abertura do leilão",
+    faixas=(1, 5, 15, 60, 300, 900, 3600, 86400))
+ATRASO_FINALIZACAO = REGISTRO.histograma(
+    "leilao_atraso_finalizacao_segundos", "Tempo entre a data de término e a finalização do leilão",
+    faixas=(1, 5, 15, 60, 300, 900, 3600, 86400))
+LANCES_REPETIDOS = REGISTRO.contador(
+    "leilao_lances_repetidos_total", "Reenvios de lance respondidos pela chave de idempotência", ("origem",))
+LEILOES_QUENTES = REGISTRO.medidor(
+    "leilao_leiloes_quentes", "Leilões no conjunto quente (caminho em memória)")
+TAXA_LANCES_QUENTES = REGISTRO.medidor(
+    "leilao_taxa_lances_quentes", "Lances por segundo na janela deslizante de cada leilão quente", ("leilao_id",))
+TRANSICOES_QUENTES = REGISTRO.contador(
+    "leilao_transicoes_quentes_total", "Promoções e rebaixamentos do conjunto quente", ("transicao",))
+RECUSAS_EM_MEMORIA = REGISTRO.contador(
+    "leilao_lances_recusados_em_memoria_total", "Lances de leilões quentes recusados sem acessar o banco")
+EVENTOS_PRECO = REGISTRO.contador(
+    "leilao_eventos_preco_total", "Atualizações de preço de leilões quentes entregues ou agrupadas", ("resultado",))
+LANCES_LIMITADOS = REGISTRO.contador(
+    "leilao_lances_limitados_total", "Lances recusados pelo limite de taxa, antes de acessar o banco", ("limite",))
+PROFUNDIDADE_FILA_LANCES = REGISTRO.medidor(
+    "leilao_fila_lances", "Lances aguardando gravação na fila do escritor")
+ESPERA_FILA_LANCES = REGISTRO.histograma(
+    "leilao_fila_lances_espera_segundos", "Tempo de cada lance na fila do escritor até a gravação ou o descarte")
+LANCES_DESCARTADOS = REGISTRO.contador(
+    "leilao_lances_descartados_total", "Lances recusados pela fila do escritor (sistema ocupado)", ("motivo",))
+FILA_SHARD = REGISTRO.medidor(
+    "leilao_fila_shard", "Lances e operações aguardando a thread dona de cada shard", ("shard",))
+LANCES_POR_LOTE_SHARD = REGISTRO.histograma(
+    "leilao_shard_lote_lances", "Lances gravados em cada commit de lote dos shards",
+    faixas=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+LATENCIA_EMAIL = REGISTRO.histograma(
+    "email_envio_latencia_segundos", "Tempo de envio de e-mail", ("modo", "resultado"))
+
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+    registro: RegistroMetricas = REGISTRO
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = self.registro.renderizar_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass  # sem uma linha de log por coleta
+
+
+def servir_metricas(porta: int = 9100, endereco: str = "", registro: RegistroMetricas = REGISTRO) -> ThreadingHTTPServer:
+    """Expõe GET /metrics em uma thread de fundo; encerre com servidor.shutdown()"""
+    manipulador = type("ManipuladorMetricas", (_ManipuladorMetricas,), {"registro": registro})
+    servidor = ThreadingHTTPServer((endereco, porta), manipulador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -0,0 +1,220 @@
+"""
+Modo de perfilamento (cProfile + tracemalloc) para main() e as operações do GerenciadorLeiloes.
+
+Ativado por LEILAO_PROFILE=1 (ou python main.py --profile). O diretório de
+saída é LEILAO_PROFILE_DIR (padrão: perfis/). Para cada operação são gravados:
+
+  <operacao>.pstats   estatísticas do cProfile (python -m pstats, snakeviz)
+  <operacao>.folded   pilhas colapsadas (flamegraph.pl, speedscope, inferno)
+
+e relatorio_alocacoes.txt com os locais que mais alocaram memória em cada
+operação (tracemalloc). Várias chamadas da mesma operação são somadas.
+
+Com o modo desligado nada é envolvido: a verificação acontece uma vez, na
+criação do gerenciador.
+"""
+import atexit
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+DIRETORIO_PADRAO = "perfis"
+
+
+class Perfilador:
+    """Acumula perfis de CPU e de alocação por operação e grava os arquivos em salvar()"""
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO, top_alocacoes: int = 10):
+        self.diretorio = diretorio
+        self.top_alocacoes = top_alocacoes
+        self._perfis: Dict[str, List[cProfile.Profile]] = defaultdict(list)
+        self._alocacoes: Dict[str, Counter] = defaultdict(Counter)
+        self._chamadas: Counter = Counter()
+        self._tempos: Counter = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # O tracemalloc é global ao processo: ligado pela primeira operação em
+        # andamento (de qualquer thread) e desligado só quando a última termina
+        self._em_andamento = 0
+        self._iniciou_tracemalloc = False
+
+    @contextmanager
+    def perfilar(self, operacao: str):
+        """
+        Perfila o bloco como a operação informada.
+
+        Só um cProfile fica ativo por vez: uma operação aninhada (ex.:
+        finalizar_leilao chamando encontrar_leilao_por_id) pausa o perfil
+        externo, e o perfil interno é somado ao externo ao salvar.
+        """
+        pilha = getattr(self._local, "pilha", None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        self._entrar_tracemalloc()
+
+        perfil = cProfile.Profile()
+        if pilha:
+            pilha[-1][1].disable()
+        pilha.append((operacao, perfil, []))
+        antes = tracemalloc.take_snapshot()
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            duracao = time.perf_counter() - inicio
+            depois = tracemalloc.take_snapshot()
+            _, _, internos = pilha.pop()
+            self._sair_tracemalloc()
+            if pilha:
+                pilha[-1][2].append(perfil)
+                pilha[-1][2].extend(internos)
+                pilha[-1][1].enable()
+            self._registrar(operacao, [perfil] + internos, duracao, antes, depois)
+
+    def _entrar_tracemalloc(self):
+        with self._lock:
+            if self._em_andamento == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._iniciou_tracemalloc = True
+            self._em_andamento += 1
+
+    def _sair_tracemalloc(self):
+        with self._lock:
+            self._em_andamento -= 1
+            if self._em_andamento == 0 and self._iniciou_tracemalloc:
+                tracemalloc.stop()
+                self._iniciou_tracemalloc = False
+
+    def _registrar(self, operacao: str, perfis, duracao: float, antes, depois):
+        filtros = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diferencas = depois.filter_traces(filtros).compare_to(antes.filter_traces(filtros), "lineno")
+        with self._lock:
+            self._perfis[operacao].extend(perfis)
+            self._chamadas[operacao] += 1
+            self._tempos[operacao] += duracao
+            alocacoes = self._alocacoes[operacao]
+            for diferenca in diferencas:
+                if diferenca.size_diff > 0:
+                    quadro = diferenca.traceback[0]
+                    alocacoes[f"{quadro.filename}:{quadro.lineno}"] += diferenca.size_diff
+
+    def envolver(self, objeto, prefixo: str = ""):
+        """Substitui os métodos públicos do objeto por versões perfiladas"""
+        for nome in dir(type(objeto)):
+            metodo = getattr(objeto, nome)
+            if not nome.startswith("_") and callable(metodo):
+                setattr(objeto, nome, self._envolver_metodo(f"{prefixo}{nome}", metodo))
+        return objeto
+
+    def _envolver_metodo(self, operacao: str, metodo):
+        @wraps(metodo)
+        def perfilado(*args, **kwargs):
+            with self.perfilar(operacao):
+                return metodo(*args, **kwargs)
+        return perfilado
+
+    def relatorio(self) -> Dict[str, Dict[str, Any]]:
+        """operação -> {'chamadas', 'tempo_total_s', 'top_alocacoes': [(local, bytes)]}"""
+        with self._lock:
+            return {
+                operacao: {
+                    'chamadas': self._chamadas[operacao],
+                    'tempo_total_s': round(self._tempos[operacao], 6),
+                    'top_alocacoes': self._alocacoes[operacao].most_common(self.top_alocacoes),
+                }
+                for operacao in self._chamadas
+            }
+
+    def salvar(self) -> List[str]:
+        """Grava .pstats, .folded e o relatório de alocações; retorna os arquivos gravados"""
+        with self._lock:
+            perfis = {operacao: list(lista) for operacao, lista in self._perfis.items()}
+        if not perfis:
+            return []
+        os.makedirs(self.diretorio, exist_ok=True)
+        arquivos = []
+        for operacao, lista in perfis.items():
+            estatisticas = pstats.Stats(lista[0])
+            for perfil in lista[1:]:
+                estatisticas.add(perfil)
+            base = os.path.join(self.diretorio, operacao)
+            estatisticas.dump_stats(f"{base}.pstats")
+            with open(f"{base}.folded", "w", encoding="utf-8") as arquivo:
+                arquivo.writelines(f"{pilha} {valor}\n" for pilha, valor in pilhas_colapsadas(estatisticas))
+            arquivos += [f"{base}.pstats", f"{base}.folded"]
+
+        caminho = os.path.join(self.diretorio, "relatorio_alocacoes.txt")
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            for operacao, dados in sorted(self.relatorio().items()):
+                arquivo.write(f"{operacao}: {dados['chamadas']} chamada(s), {dados['tempo_total_s']:.4f}s\n")
+                for local, tamanho in dados['top_alocacoes']:
+                    arquivo.write(f"  {tamanho / 1024:10.1f} KiB  {local}\n")
+                arquivo.write("\n")
+        arquivos.append(caminho)
+        return arquivos
+
+
+def _nome_funcao(funcao) -> str:
+    arquivo, linha, nome = funcao
+    if arquivo == "~":  # funções embutidas
+        return nome
+    return f"{nome} ({os.path.basename(arquivo)}:{linha})"
+
+
+def pilhas_colapsadas(estatisticas: pstats.Stats, profundidade_maxima: int = 64):
+    """
+    Reconstrói pilhas no formato "a;b;c valor" (microssegundos) a partir do grafo
+    chamador -> chamado do pstats.
+
+    O cProfile não guarda pilhas completas: o tempo de cada aresta é repartido
+    entre os caminhos proporcionalmente, como fazem os conversores de pstats
+    para flamegraph.
+    """
+    dados = estatisticas.stats
+    chamados = defaultdict(list)
+    for funcao, (_, _, _, _, chamadores) in dados.items():
+        for chamador, aresta in chamadores.items():
+            chamados[chamador].append((funcao, aresta[3]))  # tempo acumulado da aresta
+    raizes = [f for f, (_, _, _, _, chamadores) in dados.items() if not chamadores]
+
+    pilhas: Counter = Counter()
+
+    def visitar(funcao, pilha, tempo):
+        _, _, proprio, acumulado, _ = dados[funcao]
+        pilha = pilha + [_nome_funcao(funcao)]
+        fracao = tempo / acumulado if acumulado else 0.0
+        if proprio * fracao > 0:
+            pilhas[";".join(pilha)] += proprio * fracao
+        if len(pilha) >= profundidade_maxima:
+            return
+        for chamado, tempo_aresta in chamados.get(funcao, ()):
+            if _nome_funcao(chamado) not in pilha:  # recursão: já contada no quadro atual
+                visitar(chamado, pilha, tempo_aresta * fracao)
+
+    for raiz in raizes:
+        visitar(raiz, [], dados[raiz][3])
+    return [(pilha, int(valor * 1_000_000)) for pilha, valor in sorted(pilhas.items())
+            if int(valor * 1_000_000) > 0]
+
+
+_perfilador: Optional[Perfilador] = None
+
+
+def perfilador_ativo() -> Optional[Perfilador]:
+    """Perfilador do processo quando LEILAO_PROFILE está ligado; None caso contrário"""
+    global _perfilador
+    if os.getenv("LEILAO_PROFILE", "").lower() not in ("1", "true", "sim"):
+        return None
+    if _perfilador is None:
+        _perfilador = Perfilador(os.getenv("LEILAO_PROFILE_DIR", DIRETORIO_PADRAO))
+        atexit.register(_perfilador.salvar)
+    return _perfilador
@@ -0,0 +1,65 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Union
+
+
+class Relogio(ABC):
+    """
+    Fonte de tempo injetável.
+
+    O GerenciadorLeiloes, o EmailService e o main.py pedem a hora a um
+    relógio em vez de chamar datetime.now() diretamente, para que uma
+    simulação possa avançar o tempo sem esperar.
+    """
+
+    @abstractmethod
+    def agora(self) -> datetime:
+        """Hora atual do relógio"""
+
+    @abstractmethod
+    def dormir(self, segundos: float):
+        """Espera os segundos informados no tempo do relógio"""
+
+
+class RelogioSistema(Relogio):
+    """Hora real do sistema"""
+
+    def agora(self) -> datetime:
+        return datetime.now()
+
+    def dormir(self, segundos: float):
+        time.sleep(segundos)
+
+
+class RelogioVirtual(Relogio):
+    """Relógio controlado pelo chamador: só anda com dormir/avancar/avancar_ate"""
+
+    def __init__(self, inicio: datetime):
+        self._agora = inicio
+        self._lock = threading.Lock()
+
+    def agora(self) -> datetime:
+        return self._agora
+
+    def dormir(self, segundos: float):
+        self.avancar(segundos)
+
+    def avancar(self, intervalo: Union[float, timedelta]):
+        if not isinstance(intervalo, timedelta):
+            intervalo = timedelta(seconds=intervalo)
+        if intervalo < timedelta(0):
+            raise ValueError("O relógio virtual não pode voltar no tempo")
+        with self._lock:
+            self._agora += intervalo
+
+    def avancar_ate(self, momento: datetime):
+        """Avança até o momento informado (momentos no passado são ignorados)"""
+        with self._lock:
+            if momento > self._agora:
+                self._agora = momento
+
+
+# Relógio padrão quando nenhum é injetado
+RELOGIO_SISTEMA = RelogioSistema()
@@ -0,0 +1,490 @@
+"""
+Escritor único por shard: lances ordenados em memória, sem disputa no banco.
+
+O SQLite aceita um escritor por vez, e escritores concorrentes só se ordenam
+pelo lock do banco, com esperas e timeouts que não controlamos. Neste modo os
+leilões são particionados por leilao_id entre threads de trabalho: cada uma é
+a única que grava os lances dos seus leilões. Ela mantém em memória o estado
+de cada leilão (último lance, quem já deu lance nos ocultos, data_fim do
+soft-close), aplica os lances na ordem de chegada com as mesmas regras e
+mensagens dos outros caminhos e grava em lote: tudo o que chegou enquanto o
+lote anterior era gravado vai em um único INSERT e um único commit.
+
+Com um arquivo por shard (criar_gerenciador recebe o índice do shard) os
+escritores não disputam nenhum lock e a vazão cresce com o número de shards;
+com um único arquivo em WAL eles só se alternam a cada commit de lote.
+
+Todas as escritas nos leilões de um shard devem passar pelo executor: os
+lances por enviar() e as demais operações (abrir, finalizar, lance
+automático...) por executar(), que as roda na mesma fila e recarrega o estado.
+Leilões com lances automáticos e holandeses são gravados pelo caminho rápido do
+gerenciador, ainda pela thread dona do shard.
+
+Uso:
+    executor = ExecutorShards(lambda indice: GerenciadorLeiloes(sessoes[indice]()), shards=4).iniciar()
+    lance = executor.adicionar_lance(leilao_id, Lance(...))
+    executor.executar(leilao_id, lambda g: g.finalizar_leilao(leilao_id)).result()
+"""
+import itertools
+import multiprocessing
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from models.lance import Lance
+from models.leilao import EstadoLeilao, TipoLeilao
+from services.metricas import FILA_SHARD, LANCES_POR_LOTE_SHARD
+
+
+class EstadoShard(NamedTuple):
+    """Estado de um leilão mantido pela thread dona do shard"""
+    tipo: TipoLeilao
+    estado: EstadoLeilao
+    lance_minimo: float
+    quantidade: int
+    data_fim: datetime
+    janela_prorrogacao_s: Optional[int]
+    prorrogacao_s: Optional[int]
+    automaticos: bool                    # há lances automáticos: gravação pelo caminho rápido
+    ultimo: Optional[Tuple[float, int]]  # (valor, participante_id) do último lance dos leilões ingleses
+    com_lance: set                       # participantes com lance nos leilões ocultos
+
+    # Aplica um lance aceito; retorna o novo estado e se o soft-close prorrogou o leilão
+    def aplicar(self, valor: float, participante_id: int, data_hora: datetime) -> Tuple["EstadoShard", bool]:
+        estado = self
+        if self.tipo.oculto:
+            self.com_lance.add(participante_id)
+        else:
+            estado = estado._replace(ultimo=(valor, participante_id))
+        if (self.janela_prorrogacao_s is not None
+                and self.data_fim - timedelta(seconds=self.janela_prorrogacao_s) <= data_hora <= self.data_fim):
+            return estado._replace(data_fim=self.data_fim + timedelta(seconds=self.prorrogacao_s)), True
+        return estado, False
+
+
+# Partição padrão: leilao_id módulo o número de shards (ids sequenciais se
+# distribuem por igual)
+def particao_por_modulo(shards: int) -> Callable[[int], int]:
+    return lambda leilao_id: leilao_id % shards
+
+
+class _Operacao(NamedTuple):
+    """Operação do gerenciador executada na fila do shard"""
+    leilao_id: int
+    funcao: Callable[[Any], Any]
+    futuro: Future
+
+
+# Aplica um lote retirado da fila de um shard: valida os lances contra o estado
+# em memória (estados, leilao_id -> EstadoShard), grava os aceitos em lote e
+# roda as operações na ordem de chegada. Resolve o Future de cada item e soma
+# em contagem os lances 'gravados', 'recusados' e os 'lotes' gravados. Usado
+# pela thread dona do shard e pelo processo do shard.
+def _processar(gerenciador, lote: list, estados: Dict[int, EstadoShard], contagem: Counter):
+    pendentes: List[Tuple[Any, Future]] = []
+    datas_fim: Dict[int, datetime] = {}
+    for item in lote:
+        if isinstance(item, _Operacao):
+            _gravar(gerenciador, pendentes, datas_fim, estados, contagem)
+            if item.futuro.set_running_or_notify_cancel():
+                _rodar(item.futuro, item.funcao, gerenciador)
+            estados.pop(item.leilao_id, None)
+            continue
+        leilao_id, lance, futuro = item
+        if not futuro.set_running_or_notify_cancel():
+            continue
+        try:
+            estado = _estado(gerenciador, estados, leilao_id)
+            if estado.automaticos or estado.tipo == TipoLeilao.HOLANDES:
+                # Regras que dependem do banco: mantém a ordem gravando o que está pendente antes
+                _gravar(gerenciador, pendentes, datas_fim, estados, contagem)
+                _rodar(futuro, lambda g: g.adicionar_lance_rapido(leilao_id, lance), gerenciador)
+                estados.pop(leilao_id, None)
+                continue
+            gerenciador.validar_lance_shard(estado, lance)
+        except ValueError as e:
+            contagem['recusados'] += 1
+            futuro.set_exception(e)
+            continue
+        except Exception as e:
+            gerenciador.db.rollback()
+            futuro.set_exception(e)
+            continue
+        lance.leilao_id = leilao_id
+        estado, prorrogado = estado.aplicar(lance.valor, lance.participante_id, lance.data_hora)
+        estados[leilao_id] = estado
+        if prorrogado:
+            datas_fim[leilao_id] = estado.data_fim
+        pendentes.append((lance, futuro))
+    _gravar(gerenciador, pendentes, datas_fim, estados, contagem)
+
+
+def _estado(gerenciador, estados: Dict[int, EstadoShard], leilao_id: int) -> EstadoShard:
+    estado = estados.get(leilao_id)
+    if estado is None:
+        estado = gerenciador.carregar_estado_shard(leilao_id)
+        if estado is None:
+            raise ValueError("Leilão não encontrado")
+        estados[leilao_id] = estado
+    return estado
+
+
+def _rodar(futuro: Future, funcao: Callable[[Any], Any], gerenciador):
+    try:
+        futuro.set_result(funcao(gerenciador))
+    except Exception as e:
+        if not isinstance(e, ValueError):
+            gerenciador.db.rollback()
+        futuro.set_exception(e)
+
+
+def _gravar(gerenciador, pendentes: List[Tuple[Any, Future]], datas_fim: Dict[int, datetime],
+            estados: Dict[int, EstadoShard], contagem: Counter):
+    if not pendentes:
+        return
+    lances = [lance for lance, _ in pendentes]
+    try:
+        gerenciador.gravar_lances_shard(lances, datas_fim)
+    except Exception as e:
+        gerenciador.db.rollback()
+        # O estado em memória já contava com esses lances: volta a ser lido do banco
+        for lance in lances:
+            estados.pop(lance.leilao_id, None)
+        for _, futuro in pendentes:
+            futuro.set_exception(e)
+    else:
+        contagem['gravados'] += len(lances)
+        contagem['lotes'] += 1
+        LANCES_POR_LOTE_SHARD.observar(len(lances))
+        for lance, futuro in pendentes:
+            futuro.set_result(lance)
+    pendentes.clear()
+    datas_fim.clear()
+
+
+class _DonoShard:
+    """Thread dona de um shard: fila própria, estado dos leilões e gravação em lote"""
+
+    def __init__(self, indice: int, criar_gerenciador: Callable[[int], Any], tamanho_lote: int):
+        self.indice = indice
+        self._criar_gerenciador = criar_gerenciador
+        self._tamanho_lote = tamanho_lote
+        self._fila: deque = deque()
+        self._condicao = threading.Condition()
+        self._encerrando = False
+        self._estados: Dict[int, EstadoShard] = {}
+        self._contagem: Counter = Counter()
+        self._thread = threading.Thread(target=self._executar, name=f"shard-{indice}", daemon=True)
+
+    # Contadores para estatísticas
+    @property
+    def gravados(self) -> int:
+        return self._contagem['gravados']
+
+    @property
+    def recusados(self) -> int:
+        return self._contagem['recusados']
+
+    @property
+    def lotes(self) -> int:
+        return self._contagem['lotes']
+
+    def iniciar(self):
+        self._thread.start()
+
+    def enfileirar(self, item):
+        with self._condicao:
+            if self._encerrando:
+                raise RuntimeError("Executor de shards encerrado")
+            self._fila.append(item)
+            # A thread do shard só espera com a fila vazia
+            if len(self._fila) == 1:
+                self._condicao.notify()
+
+    def encerrar(self):
+        with self._condicao:
+            self._encerrando = True
+            self._condicao.notify()
+
+    def juntar(self, timeout: Optional[float] = None):
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def na_fila(self) -> int:
+        return len(self._fila)
+
+    def _executar(self):
+        gerenciador = self._criar_gerenciador(self.indice)
+        try:
+            while True:
+                with self._condicao:
+                    while not self._fila and not self._encerrando:
+                        self._condicao.wait()
+                    if not self._fila:
+                        return
+                    # Tudo o que chegou durante a gravação anterior forma o próximo lote
+                    lote = [self._fila.popleft() for _ in range(min(len(self._fila), self._tamanho_lote))]
+                _processar(gerenciador, lote, self._estados, self._contagem)
+        finally:
+            gerenciador.db.close()
+
+
+# Mensagens entre o processo principal e o processo de um shard: listas de
+# ("lance", seq, leilao_id, valor, participante_id, data_hora, quantidade) e
+# ("operacao", seq, leilao_id, funcao) na ida e de (seq, resultado, erro) na
+# volta. Cada lado envia de uma vez tudo o que acumulou, então o custo de
+# serialização e de chamada de sistema é dividido pelo lote.
+def _executar_processo(indice: int, criar_gerenciador: Callable[[int], Any], tamanho_lote: int,
+                       entrada, saida):
+    gerenciador = criar_gerenciador(indice)
+    # As estatísticas são contadas pelo processo principal, a partir das respostas
+    estados: Dict[int, EstadoShard] = {}
+    contagem: Counter = Counter()
+    try:
+        while True:
+            mensagens = entrada.recv()
+            if mensagens is None:
+                return
+            for inicio in range(0, len(mensagens), tamanho_lote):
+                itens, futuros = [], []
+                for mensagem in mensagens[inicio:inicio + tamanho_lote]:
+                    futuro = Future()
+                    futuros.append((mensagem[1], futuro, mensagem[0] == "lance"))
+                    if mensagem[0] == "lance":
+                        _, _, leilao_id, valor, participante_id, data_hora, quantidade = mensagem
+                        itens.append((leilao_id, Lance(valor, participante_id, leilao_id, data_hora, quantidade),
+                                      futuro))
+                    else:
+                        itens.append(_Operacao(mensagem[2], mensagem[3], futuro))
+                _processar(gerenciador, itens, estados, contagem)
+                saida.send([(seq,) + _resultado(futuro, lance) for seq, futuro, lance in futuros])
+    finally:
+        gerenciador.db.close()
+
+
+# (resultado, erro) de um Future já resolvido; de um lance volta só o id. O
+# erro vai como (tipo, mensagem): uma exceção qualquer pode não ser
+# serializável (ex.: argumentos obrigatórios no __init__) e quebraria o pipe.
+# Recusas (ValueError e subclasses) vão com o tipo "ValueError".
+def _resultado(futuro: Future, lance: bool) -> tuple:
+    erro = futuro.exception()
+    if erro is not None:
+        tipo = "ValueError" if isinstance(erro, ValueError) else type(erro).__name__
+        return None, (tipo, str(erro))
+    return (futuro.result().id if lance else futuro.result()), None
+
+
+class _ShardProcesso:
+    """Shard em um processo próprio, com a mesma interface de _DonoShard"""
+
+    def __init__(self, indice: int, criar_gerenciador: Callable[[int], Any], tamanho_lote: int, contexto):
+        self.indice = indice
+        # Pipe(duplex=False) devolve (leitura, escrita)
+        self._entrada, self._ida = contexto.Pipe(duplex=False)
+        self._volta, self._saida = contexto.Pipe(duplex=False)
+        self._processo = contexto.Process(target=_executar_processo, name=f"shard-{indice}", daemon=True,
+                                          args=(indice, criar_gerenciador, tamanho_lote, self._entrada, self._saida))
+        self._fila: List[tuple] = []
+        self._pendentes: Dict[int, Tuple[Any, Future]] = {}
+        self._sequencia = itertools.count()
+        self._condicao = threading.Condition()
+        self._encerrando = False
+        self._envio = threading.Thread(target=self._enviar, name=f"shard-{indice}-envio", daemon=True)
+        self._recebimento = threading.Thread(target=self._receber, name=f"shard-{indice}-recebimento", daemon=True)
+
+        # Contadores para estatísticas
+        self.gravados = 0
+        self.recusados = 0
+        self.lotes = 0
+
+    def iniciar(self):
+        self._processo.start()
+        # As pontas do processo do shard: fechadas aqui, o fim dele chega como EOF
+        self._entrada.close()
+        self._saida.close()
+        self._envio.start()
+        self._recebimento.start()
+
+    def enfileirar(self, item):
+        seq = next(self._sequencia)
+        if isinstance(item, _Operacao):
+            mensagem, pendente = ("operacao", seq, item.leilao_id, item.funcao), (None, item.futuro)
+        else:
+            leilao_id, lance, futuro = item
+            mensagem = ("lance", seq, leilao_id, lance.valor, lance.participante_id, lance.data_hora,
+                        lance.quantidade)
+            pendente = (lance, futuro)
+        with self._condicao:
+            if self._encerrando:
+                raise RuntimeError("Executor de shards encerrado")
+            self._pendentes[seq] = pendente
+            self._fila.append(mensagem)
+            # A thread de envio só espera com a fila vazia: acordá-la a cada
+            # mensagem a faria disputar o GIL com quem enfileira
+            if len(self._fila) == 1:
+                self._condicao.notify()
+
+    def encerrar(self):
+        with self._condicao:
+            self._encerrando = True
+            self._condicao.notify()
+
+    def juntar(self, timeout: Optional[float] = None):
+        self._envio.join(timeout)
+        self._processo.join(timeout)
+        self._recebimento.join(timeout)
+
+    def na_fila(self) -> int:
+        return len(self._pendentes)
+
+    def _enviar(self):
+        while True:
+            with self._condicao:
+                while not self._fila and not self._encerrando:
+                    self._condicao.wait()
+                mensagens, self._fila = self._fila, []
+            if mensagens:
+                self._ida.send(mensagens)
+            elif self._encerrando:
+                self._ida.send(None)
+                return
+
+    def _receber(self):
+        while True:
+            try:
+                resultados = self._volta.recv()
+            except EOFError:
+                break
+            self.lotes += 1
+            for seq, resultado, erro in resultados:
+                with self._condicao:
+                    lance, futuro = self._pendentes.pop(seq)
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+                if erro is not None:
+                    # O erro volta como ValueError: a mensagem de uma recusa chega
+                    # igual à dos outros caminhos; outros erros levam o tipo original
+                    tipo, mensagem = erro
+                    self.recusados += tipo == "ValueError"
+                    futuro.set_exception(ValueError(mensagem if tipo == "ValueError" else f"{tipo}: {mensagem}"))
+                elif lance is None:
+                    futuro.set_result(resultado)
+                else:
+                    lance.id = resultado
+                    self.gravados += 1
+                    futuro.set_result(lance)
+        # O processo terminou: o que ficou sem resposta não será gravado
+        with self._condicao:
+            pendentes, self._pendentes = self._pendentes, {}
+        for _, futuro in pendentes.values():
+            if futuro.set_running_or_notify_cancel():
+                futuro.set_exception(RuntimeError(f"Processo do shard {self.indice} encerrado"))
+
+
+class ExecutorShards:
+    """
+    Leilões particionados entre threads ou processos, cada um único escritor dos seus.
+
+    criar_gerenciador(indice) é chamado dentro da thread (ou do processo) de
+    cada shard. Com threads, use uma sessão com expire_on_commit=False
+    (models.database.SessionRapida) para que o lance devolvido possa ser lido
+    por outras threads sem novo SELECT.
+
+    Com processos=True a validação e a gravação de cada shard rodam fora do GIL
+    do processo principal, e a vazão cresce com o número de shards; nesse modo
+    criar_gerenciador e as funções passadas a executar() precisam ser
+    serializáveis (funções de módulo ou GerenciadorPorArquivo), os lances
+    devolvidos não pertencem a nenhuma sessão e as métricas dos shards ficam nos
+    processos deles.
+    """
+
+    def __init__(self, criar_gerenciador: Callable[[int], Any], shards: int = 4, tamanho_lote: int = 512,
+                 particao: Optional[Callable[[int], int]] = None, processos: bool = False):
+        """
+        Args:
+            criar_gerenciador: Função que cria o GerenciadorLeiloes do shard de índice informado
+            shards: Número de threads ou processos (e de partições)
+            tamanho_lote: Máximo de lances gravados em um commit
+            particao: Função leilao_id -> índice do shard (padrão: leilao_id % shards)
+            processos: Um processo por shard em vez de uma thread
+        """
+        if shards <= 0 or tamanho_lote <= 0:
+            raise ValueError("Número de shards e tamanho do lote devem ser positivos")
+        self.shards = shards
+        self.particao = particao or particao_por_modulo(shards)
+        if processos:
+            # spawn: o processo do shard não herda conexões nem threads do principal
+            contexto = multiprocessing.get_context("spawn")
+            self._donos = [_ShardProcesso(indice, criar_gerenciador, tamanho_lote, contexto)
+                           for indice in range(shards)]
+        else:
+            self._donos = [_DonoShard(indice, criar_gerenciador, tamanho_lote) for indice in range(shards)]
+
+    def iniciar(self) -> "ExecutorShards":
+        for dono in self._donos:
+            dono.iniciar()
+        return self
+
+    def shard(self, leilao_id: int) -> int:
+        return self.particao(leilao_id)
+
+    def enviar(self, leilao_id: int, lance) -> Future:
+        """Enfileira um lance no dono do leilão; o Future recebe o lance gravado ou o ValueError da recusa"""
+        futuro = Future()
+        self._donos[self.particao(leilao_id)].enfileirar((leilao_id, lance, futuro))
+        return futuro
+
+    def adicionar_lance(self, leilao_id: int, lance):
+        """Envia o lance e espera a gravação, como GerenciadorLeiloes.adicionar_lance"""
+        return self.enviar(leilao_id, lance).result()
+
+    def executar(self, leilao_id: int, funcao: Callable[[Any], Any]) -> Future:
+        """Roda funcao(gerenciador) na fila do dono do leilão, depois dos lances já enviados"""
+        futuro = Future()
+        self._donos[self.particao(leilao_id)].enfileirar(_Operacao(leilao_id, funcao, futuro))
+        return futuro
+
+    def encerrar(self, timeout: Optional[float] = None):
+        """Grava o que já está nas filas e para as threads"""
+        for dono in self._donos:
+            dono.encerrar()
+        for dono in self._donos:
+            dono.juntar(timeout)
+
+    def coletar(self):
+        """Coletor de métricas: lances na fila de cada shard"""
+        for dono in self._donos:
+            FILA_SHARD.rotulado(str(dono.indice)).definir(dono.na_fila())
+
+    def obter_estatisticas(self) -> Dict[str, Any]:
+        return {
+            'shards': self.shards,
+            'na_fila': [dono.na_fila() for dono in self._donos],
+            'gravados': [dono.gravados for dono in self._donos],
+            'recusados': sum(dono.recusados for dono in self._donos),
+            'lotes': sum(dono.lotes for dono in self._donos),
+        }
+
+
+class GerenciadorPorArquivo:
+    """
+    criar_gerenciador serializável com um arquivo SQLite em WAL por shard.
+
+    Passe um único caminho para que todos os shards gravem no mesmo arquivo, e
+    catalogo para anexar o arquivo dos participantes (models.database.RoteadorShards).
+    """
+
+    def __init__(self, caminhos: List[str], timeout: float = 30.0, catalogo: Optional[str] = None):
+        self.caminhos = list(caminhos)
+        self.timeout = timeout
+        self.catalogo = catalogo
+
+    def __call__(self, indice: int):
+        from sqlalchemy.orm import sessionmaker
+        from models.database import criar_engine_wal
+        from models.gerenciador_leiloes import GerenciadorLeiloes
+
+        engine = criar_engine_wal(self.caminhos[indice % len(self.caminhos)], self.timeout, self.catalogo)
+        return GerenciadorLeiloes(sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)())
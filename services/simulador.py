@@ -0,0 +1,233 @@
+"""
+Simulador de eventos discretos para reproduzir um dia de leilões em tempo virtual.
+
+Os eventos gravados (cadastros de participantes e leilões, lances) são aplicados
+ao GerenciadorLeiloes real na ordem do tempo; a abertura e a finalização de cada
+leilão são agendadas para data_inicio e data_fim. Antes de cada evento o
+RelogioVirtual do gerenciador salta direto para o momento do evento, então a
+simulação anda tão rápido quanto a CPU e o banco permitem.
+
+Uso: python -m services.simulador origem.db --destino simulacao.db
+(origem.db pode ser gerado com python -m benchmarks.gerador_dados)
+"""
+import heapq
+import itertools
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao
+from models.participante import Participante
+from services.relogio import RelogioVirtual
+
+class Simulador:
+    """
+    Executa eventos em ordem de tempo sobre um gerenciador com RelogioVirtual.
+
+    Eventos externos (dicionários com 'momento' e 'tipo': 'participante',
+    'leilao' ou 'lance', mais os campos do cadastro) chegam em um fluxo já
+    ordenado e podem ser milhões, então são consumidos sob demanda; apenas os
+    eventos agendados pelo próprio simulador (abrir/finalizar) ficam em um heap.
+    """
+
+    def __init__(self, gerenciador: GerenciadorLeiloes, caminho_lance: str = "rapido"):
+        """
+        Args:
+            gerenciador: Gerenciador cujo relógio é um RelogioVirtual
+            caminho_lance: 'rapido' (adicionar_lance_rapido) ou 'orm' (adicionar_lance)
+        """
+        if not isinstance(gerenciador.relogio, RelogioVirtual):
+            raise ValueError("O simulador precisa de um gerenciador com RelogioVirtual")
+        if caminho_lance not in ("rapido", "orm"):
+            raise ValueError(f"Caminho de lance inválido: {caminho_lance}")
+        self.gerenciador = gerenciador
+        self.relogio: RelogioVirtual = gerenciador.relogio
+        self._adicionar_lance = (gerenciador.adicionar_lance_rapido if caminho_lance == "rapido"
+                                 else gerenciador.adicionar_lance)
+        self._agenda = []
+        self._sequencia = itertools.count()
+        # ids no registro de origem -> ids gravados pela simulação
+        self._ids_leiloes: Dict[Any, int] = {}
+        self._ids_participantes: Dict[Any, int] = {}
+
+    def agendar(self, momento: datetime, tipo: str, acao: Callable[[], Any]):
+        """Agenda uma ação para o momento virtual informado"""
+        heapq.heappush(self._agenda, (momento, next(self._sequencia), tipo, acao))
+
+    def executar(self, eventos: Iterable[Dict[str, Any]] = (), ate: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Processa o fluxo de eventos e a agenda até esgotar ambos (ou até o momento 'ate')
+
+        Em um mesmo momento, eventos do fluxo vêm antes dos agendados, para que
+        um leilão seja cadastrado antes de sua abertura no mesmo instante.
+        Retorna as estatísticas da simulação.
+        """
+        fluxo = iter(eventos)
+        proximo = next(fluxo, None)
+        inicio_virtual = self.relogio.agora()
+        inicio_real = time.perf_counter()
+        processados, recusas = Counter(), defaultdict(Counter)
+        tempo_real = Counter()
+        finalizacoes_por_minuto, tempo_finalizacoes = Counter(), Counter()
+
+        while True:
+            do_fluxo = proximo is not None and (not self._agenda or proximo["momento"] <= self._agenda[0][0])
+            if do_fluxo:
+                momento = proximo["momento"]
+            elif self._agenda:
+                momento = self._agenda[0][0]
+            else:
+                break
+            if ate is not None and momento > ate:
+                break
+
+            if do_fluxo:
+                tipo, acao = proximo["tipo"], partial(self._aplicar, proximo)
+                proximo = next(fluxo, None)
+                if proximo is not None and proximo["momento"] < momento:
+                    raise ValueError("Eventos fora de ordem de tempo")
+            else:
+                _, _, tipo, acao = heapq.heappop(self._agenda)
+
+            self.relogio.avancar_ate(momento)
+            comeco = time.perf_counter()
+            try:
+                acao()
+                processados[tipo] += 1
+            except ValueError as e:
+                # Mensagens com valores (ex.: "Lance deve ser >= R$100.00") são agrupadas pelo prefixo
+                recusas[tipo][str(e).split(" R$")[0]] += 1
+            duracao = time.perf_counter() - comeco
+            tempo_real[tipo] += duracao
+            if tipo == "finalizar":
+                minuto = momento.replace(second=0, microsecond=0)
+                finalizacoes_por_minuto[minuto] += 1
+                tempo_finalizacoes[minuto] += duracao
+
+        duracao_real = time.perf_counter() - inicio_real
+        duracao_virtual = (self.relogio.agora() - inicio_virtual).total_seconds()
+        return {
+            'processados': dict(processados),
+            'recusados': {tipo: dict(motivos) for tipo, motivos in recusas.items()},
+            'tempo_real_por_tipo_s': {tipo: round(t, 4) for tipo, t in tempo_real.items()},
+            'duracao_real_s': round(duracao_real, 3),
+            'duracao_virtual_s': round(duracao_virtual, 3),
+            'aceleracao': round(duracao_virtual / duracao_real, 1) if duracao_real > 0 else None,
+            'eventos_por_segundo': round(sum(processados.values()) / duracao_real) if duracao_real > 0 else 0,
+            'picos_finalizacao': [
+                {'minuto': minuto.isoformat(), 'finalizacoes': n,
+                 'tempo_real_s': round(tempo_finalizacoes[minuto], 4)}
+                for minuto, n in finalizacoes_por_minuto.most_common(5)
+            ],
+            'eventos_pendentes': len(self._agenda) + (proximo is not None),
+        }
+
+    def _aplicar(self, evento: Dict[str, Any]):
+        tipo = evento["tipo"]
+        g = self.gerenciador
+        if tipo == "participante":
+            participante = g.adicionar_participante(Participante(
+                evento["cpf"], evento["nome"], evento["email"], evento["data_nascimento"]))
+            self._ids_participantes[evento.get("id", participante.id)] = participante.id
+        elif tipo == "leilao":
+            leilao = g.adicionar_leilao(Leilao(
+                evento["nome"], evento["lance_minimo"], evento["data_inicio"], evento["data_fim"],
+                evento.get("janela_prorrogacao_s"), evento.get("prorrogacao_s")))
+            self._ids_leiloes[evento.get("id", leilao.id)] = leilao.id
+            self.agendar(evento["data_inicio"], "abrir", partial(g.abrir_leilao, leilao.id))
+            self.agendar(evento["data_fim"], "finalizar", partial(self._finalizar, leilao.id))
+        elif tipo == "lance":
+            leilao_id = self._ids_leiloes.get(evento["leilao_id"])
+            participante_id = self._ids_participantes.get(evento["participante_id"])
+            if leilao_id is None or participante_id is None:
+                raise ValueError("Lance para leilão ou participante desconhecido")
+            self._adicionar_lance(leilao_id, Lance(evento["valor"], participante_id, leilao_id, self.relogio.agora()))
+        else:
+            raise ValueError(f"Tipo de evento desconhecido: {tipo}")
+
+    def _finalizar(self, leilao_id: int):
+        try:
+            self.gerenciador.finalizar_leilao(leilao_id)
+        except ValueError:
+            # Soft-close: o leilão foi prorrogado depois do agendamento; tenta de novo no novo término
+            leilao = self.gerenciador.encontrar_leilao_por_id(leilao_id)
+            if leilao is not None and leilao.estado == EstadoLeilao.ABERTO and leilao.data_fim > self.relogio.agora():
+                self.agendar(leilao.data_fim, "finalizar", partial(self._finalizar, leilao_id))
+            raise
+
+
+def eventos_do_banco(db: Session) -> Iterator[Dict[str, Any]]:
+    """
+    Fluxo ordenado de eventos a partir de um banco gravado (ex.: gerado por
+    benchmarks.gerador_dados): participantes no início, cada leilão cadastrado
+    em sua data_inicio e cada lance em sua data_hora.
+    """
+    primeiro_inicio = db.execute(select(Leilao.data_inicio).order_by(Leilao.data_inicio).limit(1)).scalar()
+    if primeiro_inicio is None:
+        return iter(())
+
+    participantes = (
+        {"momento": primeiro_inicio, "tipo": "participante", "id": p.id, "cpf": p.cpf,
+         "nome": p.nome, "email": p.email, "data_nascimento": p.data_nascimento}
+        for p in db.execute(select(Participante.__table__).order_by(Participante.id))
+    )
+    leiloes = (
+        {"momento": l.data_inicio, "tipo": "leilao", "id": l.id, "nome": l.nome,
+         "lance_minimo": l.lance_minimo, "data_inicio": l.data_inicio, "data_fim": l.data_fim,
+         "janela_prorrogacao_s": l.janela_prorrogacao_s, "prorrogacao_s": l.prorrogacao_s}
+        for l in db.execute(select(Leilao.__table__).order_by(Leilao.data_inicio, Leilao.id))
+    )
+    lances = (
+        {"momento": l.data_hora, "tipo": "lance", "leilao_id": l.leilao_id,
+         "participante_id": l.participante_id, "valor": l.valor}
+        for l in db.execute(select(Lance.__table__).order_by(Lance.data_hora, Lance.id))
+    )
+    # heapq.merge é estável: no mesmo momento, participantes antes de leilões antes de lances
+    return heapq.merge(participantes, leiloes, lances, key=lambda evento: evento["momento"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import argparse
+    import json
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from models.base import Base
+
+    parser = argparse.ArgumentParser(description="Reproduz um banco de leilões gravado em tempo virtual")
+    parser.add_argument("origem", help="banco SQLite com os eventos gravados")
+    parser.add_argument("--destino", default="simulacao.db")
+    parser.add_argument("--caminho", choices=("rapido", "orm"), default="rapido")
+    args = parser.parse_args()
+
+    os.environ.setdefault("EMAIL_MODE", "test")  # a simulação não envia e-mails de verdade
+    if os.path.exists(args.destino):
+        os.remove(args.destino)
+    engine_destino = create_engine(f"sqlite:///{args.destino}")
+
+    # O banco da simulação é descartável: sem fsync a cada commit, o custo
+    # medido é o do gerenciador e não o do disco
+    @event.listens_for(engine_destino, "connect")
+    def _sem_fsync(conexao_dbapi, _registro):
+        conexao_dbapi.execute("PRAGMA synchronous = OFF")
+        conexao_dbapi.execute("PRAGMA journal_mode = MEMORY")
+
+    Base.metadata.create_all(engine_destino)
+    origem = sessionmaker(bind=create_engine(f"sqlite:///{args.origem}"))()
+    destino = sessionmaker(bind=engine_destino, expire_on_commit=False)()
+
+    fluxo = eventos_do_banco(origem)
+    primeiro = next(fluxo, None)
+    if primeiro is None:
+        raise SystemExit("Banco de origem sem leilões")
+    relogio = RelogioVirtual(primeiro["momento"])
+    simulador = Simulador(GerenciadorLeiloes(destino, relogio=relogio), args.caminho)
+    resultado = simulador.executar(itertools.chain([primeiro], fluxo))
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
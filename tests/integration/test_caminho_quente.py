@@ -0,0 +1,102 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao
+from models.monitor_sql import contar_consultas
+from models.participante import Participante
+from services.leiloes_quentes import DifusorPrecos, EscritorLances, LeiloesQuentes
+
+
+def cadastrar(gerenciador, leiloes=1):
+    agora = datetime.now()
+    p1 = gerenciador.adicionar_participante(Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1)))
+    p2 = gerenciador.adicionar_participante(Participante("222.222.222-22", "Bia", "bia@email.com", datetime(1991, 1, 1)))
+    ids = []
+    for i in range(leiloes):
+        leilao = gerenciador.adicionar_leilao(Leilao(f"Item {i}", 100.0, agora, agora + timedelta(days=1)))
+        gerenciador.abrir_leilao(leilao.id, agora)
+        ids.append(leilao.id)
+    return ids, p1.id, p2.id, agora
+
+
+@pytest.fixture
+def quente(db_session, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    difusor = DifusorPrecos(intervalo_s=0)
+    precos = []
+    difusor.assinar(lambda *args: precos.append(args))
+    # Limiar baixo: o primeiro lance já promove o leilão
+    gerenciador = GerenciadorLeiloes(db_session, quentes=LeiloesQuentes(limiar_promocao=0.01, difusor=difusor))
+    ids, p1, p2, agora = cadastrar(gerenciador)
+    return {'gerenciador': gerenciador, 'leilao_id': ids[0], 'p1': p1, 'p2': p2, 'agora': agora, 'precos': precos}
+
+
+@pytest.mark.parametrize("metodo", ["adicionar_lance", "adicionar_lance_rapido"])
+def test_leilao_quente_recusa_lance_perdedor_sem_acessar_o_banco(quente, metodo):
+    gerenciador, leilao_id, agora = quente['gerenciador'], quente['leilao_id'], quente['agora']
+    adicionar = getattr(gerenciador, metodo)
+    adicionar(leilao_id, Lance(500.0, quente['p1'], leilao_id, agora))
+
+    with contar_consultas(maximo=0):
+        with pytest.raises(ValueError, match="Lance deve ser maior que o último lance"):
+            adicionar(leilao_id, Lance(450.0, quente['p2'], leilao_id, agora))
+        with pytest.raises(ValueError, match=r"Lance deve ser >= R\$100.00"):
+            adicionar(leilao_id, Lance(50.0, quente['p2'], leilao_id, agora))
+
+    # O que passa pela memória continua sendo validado pelo banco
+    with pytest.raises(ValueError, match="dois lances consecutivos"):
+        adicionar(leilao_id, Lance(600.0, quente['p1'], leilao_id, agora))
+    adicionar(leilao_id, Lance(600.0, quente['p2'], leilao_id, agora))
+    assert quente['precos'] == [(leilao_id, 500.0, quente['p1']), (leilao_id, 600.0, quente['p2'])]
+
+def test_mudanca_de_estado_invalida_o_estado_em_memoria(quente):
+    gerenciador, leilao_id, agora = quente['gerenciador'], quente['leilao_id'], quente['agora']
+    gerenciador.adicionar_lance_rapido(leilao_id, Lance(500.0, quente['p1'], leilao_id, agora))
+    gerenciador.finalizar_leilao(leilao_id, agora + timedelta(days=2))
+
+    with pytest.raises(ValueError, match="deve estar ABERTO"):
+        gerenciador.adicionar_lance_rapido(leilao_id, Lance(900.0, quente['p2'], leilao_id, agora))
+    with contar_consultas(maximo=0):  # o estado encerrado já está em memória
+        with pytest.raises(ValueError, match="deve estar ABERTO"):
+            gerenciador.adicionar_lance_rapido(leilao_id, Lance(950.0, quente['p2'], leilao_id, agora))
+
+def test_lances_automaticos_atualizam_o_preco_em_memoria(quente):
+    gerenciador, leilao_id, agora = quente['gerenciador'], quente['leilao_id'], quente['agora']
+    gerenciador.adicionar_lance_rapido(leilao_id, Lance(200.0, quente['p1'], leilao_id, agora))
+    gerenciador.registrar_lance_automatico(leilao_id, quente['p2'], 400.0, agora)
+
+    assert gerenciador.quentes.estado(leilao_id).ultimo_valor == 201.0
+    with contar_consultas(maximo=0):
+        with pytest.raises(ValueError, match="maior que o último"):
+            gerenciador.adicionar_lance_rapido(leilao_id, Lance(201.0, quente['p1'], leilao_id, agora))
+
+def test_escritor_grava_leiloes_quentes_primeiro(tmp_path, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    engine = create_engine(f"sqlite:///{tmp_path / 'quentes.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Sessao = sessionmaker(bind=engine, expire_on_commit=False)
+    with Sessao() as db:
+        (frio, disputado), p1, p2, agora = cadastrar(GerenciadorLeiloes(db), leiloes=2)
+
+    quentes = LeiloesQuentes(limiar_promocao=1, janela_s=1)
+    quentes.registrar(disputado)
+    escritor = EscritorLances(lambda: GerenciadorLeiloes(Sessao(), quentes=quentes), quentes)
+    # Enfileirados antes de a thread começar: a ordem de gravação é a da fila
+    futuros = [escritor.enviar(frio, Lance(150.0, p1, frio, agora)),
+               escritor.enviar(disputado, Lance(300.0, p1, disputado, agora)),
+               escritor.enviar(disputado, Lance(250.0, p2, disputado, agora))]
+    escritor.iniciar()
+    escritor.encerrar(timeout=10)
+
+    assert futuros[1].result().id < futuros[0].result().id
+    with pytest.raises(ValueError, match="maior que o último"):
+        futuros[2].result()
+    with Sessao() as db:
+        assert db.execute(select(Lance.leilao_id).order_by(Lance.id)).scalars().all() == [disputado, frio]
+    with pytest.raises(RuntimeError, match="encerrado"):
+        escritor.enviar(frio, Lance(200.0, p2, frio, agora))
+    engine.dispose()
@@ -0,0 +1,146 @@
+import functools
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.database import criar_engine_wal
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao, TipoLeilao
+from models.participante import Participante
+from services.shards import ExecutorShards, GerenciadorPorArquivo
+
+
+def finalizar(leilao_id):
+    def operacao(gerenciador):
+        gerenciador.finalizar_leilao(leilao_id, datetime.now() + timedelta(days=2))
+        return gerenciador.encontrar_leilao_por_id(leilao_id).estado
+    return operacao
+
+
+class ErroComArgumentos(Exception):
+    """Exceção que o pickle não reconstrói (argumentos obrigatórios no __init__)"""
+    def __init__(self, codigo, detalhe):
+        super().__init__(f"{codigo}: {detalhe}")
+
+
+def falhar(gerenciador):
+    raise ErroComArgumentos(42, "falhou")
+
+
+@pytest.fixture
+def arquivos(tmp_path, mocker):
+    """Dois arquivos em WAL com os mesmos participantes e leilões de tipos diferentes"""
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    caminhos = [str(tmp_path / f"shard{i}.db") for i in range(2)]
+    agora = datetime.now()
+    for caminho in caminhos:
+        engine = criar_engine_wal(caminho)
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine, expire_on_commit=False)() as db:
+            gerenciador = GerenciadorLeiloes(db)
+            for i in (1, 2):
+                gerenciador.adicionar_participante(
+                    Participante(f"{i}{i}{i}.{i}{i}{i}.{i}{i}{i}-{i}{i}", f"P{i}", f"p{i}@email.com", datetime(1990, 1, 1)))
+            for leilao in (Leilao("Inglês", 100.0, agora, agora + timedelta(seconds=30),
+                                  janela_prorrogacao_s=60, prorrogacao_s=120),
+                           Leilao("Selado", 100.0, agora, agora + timedelta(days=1),
+                                  tipo=TipoLeilao.SELADO_PRIMEIRO_PRECO),
+                           Leilao("Inglês 2", 100.0, agora, agora + timedelta(days=1))):
+                gerenciador.abrir_leilao(gerenciador.adicionar_leilao(leilao).id, agora)
+        engine.dispose()
+    return caminhos, agora
+
+
+def lances_gravados(caminho):
+    engine = criar_engine_wal(caminho)
+    with sessionmaker(bind=engine)() as db:
+        lances = db.execute(select(Lance.id, Lance.leilao_id, Lance.valor).order_by(Lance.id)).all()
+        data_fim = db.get(Leilao, 1).data_fim
+    engine.dispose()
+    return lances, data_fim
+
+
+def test_mesmas_regras_e_mensagens_dos_outros_caminhos(arquivos):
+    caminhos, agora = arquivos
+    executor = ExecutorShards(GerenciadorPorArquivo(caminhos[:1]), shards=2)
+    futuros = [executor.enviar(leilao_id, Lance(valor, participante, leilao_id, agora))
+               for leilao_id, valor, participante in [(1, 150.0, 1), (1, 140.0, 2), (1, 160.0, 1),
+                                                      (2, 200.0, 1), (2, 300.0, 1), (3, 50.0, 2), (9, 500.0, 1)]]
+    executor.iniciar()
+    executor.encerrar(timeout=10)
+
+    erros = [str(f.exception()) if f.exception() else None for f in futuros]
+    assert erros == [None, "Lance deve ser maior que o último lance",
+                     "Participante não pode dar dois lances consecutivos", None,
+                     "Participante já enviou um lance para este leilão selado",
+                     "Lance deve ser >= R$100.00",
+                     "Leilão não encontrado"]
+    lances, data_fim = lances_gravados(caminhos[0])
+    # Os dois shards gravam no mesmo arquivo, cada um na sua vez
+    assert sorted(lances) == sorted([(futuros[0].result().id, 1, 150.0), (futuros[3].result().id, 2, 200.0)])
+    # Lance na janela de 60s do soft-close: data_fim prorrogada no banco
+    assert data_fim > agora + timedelta(seconds=120)
+
+def test_ids_dos_lances_em_lote_sao_os_do_banco(arquivos):
+    caminhos, agora = arquivos
+    executor = ExecutorShards(GerenciadorPorArquivo(caminhos[:1]), shards=1)
+    futuros = [executor.enviar(leilao_id, Lance(100.0 + n, 1 + n % 2, leilao_id, agora))
+               for n in range(20) for leilao_id in (1, 3)]
+    executor.iniciar()
+    executor.encerrar(timeout=10)
+
+    lances, _ = lances_gravados(caminhos[0])
+    assert [(f.result().id, f.result().leilao_id, f.result().valor) for f in futuros] == lances
+    assert executor.obter_estatisticas()['lotes'] == 1
+
+def test_ids_com_outro_escritor_no_mesmo_arquivo(arquivos):
+    caminhos, agora = arquivos
+    executor = ExecutorShards(GerenciadorPorArquivo(caminhos[:1]), shards=1).iniciar()
+    direto = GerenciadorPorArquivo(caminhos[:1])(0)
+    primeiro = executor.adicionar_lance(3, Lance(150.0, 1, 3, agora))
+    # Lances gravados fora do executor, em outro leilão, entre os lotes dele
+    for valor, participante in ((200.0, 1), (210.0, 2)):
+        direto.adicionar_lance_rapido(2, Lance(valor, participante, 2, agora))
+    segundo = executor.adicionar_lance(3, Lance(160.0, 2, 3, agora))
+    executor.encerrar(timeout=10)
+    direto.db.close()
+
+    ids = {valor: lance_id for lance_id, _, valor in lances_gravados(caminhos[0])[0]}
+    assert (primeiro.id, segundo.id) == (ids[150.0], ids[160.0])
+
+def test_operacoes_passam_pela_fila_do_shard(arquivos):
+    caminhos, agora = arquivos
+    executor = ExecutorShards(GerenciadorPorArquivo(caminhos), shards=2).iniciar()
+    executor.adicionar_lance(3, Lance(150.0, 1, 3, agora))
+    assert executor.executar(3, finalizar(3)).result(timeout=10) == EstadoLeilao.FINALIZADO
+    # O estado em memória foi descartado e relido: o leilão já não está aberto
+    with pytest.raises(ValueError, match="ABERTO"):
+        executor.adicionar_lance(3, Lance(200.0, 2, 3, agora))
+    executor.encerrar(timeout=10)
+
+    # Cada shard grava no seu arquivo: o leilão 3 (ímpar) fica no segundo
+    assert lances_gravados(caminhos[0])[0] == []
+    assert [valor for _, _, valor in lances_gravados(caminhos[1])[0]] == [150.0]
+
+def test_shards_em_processos(arquivos):
+    caminhos, agora = arquivos
+    executor = ExecutorShards(GerenciadorPorArquivo(caminhos), shards=2, processos=True).iniciar()
+    futuros = [executor.enviar(leilao_id, Lance(valor, participante, leilao_id, agora))
+               for leilao_id, valor, participante in [(2, 200.0, 1), (3, 150.0, 1), (3, 140.0, 2), (2, 300.0, 1)]]
+    # Nos processos a função precisa ser serializável
+    resumo = executor.executar(3, functools.partial(GerenciadorLeiloes.listar_lances_resumo, leilao_id=3))
+    assert [lance.valor for lance in resumo.result(timeout=30)] == [150.0]
+    # O erro volta como (tipo, mensagem) e não quebra o pipe do shard
+    with pytest.raises(ValueError, match="ErroComArgumentos: 42: falhou"):
+        executor.executar(2, falhar).result(timeout=30)
+    executor.encerrar(timeout=30)
+
+    assert futuros[1].result().id == 1 and futuros[0].result().id == 1
+    for futuro, mensagem in ((futuros[2], "maior que o último"), (futuros[3], "já enviou")):
+        with pytest.raises(ValueError, match=mensagem):
+            futuro.result()
+    assert executor.obter_estatisticas()['gravados'] == [1, 1]
+    with pytest.raises(RuntimeError, match="encerrado"):
+        executor.enviar(2, Lance(500.0, 2, 2, agora))
@@ -2,8 +2,11 @@ import pytest
 from datetime import datetime, timedelta
 from models.gerenciador_leiloes import GerenciadorLeiloes
 from models.lance import Lance
-from models.leilao import Leilao, EstadoLeilao
+from models.leilao import Leilao, EstadoLeilao, TipoLeilao
 from models.participante import Participante
+from models.monitor_sql import contar_consultas
+from services.cache_leitura import CacheLeitura
+from sqlalchemy.orm import sessionmaker
 
 # === FIXTURES (usadas para reaproveitar objetos entre os testes) ===
 
@@ -346,4 +349,272 @@ def test_remover_participante_com_lances(sistema_limpo):
 def test_encontrar_leilao_por_id_inexistente(sistema_limpo):
     """Testa busca por ID de leilão que não existe (versão simples)"""
     # Usa um ID arbitrário que não existe
-    assert sistema_limpo.encontrar_leilao_por_id(999999) is None
\ No newline at end of file
+    assert sistema_limpo.encontrar_leilao_por_id(999999) is None
+
+
+# --- Testes de Consultas Agregadas ---
+
+def test_obter_maior_e_menor_lance_no_banco(sistema_limpo, leilao_aberto):
+    """Testa MAX/MIN calculados no banco, sem carregar a coleção de lances"""
+    p1 = sistema_limpo.adicionar_participante(Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1)))
+    p2 = sistema_limpo.adicionar_participante(Participante("222.222.222-22", "Bia", "bia@email.com", datetime(1991, 1, 1)))
+
+    assert sistema_limpo.obter_maior_lance(leilao_aberto.id) == 0
+    assert sistema_limpo.obter_menor_lance(leilao_aberto.id) == 0
+
+    sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(2100.0, p1.id, leilao_aberto.id, datetime.now()))
+    sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(2500.0, p2.id, leilao_aberto.id, datetime.now()))
+
+    assert sistema_limpo.obter_maior_lance(leilao_aberto.id) == 2500.0
+    assert sistema_limpo.obter_menor_lance(leilao_aberto.id) == 2100.0
+
+def test_identificar_vencedor_pelo_gerenciador(sistema_limpo, leilao_aberto):
+    """Testa o lance vencedor retornado já com o participante carregado"""
+    p1 = sistema_limpo.adicionar_participante(Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1)))
+    p2 = sistema_limpo.adicionar_participante(Participante("222.222.222-22", "Bia", "bia@email.com", datetime(1991, 1, 1)))
+    sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(2100.0, p1.id, leilao_aberto.id, datetime.now()))
+    sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(2500.0, p2.id, leilao_aberto.id, datetime.now()))
+
+    with pytest.raises(ValueError, match="Leilão não finalizado"):
+        sistema_limpo.identificar_vencedor(leilao_aberto.id)
+
+    sistema_limpo.finalizar_leilao(leilao_aberto.id, datetime.now() + timedelta(days=2))
+    vencedor = sistema_limpo.identificar_vencedor(leilao_aberto.id)
+
+    assert vencedor.valor == 2500.0
+    assert vencedor.participante == p2
+
+def test_identificar_vencedor_leilao_inexistente(sistema_limpo):
+    with pytest.raises(ValueError, match="Leilão não encontrado"):
+        sistema_limpo.identificar_vencedor(999)
+
+# --- Testes de Cache de Leitura ---
+
+@pytest.fixture
+def sistema_com_cache(db_session, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    return GerenciadorLeiloes(db_session, cache=CacheLeitura())
+
+def test_cache_evita_nova_consulta_de_leilao(sistema_com_cache):
+    agora = datetime.now()
+    leilao = sistema_com_cache.adicionar_leilao(Leilao("TV", 1000.0, agora, agora + timedelta(days=1)))
+
+    primeiro = sistema_com_cache.encontrar_leilao_por_id(leilao.id)
+    segundo = sistema_com_cache.encontrar_leilao_por_id(leilao.id)
+
+    assert primeiro is segundo
+    assert sistema_com_cache.cache.acertos == 1
+    assert sistema_com_cache.cache.falhas == 1
+
+def test_cache_invalidado_pelas_escritas(sistema_com_cache):
+    agora = datetime.now()
+    leilao = sistema_com_cache.adicionar_leilao(Leilao("TV", 1000.0, agora, agora + timedelta(days=1)))
+
+    sistema_com_cache.editar_leilao(leilao.id, novo_nome="TV 4K")
+    sistema_com_cache.abrir_leilao(leilao.id, agora)
+    assert sistema_com_cache.cache.invalidacoes == 2
+    assert sistema_com_cache.encontrar_leilao_por_id(leilao.id).estado == EstadoLeilao.ABERTO
+
+    sistema_com_cache.finalizar_leilao(leilao.id, agora + timedelta(days=2))
+    sistema_com_cache.remover_leilao(leilao.id)
+    assert sistema_com_cache.encontrar_leilao_por_id(leilao.id) is None
+
+def test_cache_de_participante_invalidado_na_remocao(sistema_com_cache):
+    participante = Participante("123.456.789-00", "João", "joao@email.com", datetime(1990, 1, 1))
+    sistema_com_cache.adicionar_participante(participante)
+
+    assert sistema_com_cache.encontrar_participante_por_cpf(participante.cpf) is participante
+    sistema_com_cache.remover_participante(participante)
+    assert sistema_com_cache.encontrar_participante_por_cpf(participante.cpf) is None
+
+def test_cache_compartilhado_entre_sessoes(db_session, mocker):
+    """Objetos vindos de outra sessão são associados sem nova consulta"""
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    cache = CacheLeitura()
+    agora = datetime.now()
+    gerenciador1 = GerenciadorLeiloes(db_session, cache=cache)
+    leilao = gerenciador1.adicionar_leilao(Leilao("TV", 1000.0, agora, agora + timedelta(days=1)))
+    gerenciador1.encontrar_leilao_por_id(leilao.id)
+
+    outra_sessao = sessionmaker(bind=db_session.get_bind())()
+    gerenciador2 = GerenciadorLeiloes(outra_sessao, cache=cache)
+    leilao_id = leilao.id
+    with contar_consultas(maximo=0):
+        leilao2 = gerenciador2.encontrar_leilao_por_id(leilao_id)
+        assert leilao2.nome == "TV"
+
+    assert leilao2 in outra_sessao and leilao2 is not leilao
+    assert cache.acertos == 1
+    outra_sessao.close()
+
+def test_acerto_do_cache_apos_commit_nao_consulta_o_banco(sistema_com_cache):
+    """Com expire_on_commit (padrão do SessionLocal), o acerto não recarrega o objeto"""
+    agora = datetime.now()
+    leilao = sistema_com_cache.adicionar_leilao(Leilao("TV", 1000.0, agora, agora + timedelta(days=1)))
+    participante = sistema_com_cache.adicionar_participante(
+        Participante("123.456.789-09", "João", "joao@email.com", datetime(1990, 1, 1)))
+    leilao_id, cpf = leilao.id, participante.cpf
+    sistema_com_cache.encontrar_leilao_por_id(leilao_id)
+    sistema_com_cache.encontrar_participante_por_cpf(cpf)
+    sistema_com_cache.db.commit()
+
+    with contar_consultas(maximo=0):
+        encontrado = sistema_com_cache.encontrar_leilao_por_id(leilao_id)
+        assert (encontrado.nome, encontrado.estado) == ("TV", EstadoLeilao.INATIVO)
+        assert sistema_com_cache.encontrar_participante_por_cpf(cpf).nome == "João"
+    assert encontrado is leilao
+    assert sistema_com_cache.cache.acertos == 2
+
+# --- Testes de Modelos de Leitura ---
+
+def test_listar_leiloes_resumo(sistema_limpo, leilao_aberto):
+    agora = datetime.now()
+    sistema_limpo.adicionar_leilao(Leilao("Geladeira", 800.0, agora + timedelta(days=1), agora + timedelta(days=2)))
+    p1 = sistema_limpo.adicionar_participante(Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1)))
+    sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(2300.0, p1.id, leilao_aberto.id, agora))
+
+    resumos = sistema_limpo.listar_leiloes_resumo()
+    assert [r.nome for r in resumos] == ["Notebook", "Geladeira"]
+    assert resumos[0].maior_lance == 2300.0
+    assert resumos[1].maior_lance == 0
+
+    abertos = sistema_limpo.listar_leiloes_resumo(estado=EstadoLeilao.ABERTO)
+    assert len(abertos) == 1
+    assert abertos[0].estado == EstadoLeilao.ABERTO
+    with pytest.raises(AttributeError):
+        abertos[0].nome = "Outro"  # modelos de leitura são imutáveis
+
+def test_listar_leiloes_resumo_range_invalido(sistema_limpo):
+    agora = datetime.now()
+    with pytest.raises(ValueError, match="Data de início não pode ser maior"):
+        sistema_limpo.listar_leiloes_resumo(data_inicio=agora, data_fim=agora - timedelta(days=1))
+
+def test_listar_lances_resumo(sistema_limpo, leilao_aberto):
+    p1 = sistema_limpo.adicionar_participante(Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1)))
+    p2 = sistema_limpo.adicionar_participante(Participante("222.222.222-22", "Bia", "bia@email.com", datetime(1991, 1, 1)))
+    sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(2100.0, p1.id, leilao_aberto.id, datetime.now()))
+    sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(2200.0, p2.id, leilao_aberto.id, datetime.now()))
+
+    historico = sistema_limpo.listar_lances_resumo(leilao_aberto.id)
+    assert [(l.valor, l.participante_nome) for l in historico] == [(2100.0, "Ana"), (2200.0, "Bia")]
+
+def test_encontrar_participante_resumo(sistema_limpo):
+    sistema_limpo.adicionar_participante(Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1)))
+
+    resumo = sistema_limpo.encontrar_participante_resumo("111.111.111-11")
+    assert resumo.nome == "Ana"
+    assert resumo.email == "ana@email.com"
+    assert sistema_limpo.encontrar_participante_resumo("000.000.000-00") is None
+
+# --- Testes de Cadastro em Lote ---
+
+def test_adicionar_leiloes_em_lote(sistema_limpo):
+    agora = datetime.now()
+    catalogo = [
+        {"nome": f"Lote {i}", "lance_minimo": 100.0 * i,
+         "data_inicio": agora, "data_fim": agora + timedelta(days=1)}
+        for i in range(1, 6)
+    ]
+    catalogo[2]["data_fim"] = agora - timedelta(days=1)
+    catalogo[4] = {"nome": "Sem datas", "lance_minimo": 10.0}
+
+    resultado = sistema_limpo.adicionar_leiloes_em_lote(catalogo, tamanho_lote=2)
+
+    assert resultado['inseridos'] == 3
+    assert resultado['rejeitados'] == [
+        (2, "Data de término deve ser posterior à data de início"),
+        (4, "Campos obrigatórios ausentes: data_inicio, data_fim"),
+    ]
+    nomes = [sistema_limpo.encontrar_leilao_por_id(i).nome for i in resultado['ids']]
+    assert nomes == ["Lote 1", "Lote 2", "Lote 4"]
+    assert all(l.estado == EstadoLeilao.INATIVO for l in sistema_limpo.listar_leiloes())
+    assert resultado['leiloes_por_segundo'] >= 0
+
+def test_adicionar_leiloes_em_lote_datas_invalidas(sistema_limpo):
+    resultado = sistema_limpo.adicionar_leiloes_em_lote(
+        [{"nome": "X", "lance_minimo": 1.0, "data_inicio": "2024-01-01", "data_fim": "2024-01-02"}]
+    )
+    assert resultado['ids'] == []
+    assert resultado['rejeitados'] == [(0, "Datas devem ser datetime")]
+
+def test_adicionar_leiloes_em_lote_tipos_invalidos(sistema_limpo):
+    agora = datetime.now()
+    base = {"nome": "X", "lance_minimo": 1.0, "data_inicio": agora, "data_fim": agora + timedelta(days=1)}
+    resultado = sistema_limpo.adicionar_leiloes_em_lote([
+        {**base, "lance_minimo": "10"},
+        {**base, "lance_minimo": -1.0},
+        {**base, "quantidade": "3"},
+        {**base, "tipo": "SELADO"},
+        base,
+    ], tamanho_lote=2)
+
+    assert resultado['rejeitados'] == [
+        (0, "Lance mínimo deve ser um número não negativo"),
+        (1, "Lance mínimo deve ser um número não negativo"),
+        (2, "Quantidade do lote deve ser um número inteiro"),
+        (3, "Tipo de leilão inválido"),
+    ]
+    assert resultado['inseridos'] == 1
+
+def test_adicionar_leiloes_em_lote_holandes_e_soft_close(sistema_limpo):
+    inicio = datetime(2025, 1, 1, 10, 0)
+    base = {"nome": "X", "lance_minimo": 100.0, "data_inicio": inicio, "data_fim": inicio + timedelta(minutes=100)}
+    holandes = {**base, "tipo": TipoLeilao.HOLANDES, "preco_inicial": 1100.0}
+    resultado = sistema_limpo.adicionar_leiloes_em_lote([
+        holandes,
+        {**base, "janela_prorrogacao_s": 60, "prorrogacao_s": 120},
+        {**base, "tipo": TipoLeilao.HOLANDES},
+        {**holandes, "curva_preco": "quadratica"},
+        {**holandes, "intervalo_preco_s": 0},
+        {**holandes, "janela_prorrogacao_s": 60, "prorrogacao_s": 120},
+        {**base, "janela_prorrogacao_s": 60},
+    ])
+
+    assert resultado['rejeitados'] == [
+        (2, "Preço inicial do leilão holandês deve ser maior que o lance mínimo"),
+        (3, "Curva de preço inválida: quadratica"),
+        (4, "Intervalo de queda do preço deve ser positivo"),
+        (5, "Soft-close só se aplica a leilões ingleses"),
+        (6, "Janela e prorrogação do soft-close devem ser informadas juntas"),
+    ]
+    id_holandes, id_ingles = resultado['ids']
+    assert sistema_limpo.obter_preco_atual(id_holandes, inicio + timedelta(minutes=25)) == 850.0
+    ingles = sistema_limpo.encontrar_leilao_por_id(id_ingles)
+    assert (ingles.janela_prorrogacao_s, ingles.prorrogacao_s, ingles.curva_preco) == (60, 120, None)
+
+def test_adicionar_leiloes_em_lote_tamanho_invalido(sistema_limpo):
+    with pytest.raises(ValueError, match="Tamanho do lote deve ser positivo"):
+        sistema_limpo.adicionar_leiloes_em_lote([], tamanho_lote=0)
+
+# --- Testes de Métricas ---
+
+def test_metricas_de_lances_por_caminho_e_motivo(sistema_limpo, leilao_aberto):
+    from services.metricas import LANCES_ACEITOS, LANCES_RECUSADOS, LATENCIA_LANCE
+    aceitos = LANCES_ACEITOS.rotulado("orm")
+    abaixo = LANCES_RECUSADOS.rotulado("abaixo_do_minimo")
+    consecutivo = LANCES_RECUSADOS.rotulado("lance_consecutivo")
+    latencia = LATENCIA_LANCE.rotulado("orm")
+    antes = (aceitos.valor, abaixo.valor, consecutivo.valor, latencia.ler()[2])
+
+    ana = Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1))
+    sistema_limpo.adicionar_participante(ana)
+    agora = datetime.now()
+    sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(2500.0, ana.id, leilao_aberto.id, agora))
+    for valor in (100.0, 3000.0):
+        with pytest.raises(ValueError):
+            sistema_limpo.adicionar_lance(leilao_aberto.id, Lance(valor, ana.id, leilao_aberto.id, agora))
+
+    depois = (aceitos.valor, abaixo.valor, consecutivo.valor, latencia.ler()[2])
+    assert [d - a for a, d in zip(antes, depois)] == [1, 1, 1, 3]
+
+def test_coletor_de_leiloes_por_estado(sistema_limpo, leilao_aberto, leilao_inativo):
+    from services.metricas import REGISTRO
+    sistema_limpo.adicionar_leilao(leilao_inativo)
+    REGISTRO.registrar_coletor(sistema_limpo.coletar_leiloes_por_estado)
+    try:
+        texto = REGISTRO.renderizar_prometheus()
+    finally:
+        REGISTRO.remover_coletor(sistema_limpo.coletar_leiloes_por_estado)
+    assert 'leilao_leiloes{estado="ABERTO"} 1' in texto
+    assert 'leilao_leiloes{estado="INATIVO"} 1' in texto
+    assert 'leilao_leiloes{estado="FINALIZADO"} 0' in texto
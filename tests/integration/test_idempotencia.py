@@ -0,0 +1,113 @@
+import threading
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.chave_idempotencia import ChaveIdempotencia
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao
+from models.monitor_sql import contar_consultas
+from models.participante import Participante
+from services.cache_leitura import CacheLeitura
+from services.relogio import RelogioVirtual
+
+INICIO = datetime(2025, 3, 1, 10, 0)
+
+
+def cadastrar(gerenciador):
+    leilao = gerenciador.adicionar_leilao(Leilao("Bicicleta", 100.0, INICIO, INICIO + timedelta(days=1)))
+    gerenciador.abrir_leilao(leilao.id, INICIO)
+    p1 = gerenciador.adicionar_participante(Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1)))
+    p2 = gerenciador.adicionar_participante(Participante("222.222.222-22", "Bia", "bia@email.com", datetime(1991, 1, 1)))
+    return leilao.id, p1.id, p2.id
+
+
+@pytest.fixture
+def cenario(db_session, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    gerenciador = GerenciadorLeiloes(db_session, relogio=RelogioVirtual(INICIO), idempotencia=CacheLeitura())
+    leilao_id, p1, p2 = cadastrar(gerenciador)
+    return gerenciador, leilao_id, p1, p2
+
+
+@pytest.mark.parametrize("metodo", ["adicionar_lance", "adicionar_lance_rapido"])
+def test_reenvio_devolve_o_lance_original_sem_acessar_o_banco(cenario, metodo):
+    gerenciador, leilao_id, p1, _ = cenario
+    adicionar = getattr(gerenciador, metodo)
+    original = adicionar(leilao_id, Lance(200.0, p1, leilao_id, INICIO), chave_idempotencia="req-1")
+
+    with contar_consultas(maximo=0):
+        # O reenvio traz o mesmo valor, que seria recusado como lance consecutivo
+        repetido = adicionar(leilao_id, Lance(200.0, p1, leilao_id, INICIO), chave_idempotencia="req-1")
+
+    assert repetido is original
+    assert gerenciador.db.execute(select(func.count()).select_from(Lance)).scalar() == 1
+
+def test_reenvio_sem_cache_consulta_so_a_chave(cenario):
+    gerenciador, leilao_id, p1, _ = cenario
+    gerenciador.adicionar_lance_rapido(leilao_id, Lance(200.0, p1, leilao_id, INICIO), chave_idempotencia="req-1")
+    gerenciador.idempotencia.limpar()
+    gerenciador.db.expunge_all()
+
+    with contar_consultas(maximo=1) as medicao:
+        repetido = gerenciador.adicionar_lance_rapido(
+            leilao_id, Lance(999.0, p1, leilao_id, INICIO), chave_idempotencia="req-1")
+
+    assert (repetido.valor, repetido.leilao_id) == (200.0, leilao_id)
+    assert "leiloes" not in medicao.instrucoes[0]
+
+def test_chave_vale_por_participante_e_recusa_nao_e_guardada(cenario):
+    gerenciador, leilao_id, p1, p2 = cenario
+    gerenciador.adicionar_lance_rapido(leilao_id, Lance(200.0, p1, leilao_id, INICIO), chave_idempotencia="x")
+    # Recusado: nada é guardado e o reenvio corrigido com a mesma chave é avaliado de novo
+    with pytest.raises(ValueError, match="maior que o último"):
+        gerenciador.adicionar_lance_rapido(leilao_id, Lance(150.0, p2, leilao_id, INICIO), chave_idempotencia="x")
+    # A mesma chave de outro participante é outra chave
+    lance = gerenciador.adicionar_lance_rapido(leilao_id, Lance(250.0, p2, leilao_id, INICIO), chave_idempotencia="x")
+    assert (lance.participante_id, lance.valor) == (p2, 250.0)
+
+def test_chave_invalida(cenario):
+    gerenciador, leilao_id, p1, _ = cenario
+    with pytest.raises(ValueError, match="Chave de idempotência deve ter de 1 a 64"):
+        gerenciador.adicionar_lance(leilao_id, Lance(200.0, p1, leilao_id, INICIO), chave_idempotencia="")
+
+def test_limpeza_por_ttl(cenario):
+    gerenciador, leilao_id, p1, p2 = cenario
+    gerenciador.adicionar_lance_rapido(leilao_id, Lance(200.0, p1, leilao_id, INICIO), chave_idempotencia="antiga")
+    gerenciador.relogio.avancar(timedelta(hours=2))
+    gerenciador.adicionar_lance_rapido(leilao_id, Lance(300.0, p2, leilao_id, INICIO), chave_idempotencia="nova")
+
+    assert gerenciador.limpar_chaves_idempotencia(ttl=timedelta(hours=1)) == 1
+    assert gerenciador.db.execute(select(ChaveIdempotencia.chave)).scalars().all() == ["nova"]
+
+def test_reenvios_simultaneos_gravam_um_lance(tmp_path, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    engine = create_engine(f"sqlite:///{tmp_path / 'idempotencia.db'}",
+                           connect_args={"timeout": 30, "check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Sessao = sessionmaker(bind=engine, expire_on_commit=False)
+    with Sessao() as db:
+        leilao_id, p1, _ = cadastrar(GerenciadorLeiloes(db))
+
+    barreira = threading.Barrier(6)
+    ids = []
+
+    def reenviar():
+        with Sessao() as db:
+            barreira.wait()
+            lance = GerenciadorLeiloes(db).adicionar_lance_rapido(
+                leilao_id, Lance(200.0, p1, leilao_id, INICIO), chave_idempotencia="retry")
+            ids.append(lance.id)
+
+    threads = [threading.Thread(target=reenviar) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(ids) == 6 and len(set(ids)) == 1
+    with Sessao() as db:
+        assert db.execute(select(func.count()).select_from(Lance)).scalar() == 1
+    engine.dispose()
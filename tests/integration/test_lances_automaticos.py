@@ -0,0 +1,101 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.lance import Lance
+from models.lance_automatico import LanceAutomatico
+from models.leilao import Leilao, EstadoLeilao
+from models.participante import Participante
+
+
+@pytest.fixture(params=[True, False], ids=["autoflush", "sem_autoflush"])
+def db_session(request):
+    """Sessão do conftest e a das sessões do projeto (SessionLocal, autoflush=False)"""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=request.param)()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def cenario(sistema_limpo):
+    agora = datetime.now()
+    leilao = sistema_limpo.adicionar_leilao(Leilao("Bicicleta", 100.0, agora, agora + timedelta(days=1)))
+    sistema_limpo.abrir_leilao(leilao.id, agora)
+    participantes = [
+        sistema_limpo.adicionar_participante(Participante(f"{i}{i}{i}.{i}{i}{i}.{i}{i}{i}-{i}{i}", f"P{i}",
+                                                          f"p{i}@email.com", datetime(1990, 1, 1)))
+        for i in range(1, 4)
+    ]
+    return {'leilao': leilao, 'participantes': participantes, 'agora': agora}
+
+
+def valores(sistema, leilao_id):
+    return [(l.valor, l.participante_id) for l in sistema.listar_lances_resumo(leilao_id)]
+
+
+def test_disputa_entre_automaticos_resolvida_em_um_passo(sistema_limpo, cenario):
+    leilao, (p1, p2, _) = cenario['leilao'], cenario['participantes']
+
+    assert [l.valor for l in sistema_limpo.registrar_lance_automatico(leilao.id, p1.id, 500.0)] == [100.0]
+    gravados = sistema_limpo.registrar_lance_automatico(leilao.id, p2.id, 300.0)
+
+    # Em vez de ~200 rodadas de lances, só o resultado fica visível
+    assert [(l.valor, l.participante_id) for l in gravados] == [(300.0, p2.id), (301.0, p1.id)]
+    assert valores(sistema_limpo, leilao.id) == [(100.0, p1.id), (300.0, p2.id), (301.0, p1.id)]
+    assert all(l.id is not None and l in sistema_limpo.db for l in gravados)
+
+@pytest.mark.parametrize("metodo", ["adicionar_lance", "adicionar_lance_rapido"])
+def test_lance_manual_dispara_o_automatico(sistema_limpo, cenario, metodo):
+    leilao, (p1, p2, p3) = cenario['leilao'], cenario['participantes']
+    sistema_limpo.registrar_lance_automatico(leilao.id, p1.id, 500.0)
+
+    getattr(sistema_limpo, metodo)(leilao.id, Lance(250.0, p2.id, leilao.id, cenario['agora']))
+    assert valores(sistema_limpo, leilao.id)[-2:] == [(250.0, p2.id), (251.0, p1.id)]
+
+    # Um lance acima do máximo vence e o automático não responde
+    getattr(sistema_limpo, metodo)(leilao.id, Lance(600.0, p3.id, leilao.id, cenario['agora']))
+    assert valores(sistema_limpo, leilao.id)[-1] == (600.0, p3.id)
+    assert sistema_limpo.obter_maior_lance(leilao.id) == 600.0
+
+def test_lance_em_lote_dispara_o_automatico(sistema_limpo, cenario):
+    leilao, (p1, p2, p3) = cenario['leilao'], cenario['participantes']
+    sistema_limpo.registrar_lance_automatico(leilao.id, p1.id, 500.0)
+    sistema_limpo.adicionar_lances_em_lote(leilao.id, [
+        Lance(150.0, p2.id, leilao.id, cenario['agora']),
+        Lance(160.0, p3.id, leilao.id, cenario['agora']),
+    ])
+    assert valores(sistema_limpo, leilao.id)[-1] == (161.0, p1.id)
+
+def test_aumentar_o_maximo_atualiza_o_registro(sistema_limpo, cenario):
+    leilao, (p1, p2, _) = cenario['leilao'], cenario['participantes']
+    sistema_limpo.registrar_lance_automatico(leilao.id, p1.id, 200.0)
+    sistema_limpo.registrar_lance_automatico(leilao.id, p2.id, 300.0)
+    assert valores(sistema_limpo, leilao.id)[-1] == (201.0, p2.id)
+
+    # p2 já lidera, então só p1 dá lance, cobrindo o máximo de p2
+    sistema_limpo.registrar_lance_automatico(leilao.id, p1.id, 400.0)
+    assert valores(sistema_limpo, leilao.id)[-2:] == [(201.0, p2.id), (301.0, p1.id)]
+    total = sistema_limpo.db.execute(select(func.count()).select_from(LanceAutomatico)).scalar()
+    assert total == 2
+
+def test_regras_do_lance_automatico(sistema_limpo, cenario):
+    leilao, (p1, p2, _) = cenario['leilao'], cenario['participantes']
+    with pytest.raises(ValueError, match="Leilão não encontrado"):
+        sistema_limpo.registrar_lance_automatico(999, p1.id, 500.0)
+    with pytest.raises(ValueError, match=r"Lance deve ser >= R\$100.00"):
+        sistema_limpo.registrar_lance_automatico(leilao.id, p1.id, 50.0)
+
+    sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(250.0, p1.id, leilao.id, cenario['agora']))
+    with pytest.raises(ValueError, match="Lance máximo deve ser maior que o último lance"):
+        sistema_limpo.registrar_lance_automatico(leilao.id, p2.id, 250.0)
+    # A recusa desfaz o registro do máximo
+    assert sistema_limpo.db.execute(select(func.count()).select_from(LanceAutomatico)).scalar() == 0
+
+    sistema_limpo.finalizar_leilao(leilao.id, leilao.data_fim + timedelta(seconds=1))
+    assert leilao.estado == EstadoLeilao.FINALIZADO
+    with pytest.raises(ValueError, match="ABERTO"):
+        sistema_limpo.registrar_lance_automatico(leilao.id, p2.id, 500.0)
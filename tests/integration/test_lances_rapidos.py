@@ -0,0 +1,147 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao
+from models.participante import Participante
+
+
+@pytest.fixture
+def cenario(sistema_limpo):
+    agora = datetime.now()
+    leilao = sistema_limpo.adicionar_leilao(Leilao("Notebook", 1000.0, agora, agora + timedelta(days=1)))
+    sistema_limpo.abrir_leilao(leilao.id, agora)
+    p1 = sistema_limpo.adicionar_participante(Participante("111.111.111-11", "Ana", "ana@email.com", datetime(1990, 1, 1)))
+    p2 = sistema_limpo.adicionar_participante(Participante("222.222.222-22", "Bia", "bia@email.com", datetime(1991, 1, 1)))
+    return {'leilao': leilao, 'p1': p1, 'p2': p2, 'agora': agora}
+
+
+def test_lance_rapido_fica_no_identity_map(sistema_limpo, cenario):
+    leilao, p1 = cenario['leilao'], cenario['p1']
+    assert len(leilao.lances) == 0  # coleção carregada antes do lance
+
+    lance = sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(1100.0, p1.id, leilao.id, cenario['agora']))
+
+    assert lance.id is not None
+    assert lance in sistema_limpo.db
+    assert sistema_limpo.db.get(Lance, lance.id) is lance
+    assert [l.valor for l in leilao.lances] == [1100.0]  # coleção recarregada
+
+def test_lance_rapido_aplica_regras(sistema_limpo, cenario):
+    leilao, p1, p2, agora = cenario['leilao'], cenario['p1'], cenario['p2'], cenario['agora']
+
+    with pytest.raises(ValueError, match=r"Lance deve ser >= R\$1000.00"):
+        sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(900.0, p1.id, leilao.id, agora))
+
+    sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(1100.0, p1.id, leilao.id, agora))
+    with pytest.raises(ValueError, match="Lance deve ser maior que o último lance"):
+        sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(1100.0, p2.id, leilao.id, agora))
+    with pytest.raises(ValueError, match="dois lances consecutivos"):
+        sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(1200.0, p1.id, leilao.id, agora))
+    with pytest.raises(ValueError, match="Leilão não encontrado"):
+        sistema_limpo.adicionar_lance_rapido(999, Lance(1200.0, p2.id, 999, agora))
+
+    assert sistema_limpo.obter_maior_lance(leilao.id) == 1100.0
+
+def test_lance_rapido_leilao_fechado(sistema_limpo, cenario):
+    agora = datetime.now()
+    inativo = sistema_limpo.adicionar_leilao(Leilao("TV", 100.0, agora, agora + timedelta(days=1)))
+    with pytest.raises(ValueError, match="deve estar ABERTO"):
+        sistema_limpo.adicionar_lance_rapido(inativo.id, Lance(200.0, cenario['p1'].id, inativo.id, agora))
+
+def test_lance_rapido_recusado_por_lance_concorrente(sistema_limpo, cenario, mocker):
+    """Se outro escritor gravou antes, o banco recusa mesmo que a leitura pareça válida"""
+    leilao, p1, agora = cenario['leilao'], cenario['p1'], cenario['agora']
+    sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(1500.0, p1.id, leilao.id, agora))
+    mocker.patch.object(GerenciadorLeiloes, '_validar_lance')
+
+    with pytest.raises(ValueError, match="maior que o último lance"):
+        sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(1200.0, cenario['p2'].id, leilao.id, agora))
+
+def test_lances_em_lote(sistema_limpo, cenario):
+    leilao, p1, p2, agora = cenario['leilao'], cenario['p1'], cenario['p2'], cenario['agora']
+    lote = [Lance(1000.0 + 100 * i, (p1, p2)[i % 2].id, leilao.id, agora) for i in range(1, 6)]
+
+    assert sistema_limpo.adicionar_lances_em_lote(leilao.id, lote) == 5
+    assert sistema_limpo.adicionar_lances_em_lote(leilao.id, []) == 0
+    assert [l.valor for l in sistema_limpo.listar_lances_resumo(leilao.id)] == [1100.0, 1200.0, 1300.0, 1400.0, 1500.0]
+
+def test_lote_invalido_nao_grava_nada(sistema_limpo, cenario):
+    leilao, p1, agora = cenario['leilao'], cenario['p1'], cenario['agora']
+    lote = [Lance(1100.0, p1.id, leilao.id, agora), Lance(1200.0, p1.id, leilao.id, agora)]
+
+    with pytest.raises(ValueError, match="dois lances consecutivos"):
+        sistema_limpo.adicionar_lances_em_lote(leilao.id, lote)
+    assert sistema_limpo.obter_maior_lance(leilao.id) == 0
+
+def test_lote_recusado_pelo_banco_faz_rollback(sistema_limpo, cenario, mocker):
+    leilao, p1, p2, agora = cenario['leilao'], cenario['p1'], cenario['p2'], cenario['agora']
+    sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(1300.0, p2.id, leilao.id, agora))
+    mocker.patch.object(GerenciadorLeiloes, '_validar_lance')
+    lote = [Lance(1400.0, p1.id, leilao.id, agora), Lance(1250.0, p2.id, leilao.id, agora)]
+
+    with pytest.raises(ValueError, match="Lote recusado"):
+        sistema_limpo.adicionar_lances_em_lote(leilao.id, lote)
+    assert sistema_limpo.obter_maior_lance(leilao.id) == 1300.0
+
+def test_sessao_sem_expiracao(db_session, cenario):
+    """Com expire_on_commit=False o leilão carregado continua válido após o lance"""
+    sessao = sessionmaker(bind=db_session.get_bind(), expire_on_commit=False)()
+    gerenciador = GerenciadorLeiloes(sessao)
+    leilao = gerenciador.encontrar_leilao_por_id(cenario['leilao'].id)
+
+    gerenciador.adicionar_lance_rapido(leilao.id, Lance(1100.0, cenario['p1'].id, leilao.id, cenario['agora']))
+
+    assert "nome" in leilao.__dict__  # atributos não foram expirados pelo commit
+    assert leilao.estado == EstadoLeilao.ABERTO
+    sessao.close()
+
+
+# --- Soft-close ---
+
+@pytest.fixture
+def leilao_soft_close(sistema_limpo, cenario):
+    # Termina em 10 minutos; lances nos últimos 60 segundos adiam o término em 30 segundos
+    agora = cenario['agora']
+    leilao = sistema_limpo.adicionar_leilao(Leilao(
+        "Relógio", 100.0, agora, agora + timedelta(minutes=10), janela_prorrogacao_s=60, prorrogacao_s=30))
+    sistema_limpo.abrir_leilao(leilao.id, agora)
+    return leilao
+
+@pytest.mark.parametrize("metodo", ["adicionar_lance", "adicionar_lance_rapido"])
+def test_soft_close_prorroga_apenas_na_janela(sistema_limpo, cenario, leilao_soft_close, metodo):
+    adicionar = getattr(sistema_limpo, metodo)
+    leilao, p1, p2 = leilao_soft_close, cenario['p1'], cenario['p2']
+    fim = leilao.data_fim
+
+    adicionar(leilao.id, Lance(110.0, p1.id, leilao.id, fim - timedelta(seconds=61)))
+    assert leilao.data_fim == fim
+    adicionar(leilao.id, Lance(120.0, p2.id, leilao.id, fim - timedelta(seconds=10)))
+    assert leilao.data_fim == fim + timedelta(seconds=30)  # microssegundos preservados
+    # A janela passa a contar a partir do novo término
+    adicionar(leilao.id, Lance(130.0, p1.id, leilao.id, fim + timedelta(seconds=5)))
+    assert leilao.data_fim == fim + timedelta(seconds=60)
+
+def test_soft_close_lance_recusado_nao_prorroga(sistema_limpo, cenario, leilao_soft_close):
+    leilao, p1 = leilao_soft_close, cenario['p1']
+    fim = leilao.data_fim
+    with pytest.raises(ValueError, match="Lance deve ser >="):
+        sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(50.0, p1.id, leilao.id, fim))
+    assert leilao.data_fim == fim
+
+def test_soft_close_em_lote_prorroga_lance_a_lance(sistema_limpo, cenario, leilao_soft_close):
+    leilao, p1, p2 = leilao_soft_close, cenario['p1'], cenario['p2']
+    fim = leilao.data_fim
+    # O segundo lance só cai na janela graças à prorrogação do primeiro
+    sistema_limpo.adicionar_lances_em_lote(leilao.id, [
+        Lance(110.0, p1.id, leilao.id, fim - timedelta(seconds=1)),
+        Lance(120.0, p2.id, leilao.id, fim + timedelta(seconds=20)),
+    ])
+    assert leilao.data_fim == fim + timedelta(seconds=60)
+
+def test_leilao_sem_soft_close_nao_prorroga(sistema_limpo, cenario):
+    leilao, p1 = cenario['leilao'], cenario['p1']
+    fim = leilao.data_fim
+    sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(1100.0, p1.id, leilao.id, fim))
+    assert leilao.data_fim == fim
@@ -0,0 +1,90 @@
+import threading
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao, TipoLeilao
+from models.participante import Participante
+
+INICIO = datetime(2025, 1, 1, 10, 0)
+
+
+def cadastrar(gerenciador, participantes=2):
+    leilao = gerenciador.adicionar_leilao(Leilao(
+        "Flores", 100.0, INICIO, INICIO + timedelta(minutes=100), tipo=TipoLeilao.HOLANDES, preco_inicial=1100.0))
+    gerenciador.abrir_leilao(leilao.id, INICIO)
+    compradores = [
+        gerenciador.adicionar_participante(Participante(f"{i:03d}.000.000-00", f"C{i}", f"c{i}@email.com",
+                                                        datetime(1990, 1, 1)))
+        for i in range(1, participantes + 1)
+    ]
+    return leilao, compradores
+
+
+def test_arremate_pelo_preco_atual_encerra_o_leilao(sistema_limpo):
+    leilao, (c1, c2) = cadastrar(sistema_limpo)
+    momento = INICIO + timedelta(minutes=25)
+    assert sistema_limpo.obter_preco_atual(leilao.id, momento) == 850.0
+
+    lance = sistema_limpo.arrematar_leilao_holandes(leilao.id, c1.id, momento)
+
+    assert (lance.valor, lance.participante_id) == (850.0, c1.id)
+    assert (leilao.estado, leilao.preco_final) == (EstadoLeilao.FINALIZADO, 850.0)
+    assert sistema_limpo.identificar_vencedor(leilao.id).participante_id == c1.id
+    with pytest.raises(ValueError, match="Leilão já foi arrematado"):
+        sistema_limpo.arrematar_leilao_holandes(leilao.id, c2.id, momento + timedelta(minutes=1))
+
+def test_leilao_holandes_nao_aceita_lance_comum(sistema_limpo):
+    leilao, (c1, _) = cadastrar(sistema_limpo)
+    for metodo in (sistema_limpo.adicionar_lance, sistema_limpo.adicionar_lance_rapido):
+        with pytest.raises(ValueError, match="Leilão holandês só aceita arremate"):
+            metodo(leilao.id, Lance(2000.0, c1.id, leilao.id, INICIO))
+
+def test_arremate_fora_do_prazo_ou_em_outro_tipo(sistema_limpo):
+    leilao, (c1, _) = cadastrar(sistema_limpo)
+    with pytest.raises(ValueError, match="encerrado sem comprador"):
+        sistema_limpo.arrematar_leilao_holandes(leilao.id, c1.id, leilao.data_fim + timedelta(seconds=1))
+    ingles = sistema_limpo.adicionar_leilao(Leilao("Vaso", 10.0, INICIO, INICIO + timedelta(hours=1)))
+    with pytest.raises(ValueError, match="só existe em leilões holandeses"):
+        sistema_limpo.arrematar_leilao_holandes(ingles.id, c1.id, INICIO)
+    with pytest.raises(ValueError, match="Leilão não encontrado"):
+        sistema_limpo.arrematar_leilao_holandes(999, c1.id, INICIO)
+
+def test_compradores_simultaneos_apenas_um_vence(tmp_path, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    engine = create_engine(f"sqlite:///{tmp_path / 'holandes.db'}",
+                           connect_args={"timeout": 30, "check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Sessao = sessionmaker(bind=engine)
+    with Sessao() as db:
+        leilao, compradores = cadastrar(GerenciadorLeiloes(db), participantes=8)
+        leilao_id, compradores = leilao.id, [c.id for c in compradores]
+
+    barreira = threading.Barrier(len(compradores))
+    resultados = []
+
+    def comprar(participante_id):
+        with Sessao() as db:
+            barreira.wait()
+            try:
+                GerenciadorLeiloes(db).arrematar_leilao_holandes(
+                    leilao_id, participante_id, INICIO + timedelta(minutes=50))
+                resultados.append("venceu")
+            except ValueError as e:
+                resultados.append(str(e))
+
+    threads = [threading.Thread(target=comprar, args=(c,)) for c in compradores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert resultados.count("venceu") == 1
+    assert resultados.count("Leilão já foi arrematado") == len(compradores) - 1
+    with Sessao() as db:
+        assert db.execute(select(func.count()).select_from(Lance)).scalar() == 1
+        assert db.get(Leilao, leilao_id).preco_final == 600.0
+    engine.dispose()
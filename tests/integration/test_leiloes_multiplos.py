@@ -0,0 +1,100 @@
+import pytest
+from datetime import datetime, timedelta
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao, TipoLeilao
+from models.participante import Participante
+from models import gerenciador_leiloes
+
+
+@pytest.fixture
+def participantes(sistema_limpo):
+    return [
+        sistema_limpo.adicionar_participante(Participante(f"{i}{i}{i}.{i}{i}{i}.{i}{i}{i}-{i}{i}", f"P{i}",
+                                                          f"p{i}@email.com", datetime(1990, 1, 1)))
+        for i in range(1, 5)
+    ]
+
+
+@pytest.fixture
+def criar_lote(sistema_limpo):
+    agora = datetime.now()
+
+    def criar(tipo=TipoLeilao.MULTIPLO_PRECO_UNIFORME, quantidade=10):
+        leilao = sistema_limpo.adicionar_leilao(
+            Leilao("Lote de ações", 100.0, agora - timedelta(hours=1), agora + timedelta(hours=1),
+                   tipo=tipo, quantidade=quantidade))
+        sistema_limpo.abrir_leilao(leilao.id, agora)
+        return leilao
+    return criar
+
+
+@pytest.mark.parametrize("metodo", ["adicionar_lance", "adicionar_lance_rapido"])
+def test_lances_com_quantidade(sistema_limpo, participantes, criar_lote, metodo):
+    leilao = criar_lote(quantidade=10)
+    adicionar = getattr(sistema_limpo, metodo)
+    p1, p2, p3, _ = participantes
+    agora = datetime.now()
+
+    adicionar(leilao.id, Lance(150.0, p1.id, leilao.id, agora, quantidade=10))
+    adicionar(leilao.id, Lance(120.0, p2.id, leilao.id, agora, quantidade=3))  # lances fora de ordem
+    with pytest.raises(ValueError, match="Quantidade do lance deve estar entre 1 e 10"):
+        adicionar(leilao.id, Lance(200.0, p3.id, leilao.id, agora, quantidade=11))
+    with pytest.raises(ValueError, match="Participante já enviou um lance"):
+        adicionar(leilao.id, Lance(200.0, p1.id, leilao.id, agora, quantidade=1))
+    with pytest.raises(ValueError, match="ocultos"):
+        sistema_limpo.listar_lances_resumo(leilao.id)
+
+def test_leilao_de_uma_unidade_recusa_quantidade_maior(sistema_limpo, participantes, criar_lote):
+    leilao = criar_lote(TipoLeilao.SELADO_PRIMEIRO_PRECO, quantidade=1)
+    with pytest.raises(ValueError, match="Quantidade do lance deve estar entre 1 e 1"):
+        sistema_limpo.adicionar_lance_rapido(
+            leilao.id, Lance(200.0, participantes[0].id, leilao.id, datetime.now(), quantidade=2))
+
+@pytest.mark.parametrize("tipo, precos, preco_final", [
+    (TipoLeilao.MULTIPLO_PRECO_UNIFORME, [130.0, 130.0, 130.0], 130.0),
+    (TipoLeilao.MULTIPLO_DISCRIMINATORIO, [200.0, 150.0, 130.0], 130.0),
+])
+def test_finalizar_lote_aloca_unidades(sistema_limpo, participantes, criar_lote, tipo, precos, preco_final):
+    leilao = criar_lote(tipo, quantidade=10)
+    p1, p2, p3, p4 = participantes
+    agora = datetime.now()
+    sistema_limpo.adicionar_lances_em_lote(leilao.id, [
+        Lance(150.0, p1.id, leilao.id, agora, quantidade=4),
+        Lance(130.0, p2.id, leilao.id, agora, quantidade=5),
+        Lance(200.0, p3.id, leilao.id, agora, quantidade=3),
+        Lance(110.0, p4.id, leilao.id, agora, quantidade=2),
+    ])
+
+    sistema_limpo.finalizar_leilao(leilao.id, leilao.data_fim)
+
+    alocacoes = sistema_limpo.listar_alocacoes(leilao.id)
+    # 200 leva 3, 150 leva 4 e 130 só as 3 restantes das 5 pedidas; 110 fica de fora
+    assert [(a.participante_nome, a.quantidade) for a in alocacoes] == [("P3", 3), ("P1", 4), ("P2", 3)]
+    assert [a.preco_unitario for a in alocacoes] == precos
+    assert (leilao.estado, leilao.preco_final) == (EstadoLeilao.FINALIZADO, preco_final)
+    # Um e-mail por participante atendido, com o total a pagar
+    enviar = gerenciador_leiloes.EmailService.return_value.enviar
+    assert [c.args[3]["valor_lance"] for c in enviar.call_args_list] == [
+        f"{q * p:.2f}" for q, p in zip((3, 4, 3), precos)]
+
+def test_finalizar_lote_sem_lances_expira(sistema_limpo, criar_lote):
+    leilao = criar_lote()
+    sistema_limpo.finalizar_leilao(leilao.id, leilao.data_fim)
+    assert leilao.estado == EstadoLeilao.EXPIRADO
+    assert sistema_limpo.listar_alocacoes(leilao.id) == []
+
+def test_lote_nao_aceita_lance_automatico(sistema_limpo, participantes, criar_lote):
+    leilao = criar_lote()
+    with pytest.raises(ValueError, match="Lances automáticos só são aceitos em leilões ingleses"):
+        sistema_limpo.registrar_lance_automatico(leilao.id, participantes[0].id, 500.0)
+
+def test_catalogo_em_lote_com_quantidade(sistema_limpo):
+    agora = datetime.now()
+    fim = agora + timedelta(hours=1)
+    resultado = sistema_limpo.adicionar_leiloes_em_lote([
+        {"nome": "A", "lance_minimo": 10.0, "data_inicio": agora, "data_fim": fim,
+         "tipo": TipoLeilao.MULTIPLO_DISCRIMINATORIO, "quantidade": 500},
+        {"nome": "B", "lance_minimo": 10.0, "data_inicio": agora, "data_fim": fim, "quantidade": 2},
+    ])
+    assert resultado['rejeitados'] == [(1, "Apenas leilões de múltiplas unidades podem ter quantidade maior que 1")]
+    assert sistema_limpo.encontrar_leilao_por_id(resultado['ids'][0]).quantidade == 500
@@ -0,0 +1,117 @@
+import pytest
+from datetime import datetime, timedelta
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao, TipoLeilao
+from models.participante import Participante
+from models import gerenciador_leiloes
+
+
+@pytest.fixture
+def participantes(sistema_limpo):
+    return [
+        sistema_limpo.adicionar_participante(Participante(f"{i}{i}{i}.{i}{i}{i}.{i}{i}{i}-{i}{i}", f"P{i}",
+                                                          f"p{i}@email.com", datetime(1990, 1, 1)))
+        for i in range(1, 4)
+    ]
+
+
+@pytest.fixture
+def criar_selado(sistema_limpo):
+    agora = datetime.now()
+
+    def criar(tipo, nome="Lote B2B"):
+        leilao = sistema_limpo.adicionar_leilao(
+            Leilao(nome, 100.0, agora - timedelta(hours=1), agora + timedelta(hours=1), tipo=tipo))
+        sistema_limpo.abrir_leilao(leilao.id, agora)
+        return leilao
+    return criar
+
+
+@pytest.mark.parametrize("metodo", ["adicionar_lance", "adicionar_lance_rapido"])
+def test_lances_selados_fora_de_ordem_e_um_por_participante(sistema_limpo, participantes, criar_selado, metodo):
+    leilao = criar_selado(TipoLeilao.SELADO_PRIMEIRO_PRECO)
+    adicionar = getattr(sistema_limpo, metodo)
+    p1, p2, p3 = participantes
+    agora = datetime.now()
+
+    adicionar(leilao.id, Lance(500.0, p1.id, leilao.id, agora))
+    adicionar(leilao.id, Lance(300.0, p2.id, leilao.id, agora))  # menor que o anterior: aceito
+    with pytest.raises(ValueError, match="Participante já enviou um lance"):
+        adicionar(leilao.id, Lance(900.0, p1.id, leilao.id, agora))
+    with pytest.raises(ValueError, match=r"Lance deve ser >= R\$100.00"):
+        adicionar(leilao.id, Lance(50.0, p3.id, leilao.id, agora))
+
+def test_lances_selados_ficam_ocultos_ate_a_finalizacao(sistema_limpo, participantes, criar_selado):
+    leilao = criar_selado(TipoLeilao.SELADO_PRIMEIRO_PRECO)
+    sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(500.0, participantes[0].id, leilao.id, datetime.now()))
+    with pytest.raises(ValueError, match="ocultos"):
+        sistema_limpo.listar_lances_resumo(leilao.id)
+
+    sistema_limpo.finalizar_leilao(leilao.id, leilao.data_fim)
+    assert [l.valor for l in sistema_limpo.listar_lances_resumo(leilao.id)] == [500.0]
+
+def test_lote_selado_recusa_participante_repetido(sistema_limpo, participantes, criar_selado):
+    leilao = criar_selado(TipoLeilao.SELADO_PRIMEIRO_PRECO)
+    p1, p2, _ = participantes
+    agora = datetime.now()
+    with pytest.raises(ValueError, match="Participante já enviou um lance"):
+        sistema_limpo.adicionar_lances_em_lote(leilao.id, [
+            Lance(200.0, p1.id, leilao.id, agora), Lance(150.0, p2.id, leilao.id, agora),
+            Lance(300.0, p1.id, leilao.id, agora),
+        ])
+    assert sistema_limpo.adicionar_lances_em_lote(leilao.id, [
+        Lance(200.0, p1.id, leilao.id, agora), Lance(150.0, p2.id, leilao.id, agora)]) == 2
+
+def test_selado_nao_aceita_lance_automatico(sistema_limpo, participantes, criar_selado):
+    leilao = criar_selado(TipoLeilao.SELADO_SEGUNDO_PRECO)
+    with pytest.raises(ValueError, match="Lances automáticos só são aceitos em leilões ingleses"):
+        sistema_limpo.registrar_lance_automatico(leilao.id, participantes[0].id, 500.0)
+
+@pytest.mark.parametrize("tipo, preco", [
+    (TipoLeilao.SELADO_PRIMEIRO_PRECO, 500.0),
+    (TipoLeilao.SELADO_SEGUNDO_PRECO, 450.0),
+])
+def test_finalizar_selado_define_vencedor_e_preco(sistema_limpo, participantes, criar_selado, tipo, preco):
+    leilao = criar_selado(tipo)
+    agora = datetime.now()
+    for participante, valor in zip(participantes, (300.0, 500.0, 450.0)):
+        sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(valor, participante.id, leilao.id, agora))
+
+    sistema_limpo.finalizar_leilao(leilao.id, leilao.data_fim)
+
+    assert sistema_limpo.identificar_vencedor(leilao.id).participante_id == participantes[1].id
+    assert leilao.preco_final == preco
+    # O e-mail informa o preço a pagar, não o lance
+    contexto = gerenciador_leiloes.EmailService.return_value.enviar.call_args.args[3]
+    assert contexto["valor_lance"] == f"{preco:.2f}"
+
+def test_finalizar_leiloes_selados_em_lote(sistema_limpo, participantes, criar_selado, mocker):
+    primeiro = criar_selado(TipoLeilao.SELADO_PRIMEIRO_PRECO, "Lote 1")
+    segundo = criar_selado(TipoLeilao.SELADO_SEGUNDO_PRECO, "Lote 2")
+    unico = criar_selado(TipoLeilao.SELADO_SEGUNDO_PRECO, "Lote 3")
+    vazio = criar_selado(TipoLeilao.SELADO_PRIMEIRO_PRECO, "Lote 4")
+    ingles = criar_selado(TipoLeilao.INGLES, "Lote 5")
+    agora = datetime.now()
+    p1, p2, p3 = participantes
+    for leilao, lances in ((primeiro, [(p1, 200.0), (p2, 250.0)]),
+                           (segundo, [(p1, 400.0), (p2, 400.0), (p3, 100.0)]),
+                           (unico, [(p3, 900.0)])):
+        for participante, valor in lances:
+            sistema_limpo.adicionar_lance_rapido(leilao.id, Lance(valor, participante.id, leilao.id, agora))
+
+    resultado = sistema_limpo.finalizar_leiloes_selados(agora + timedelta(hours=2))
+
+    assert (resultado['finalizados'], resultado['expirados']) == (3, 1)
+    assert (primeiro.estado, primeiro.preco_final) == (EstadoLeilao.FINALIZADO, 250.0)
+    # Empate em 400: vence o lance mais antigo (p1), pagando o segundo maior (400)
+    assert (segundo.preco_final, sistema_limpo.identificar_vencedor(segundo.id).participante_id) == (400.0, p1.id)
+    assert unico.preco_final == 100.0
+    assert vazio.estado == EstadoLeilao.EXPIRADO
+    assert ingles.estado == EstadoLeilao.ABERTO  # leilões ingleses ficam de fora
+    # Um único EmailService para o lote, um e-mail por vencedor
+    assert gerenciador_leiloes.EmailService.call_count == 1
+    assert gerenciador_leiloes.EmailService.return_value.enviar.call_count == 3
+
+def test_finalizar_leiloes_selados_sem_leiloes_vencidos(sistema_limpo, criar_selado):
+    criar_selado(TipoLeilao.SELADO_PRIMEIRO_PRECO)
+    assert sistema_limpo.finalizar_leiloes_selados(datetime.now() - timedelta(hours=2))['finalizados'] == 0
@@ -0,0 +1,92 @@
+import pytest
+from datetime import datetime, timedelta
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.lance import Lance
+from models.leilao import Leilao, TipoLeilao
+from models.monitor_sql import contar_consultas
+from models.participante import Participante
+from services.limitador import LimitadorLances
+from services.metricas import LANCES_RECUSADOS
+
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def limitado(db_session, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    relogio = RelogioFalso()
+    limitador = LimitadorLances(por_participante=(1, 2), por_leilao=(10, 3), relogio=relogio)
+    gerenciador = GerenciadorLeiloes(db_session, limitador=limitador)
+    agora = datetime.now()
+    participantes = [
+        gerenciador.adicionar_participante(Participante(f"{i}{i}{i}.{i}{i}{i}.{i}{i}{i}-{i}{i}", f"P{i}",
+                                                        f"p{i}@email.com", datetime(1990, 1, 1))).id
+        for i in range(1, 4)
+    ]
+    leilao = gerenciador.adicionar_leilao(Leilao("Item", 100.0, agora, agora + timedelta(days=1)))
+    gerenciador.abrir_leilao(leilao.id, agora)
+    return {'gerenciador': gerenciador, 'leilao_id': leilao.id, 'participantes': participantes,
+            'agora': agora, 'relogio': relogio}
+
+
+@pytest.mark.parametrize("metodo", ["adicionar_lance", "adicionar_lance_rapido"])
+def test_lances_acima_do_limite_sao_recusados_sem_acessar_o_banco(limitado, metodo):
+    adicionar = getattr(limitado['gerenciador'], metodo)
+    leilao_id, agora = limitado['leilao_id'], limitado['agora']
+    p1, p2, _ = limitado['participantes']
+    recusados = LANCES_RECUSADOS.rotulado("limite_de_taxa").valor
+
+    adicionar(leilao_id, Lance(200.0, p1, leilao_id, agora))
+    with pytest.raises(ValueError, match="dois lances consecutivos"):  # gasta a segunda ficha
+        adicionar(leilao_id, Lance(300.0, p1, leilao_id, agora))
+    with contar_consultas(maximo=0):
+        with pytest.raises(ValueError, match="Limite de lances por participante excedido"):
+            adicionar(leilao_id, Lance(300.0, p1, leilao_id, agora))
+    assert LANCES_RECUSADOS.rotulado("limite_de_taxa").valor == recusados + 1
+
+    # Outro participante ainda tem fichas; o participante limitado volta com o tempo
+    adicionar(leilao_id, Lance(300.0, p2, leilao_id, agora))
+    limitado['relogio'].agora = 1.0
+    adicionar(leilao_id, Lance(400.0, p1, leilao_id, agora))
+
+@pytest.mark.parametrize("metodo", ["adicionar_lance", "adicionar_lance_rapido"])
+def test_reenvio_com_chave_no_limite_devolve_o_lance_original(limitado, metodo):
+    adicionar = getattr(limitado['gerenciador'], metodo)
+    leilao_id, agora = limitado['leilao_id'], limitado['agora']
+    p1 = limitado['participantes'][0]
+
+    primeiro_id = adicionar(leilao_id, Lance(200.0, p1, leilao_id, agora), chave_idempotencia="k1").id
+    with pytest.raises(ValueError, match="dois lances consecutivos"):  # gasta a segunda ficha
+        adicionar(leilao_id, Lance(300.0, p1, leilao_id, agora))
+
+    # Sem fichas: o reenvio do lance aceito não é limitado, mas um lance novo é
+    reenvio = adicionar(leilao_id, Lance(200.0, p1, leilao_id, agora), chave_idempotencia="k1")
+    assert reenvio.id == primeiro_id
+    with pytest.raises(ValueError, match="Limite de lances por participante excedido"):
+        adicionar(leilao_id, Lance(300.0, p1, leilao_id, agora), chave_idempotencia="k2")
+
+def test_limite_por_leilao_vale_para_todos_os_caminhos(limitado):
+    gerenciador, leilao_id, agora = limitado['gerenciador'], limitado['leilao_id'], limitado['agora']
+    p1, p2, p3 = limitado['participantes']
+    gerenciador.adicionar_lance(leilao_id, Lance(200.0, p1, leilao_id, agora))
+    gerenciador.adicionar_lance_rapido(leilao_id, Lance(300.0, p2, leilao_id, agora))
+    gerenciador.registrar_lance_automatico(leilao_id, p3, 500.0)
+    with pytest.raises(ValueError, match="Limite de lances por leilao excedido"):
+        gerenciador.adicionar_lance_rapido(leilao_id, Lance(600.0, p1, leilao_id, agora))
+
+def test_arremate_holandes_respeita_o_limite(limitado):
+    gerenciador, agora = limitado['gerenciador'], limitado['agora']
+    p1 = limitado['participantes'][0]
+    leilao = gerenciador.adicionar_leilao(Leilao("Holandês", 100.0, agora, agora + timedelta(hours=1),
+                                                 tipo=TipoLeilao.HOLANDES, preco_inicial=200.0))
+    gerenciador.adicionar_lance(limitado['leilao_id'], Lance(200.0, p1, limitado['leilao_id'], agora))
+    with pytest.raises(ValueError, match="Leilão deve estar ABERTO"):
+        gerenciador.arrematar_leilao_holandes(leilao.id, p1, agora)
+    with pytest.raises(ValueError, match="Limite de lances por participante excedido"):
+        gerenciador.arrematar_leilao_holandes(leilao.id, p1, agora)
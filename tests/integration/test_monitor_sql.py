@@ -0,0 +1,107 @@
+import pytest
+from datetime import datetime, timedelta
+from models.lance import Lance
+from models.leilao import Leilao
+from models.participante import Participante
+from models.monitor_sql import (ConsultasRepetidasWarning, contar_consultas,
+                                instrumentar_gerenciador, normalizar_sql)
+
+# === FIXTURES ===
+
+# Id de um leilão aberto com 8 lances alternando entre 4 participantes
+@pytest.fixture
+def leilao_com_lances(sistema_limpo):
+    agora = datetime.now()
+    participantes = [Participante(f"{i}{i}{i}.111.111-11", f"P{i}", f"p{i}@test.com", datetime(1990, 1, 1))
+                     for i in range(1, 5)]
+    for participante in participantes:
+        sistema_limpo.adicionar_participante(participante)
+    leilao = Leilao("TV", 100.0, agora, agora + timedelta(days=1))
+    sistema_limpo.adicionar_leilao(leilao)
+    sistema_limpo.abrir_leilao(leilao.id, agora)
+    for i in range(8):
+        sistema_limpo.adicionar_lance(leilao.id, Lance(200.0 + i, participantes[i % 4].id, leilao.id, agora))
+    leilao_id = leilao.id
+    sistema_limpo.db.expire_all()
+    return leilao_id
+
+# --- Normalização ---
+
+def test_normalizar_sql_agrupa_instrucoes_de_mesma_forma():
+    assert normalizar_sql("SELECT * FROM t WHERE id = 10 AND nome = 'Ana'") == \
+        "SELECT * FROM t WHERE id = ? AND nome = ?"
+    assert normalizar_sql("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == \
+        normalizar_sql("SELECT * FROM t WHERE id IN (?,?)")
+
+# --- Contagem ---
+
+def test_contar_consultas_por_operacao(sistema_limpo, leilao_com_lances):
+    agora = datetime.now()
+    with contar_consultas(maximo=3) as medicao:
+        sistema_limpo.finalizar_leilao(leilao_com_lances, agora + timedelta(days=2))
+    assert medicao.consultas == 3
+    assert medicao.linhas_afetadas == 1  # UPDATE do estado; os SELECTs não contam
+    assert medicao.tempo_ms > 0
+
+def test_contar_consultas_falha_acima_do_maximo(sistema_limpo, leilao_com_lances):
+    with pytest.raises(AssertionError, match="máximo 1"):
+        with contar_consultas(maximo=1, limite_repeticao=None):
+            for lance in sistema_limpo.encontrar_leilao_por_id(leilao_com_lances).lances:
+                str(lance)
+
+def test_contar_consultas_como_decorador(sistema_limpo, leilao_com_lances):
+    @contar_consultas(maximo=1)
+    def buscar():
+        return sistema_limpo.obter_maior_lance(leilao_com_lances)
+    assert buscar() == 207.0
+
+def test_medicoes_aninhadas(sistema_limpo, leilao_com_lances):
+    with contar_consultas() as externa:
+        sistema_limpo.obter_maior_lance(leilao_com_lances)
+        with contar_consultas() as interna:
+            sistema_limpo.obter_menor_lance(leilao_com_lances)
+    assert (externa.consultas, interna.consultas) == (2, 1)
+
+def test_contar_consultas_filtra_por_engine(sistema_limpo, leilao_com_lances):
+    from sqlalchemy import create_engine, text
+    outra = create_engine("sqlite://")
+    with contar_consultas(engine=outra) as medicao:
+        sistema_limpo.obter_maior_lance(leilao_com_lances)
+        with outra.connect() as conexao:
+            conexao.execute(text("SELECT 1"))
+    assert medicao.consultas == 1
+
+def test_instrucao_que_falha_nao_deixa_inicio_na_conexao(sistema_limpo):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    with contar_consultas() as medicao:
+        with pytest.raises(OperationalError):
+            sistema_limpo.db.execute(text("SELECT * FROM tabela_inexistente"))
+        sistema_limpo.db.rollback()
+        sistema_limpo.db.execute(text("SELECT 1"))
+    assert medicao.consultas == 1
+    assert sistema_limpo.db.connection().info["monitor_sql_inicio"] == []
+
+# --- N+1 ---
+
+def test_aviso_de_consultas_repetidas(sistema_limpo, leilao_com_lances):
+    # Lance.__str__ carrega o participante de cada lance: uma consulta por participante
+    with pytest.warns(ConsultasRepetidasWarning, match="4x"):
+        with contar_consultas(limite_repeticao=4, nome="listar lances"):
+            for lance in sistema_limpo.encontrar_leilao_por_id(leilao_com_lances).lances:
+                str(lance)
+
+# --- Instrumentação do gerenciador ---
+
+def test_instrumentar_gerenciador(sistema_limpo, leilao_com_lances):
+    estatisticas = instrumentar_gerenciador(sistema_limpo)
+    sistema_limpo.obter_maior_lance(leilao_com_lances)
+    sistema_limpo.obter_maior_lance(leilao_com_lances)
+    with pytest.raises(ValueError):
+        sistema_limpo.identificar_vencedor(999)
+
+    assert estatisticas["obter_maior_lance"]["chamadas"] == 2
+    assert estatisticas["obter_maior_lance"]["consultas"] == 2
+    # Chamadas internas entre operações também são medidas
+    assert estatisticas["identificar_vencedor"]["chamadas"] == 1
+    assert estatisticas["encontrar_leilao_por_id"]["chamadas"] == 1
@@ -0,0 +1,171 @@
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+from models.database import RoteadorShards
+from models.gerenciador_shards import GerenciadorShards
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao, TipoLeilao
+from models.participante import Participante
+from services.shards import ExecutorShards
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    return str(tmp_path / "catalogo.db"), [str(tmp_path / f"leiloes{i}.db") for i in range(3)]
+
+
+@pytest.fixture
+def sistema(arquivos, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    roteador = RoteadorShards(*arquivos)
+    roteador.criar_tabelas()
+    sistema = GerenciadorShards(roteador)
+    yield sistema
+    sistema.fechar()
+    roteador.fechar()
+
+
+@pytest.fixture
+def participantes(sistema):
+    return [sistema.adicionar_participante(Participante(f"{i}{i}{i}.{i}{i}{i}.{i}{i}{i}-{i}{i}", f"P{i}",
+                                                        f"p{i}@email.com", datetime(1990, 1, 1)))
+            for i in (1, 2)]
+
+
+def criar_leiloes(sistema, total, **opcoes):
+    agora = datetime.now()
+    ids = []
+    for i in range(total):
+        leilao = sistema.adicionar_leilao(Leilao(f"Item {i}", 100.0, agora, agora + timedelta(hours=1), **opcoes))
+        sistema.abrir_leilao(leilao.id, agora)
+        ids.append(leilao.id)
+    return ids
+
+
+def tabelas(caminho):
+    with sqlite3.connect(caminho) as conexao:
+        return {nome for (nome,) in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_participantes_no_catalogo_e_leiloes_nos_shards(sistema, arquivos, participantes):
+    catalogo, shards = arquivos
+    assert tabelas(catalogo) == {"participantes", "diretorio_leiloes", "sqlite_sequence"}
+    assert "participantes" not in tabelas(shards[0]) and "lances" in tabelas(shards[0])
+
+    ids = criar_leiloes(sistema, 4)
+    assert ids == [1, 2, 3, 4]
+    assert [sistema.roteador.shard_do_leilao(i) for i in ids] == [1, 2, 0, 1]
+    assert sistema.roteador.leiloes_por_shard() == [1, 2, 1]
+    assert sistema.encontrar_leilao_por_id(99) is None
+    with pytest.raises(ValueError, match="Shard deve estar entre 0 e 2"):
+        sistema.adicionar_leilao(Leilao("X", 1.0, datetime.now(), datetime.now() + timedelta(hours=1)), shard=3)
+
+def test_lances_juntam_com_participantes_do_catalogo(sistema, participantes):
+    p1, p2 = participantes
+    leilao_id = criar_leiloes(sistema, 1)[0]
+    agora = datetime.now()
+    sistema.adicionar_lance(leilao_id, Lance(150.0, p1.id, leilao_id, agora))
+    sistema.adicionar_lance_rapido(leilao_id, Lance(200.0, p2.id, leilao_id, agora))
+
+    resumo = sistema.gerenciador(leilao_id).listar_lances_resumo(leilao_id)
+    assert [(l.valor, l.participante_nome) for l in resumo] == [(150.0, "P1"), (200.0, "P2")]
+    sistema.finalizar_leilao(leilao_id, agora + timedelta(hours=2))
+    assert sistema.encontrar_leilao_por_id(leilao_id).estado == EstadoLeilao.FINALIZADO
+
+def test_listagens_reunem_todos_os_shards_por_id(sistema, participantes):
+    ids = criar_leiloes(sistema, 7)
+    sistema.finalizar_leilao(ids[2], datetime.now() + timedelta(hours=2))
+    sistema.adicionar_lance(ids[4], Lance(300.0, participantes[0].id, ids[4], datetime.now()))
+
+    assert [l.id for l in sistema.listar_leiloes()] == ids
+    assert [l.id for l in sistema.listar_leiloes(EstadoLeilao.ABERTO)] == ids[:2] + ids[3:]
+    resumos = sistema.listar_leiloes_resumo()
+    assert [r.id for r in resumos] == ids
+    assert [r.maior_lance for r in resumos if r.maior_lance] == [300.0]
+    with pytest.raises(ValueError, match="Data de início não pode ser maior"):
+        sistema.listar_leiloes(data_inicio=datetime.now(), data_fim=datetime.now() - timedelta(days=1))
+
+def test_lances_do_participante_por_data_e_shard(sistema, participantes):
+    p1, p2 = participantes
+    ids = criar_leiloes(sistema, 3)
+    agora = datetime.now()
+    # Um lance por shard: todos recebem o id 1 no próprio arquivo
+    for minutos, leilao_id in ((2, ids[0]), (1, ids[1]), (3, ids[2])):
+        sistema.adicionar_lance(leilao_id, Lance(150.0 + minutos, p1.id, leilao_id, agora + timedelta(minutes=minutos)))
+    sistema.adicionar_lance(ids[0], Lance(200.0, p2.id, ids[0], agora))
+
+    lances = sistema.listar_lances_participante(p1.id)
+    assert [l.id for l in lances] == [1, 1, 1]
+    assert [(l.shard, l.leilao_id, l.valor) for l in lances] == [
+        (2, ids[1], 151.0), (1, ids[0], 152.0), (0, ids[2], 153.0)]
+    assert [(l.shard, l.id) for l in sistema.listar_lances_participante(p2.id)] == [(1, 2)]
+
+def test_mover_leilao_leva_lances_alocacoes_e_chaves(sistema, arquivos, participantes):
+    p1, p2 = participantes
+    outro = criar_leiloes(sistema, 3)[2]
+    lote = criar_leiloes(sistema, 1, tipo=TipoLeilao.MULTIPLO_PRECO_UNIFORME, quantidade=10)[0]
+    origem = sistema.roteador.shard_do_leilao(lote)
+    agora = datetime.now()
+    # Ids de lance ocupados no destino: os lances movidos recebem ids novos
+    sistema.adicionar_lance(outro, Lance(150.0, p1.id, outro, agora))
+    primeiro = sistema.adicionar_lance(lote, Lance(120.0, p1.id, lote, agora, quantidade=6), chave_idempotencia="k1")
+    sistema.adicionar_lance(lote, Lance(110.0, p2.id, lote, agora, quantidade=6))
+    sistema.finalizar_leilao(lote, agora + timedelta(hours=2))
+
+    movidos = sistema.mover_leilao(lote, destino=0)
+
+    assert movidos == {'lances': 2, 'lances_automaticos': 0, 'alocacoes': 2, 'chaves_idempotencia': 1}
+    assert sistema.roteador.shard_do_leilao(lote) == 0 != origem
+    destino = sistema.gerenciador(lote)
+    alocacoes = destino.listar_alocacoes(lote)
+    assert [(a.participante_nome, a.quantidade) for a in alocacoes] == [("P1", 6), ("P2", 4)]
+    assert sistema.encontrar_leilao_por_id(lote).estado == EstadoLeilao.FINALIZADO
+    # O reenvio com a mesma chave devolve o lance já gravado, agora com o id do destino
+    reenvio = sistema.adicionar_lance(lote, Lance(120.0, p1.id, lote, agora, quantidade=6), chave_idempotencia="k1")
+    assert reenvio.id != primeiro.id and reenvio.id == alocacoes[0].lance_id
+    assert sistema.gerenciadores[origem].encontrar_leilao_por_id(lote) is None
+    # Outro roteador (diretório lido do catálogo) encontra o leilão no novo shard
+    outro_roteador = RoteadorShards(*arquivos)
+    assert outro_roteador.shard_do_leilao(lote) == 0
+    outro_roteador.fechar()
+    assert [l.id for l in sistema.listar_leiloes()] == [1, 2, 3, 4]
+
+def test_rebalancear_apos_acrescentar_arquivo(arquivos, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    catalogo, shards = arquivos
+    roteador = RoteadorShards(catalogo, shards[:2])
+    roteador.criar_tabelas()
+    sistema = GerenciadorShards(roteador)
+    ids = criar_leiloes(sistema, 6)
+    sistema.finalizar_leilao(ids[0], datetime.now() + timedelta(hours=2))
+    sistema.fechar()
+    roteador.fechar()
+
+    roteador = RoteadorShards(catalogo, shards)
+    roteador.criar_tabelas()
+    sistema = GerenciadorShards(roteador)
+    movimentos = sistema.rebalancear()
+
+    # Ativos: 2, 4 e 6 no shard 0 e 3 e 5 no 1 (o 1 foi finalizado); o mais recente
+    # do shard mais cheio vai para o novo e a diferença fica em um
+    assert movimentos == [(6, 0, 2)]
+    assert roteador.leiloes_por_shard() == [2, 3, 1]
+    assert sistema.rebalancear() == []
+    assert [l.id for l in sistema.listar_leiloes()] == ids
+    sistema.fechar()
+    roteador.fechar()
+
+def test_executor_com_um_escritor_por_arquivo(sistema, participantes):
+    ids = criar_leiloes(sistema, 6)
+    roteador = sistema.roteador
+    executor = ExecutorShards(roteador.criar_gerenciador(), shards=roteador.shards,
+                              particao=roteador.shard_do_leilao).iniciar()
+    agora = datetime.now()
+    futuros = [executor.enviar(leilao_id, Lance(100.0 + n, participantes[n % 2].id, leilao_id, agora))
+               for n in range(5) for leilao_id in ids]
+    executor.encerrar(timeout=10)
+
+    assert all(f.exception() is None for f in futuros)
+    assert executor.obter_estatisticas()['gravados'] == [10, 10, 10]
+    resumos = sistema.listar_leiloes_resumo()
+    assert [r.maior_lance for r in resumos] == [104.0] * 6
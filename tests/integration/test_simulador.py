@@ -0,0 +1,127 @@
+import itertools
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.gerenciador_leiloes import GerenciadorLeiloes
+from models.leilao import EstadoLeilao
+from services.relogio import RelogioVirtual
+from services.simulador import Simulador, eventos_do_banco
+
+INICIO = datetime(2025, 3, 10, 8, 0)
+
+# === FIXTURES ===
+
+# Gerenciador sobre um RelogioVirtual parado em INICIO
+@pytest.fixture
+def gerenciador_virtual(db_session, mocker):
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+    return GerenciadorLeiloes(db_session, relogio=RelogioVirtual(INICIO))
+
+
+def dia_gravado():
+    """Dois participantes, dois leilões e lances ao longo do dia"""
+    eventos = [
+        {"momento": INICIO, "tipo": "participante", "id": 10, "cpf": "111.111.111-11",
+         "nome": "Ana", "email": "ana@test.com", "data_nascimento": datetime(1990, 1, 1)},
+        {"momento": INICIO, "tipo": "participante", "id": 20, "cpf": "222.222.222-22",
+         "nome": "Bruno", "email": "bruno@test.com", "data_nascimento": datetime(1985, 5, 5)},
+        {"momento": INICIO + timedelta(hours=1), "tipo": "leilao", "id": 7, "nome": "TV",
+         "lance_minimo": 100.0, "data_inicio": INICIO + timedelta(hours=1), "data_fim": INICIO + timedelta(hours=9)},
+        {"momento": INICIO + timedelta(hours=2), "tipo": "leilao", "id": 8, "nome": "Sofá",
+         "lance_minimo": 50.0, "data_inicio": INICIO + timedelta(hours=2), "data_fim": INICIO + timedelta(hours=3)},
+    ]
+    for i in range(6):
+        eventos.append({"momento": INICIO + timedelta(hours=4, minutes=i), "tipo": "lance",
+                        "leilao_id": 7, "participante_id": (10, 20)[i % 2], "valor": 150.0 + i})
+    # Lance depois do fim do leilão 8 (já expirado): deve ser recusado
+    eventos.append({"momento": INICIO + timedelta(hours=5), "tipo": "lance",
+                    "leilao_id": 8, "participante_id": 10, "valor": 60.0})
+    return eventos
+
+# --- Simulação ---
+
+def test_simulacao_de_um_dia(gerenciador_virtual):
+    resultado = Simulador(gerenciador_virtual).executar(dia_gravado())
+
+    assert resultado['processados'] == {"participante": 2, "leilao": 2, "abrir": 2, "lance": 6, "finalizar": 2}
+    assert resultado['recusados'] == {"lance": {"Leilão deve estar ABERTO para receber lances": 1}}
+    assert resultado['duracao_virtual_s'] == 9 * 3600
+    assert resultado['eventos_pendentes'] == 0
+    assert gerenciador_virtual.relogio.agora() == INICIO + timedelta(hours=9)
+
+    leiloes = {l.nome: l for l in gerenciador_virtual.listar_leiloes()}
+    assert leiloes["TV"].estado == EstadoLeilao.FINALIZADO
+    assert leiloes["Sofá"].estado == EstadoLeilao.EXPIRADO
+    vencedor = gerenciador_virtual.identificar_vencedor(leiloes["TV"].id)
+    assert (vencedor.participante.nome, vencedor.valor) == ("Bruno", 155.0)
+    assert vencedor.data_hora == INICIO + timedelta(hours=4, minutes=5)
+
+def test_simulacao_ate_um_momento(gerenciador_virtual):
+    simulador = Simulador(gerenciador_virtual, caminho_lance="orm")
+    resultado = simulador.executar(dia_gravado(), ate=INICIO + timedelta(hours=4, minutes=2))
+    assert resultado['processados']["lance"] == 3
+    assert resultado['processados']["finalizar"] == 1  # só o Sofá terminou
+    assert resultado['eventos_pendentes'] > 0
+
+def test_simulacao_exige_relogio_virtual(sistema_limpo):
+    with pytest.raises(ValueError, match="RelogioVirtual"):
+        Simulador(sistema_limpo)
+
+def test_eventos_fora_de_ordem(gerenciador_virtual):
+    eventos = list(reversed(dia_gravado()))
+    with pytest.raises(ValueError, match="fora de ordem"):
+        Simulador(gerenciador_virtual).executar(eventos)
+
+def test_reproduz_banco_gravado(tmp_path, gerenciador_virtual):
+    from benchmarks.gerador_dados import gerar
+    origem_db = tmp_path / "origem.db"
+    gerar(str(origem_db), participantes=20, leiloes=5, lances=200, agora=INICIO)
+    origem = sessionmaker(bind=create_engine(f"sqlite:///{origem_db}"))()
+
+    eventos = eventos_do_banco(origem)
+    primeiro = next(eventos)
+    relogio = gerenciador_virtual.relogio
+    relogio.avancar_ate(primeiro["momento"])
+    resultado = Simulador(gerenciador_virtual).executar(itertools.chain([primeiro], eventos))
+    origem.close()
+
+    assert resultado['processados']["lance"] == 200
+    assert resultado['processados']["finalizar"] == 5
+    assert resultado['recusados'] == {}
+
+# --- main.py ---
+
+def test_main_com_relogio_virtual_termina_sem_esperar(tmp_path, monkeypatch, mocker):
+    import time
+    import main as modulo_main
+    from models import database
+    engine = create_engine(f"sqlite:///{tmp_path / 'leilao.db'}")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(modulo_main, "create_db_tables", lambda: Base.metadata.create_all(engine))
+    monkeypatch.chdir(tmp_path)
+    mocker.patch('models.gerenciador_leiloes.EmailService')
+
+    relogio = RelogioVirtual(datetime(2025, 1, 1, 10, 0))
+    inicio = time.perf_counter()
+    modulo_main.main(relogio)
+    assert time.perf_counter() - inicio < 5
+    assert relogio.agora() >= datetime(2025, 1, 1, 10, 0, 20)
+
+def test_simulacao_reagenda_finalizacao_prorrogada(gerenciador_virtual):
+    fim = INICIO + timedelta(hours=1)
+    eventos = dia_gravado()[:2] + [
+        {"momento": INICIO, "tipo": "leilao", "id": 1, "nome": "Quadro", "lance_minimo": 10.0,
+         "data_inicio": INICIO, "data_fim": fim, "janela_prorrogacao_s": 60, "prorrogacao_s": 120},
+        {"momento": fim - timedelta(seconds=30), "tipo": "lance", "leilao_id": 1,
+         "participante_id": 10, "valor": 20.0},
+    ]
+    resultado = Simulador(gerenciador_virtual).executar(eventos)
+
+    # A finalização agendada para o término original é recusada e reagendada
+    assert resultado['processados']['finalizar'] == 1
+    assert resultado['recusados'] == {"finalizar": {"Leilão não pode ser finalizado antes da data de término.": 1}}
+    assert resultado['duracao_virtual_s'] == 3600 + 120
+    assert gerenciador_virtual.encontrar_leilao_por_id(1).estado == EstadoLeilao.FINALIZADO
@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+from models.apuracao import alocar_unidades, dois_maiores_por_grupo, precos_selados
+
+
+def test_dois_maiores_por_grupo():
+    grupos = np.array([2, 1, 2, 2, 3, 1])
+    valores = np.array([50.0, 10.0, 70.0, 70.0, 5.0, 30.0])
+    ids = np.array([1, 2, 3, 4, 5, 6])
+
+    resultado = dois_maiores_por_grupo(grupos, valores, ids)
+
+    assert resultado.grupos.tolist() == [1, 2, 3]
+    assert resultado.primeiro.tolist() == [5, 2, 4]  # empate em 70: vence o lance de menor id
+    assert resultado.segundo.tolist() == [1, 3, -1]
+
+def test_dois_maiores_sem_lances():
+    resultado = dois_maiores_por_grupo(np.array([], dtype=np.int64), np.array([]), np.array([]))
+    assert len(resultado.grupos) == len(resultado.primeiro) == len(resultado.segundo) == 0
+
+def test_precos_selados():
+    precos = precos_selados(
+        valor_vencedor=np.array([100.0, 100.0, 100.0]),
+        segundo_valor=np.array([80.0, 80.0, np.nan]),
+        lance_minimo=np.array([50.0, 50.0, 50.0]),
+        segundo_preco=np.array([False, True, True]),
+    )
+    assert precos.tolist() == [100.0, 80.0, 50.0]
+
+def test_alocar_unidades_preco_uniforme_com_atendimento_parcial():
+    valores = np.array([120.0, 150.0, 100.0, 150.0, 130.0])
+    quantidades = np.array([3, 4, 5, 2, 2])
+    ids = np.array([1, 2, 3, 4, 5])
+
+    alocacoes = alocar_unidades(valores, quantidades, ids, unidades=9)
+
+    # 150 (id 2, mais antigo) e 150 (id 4) levam tudo; 130 leva 2; 120 leva só 1 das 3
+    assert alocacoes.lances.tolist() == [1, 3, 4, 0]
+    assert alocacoes.unidades.tolist() == [4, 2, 2, 1]
+    assert alocacoes.preco_unitario.tolist() == [120.0] * 4
+
+def test_alocar_unidades_discriminatorio_e_sobra_de_unidades():
+    alocacoes = alocar_unidades(np.array([200.0, 300.0]), np.array([2, 1]), np.array([1, 2]), unidades=10,
+                                preco_uniforme=False)
+    assert alocacoes.lances.tolist() == [1, 0]
+    assert alocacoes.unidades.tolist() == [1, 2]
+    assert alocacoes.preco_unitario.tolist() == [300.0, 200.0]
+
+def test_alocar_unidades_empate_no_corte_vai_para_o_mais_antigo():
+    valores = np.array([100.0, 100.0, 100.0, 90.0])
+    alocacoes = alocar_unidades(valores, np.ones(4, dtype=np.int64), np.array([7, 3, 5, 1]), unidades=2)
+    assert alocacoes.lances.tolist() == [1, 2]
+
+def test_alocar_unidades_sem_lances():
+    vazio = np.array([])
+    assert len(alocar_unidades(vazio, vazio.astype(np.int64), vazio, unidades=5).lances) == 0
+
+def test_alocar_unidades_um_milhao_de_lances():
+    rng = np.random.default_rng(7)
+    n = 1_000_000
+    valores = np.round(rng.uniform(100.0, 2000.0, n), 2)
+    quantidades = rng.integers(1, 6, n)
+    ids = np.arange(n)
+
+    inicio = time.perf_counter()
+    alocacoes = alocar_unidades(valores, quantidades, ids, unidades=100_000)
+    duracao = time.perf_counter() - inicio
+
+    assert alocacoes.unidades.sum() == 100_000
+    # Nenhum lance recusado tem preço maior que o menor aceito
+    recusados = np.ones(n, dtype=bool)
+    recusados[alocacoes.lances] = False
+    assert valores[recusados].max() <= alocacoes.preco_unitario[0]
+    assert duracao < 1.0
@@ -0,0 +1,74 @@
+import pytest
+from services.cache_leitura import CacheLeitura, cache_compartilhado
+
+
+class RelogioFalso:
+    """Relógio controlado manualmente para testar expiração"""
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_acerto_e_falha():
+    cache = CacheLeitura(capacidade=2)
+    assert cache.obter("a") is None
+    cache.definir("a", 1)
+    assert cache.obter("a") == 1
+
+    stats = cache.obter_estatisticas()
+    assert stats['acertos'] == 1
+    assert stats['falhas'] == 1
+    assert stats['taxa_acerto'] == 50.0
+
+def test_descarta_menos_usado():
+    cache = CacheLeitura(capacidade=2)
+    cache.definir("a", 1)
+    cache.definir("b", 2)
+    cache.obter("a")  # "b" passa a ser o menos usado
+    cache.definir("c", 3)
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") == 1
+    assert cache.obter("c") == 3
+    assert cache.descartes == 1
+    assert len(cache) == 2
+
+def test_expiracao_por_ttl():
+    relogio = RelogioFalso()
+    cache = CacheLeitura(ttl_segundos=10, relogio=relogio)
+    cache.definir("a", 1)
+
+    relogio.agora = 9.9
+    assert cache.obter("a") == 1
+    relogio.agora = 10.0
+    assert cache.obter("a") is None
+    assert cache.expiracoes == 1
+
+def test_sem_ttl_nao_expira():
+    relogio = RelogioFalso()
+    cache = CacheLeitura(ttl_segundos=None, relogio=relogio)
+    cache.definir("a", 1)
+    relogio.agora = 10 ** 9
+    assert cache.obter("a") == 1
+
+def test_invalidar_e_limpar():
+    cache = CacheLeitura()
+    cache.definir("a", 1)
+    cache.definir("b", 2)
+    cache.invalidar("a")
+    cache.invalidar("inexistente")
+    assert cache.invalidacoes == 1
+    assert cache.obter("a") is None
+
+    cache.limpar()
+    assert len(cache) == 0
+    assert "tamanho=0/1024" in str(cache)
+
+def test_capacidade_invalida():
+    with pytest.raises(ValueError, match="Capacidade do cache deve ser positiva"):
+        CacheLeitura(capacidade=0)
+
+def test_cache_compartilhado_unico():
+    assert cache_compartilhado() is cache_compartilhado()
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.carga import executar_carga, gerar_relatorio, percentil, verificar_invariantes
+from models.base import Base
+
+
+def test_percentil():
+    valores = [float(v) for v in range(1, 101)]
+    assert percentil(valores, 50) == 51.0
+    assert percentil(valores, 99) == 99.0
+    assert percentil([], 50) == 0.0
+
+def test_gerar_relatorio():
+    registros = [(0.1, 0.010, "aceito"), (0.5, 0.020, "aceito"),
+                 (1.2, 0.030, "Lance deve ser maior que o último lance"), (1.4, 0.5, "lock timeout")]
+    relatorio = gerar_relatorio(registros, 2.0)
+    assert relatorio["tentativas"] == 4
+    assert relatorio["aceitos"] == 2
+    assert relatorio["motivos_recusa"] == {"Lance deve ser maior que o último lance": 1, "lock timeout": 1}
+    assert relatorio["vazao_por_segundo"] == [2, 0, 0]
+    assert relatorio["latencia_aceitos_ms"]["max"] == 20.0
+
+def test_verificar_invariantes_detecta_violacoes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(text("INSERT INTO lances (valor, participante_id, leilao_id, data_hora) VALUES "
+                    "(110, 1, 1, '2025-01-01'), (120, 2, 1, '2025-01-01'), "
+                    "(115, 1, 1, '2025-01-01'), (130, 1, 1, '2025-01-01')"))
+    violacoes = verificar_invariantes(db, 1)
+    assert len(violacoes) == 2
+    assert "não supera" in violacoes[0]
+    assert "consecutivos do participante 1" in violacoes[1]
+    assert verificar_invariantes(db, 2) == []
+
+@pytest.mark.parametrize("modo", ["threads", "asyncio"])
+def test_carga_caminho_rapido_preserva_invariantes(tmp_path, modo):
+    relatorio = executar_carga(str(tmp_path / "carga.db"), participantes=4, duracao=0.5,
+                               modo=modo, caminho="rapido")
+    assert relatorio["aceitos"] > 0
+    assert relatorio["tentativas"] == relatorio["aceitos"] + relatorio["recusados"]
+    assert relatorio["total_violacoes"] == 0
+
+def test_carga_pela_fila_do_escritor(tmp_path):
+    relatorio = executar_carga(str(tmp_path / "carga.db"), participantes=4, duracao=0.5,
+                               caminho="fila", capacidade=2, prazo_s=0.25)
+    assert relatorio["aceitos"] > 0
+    assert relatorio["total_violacoes"] == 0
+
+def test_carga_parametros_invalidos(tmp_path):
+    with pytest.raises(ValueError, match="Modo inválido"):
+        executar_carga(str(tmp_path / "carga.db"), modo="http")
+    with pytest.raises(ValueError, match="Caminho inválido"):
+        executar_carga(str(tmp_path / "carga.db"), caminho="lento")
+    with pytest.raises(ValueError, match="exige o modo threads ou asyncio"):
+        executar_carga(str(tmp_path / "carga.db"), modo="processos", caminho="fila")
+
+def test_carga_soft_close_nao_perde_prorrogacoes(tmp_path):
+    relatorio = executar_carga(str(tmp_path / "carga.db"), participantes=4, duracao=0.5,
+                               caminho="rapido", soft_close=(1, 1))
+    assert relatorio["aceitos"] > 0
+    assert relatorio["prorrogacao_total_s"] >= 1
+    assert relatorio["total_violacoes"] == 0
@@ -28,4 +28,67 @@ def test_create_db_tables():
     """Testa a função de criação de tabelas."""
     with patch.object(Base.metadata, 'create_all') as mock_create_all:
         create_db_tables()
-        mock_create_all.assert_called_once_with(bind=engine)
\ No newline at end of file
+        mock_create_all.assert_called_once_with(bind=engine)
+
+def test_log_consultas_lentas_com_plano_de_execucao(caplog):
+    """Instruções acima do limite vão para o log com parâmetros e EXPLAIN QUERY PLAN."""
+    from sqlalchemy import create_engine, text
+    from models.database import habilitar_log_consultas_lentas, desabilitar_log_consultas_lentas
+
+    engine_teste = create_engine("sqlite://")
+    Base.metadata.create_all(engine_teste)
+    habilitar_log_consultas_lentas(engine_teste, limite_ms=0)
+    try:
+        with caplog.at_level("WARNING", logger="models.database"):
+            with engine_teste.connect() as conexao:
+                conexao.execute(text("SELECT valor FROM lances WHERE leilao_id = :id ORDER BY valor DESC"), {"id": 7})
+    finally:
+        desabilitar_log_consultas_lentas(engine_teste)
+
+    mensagem = next(r.getMessage() for r in caplog.records if "FROM lances" in r.getMessage())
+    assert "Consulta lenta" in mensagem
+    assert "(7,)" in mensagem
+    assert "ix_lances_leilao_valor" in mensagem
+
+
+def test_top_consultas_por_tempo_total():
+    """As estatísticas agrupam instruções pela forma normalizada."""
+    from sqlalchemy import create_engine, text
+    from models.database import habilitar_log_consultas_lentas, desabilitar_log_consultas_lentas, top_consultas
+
+    engine_teste = create_engine("sqlite://")
+    assert top_consultas(engine=engine_teste) == []
+    habilitar_log_consultas_lentas(engine_teste, limite_ms=10_000)
+    try:
+        with engine_teste.connect() as conexao:
+            for i in range(5):
+                conexao.execute(text(f"SELECT {i}"))
+            conexao.execute(text("SELECT 'unica', 1"))
+        top = top_consultas(10, engine=engine_teste)
+    finally:
+        desabilitar_log_consultas_lentas(engine_teste)
+
+    repetida = next(c for c in top if c["sql"] == "SELECT ?")
+    assert repetida["chamadas"] == 5
+    assert sum(repetida["histograma"].values()) == 5
+    assert top == sorted(top, key=lambda c: c["tempo_total_ms"], reverse=True)
+    assert top_consultas(engine=engine_teste) == []
+
+
+def test_log_consultas_lentas_descarta_inicio_de_instrucao_que_falhou():
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+    from models.database import habilitar_log_consultas_lentas, desabilitar_log_consultas_lentas, top_consultas
+
+    engine_teste = create_engine("sqlite://")
+    habilitar_log_consultas_lentas(engine_teste, limite_ms=10_000)
+    try:
+        with engine_teste.connect() as conexao:
+            with pytest.raises(OperationalError):
+                conexao.execute(text("SELECT * FROM tabela_inexistente"))
+            conexao.rollback()
+            conexao.execute(text("SELECT 1"))
+            assert conexao.info["consultas_lentas_inicio"] == []
+        assert [c["sql"] for c in top_consultas(engine=engine_teste)] == ["SELECT ?"]
+    finally:
+        desabilitar_log_consultas_lentas(engine_teste)
@@ -0,0 +1,79 @@
+import random
+import sqlite3
+from datetime import datetime
+import pytest
+from itertools import groupby
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from benchmarks.gerador_dados import PRESETS, distribuir_zipf, gerar, gerar_cpf
+from models.lance import Lance
+from models.leilao import Leilao, EstadoLeilao
+from models.participante import Participante, cpf_digitos_validos
+
+
+@pytest.fixture
+def banco_gerado(tmp_path):
+    caminho = str(tmp_path / "bench.db")
+    resumo = gerar(caminho, participantes=50, leiloes=20, lances=2_000, semente=7)
+    engine = create_engine(f"sqlite:///{caminho}")
+    sessao = sessionmaker(bind=engine)()
+    yield resumo, sessao
+    sessao.close()
+    engine.dispose()
+
+
+def test_quantidades_geradas(banco_gerado):
+    resumo, sessao = banco_gerado
+    assert sessao.query(Participante).count() == 50
+    assert sessao.query(Leilao).count() == 20
+    assert sessao.query(Lance).count() == 2_000
+    assert resumo['maior_leilao'] > 2_000 / 20  # popularidade assimétrica
+
+def test_participantes_validos_e_unicos(banco_gerado):
+    _, sessao = banco_gerado
+    participantes = sessao.query(Participante).all()
+    assert all(cpf_digitos_validos(p.cpf) for p in participantes)
+    assert len({p.email for p in participantes}) == 50
+
+def test_lances_respeitam_regras(banco_gerado):
+    _, sessao = banco_gerado
+    lances = sessao.query(Lance).order_by(Lance.leilao_id, Lance.id).all()
+    leiloes = {l.id: l for l in sessao.query(Leilao).all()}
+
+    for leilao_id, grupo in groupby(lances, key=lambda l: l.leilao_id):
+        grupo = list(grupo)
+        leilao = leiloes[leilao_id]
+        assert leilao.estado == EstadoLeilao.ABERTO
+        assert grupo[0].valor >= leilao.lance_minimo
+        for anterior, atual in zip(grupo, grupo[1:]):
+            assert atual.valor > anterior.valor
+            assert atual.participante_id != anterior.participante_id
+            assert leilao.data_inicio <= atual.data_hora <= leilao.data_fim
+
+def test_mesma_semente_gera_mesmos_dados(tmp_path):
+    agora = datetime(2025, 1, 1)
+    dumps = []
+    for nome in ("a.db", "b.db"):
+        gerar(str(tmp_path / nome), participantes=10, leiloes=3, lances=50, semente=1, agora=agora)
+        conexao = sqlite3.connect(tmp_path / nome)
+        dumps.append(list(conexao.iterdump()))
+        conexao.close()
+    assert dumps[0] == dumps[1]
+
+def test_distribuicao_zipf():
+    contagens = distribuir_zipf(1_000, 10, 1.1, random.Random(0))
+    assert sum(contagens) == 1_000
+    assert max(contagens) > 3 * min(contagens)
+
+def test_cpfs_gerados_unicos():
+    rng = random.Random(0)
+    cpfs = [gerar_cpf(i, rng) for i in range(5_000)]
+    assert len(set(cpfs)) == 5_000
+    assert all(cpf_digitos_validos(c) for c in cpfs)
+
+def test_presets_disponiveis():
+    assert [PRESETS[p]["lances"] for p in ("10k", "1m", "10m")] == [10_000, 1_000_000, 10_000_000]
+
+def test_participantes_insuficientes(tmp_path):
+    with pytest.raises(ValueError, match="ao menos 2 participantes"):
+        gerar(str(tmp_path / "x.db"), participantes=1, leiloes=1, lances=10)
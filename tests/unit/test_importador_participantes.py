@@ -0,0 +1,124 @@
+import csv
+import json
+import pytest
+from datetime import datetime
+from models.participante import Participante
+from services.importador_participantes import ImportadorParticipantes
+
+
+def escrever_csv(caminho, linhas):
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(["cpf", "nome", "email", "data_nascimento"])
+        escritor.writerows(linhas)
+    return str(caminho)
+
+def ler_relatorio(caminho):
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        return list(csv.DictReader(arquivo))
+
+
+def test_importa_csv_valido(db_session, tmp_path):
+    arquivo = escrever_csv(tmp_path / "p.csv", [
+        ("529.982.247-25", "Ana", "ana@email.com", "1990-01-01"),
+        ("123.456.789-09", "Bia", "bia@email.com", "1985-06-15"),
+    ])
+
+    resultado = ImportadorParticipantes(db_session).importar(arquivo)
+
+    assert resultado['lidos'] == 2
+    assert resultado['inseridos'] == 2
+    assert resultado['rejeitados'] == 0
+    ana = db_session.query(Participante).filter_by(cpf="529.982.247-25").one()
+    assert ana.nome == "Ana"
+    assert ana.data_nascimento == datetime(1990, 1, 1)
+
+def test_relatorio_de_rejeitados(db_session, tmp_path):
+    db_session.add(Participante("529.982.247-25", "Já Existe", "existe@email.com", datetime(1990, 1, 1)))
+    db_session.commit()
+    arquivo = escrever_csv(tmp_path / "p.csv", [
+        ("529.982.247-25", "Ana", "ana@email.com", "1990-01-01"),      # CPF no banco
+        ("123.456.789-09", "Bia", "existe@email.com", "1990-01-01"),   # e-mail no banco
+        ("123.456.789-00", "Caio", "caio@email.com", "1990-01-01"),    # dígito inválido
+        ("123.456.789", "Davi", "davi@email.com", "1990-01-01"),       # formato inválido
+        ("111.444.777-35", "Eva", "eva-sem-arroba", "1990-01-01"),     # e-mail inválido
+        ("111.444.777-35", "", "eva@email.com", "1990-01-01"),         # sem nome
+        ("111.444.777-35", "Eva", "eva@email.com", "01/01/1990"),      # data inválida
+        ("111.444.777-35", "Eva", "eva@email.com", "1990-01-01"),      # válida
+        ("111.444.777-35", "Eva 2", "eva2@email.com", "1990-01-01"),   # CPF repetido no arquivo
+        ("123.456.789-09", "Fábio", "eva@email.com", "1990-01-01"),    # e-mail repetido no arquivo
+    ])
+    relatorio = tmp_path / "rejeitados.csv"
+
+    resultado = ImportadorParticipantes(db_session).importar(arquivo, str(relatorio))
+
+    assert resultado['inseridos'] == 1
+    assert resultado['rejeitados'] == 9
+    motivos = [(int(l["linha"]), l["motivo"]) for l in ler_relatorio(relatorio)]
+    assert motivos == [
+        (2, "CPF já cadastrado"),
+        (3, "E-mail já cadastrado"),
+        (4, "CPF com dígitos verificadores inválidos"),
+        (5, "CPF deve estar no formato 123.456.789-00"),
+        (6, "E-mail inválido"),
+        (7, "Nome obrigatório"),
+        (8, "Data de nascimento inválida"),
+        (10, "CPF duplicado no arquivo"),
+        (11, "E-mail duplicado no arquivo"),
+    ]
+
+def test_importa_jsonl(db_session, tmp_path):
+    caminho = tmp_path / "p.jsonl"
+    caminho.write_text(
+        json.dumps({"cpf": "529.982.247-25", "nome": "Ana", "email": "ana@email.com", "data_nascimento": "1990-01-01"})
+        + "\n\n{quebrado\n[1, 2]\n",
+        encoding="utf-8"
+    )
+    relatorio = tmp_path / "rejeitados.csv"
+
+    resultado = ImportadorParticipantes(db_session).importar(str(caminho), str(relatorio))
+
+    assert resultado['inseridos'] == 1
+    assert [l["motivo"] for l in ler_relatorio(relatorio)] == ["JSON inválido", "JSON inválido"]
+
+def test_jsonl_com_valores_fora_do_formato_recusa_so_a_linha(db_session, tmp_path):
+    caminho = tmp_path / "p.jsonl"
+    linhas = [
+        {"cpf": 52998224725, "nome": "Ana", "email": "ana@email.com", "data_nascimento": "1990-01-01"},
+        {"cpf": "١٢٣.٤٥٦.٧٨٩-٠٩", "nome": "Bia", "email": "bia@email.com", "data_nascimento": "1990-01-01"},
+        {"cpf": "123.456.789-09", "nome": "Caio", "email": "caio@email.com", "data_nascimento": "1990-01-01"},
+    ]
+    caminho.write_text("\n".join(json.dumps(l, ensure_ascii=False) for l in linhas) + "\n", encoding="utf-8")
+    relatorio = tmp_path / "rejeitados.csv"
+
+    resultado = ImportadorParticipantes(db_session).importar(str(caminho), str(relatorio))
+
+    assert (resultado['inseridos'], resultado['rejeitados']) == (1, 2)
+    assert [l["motivo"] for l in ler_relatorio(relatorio)] == [
+        "Campo cpf inválido", "CPF deve estar no formato 123.456.789-00"]
+
+def test_sem_validacao_de_digitos(db_session, tmp_path):
+    arquivo = escrever_csv(tmp_path / "p.csv", [("111.111.111-11", "Ana", "ana@email.com", "1990-01-01")])
+    resultado = ImportadorParticipantes(db_session, validar_digitos_cpf=False).importar(arquivo)
+    assert resultado['inseridos'] == 1
+
+def test_formato_nao_suportado(db_session):
+    with pytest.raises(ValueError, match="Formato de arquivo não suportado"):
+        ImportadorParticipantes(db_session).importar("participantes.xlsx")
+
+def test_tamanho_lote_invalido(db_session):
+    with pytest.raises(ValueError, match="Tamanho do lote deve ser positivo"):
+        ImportadorParticipantes(db_session, tamanho_lote=0)
+
+def test_duplicado_entre_lotes(db_session, tmp_path):
+    """Linhas gravadas em um lote anterior são vistas como já cadastradas"""
+    arquivo = escrever_csv(tmp_path / "p.csv", [
+        ("529.982.247-25", "Ana", "ana@email.com", "1990-01-01"),
+        ("123.456.789-09", "Bia", "ana@email.com", "1990-01-01"),
+    ])
+    relatorio = tmp_path / "rejeitados.csv"
+
+    resultado = ImportadorParticipantes(db_session, tamanho_lote=1).importar(arquivo, str(relatorio))
+
+    assert resultado['inseridos'] == 1
+    assert ler_relatorio(relatorio)[0]["motivo"] == "E-mail já cadastrado"
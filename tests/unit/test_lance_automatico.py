@@ -0,0 +1,43 @@
+import pytest
+from datetime import datetime, timedelta
+from models.lance_automatico import Maximo, resolver_lances_automaticos
+
+T0 = datetime(2025, 1, 1, 10, 0)
+
+
+def maximo(valor, participante, minutos=0):
+    return Maximo(valor, T0 + timedelta(minutes=minutos), participante)
+
+
+def test_sem_maximos_nao_gera_lances():
+    assert resolver_lances_automaticos((150.0, 1), 100.0, []) == []
+
+def test_primeiro_maximo_da_o_lance_minimo():
+    assert resolver_lances_automaticos(None, 100.0, [maximo(500.0, 1)]) == [(100.0, 1)]
+
+def test_lider_cobre_o_segundo_com_incremento():
+    lances = resolver_lances_automaticos((100.0, 1), 100.0, [maximo(500.0, 1), maximo(300.0, 2, 1)])
+    # O segundo sobe até o máximo dele e o líder cobre com o incremento
+    assert lances == [(300.0, 2), (301.0, 1)]
+
+def test_lider_nunca_passa_do_proprio_maximo():
+    lances = resolver_lances_automaticos((100.0, 2), 100.0, [maximo(300.5, 1), maximo(300.0, 2)])
+    assert lances == [(300.5, 1)]
+
+def test_empate_favorece_o_maximo_mais_antigo():
+    lances = resolver_lances_automaticos((100.0, 3), 100.0, [maximo(300.0, 2, 5), maximo(300.0, 1, 1)])
+    assert lances == [(300.0, 1)]
+
+def test_lance_manual_acima_de_todos_os_maximos():
+    assert resolver_lances_automaticos((600.0, 3), 100.0, [maximo(500.0, 1), maximo(300.0, 2)]) == []
+
+def test_lider_ja_na_frente_nao_da_lance_consecutivo():
+    assert resolver_lances_automaticos((150.0, 1), 100.0, [maximo(500.0, 1), maximo(120.0, 2)]) == []
+
+@pytest.mark.parametrize("quantidade", [2, 50, 1000])
+def test_so_os_dois_maiores_importam(quantidade):
+    maximos = [maximo(200.0 + i, i + 1, i) for i in range(quantidade)]
+    lances = resolver_lances_automaticos((150.0, 0), 100.0, reversed(maximos))
+    topo, segundo = maximos[-1], maximos[-2]
+    assert lances == [(segundo.valor_maximo, segundo.participante_id),
+                      (segundo.valor_maximo + 1.0, topo.participante_id)]
@@ -1,7 +1,7 @@
 import pytest
 from datetime import datetime, timedelta
 from models.lance import Lance
-from models.leilao import Leilao, EstadoLeilao
+from models.leilao import Leilao, EstadoLeilao, TipoLeilao
 from models.participante import Participante
 
 # Fixture que cria um participante para usar nos testes
@@ -325,4 +325,73 @@ def test_str_leilao_em_outros_estados(sistema_limpo, leilao_valido):
     # Estado EXPIRADO (sem lances)
     sistema_limpo.finalizar_leilao(leilao_valido.id, datetime.now() + timedelta(days=1))
     leilao = sistema_limpo.encontrar_leilao_por_id(leilao_valido.id)
-    assert str(leilao) == "Leilão: Item Teste (EXPIRADO)"
\ No newline at end of file
+    assert str(leilao) == "Leilão: Item Teste (EXPIRADO)"
+
+# --- Soft-close ---
+
+def test_soft_close_exige_janela_e_prorrogacao():
+    agora = datetime.now()
+    with pytest.raises(ValueError, match="devem ser informadas juntas"):
+        Leilao("Item", 100.0, agora, agora + timedelta(hours=1), janela_prorrogacao_s=60)
+    with pytest.raises(ValueError, match="devem ser positivas"):
+        Leilao("Item", 100.0, agora, agora + timedelta(hours=1), janela_prorrogacao_s=60, prorrogacao_s=0)
+    leilao = Leilao("Item", 100.0, agora, agora + timedelta(hours=1), 60, 30)
+    assert (leilao.janela_prorrogacao_s, leilao.prorrogacao_s) == (60, 30)
+
+# --- Leilão selado ---
+def test_preco_final_por_tipo_de_leilao():
+    agora = datetime.now()
+    fim = agora + timedelta(hours=1)
+    assert Leilao("A", 100.0, agora, fim).calcular_preco(300.0, 200.0) == 300.0
+    assert Leilao("B", 100.0, agora, fim, tipo=TipoLeilao.SELADO_PRIMEIRO_PRECO).calcular_preco(300.0, 200.0) == 300.0
+    vickrey = Leilao("C", 100.0, agora, fim, tipo=TipoLeilao.SELADO_SEGUNDO_PRECO)
+    assert vickrey.calcular_preco(300.0, 200.0) == 200.0
+    assert vickrey.calcular_preco(300.0) == 100.0  # lance único paga o mínimo
+
+def test_leilao_selado_sem_soft_close():
+    agora = datetime.now()
+    with pytest.raises(ValueError, match="Soft-close só se aplica a leilões ingleses"):
+        Leilao("Item", 100.0, agora, agora + timedelta(hours=1), 60, 30, tipo=TipoLeilao.SELADO_PRIMEIRO_PRECO)
+
+# --- Leilão holandês ---
+def test_preco_holandes_linear_exponencial_e_em_degraus():
+    inicio = datetime(2025, 1, 1, 10, 0)
+    fim = inicio + timedelta(minutes=100)
+    linear = Leilao("A", 100.0, inicio, fim, tipo=TipoLeilao.HOLANDES, preco_inicial=1100.0)
+    assert linear.preco_atual(inicio - timedelta(minutes=1)) == 1100.0
+    assert linear.preco_atual(inicio + timedelta(minutes=25)) == 850.0
+    assert linear.preco_atual(fim + timedelta(minutes=1)) == 100.0
+
+    exponencial = Leilao("B", 100.0, inicio, fim, tipo=TipoLeilao.HOLANDES, preco_inicial=400.0,
+                         curva_preco="exponencial")
+    assert exponencial.preco_atual(inicio + timedelta(minutes=50)) == 200.0
+
+    degraus = Leilao("C", 100.0, inicio, fim, tipo=TipoLeilao.HOLANDES, preco_inicial=1100.0,
+                     intervalo_preco_s=600)
+    assert degraus.preco_atual(inicio + timedelta(minutes=19)) == 1000.0
+
+def test_validacoes_do_leilao_holandes():
+    agora = datetime.now()
+    fim = agora + timedelta(hours=1)
+    with pytest.raises(ValueError, match="Preço inicial do leilão holandês"):
+        Leilao("A", 100.0, agora, fim, tipo=TipoLeilao.HOLANDES)
+    with pytest.raises(ValueError, match="Curva de preço inválida"):
+        Leilao("A", 100.0, agora, fim, tipo=TipoLeilao.HOLANDES, preco_inicial=200.0, curva_preco="cubica")
+    with pytest.raises(ValueError, match="Intervalo de queda do preço"):
+        Leilao("A", 100.0, agora, fim, tipo=TipoLeilao.HOLANDES, preco_inicial=200.0, intervalo_preco_s=0)
+    with pytest.raises(ValueError, match="Soft-close só se aplica"):
+        Leilao("A", 100.0, agora, fim, 60, 30, tipo=TipoLeilao.HOLANDES, preco_inicial=200.0)
+    with pytest.raises(ValueError, match="só existe em leilões holandeses"):
+        Leilao("A", 100.0, agora, fim).preco_atual(agora)
+
+# --- Lotes de múltiplas unidades ---
+def test_quantidade_do_lote():
+    agora = datetime.now()
+    fim = agora + timedelta(hours=1)
+    assert Leilao("A", 100.0, agora, fim).quantidade == 1
+    lote = Leilao("B", 100.0, agora, fim, tipo=TipoLeilao.MULTIPLO_PRECO_UNIFORME, quantidade=50)
+    assert lote.quantidade == 50 and lote.tipo.oculto
+    with pytest.raises(ValueError, match="Quantidade do lote deve ser positiva"):
+        Leilao("C", 100.0, agora, fim, tipo=TipoLeilao.MULTIPLO_DISCRIMINATORIO, quantidade=0)
+    with pytest.raises(ValueError, match="Apenas leilões de múltiplas unidades"):
+        Leilao("D", 100.0, agora, fim, tipo=TipoLeilao.SELADO_PRIMEIRO_PRECO, quantidade=2)
@@ -0,0 +1,224 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+from models.leilao import EstadoLeilao, TipoLeilao
+from services.leiloes_quentes import DifusorPrecos, EscritorLances, EstadoQuente, LeiloesQuentes
+from services.metricas import ESPERA_FILA_LANCES, LANCES_DESCARTADOS, REGISTRO
+
+
+class RelogioFalso:
+    """Relógio controlado manualmente para testar a janela deslizante"""
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio():
+    return RelogioFalso()
+
+
+def test_taxa_em_janela_deslizante(relogio):
+    quentes = LeiloesQuentes(limiar_promocao=100, janela_s=10, fatias=10, relogio=relogio)
+    for _ in range(20):
+        quentes.registrar(1)
+    relogio.agora = 5.0
+    for _ in range(10):
+        quentes.registrar(1)
+    assert quentes.taxa(1) == 3.0
+
+    relogio.agora = 10.5  # os lances do segundo 0 saíram da janela
+    assert quentes.taxa(1) == 1.0
+    relogio.agora = 30.0
+    assert quentes.taxa(1) == 0.0
+
+def test_promove_e_rebaixa_com_histerese(relogio):
+    quentes = LeiloesQuentes(limiar_promocao=2, limiar_rebaixamento=1, janela_s=10, relogio=relogio)
+    assert not any(quentes.registrar(1) for _ in range(19))
+    assert quentes.registrar(1)  # 20 lances em 10s = 2/s
+
+    relogio.agora = 9.5  # os 20 lances ainda estão na janela: segue quente
+    quentes.registrar(2)
+    assert quentes.quente(1)
+
+    relogio.agora = 15.0
+    quentes.varrer()
+    assert not quentes.quente(1)
+    assert quentes.obter_estatisticas()['promocoes'] == quentes.obter_estatisticas()['rebaixamentos'] == 1
+
+def test_esquece_leiloes_sem_lances_na_janela(relogio):
+    quentes = LeiloesQuentes(janela_s=10, relogio=relogio)
+    quentes.registrar(1)
+    relogio.agora = 25.0
+    quentes.registrar(2)  # a primeira fatia nova dispara a varredura
+    assert quentes.obter_estatisticas()['acompanhados'] == 1
+
+def test_capacidade_do_conjunto_quente(relogio):
+    quentes = LeiloesQuentes(limiar_promocao=0.1, janela_s=10, capacidade=2, relogio=relogio)
+    assert [quentes.registrar(i) for i in (1, 2, 3)] == [True, True, False]
+
+def test_estado_em_memoria_e_ultimo_valor(relogio):
+    difusor = DifusorPrecos(intervalo_s=0, relogio=relogio)
+    entregues = []
+    difusor.assinar(lambda *args: entregues.append(args))
+    quentes = LeiloesQuentes(limiar_promocao=0.1, difusor=difusor, relogio=relogio)
+    quentes.lance_aceito(1, 200.0, 7)  # frio: nada a atualizar nem divulgar
+    quentes.registrar(1)
+    quentes.guardar_estado(1, EstadoQuente(TipoLeilao.INGLES, EstadoLeilao.ABERTO, 100.0, None))
+
+    quentes.lance_aceito(1, 300.0, 7)
+    quentes.lance_aceito(1, 250.0, 8)  # gravado antes, publicado depois: não volta o preço
+
+    assert quentes.estado(1).ultimo_valor == 300.0
+    assert entregues == [(1, 300.0, 7), (1, 250.0, 8)]
+    quentes.invalidar(1)
+    assert quentes.quente(1) and quentes.estado(1) is None
+
+def test_lances_ocultos_nao_sao_divulgados(relogio):
+    difusor = DifusorPrecos(intervalo_s=0, relogio=relogio)
+    entregues = []
+    difusor.assinar(lambda *args: entregues.append(args))
+    quentes = LeiloesQuentes(limiar_promocao=0.1, difusor=difusor, relogio=relogio)
+    quentes.registrar(1)
+    quentes.guardar_estado(1, EstadoQuente(TipoLeilao.SELADO_PRIMEIRO_PRECO, EstadoLeilao.ABERTO, 100.0, None))
+    quentes.lance_aceito(1, 300.0, 7)
+    assert entregues == []
+
+def test_difusor_agrupa_rajadas(relogio):
+    difusor = DifusorPrecos(intervalo_s=1.0, relogio=relogio)
+    entregues = []
+    difusor.assinar(lambda *args: entregues.append(args))
+
+    difusor.publicar(1, 100.0, 1)  # primeira atualização sai na hora
+    for valor in (110.0, 120.0, 130.0):
+        difusor.publicar(1, valor, 2)
+    difusor.publicar(2, 50.0, 3)
+    assert entregues == [(1, 100.0, 1)]
+
+    relogio.agora = 1.0
+    difusor.publicar(1, 140.0, 1)
+    assert entregues[1:] == [(1, 140.0, 1), (2, 50.0, 3)]
+
+def test_falha_de_assinante_nao_interrompe_entrega(relogio, capsys):
+    difusor = DifusorPrecos(intervalo_s=0, relogio=relogio)
+    entregues = []
+    difusor.assinar(lambda *args: 1 / 0)
+    difusor.assinar(lambda *args: entregues.append(args))
+    difusor.publicar(1, 100.0, 1)
+    assert entregues == [(1, 100.0, 1)]
+    assert "ALERTA" in capsys.readouterr().out
+
+def test_metricas_do_conjunto_quente(relogio):
+    quentes = LeiloesQuentes(limiar_promocao=0.1, janela_s=10, relogio=relogio)
+    for _ in range(5):
+        quentes.registrar(4242)
+    quentes.coletar()
+    assert 'leilao_taxa_lances_quentes{leilao_id="4242"} 0.5' in REGISTRO.renderizar_prometheus()
+
+    relogio.agora = 60.0
+    quentes.varrer()
+    quentes.coletar()
+    assert 'leilao_id="4242"' not in REGISTRO.renderizar_prometheus()
+
+def test_parametros_invalidos():
+    with pytest.raises(ValueError, match="Limiares"):
+        LeiloesQuentes(limiar_promocao=1, limiar_rebaixamento=2)
+    with pytest.raises(ValueError, match="devem ser positivas"):
+        LeiloesQuentes(fatias=0)
+
+
+class GerenciadorLento:
+    """Gerenciador falso: cada gravação espera a liberação do teste e leva `duracao_s` no relógio"""
+    def __init__(self, relogio, duracao_s=0.0):
+        self.relogio = relogio
+        self.duracao_s = duracao_s
+        self.liberar = threading.Event()
+        self.gravando = threading.Event()
+        self.gravados = []
+        self.db = MagicMock()
+
+    def adicionar_lance_rapido(self, leilao_id, lance, chave_idempotencia=None):
+        self.gravando.set()
+        self.liberar.wait(5)
+        self.relogio.agora += self.duracao_s
+        self.gravados.append((leilao_id, lance))
+        return lance
+
+
+def test_escritor_recusa_com_fila_cheia(relogio):
+    gerenciador = GerenciadorLento(relogio)
+    escritor = EscritorLances(lambda: gerenciador, capacidade=2, relogio=relogio)
+    cheia = LANCES_DESCARTADOS.rotulado("fila_cheia").valor
+    futuros = [escritor.enviar(1, f"lance {i}") for i in range(3)]
+    with pytest.raises(ValueError, match="Sistema ocupado: fila cheia"):
+        futuros[2].result(timeout=0)  # recusado antes de enviar() retornar
+    assert LANCES_DESCARTADOS.rotulado("fila_cheia").valor == cheia + 1
+
+    gerenciador.liberar.set()
+    escritor.iniciar()
+    escritor.encerrar(timeout=5)
+    assert [f.result() for f in futuros[:2]] == ["lance 0", "lance 1"]
+
+def test_escritor_descarta_lance_com_prazo_vencido_sem_gravar(relogio):
+    gerenciador = GerenciadorLento(relogio, duracao_s=0.3)
+    gerenciador.liberar.set()
+    escritor = EscritorLances(lambda: gerenciador, prazo_s=0.5, relogio=relogio)
+    esperas = ESPERA_FILA_LANCES.rotulado().ler()[2]
+    futuros = [escritor.enviar(1, f"lance {i}") for i in range(3)]
+    escritor.iniciar()
+    escritor.encerrar(timeout=5)
+
+    # O terceiro começaria em 0.6s, depois do prazo de 0.5s
+    assert [f.result() for f in futuros[:2]] == ["lance 0", "lance 1"]
+    with pytest.raises(ValueError, match="Sistema ocupado: prazo esgotado"):
+        futuros[2].result()
+    assert len(gerenciador.gravados) == 2
+    assert ESPERA_FILA_LANCES.rotulado().ler()[2] == esperas + 3
+    assert escritor.obter_estatisticas()['descartados'] == 1
+
+def test_escritor_recusa_na_chegada_pela_espera_estimada(relogio):
+    gerenciador = GerenciadorLento(relogio, duracao_s=1.0)
+    gerenciador.liberar.set()
+    escritor = EscritorLances(lambda: gerenciador, relogio=relogio).iniciar()
+    escritor.adicionar_lance(1, "medição")  # média móvel da gravação: 0.2 * 1.0s
+    gerenciador.liberar.clear()
+    gerenciador.gravando.clear()
+    escritor.enviar(1, "ocupando")
+    gerenciador.gravando.wait(5)  # a thread fica presa nesta gravação
+
+    futuros = [escritor.enviar(1, f"lance {i}", prazo_s=0.3) for i in range(4)]
+    # Espera estimada de 0s, 0.2s, 0.4s e 0.6s: os dois últimos são recusados na chegada
+    assert [f.done() for f in futuros] == [False, False, True, True]
+    with pytest.raises(ValueError, match="Sistema ocupado"):
+        futuros[2].result()
+    gerenciador.liberar.set()
+    escritor.encerrar(timeout=5)
+
+def test_promocao_nao_passa_lances_novos_a_frente_dos_antigos_do_leilao(relogio):
+    gerenciador = GerenciadorLento(relogio)
+    gerenciador.liberar.set()
+    quentes = MagicMock()
+    quentes.quente.return_value = False
+    escritor = EscritorLances(lambda: gerenciador, quentes, relogio=relogio)
+    escritor.enviar(1, "1: primeiro")
+    escritor.enviar(2, "2: frio")
+    quentes.quente.return_value = True  # leilão 1 promovido com lance na fila
+    escritor.enviar(1, "1: segundo")
+    escritor.enviar(3, "3: quente")
+    escritor.iniciar()
+    escritor.encerrar(timeout=5)
+
+    # O leilão 3 não tinha nada na fila e passa à frente; o 1 mantém a ordem de chegada
+    assert [lance for _, lance in gerenciador.gravados] == ["3: quente", "1: primeiro", "2: frio", "1: segundo"]
+    assert escritor._por_leilao == {}
+
+def test_escritor_exporta_profundidade_da_fila(relogio):
+    escritor = EscritorLances(lambda: GerenciadorLento(relogio), relogio=relogio)
+    for i in range(3):
+        escritor.enviar(1, i)
+    escritor.coletar()
+    assert "leilao_fila_lances 3" in REGISTRO.renderizar_prometheus()
+    with pytest.raises(ValueError, match="Capacidade"):
+        EscritorLances(lambda: None, capacidade=0)
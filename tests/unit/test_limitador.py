@@ -0,0 +1,86 @@
+import pytest
+from services.limitador import BaldesFichas, LimitadorLances, limitador_do_ambiente
+from services.metricas import LANCES_LIMITADOS
+
+
+class RelogioFalso:
+    """Relógio controlado manualmente para testar a reposição das fichas"""
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio():
+    return RelogioFalso()
+
+
+def test_rajada_e_reposicao(relogio):
+    baldes = BaldesFichas(taxa=2, rajada=3, relogio=relogio)
+    assert [baldes.consumir("a") for _ in range(3)] == [0, 0, 0]
+    assert baldes.consumir("a") == 0.5  # meia ficha por segundo falta
+    assert baldes.consumir("b") == 0  # cada chave tem o próprio balde
+
+    relogio.agora = 0.5  # uma ficha reposta
+    assert baldes.consumir("a") == 0
+    assert baldes.consumir("a") > 0
+    relogio.agora = 100.0  # o balde não passa da rajada
+    assert [baldes.consumir("a") for _ in range(4)][-1] > 0
+    assert baldes.recusas == 3
+
+def test_descarta_chaves_ociosas(relogio):
+    baldes = BaldesFichas(taxa=1, rajada=2, relogio=relogio)
+    for chave in range(1000):
+        baldes.consumir(chave)
+    assert len(baldes) == 1000
+
+    relogio.agora = 2.5  # todas paradas há mais de rajada / taxa: cheias de novo
+    baldes.consumir("ativa")
+    assert len(baldes) == 1
+    assert baldes.descartadas == 1000
+
+def test_limite_por_participante_e_por_leilao(relogio):
+    limitador = LimitadorLances(por_participante=(1, 2), por_leilao=(1, 3), relogio=relogio)
+    limitados = LANCES_LIMITADOS.rotulado("participante").valor
+    limitador.verificar(leilao_id=1, participante_id=10)
+    limitador.verificar(leilao_id=1, participante_id=10)
+    with pytest.raises(ValueError, match=r"Limite de lances por participante excedido; tente novamente em 1.00s"):
+        limitador.verificar(leilao_id=1, participante_id=10)
+    assert LANCES_LIMITADOS.rotulado("participante").valor == limitados + 1
+
+    limitador.verificar(leilao_id=1, participante_id=20)
+    with pytest.raises(ValueError, match="Limite de lances por leilao excedido"):
+        limitador.verificar(leilao_id=1, participante_id=30)
+    limitador.verificar(leilao_id=2, participante_id=30)
+    assert limitador.obter_estatisticas() == {
+        "participante": {"chaves": 3, "recusas": 1, "descartadas": 0},
+        "leilao": {"chaves": 2, "recusas": 1, "descartadas": 0},
+    }
+
+def test_limite_desligado():
+    limitador = LimitadorLances(por_participante=None)
+    for _ in range(1000):
+        limitador.verificar(1, 1)
+    assert limitador.obter_estatisticas() == {}
+
+def test_configuracao_pelo_ambiente(monkeypatch):
+    monkeypatch.delenv("LEILAO_LIMITE_PARTICIPANTE", raising=False)
+    monkeypatch.delenv("LEILAO_LIMITE_LEILAO", raising=False)
+    assert limitador_do_ambiente() is None
+
+    monkeypatch.setenv("LEILAO_LIMITE_LEILAO", "200/400")
+    limitador = limitador_do_ambiente()
+    assert limitador.participantes is None
+    assert (limitador.leiloes.taxa, limitador.leiloes.rajada) == (200, 400)
+
+    monkeypatch.setenv("LEILAO_LIMITE_PARTICIPANTE", "5")
+    with pytest.raises(ValueError, match="LEILAO_LIMITE_PARTICIPANTE deve ter o formato taxa/rajada"):
+        limitador_do_ambiente()
+
+def test_parametros_invalidos():
+    with pytest.raises(ValueError, match="Taxa deve ser positiva"):
+        BaldesFichas(taxa=0, rajada=1)
+    with pytest.raises(ValueError, match="rajada de pelo menos 1"):
+        BaldesFichas(taxa=1, rajada=0.5)
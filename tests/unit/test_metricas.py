@@ -0,0 +1,102 @@
+import threading
+import time
+import urllib.request
+import pytest
+from services.metricas import RegistroMetricas, _Metrica, servir_metricas
+
+
+@pytest.fixture
+def registro():
+    return RegistroMetricas()
+
+
+def test_contador_com_rotulos(registro):
+    contador = registro.contador("lances_total", "Lances", ("caminho",))
+    contador.rotulado("orm").inc()
+    contador.rotulado("orm").inc(2)
+    contador.rotulado("rapido").inc()
+    texto = registro.renderizar_prometheus()
+    assert "# TYPE lances_total counter" in texto
+    assert 'lances_total{caminho="orm"} 3' in texto
+    assert 'lances_total{caminho="rapido"} 1' in texto
+
+def test_contador_nao_decrementa(registro):
+    with pytest.raises(ValueError, match="só pode ser incrementado"):
+        registro.contador("c", "C").inc(-1)
+
+def test_rotulos_errados(registro):
+    with pytest.raises(ValueError, match="espera os rótulos"):
+        registro.contador("c", "C", ("a", "b")).rotulado("x")
+
+def test_mesmo_nome_com_outro_tipo(registro):
+    assert registro.contador("c", "C") is registro.contador("c", "C")
+    with pytest.raises(ValueError, match="já registrada"):
+        registro.medidor("c", "C")
+
+def test_histograma_acumula_faixas(registro):
+    histograma = registro.histograma("latencia", "Latência", faixas=(0.1, 1.0))
+    for valor in (0.05, 0.5, 0.7, 3.0):
+        histograma.observar(valor)
+    texto = registro.renderizar_prometheus()
+    assert 'latencia_bucket{le="0.1"} 1' in texto
+    assert 'latencia_bucket{le="1.0"} 3' in texto
+    assert 'latencia_bucket{le="+Inf"} 4' in texto
+    assert "latencia_sum 4.25" in texto
+    assert "latencia_count 4" in texto
+
+def test_incrementos_de_varias_threads_nao_se_perdem(registro):
+    contador = registro.contador("c", "C")
+    histograma = registro.histograma("h", "H")
+
+    def trabalhar():
+        for _ in range(10_000):
+            contador.inc()
+            histograma.observar(0.001)
+
+    threads = [threading.Thread(target=trabalhar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert contador.rotulado().valor == 40_000
+    assert histograma.rotulado().ler()[2] == 40_000
+
+def test_celulas_de_threads_encerradas_vao_para_a_base(registro):
+    contador = registro.contador("c", "C")
+    contador.inc()
+    for _ in range(50):
+        thread = threading.Thread(target=contador.inc, args=(2,))
+        thread.start()
+        thread.join()
+    serie = contador.rotulado()
+    # Só a célula da thread principal continua: as outras 50 foram somadas à base
+    # (o estado da thread é liberado logo depois do join, então espera um pouco)
+    limite = time.monotonic() + 5
+    while len(serie._celulas._celulas) > 1 and time.monotonic() < limite:
+        time.sleep(0.01)
+    assert len(serie._celulas._celulas) == 1
+    assert serie.valor == 101
+
+def test_metrica_sem_serie_falha_na_criacao():
+    class SemSerie(_Metrica):
+        tipo = "gauge"
+
+    with pytest.raises(TypeError, match="_nova_serie"):
+        SemSerie("m", "M")
+
+def test_coletor_atualiza_medidor_na_renderizacao(registro):
+    medidor = registro.medidor("leiloes", "Leilões", ("estado",))
+    registro.registrar_coletor(lambda: medidor.rotulado("ABERTO").definir(7))
+    assert 'leiloes{estado="ABERTO"} 7' in registro.renderizar_prometheus()
+
+def test_servir_metricas_por_http(registro):
+    registro.contador("c", "C").inc()
+    servidor = servir_metricas(0, "127.0.0.1", registro)
+    try:
+        porta = servidor.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{porta}/metrics") as resposta:
+            assert resposta.headers["Content-Type"].startswith("text/plain")
+            assert "c 1" in resposta.read().decode("utf-8")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -1,6 +1,6 @@
 import pytest
 from datetime import datetime
-from models.participante import Participante
+from models.participante import Participante, calcular_digitos_cpf, cpf_digitos_validos
 
 def test_criacao_participante_valido():
     """Testa a criação com dados válidos"""
@@ -15,4 +15,11 @@ def test_validacao_cpf_invalido():
 def test_validacao_email_invalido():
     """Testa e-mail mal formatado"""
     with pytest.raises(ValueError, match="E-mail inválido"):
-        Participante("123.456.789-00", "João", "emailinvalido", datetime(1990, 1, 1))
\ No newline at end of file
+        Participante("123.456.789-00", "João", "emailinvalido", datetime(1990, 1, 1))
+
+def test_digitos_verificadores_cpf():
+    """Testa o cálculo e a conferência dos dígitos verificadores"""
+    assert calcular_digitos_cpf("529982247") == "25"
+    assert cpf_digitos_validos("529.982.247-25")
+    assert not cpf_digitos_validos("529.982.247-24")
+    assert not cpf_digitos_validos("111.111.111-11")
@@ -0,0 +1,128 @@
+import os
+import pstats
+import threading
+import tracemalloc
+import pytest
+import services.perfilamento as perfilamento
+from services.perfilamento import Perfilador, perfilador_ativo, pilhas_colapsadas
+
+
+def trabalho_pesado():
+    return [str(i) * 10 for i in range(20_000)]
+
+
+def test_perfilar_registra_tempo_e_alocacoes(tmp_path):
+    perfilador = Perfilador(str(tmp_path))
+    with perfilador.perfilar("operacao"):
+        dados = trabalho_pesado()
+    relatorio = perfilador.relatorio()["operacao"]
+    assert relatorio["chamadas"] == 1
+    assert relatorio["tempo_total_s"] > 0
+    local, tamanho = relatorio["top_alocacoes"][0]
+    assert "test_perfilamento.py" in local
+    assert tamanho > 100_000
+    assert len(dados) == 20_000
+
+def test_operacoes_aninhadas_sao_somadas_ao_perfil_externo(tmp_path):
+    perfilador = Perfilador(str(tmp_path))
+    with perfilador.perfilar("externa"):
+        with perfilador.perfilar("interna"):
+            trabalho_pesado()
+    perfilador.salvar()
+
+    externa = pstats.Stats(str(tmp_path / "externa.pstats"))
+    interna = pstats.Stats(str(tmp_path / "interna.pstats"))
+    nomes_externa = {funcao[2] for funcao in externa.stats}
+    assert "trabalho_pesado" in nomes_externa
+    assert "trabalho_pesado" in {funcao[2] for funcao in interna.stats}
+
+def test_threads_simultaneas_nao_desligam_o_tracemalloc_uma_da_outra(tmp_path):
+    perfilador = Perfilador(str(tmp_path))
+    dentro, primeira_saiu = threading.Barrier(2), threading.Event()
+    erros = []
+
+    def operacao(espera):
+        try:
+            with perfilador.perfilar("op"):
+                dentro.wait(timeout=5)
+                if espera:
+                    primeira_saiu.wait(timeout=5)
+                trabalho_pesado()
+        except Exception as erro:
+            erros.append(erro)
+        finally:
+            if not espera:
+                primeira_saiu.set()
+
+    threads = [threading.Thread(target=operacao, args=(espera,)) for espera in (False, True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert erros == []
+    assert perfilador.relatorio()["op"]["chamadas"] == 2
+    assert not tracemalloc.is_tracing()
+
+def test_salvar_grava_pstats_pilhas_e_relatorio(tmp_path):
+    perfilador = Perfilador(str(tmp_path / "saida"))
+    assert perfilador.salvar() == []
+    for _ in range(2):
+        with perfilador.perfilar("op"):
+            trabalho_pesado()
+    arquivos = perfilador.salvar()
+    assert sorted(os.path.basename(a) for a in arquivos) == ["op.folded", "op.pstats", "relatorio_alocacoes.txt"]
+
+    linhas = (tmp_path / "saida" / "op.folded").read_text(encoding="utf-8").splitlines()
+    assert any("trabalho_pesado" in linha for linha in linhas)
+    for linha in linhas:
+        pilha, valor = linha.rsplit(" ", 1)
+        assert pilha and int(valor) > 0
+    assert "op: 2 chamada(s)" in (tmp_path / "saida" / "relatorio_alocacoes.txt").read_text(encoding="utf-8")
+
+def test_pilhas_colapsadas_preservam_o_tempo_proprio():
+    import cProfile
+    perfil = cProfile.Profile()
+    perfil.runcall(trabalho_pesado)
+    estatisticas = pstats.Stats(perfil)
+    pilhas = pilhas_colapsadas(estatisticas)
+    total_us = sum(valor for _, valor in pilhas)
+    assert total_us == pytest.approx(estatisticas.total_tt * 1_000_000, rel=0.05)
+
+def test_envolver_metodos_publicos(tmp_path):
+    class Servico:
+        def publico(self):
+            return self._interno()
+
+        def _interno(self):
+            return 42
+
+    perfilador = Perfilador(str(tmp_path))
+    servico = perfilador.envolver(Servico())
+    assert servico.publico() == 42
+    assert list(perfilador.relatorio()) == ["publico"]
+
+def test_perfilador_ativo_pelo_ambiente(monkeypatch, tmp_path):
+    monkeypatch.setattr(perfilamento, "_perfilador", None)
+    monkeypatch.delenv("LEILAO_PROFILE", raising=False)
+    assert perfilador_ativo() is None
+
+    monkeypatch.setattr(perfilamento.atexit, "register", lambda funcao: None)
+    monkeypatch.setenv("LEILAO_PROFILE", "1")
+    monkeypatch.setenv("LEILAO_PROFILE_DIR", str(tmp_path))
+    perfilador = perfilador_ativo()
+    assert perfilador is perfilador_ativo()
+    assert perfilador.diretorio == str(tmp_path)
+
+def test_gerenciador_so_e_envolvido_com_perfilamento_ligado(monkeypatch, tmp_path, db_session):
+    from models.gerenciador_leiloes import GerenciadorLeiloes
+    monkeypatch.setattr(perfilamento, "_perfilador", None)
+    monkeypatch.setattr(perfilamento.atexit, "register", lambda funcao: None)
+
+    monkeypatch.delenv("LEILAO_PROFILE", raising=False)
+    assert "listar_leiloes" not in vars(GerenciadorLeiloes(db_session))
+
+    monkeypatch.setenv("LEILAO_PROFILE", "1")
+    monkeypatch.setenv("LEILAO_PROFILE_DIR", str(tmp_path))
+    gerenciador = GerenciadorLeiloes(db_session)
+    assert gerenciador.listar_leiloes() == []
+    assert perfilador_ativo().relatorio()["listar_leiloes"]["chamadas"] == 1
@@ -0,0 +1,34 @@
+import pytest
+from datetime import datetime, timedelta
+from services.relogio import Relogio, RelogioSistema, RelogioVirtual
+
+
+def test_relogio_sistema():
+    antes = datetime.now()
+    assert antes <= RelogioSistema().agora() <= datetime.now()
+
+def test_relogio_virtual_so_anda_quando_pedido():
+    inicio = datetime(2025, 1, 1, 12, 0)
+    relogio = RelogioVirtual(inicio)
+    assert relogio.agora() == inicio
+    relogio.dormir(5)
+    relogio.avancar(timedelta(minutes=1))
+    assert relogio.agora() == inicio + timedelta(seconds=65)
+
+def test_relogio_virtual_nao_volta_no_tempo():
+    inicio = datetime(2025, 1, 1, 12, 0)
+    relogio = RelogioVirtual(inicio)
+    relogio.avancar_ate(inicio - timedelta(hours=1))
+    assert relogio.agora() == inicio
+    relogio.avancar_ate(inicio + timedelta(hours=1))
+    assert relogio.agora() == inicio + timedelta(hours=1)
+    with pytest.raises(ValueError, match="não pode voltar no tempo"):
+        relogio.avancar(-1)
+
+def test_relogio_incompleto_falha_na_criacao():
+    class SemDormir(Relogio):
+        def agora(self):
+            return datetime(2025, 1, 1)
+
+    with pytest.raises(TypeError, match="dormir"):
+        SemDormir()
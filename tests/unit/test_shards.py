@@ -0,0 +1,112 @@
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from models.lance import Lance
+from models.leilao import EstadoLeilao, TipoLeilao
+from services.metricas import LANCES_POR_LOTE_SHARD
+from services.shards import EstadoShard, ExecutorShards, particao_por_modulo
+
+FIM = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def estado(tipo=TipoLeilao.INGLES, janela_s=None, prorrogacao_s=None):
+    return EstadoShard(tipo, EstadoLeilao.ABERTO, 100.0, 1, FIM, janela_s, prorrogacao_s, False, None, set())
+
+
+class GerenciadorFalso:
+    """Recusa só lances que não superam o último e guarda os lotes gravados"""
+    def __init__(self, liberar=None):
+        self.lotes = []
+        self.db = self
+        self._liberar = liberar
+
+    def carregar_estado_shard(self, leilao_id):
+        return estado() if leilao_id != 404 else None
+
+    def validar_lance_shard(self, estado, lance):
+        if estado.ultimo is not None and lance.valor <= estado.ultimo[0]:
+            raise ValueError("Lance deve ser maior que o último lance")
+
+    def gravar_lances_shard(self, lances, datas_fim):
+        if self._liberar is not None:
+            self._liberar.wait(5)
+        self.lotes.append([lance.valor for lance in lances])
+        for i, lance in enumerate(lances):
+            lance.id = i
+        return len(lances)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_aplicar_guarda_ultimo_lance_e_prorroga_na_janela():
+    inicial = estado(janela_s=60, prorrogacao_s=120)
+
+    fora, prorrogado = inicial.aplicar(150.0, 1, FIM - timedelta(minutes=5))
+    assert (fora.ultimo, fora.data_fim, prorrogado) == ((150.0, 1), FIM, False)
+
+    dentro, prorrogado = fora.aplicar(160.0, 2, FIM - timedelta(seconds=30))
+    assert (dentro.ultimo, dentro.data_fim, prorrogado) == ((160.0, 2), FIM + timedelta(minutes=2), True)
+    assert inicial.ultimo is None  # o estado anterior não muda
+
+def test_aplicar_em_leilao_oculto_registra_participante():
+    selado = estado(TipoLeilao.SELADO_PRIMEIRO_PRECO)
+    novo, prorrogado = selado.aplicar(150.0, 7, FIM - timedelta(minutes=5))
+    assert (novo.com_lance, novo.ultimo, prorrogado) == ({7}, None, False)
+
+def test_particao_por_modulo():
+    particao = particao_por_modulo(4)
+    assert [particao(i) for i in range(1, 9)] == [1, 2, 3, 0, 1, 2, 3, 0]
+
+def test_parametros_invalidos():
+    with pytest.raises(ValueError, match="devem ser positivos"):
+        ExecutorShards(GerenciadorFalso, shards=0)
+
+def test_lances_que_chegam_durante_a_gravacao_formam_um_lote():
+    liberar = threading.Event()
+    gerenciadores = {}
+
+    def criar(indice):
+        gerenciadores[indice] = GerenciadorFalso(liberar)
+        return gerenciadores[indice]
+
+    _, _, total_antes = LANCES_POR_LOTE_SHARD.rotulado().ler()
+    executor = ExecutorShards(criar, shards=2).iniciar()
+    agora = datetime.now()
+    # O primeiro lance do shard 0 segura a gravação; os seguintes esperam na fila
+    primeiro = executor.enviar(2, Lance(110.0, 1, 2, agora))
+    while executor.obter_estatisticas()['na_fila'][0]:
+        time.sleep(0.001)
+    futuros = [executor.enviar(2, Lance(valor, 1, 2, agora)) for valor in (120.0, 115.0, 130.0)]
+    futuros.append(executor.enviar(404, Lance(200.0, 1, 404, agora)))
+    liberar.set()
+    executor.encerrar(timeout=10)
+
+    assert primeiro.result().valor == 110.0
+    assert [f.result().valor for f in (futuros[0], futuros[2])] == [120.0, 130.0]
+    with pytest.raises(ValueError, match="maior que o último"):
+        futuros[1].result()
+    with pytest.raises(ValueError, match="Leilão não encontrado"):
+        futuros[3].result()
+    assert gerenciadores[0].lotes == [[110.0], [120.0, 130.0]]
+    assert 1 not in gerenciadores or gerenciadores[1].lotes == []
+    assert executor.obter_estatisticas() == {'shards': 2, 'na_fila': [0, 0], 'gravados': [3, 0],
+                                             'recusados': 2, 'lotes': 2}
+    assert LANCES_POR_LOTE_SHARD.rotulado().ler()[2] - total_antes == 2
+    with pytest.raises(RuntimeError, match="encerrado"):
+        executor.enviar(2, Lance(200.0, 1, 2, agora))
+
+def test_executar_roda_na_fila_do_shard_e_recarrega_o_estado():
+    executor = ExecutorShards(lambda indice: GerenciadorFalso(), shards=1).iniciar()
+    agora = datetime.now()
+    executor.adicionar_lance(1, Lance(150.0, 1, 1, agora))
+    assert executor.executar(1, lambda g: len(g.lotes)).result(timeout=5) == 1
+    # Estado descartado após a operação: o próximo lance o relê do banco (aqui, sem lances)
+    assert executor.adicionar_lance(1, Lance(120.0, 1, 1, agora)).valor == 120.0
+    with pytest.raises(ZeroDivisionError):
+        executor.executar(1, lambda g: 1 / 0).result(timeout=5)
+    executor.encerrar(timeout=10)
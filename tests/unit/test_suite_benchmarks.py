@@ -0,0 +1,65 @@
+import json
+import os
+from benchmarks import suite
+from benchmarks.suite import CASOS, comparar, main, medir
+
+
+def resultado(**medianas):
+    return {"resultados": {nome: {"mediana_ms": m, "p95_ms": m * 2} for nome, m in medianas.items()}}
+
+
+def test_comparar_detecta_regressao():
+    linhas = comparar(resultado(a=10.0, b=10.0), resultado(a=10.5, b=13.0), limite=0.20)
+    regressoes = {(l["caso"], l["metrica"]) for l in linhas if l["regressao"]}
+    assert regressoes == {("b", "mediana_ms"), ("b", "p95_ms")}
+
+def test_comparar_falha_com_caso_da_baseline_ausente():
+    linhas = comparar(resultado(a=10.0, so_na_baseline=1.0), resultado(a=5.0, novo=1.0))
+    assert {l["caso"] for l in linhas} == {"a", "so_na_baseline"}
+    assert [l["caso"] for l in linhas if l["regressao"]] == ["so_na_baseline"]
+    assert [l["caso"] for l in linhas if l.get("ausente")] == ["so_na_baseline"]
+
+def test_comparar_ignora_casos_fora_do_filtro():
+    atual = {**resultado(**{"email/x": 1.0}), "meta": {"filtro": "email"}}
+    linhas = comparar(resultado(**{"email/x": 1.0, "email/sumiu": 1.0, "listar/y": 1.0}), atual)
+    assert {l["caso"] for l in linhas} == {"email/x", "email/sumiu"}
+    assert [l["caso"] for l in linhas if l.get("ausente")] == ["email/sumiu"]
+
+def test_baseline_versionada_cobre_todos_os_casos():
+    with open(os.path.join(os.path.dirname(suite.__file__), "baseline.json"), encoding="utf-8") as arquivo:
+        baseline = json.load(arquivo)
+    assert set(baseline["resultados"]) == set(CASOS)
+
+def test_casos_registrados():
+    esperados = {"adicionar_lance/leilao_vazio", "adicionar_lance/leilao_10k_lances",
+                 "listar_leiloes/sem_filtro", "listar_leiloes/estado", "listar_leiloes/periodo",
+                 "listar_leiloes/estado_e_periodo", "finalizar_leilao/10k_lances",
+                 "remover_participante/100k_lances", "email/enviar_renderizacao"}
+    assert esperados <= set(CASOS)
+
+def test_medir_caso():
+    estatisticas = medir(CASOS["adicionar_lance/leilao_vazio"], repeticoes=3)
+    assert estatisticas["repeticoes"] == 3
+    assert 0 < estatisticas["min_ms"] <= estatisticas["mediana_ms"] <= estatisticas["p95_ms"]
+
+def test_executar_e_comparar_pela_linha_de_comando(tmp_path):
+    saida = tmp_path / "atual.json"
+    assert main(["executar", "--saida", str(saida), "--filtro", "email", "--repeticoes", "3"]) == 0
+    atual = json.loads(saida.read_text(encoding="utf-8"))
+    assert list(atual["resultados"]) == ["email/enviar_renderizacao"]
+    assert atual["meta"]["filtro"] == "email"
+
+    # Baseline 10x mais rápida: a comparação deve falhar
+    baseline = {"resultados": {n: {m: v / 10 for m, v in r.items()} for n, r in atual["resultados"].items()}}
+    caminho_baseline = tmp_path / "baseline.json"
+    caminho_baseline.write_text(json.dumps(baseline), encoding="utf-8")
+    assert main(["comparar", str(caminho_baseline), str(saida)]) == 1
+    assert main(["comparar", str(saida), str(saida)]) == 0
+    # Casos que o filtro exclui não são comparados
+    baseline = {"resultados": {**atual["resultados"], "listar_leiloes/fora_do_filtro": {"mediana_ms": 1.0}}}
+    caminho_baseline.write_text(json.dumps(baseline), encoding="utf-8")
+    assert main(["comparar", str(caminho_baseline), str(saida)]) == 0
+    # Caso selecionado pelo filtro que sumiu do resultado atual: falha
+    baseline["resultados"]["email/removido"] = {"mediana_ms": 1.0, "p95_ms": 1.0}
+    caminho_baseline.write_text(json.dumps(baseline), encoding="utf-8")
+    assert main(["comparar", str(caminho_baseline), str(saida)]) == 1